@@ -1,19 +1,79 @@
 """
 Flask application factory.
 """
-from flask import Flask
+from flask import Flask, Request, Response, current_app, g, request
 from flask_cors import CORS
 from app.config import config
 from app.routes import api_bp
+from app.services import ServiceContainer
+from app.services import metrics, tracing
+from app.utils.file_utils import spooled_file
+from app.utils.metrics_utils import PROMETHEUS_CONTENT_TYPE, metrics_authorized, observe_request, report_trace, route_label
 import os
+import time
 
 
-def create_app(config_name=None):
+class SpooledUploadRequest(Request):
+    """Request whose file uploads are buffered per UPLOAD_SPOOL_MAX_MEMORY (see spooled_file)"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return spooled_file(current_app.config['UPLOAD_SPOOL_MAX_MEMORY'], current_app.config['UPLOAD_FOLDER'])
+
+
+def install_metrics(app):
+    """Time every request and serve the merged worker metrics at /metrics"""
+    exporter = metrics.shared_exporter(app.config['METRICS_DIR'], app.config['METRICS_FLUSH_INTERVAL'])
+    app.extensions['metrics'] = exporter
+
+    @app.before_request
+    def start_request_timer():
+        # Started in the worker on its first request, not in a --preload master
+        exporter.start()
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        observe_request(request, response, g.pop('request_started', None))
+        return response
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        """Prometheus scrape endpoint"""
+        if not metrics_authorized(request, app.config.get('METRICS_TOKEN')):
+            return {'error': 'Unauthorized'}, 401
+        return Response(exporter.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def install_tracing(app):
+    """Report each request's timing breakdown in a Server-Timing header"""
+    rate = app.config.get('TRACE_SAMPLE_RATE', 0)
+    sink = tracing.TraceSink(app.config['TRACE_LOG_PATH'], rate) if rate > 0 else None
+
+    @app.before_request
+    def start_trace():
+        g.trace_token = tracing.start(route_label(request), request.method)
+
+    @app.after_request
+    def send_trace(response):
+        report_trace(response, sink)
+        return response
+
+    @app.teardown_request
+    def finish_trace(exc):
+        # Worker threads are reused; don't leave the trace current for the next request
+        token = g.pop('trace_token', None)
+        if token is not None:
+            tracing.finish(token)
+
+
+def create_app(config_name=None, overrides=None):
     """
     Create and configure the Flask application.
 
     Args:
         config_name (str): Configuration name ('development', 'production', or 'default')
+        overrides (dict): Settings applied on top of the configuration before
+            anything reads it (used by the tests)
 
     Returns:
         Flask: Configured Flask application
@@ -22,18 +82,33 @@ def create_app(config_name=None):
         config_name = os.getenv('FLASK_ENV', 'development')
 
     app = Flask(__name__)
+    app.request_class = SpooledUploadRequest
 
     # Load configuration
     app.config.from_object(config[config_name])
+    app.config.update(overrides or {})
     config[config_name].init_app(app)
 
     # Initialize CORS
     CORS(app, origins=app.config['CORS_ORIGINS'])
 
+    # Shared services (one OpenAI/Supabase client and TTS cache per worker)
+    app.extensions['services'] = ServiceContainer(app.config)
+    if app.config.get('HTTP_POOL_WARM_ON_START'):
+        app.extensions['services'].warm_connections()
+    if app.config.get('TTS_HYDRATE_ON_START'):
+        app.extensions['services'].hydrate_tts_cache()
+
     # Register blueprints
     app.register_blueprint(api_bp)
 
-    # Serve static files from /tmp directory for TTS cache
+    if app.config.get('METRICS_ENABLED'):
+        install_metrics(app)
+    if app.config.get('SERVER_TIMING_ENABLED'):
+        install_tracing(app)
+
+    # Serve static files from /tmp directory for TTS cache (kept for older clients;
+    # /api/audio/<hash>.<format> serves the same audio with caching and range support)
     @app.route('/tmp/<path:filename>')
     def serve_tmp_file(filename):
         """Serve files from /tmp directory (for TTS cache)"""
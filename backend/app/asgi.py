@@ -0,0 +1,152 @@
+"""
+Quart application factory for the ASGI serving mode.
+
+Serves the same routes as the Flask app in app/__init__.py, but with async
+handlers so one process can hold hundreds of in-flight upstream calls.
+"""
+import asyncio
+import os
+import re
+import time
+
+from quart import Quart, Request, Response, current_app, g, request, send_from_directory
+from quart_cors import cors
+
+from app.config import config
+from app.routes.async_api import async_api_bp
+from app.services import AsyncServiceContainer
+from app.services import metrics, tracing
+from app.utils.file_utils import spooled_file
+from app.utils.metrics_utils import PROMETHEUS_CONTENT_TYPE, metrics_authorized, observe_request, report_trace, route_label
+
+
+def _cors_origins(origins):
+    """Translate flask-cors style wildcard origins into patterns quart-cors accepts"""
+    return [
+        re.compile(re.escape(origin).replace(r'\*', '.*')) if '*' in origin else origin
+        for origin in origins
+    ]
+
+
+class SpooledUploadRequest(Request):
+    """Request whose file uploads are buffered per UPLOAD_SPOOL_MAX_MEMORY (see spooled_file)"""
+
+    def make_form_data_parser(self):
+        parser = super().make_form_data_parser()
+        parser.stream_factory = lambda *args, **kwargs: spooled_file(
+            current_app.config['UPLOAD_SPOOL_MAX_MEMORY'], current_app.config['UPLOAD_FOLDER']
+        )
+        return parser
+
+
+def install_metrics(app):
+    """Time every request and serve the merged worker metrics at /metrics"""
+    exporter = metrics.shared_exporter(app.config['METRICS_DIR'], app.config['METRICS_FLUSH_INTERVAL'])
+    app.extensions['metrics'] = exporter
+
+    @app.before_serving
+    async def start_metrics():
+        # In the worker process, not the one that imported the app
+        exporter.start()
+
+    @app.before_request
+    async def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    async def record_request(response):
+        observe_request(request, response, g.pop('request_started', None))
+        return response
+
+    @app.route('/metrics')
+    async def metrics_endpoint():
+        """Prometheus scrape endpoint"""
+        if not metrics_authorized(request, app.config.get('METRICS_TOKEN')):
+            return {'error': 'Unauthorized'}, 401
+        # Reads every worker's snapshot file
+        return Response(await asyncio.to_thread(exporter.render), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def install_tracing(app):
+    """Report each request's timing breakdown in a Server-Timing header"""
+    rate = app.config.get('TRACE_SAMPLE_RATE', 0)
+    sink = tracing.TraceSink(app.config['TRACE_LOG_PATH'], rate) if rate > 0 else None
+
+    @app.before_request
+    async def start_trace():
+        # Each request runs in its own task, whose context ends with it: no reset needed
+        tracing.start(route_label(request), request.method)
+
+    @app.after_request
+    async def send_trace(response):
+        report_trace(response, sink)
+        return response
+
+
+def create_asgi_app(config_name=None, overrides=None):
+    """
+    Create and configure the Quart application.
+
+    Args:
+        config_name (str): Configuration name ('development', 'production', or 'default')
+        overrides (dict): Settings applied on top of the configuration before
+            anything reads it (used by the tests)
+
+    Returns:
+        Quart: Configured ASGI application
+    """
+    if config_name is None:
+        config_name = os.getenv('FLASK_ENV', 'development')
+
+    app = Quart(__name__)
+    app.request_class = SpooledUploadRequest
+
+    # Load configuration
+    app.config.from_object(config[config_name])
+    app.config.update(overrides or {})
+    config[config_name].init_app(app)
+
+    # Initialize CORS
+    app = cors(app, allow_origin=_cors_origins(app.config['CORS_ORIGINS']))
+
+    # Shared services (one AsyncOpenAI client, PostgREST session and pool per worker)
+    services = AsyncServiceContainer(app.config)
+    app.extensions['services'] = services
+
+    @app.before_serving
+    async def warm_connections():
+        # Warm in the background so the worker starts accepting requests immediately
+        if app.config.get('HTTP_POOL_WARM_ON_START'):
+            app.add_background_task(services.warm_connections)
+        if app.config.get('TTS_HYDRATE_ON_START'):
+            app.add_background_task(services.hydrate_tts_cache)
+
+    @app.after_serving
+    async def close_connections():
+        await services.aclose()
+
+    # Register blueprints
+    app.register_blueprint(async_api_bp)
+
+    if app.config.get('METRICS_ENABLED'):
+        install_metrics(app)
+    if app.config.get('SERVER_TIMING_ENABLED'):
+        install_tracing(app)
+
+    # Serve static files from /tmp directory for TTS cache (kept for older clients;
+    # /api/audio/<hash>.<format> serves the same audio with caching and range support)
+    @app.route('/tmp/<path:filename>')
+    async def serve_tmp_file(filename):
+        """Serve files from /tmp directory (for TTS cache)"""
+        return await send_from_directory('/tmp', filename)
+
+    # Root route
+    @app.route('/')
+    async def index():
+        return {
+            'service': 'Life Review API',
+            'version': '1.0.0',
+            'status': 'running'
+        }
+
+    return app
@@ -25,14 +25,139 @@ class Config:
     # Upload settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = Path('/tmp/uploads')
+    # Uploads are handed to Whisper / the PDF parser from memory; larger ones spill to an
+    # anonymous temp file in UPLOAD_FOLDER
+    UPLOAD_SPOOL_MAX_MEMORY = int(os.getenv('UPLOAD_SPOOL_MAX_MEMORY', str(4 * 1024 * 1024)))
     ALLOWED_EXTENSIONS = {'pdf'}
 
     # OpenAI settings
-    TTS_MODEL = "tts-1-hd"  # Higher quality, still fast
+    TTS_MODEL = os.getenv('TTS_MODEL', 'tts-1-hd')  # Higher quality, still fast
+    # Per-content-type model overrides, "content_type:model,...". Live replies use the faster tier;
+    # pre-cached narratives and questions keep TTS_MODEL
+    TTS_MODEL_POLICY = dict(
+        item.strip().split(':', 1)
+        for item in os.getenv('TTS_MODEL_POLICY', 'response:tts-1').split(',') if ':' in item
+    )
+    # Audio format when the client sends no format, Accept or Save-Data hint (mp3, opus or aac)
+    TTS_DEFAULT_FORMAT = os.getenv('TTS_DEFAULT_FORMAT', 'mp3')
+    # Also look up clips under their pre-v2 cache keys (and re-key what is found); turn off once
+    # migrate_tts_cache_keys.py has run
+    TTS_LEGACY_KEY_FALLBACK = os.getenv('TTS_LEGACY_KEY_FALLBACK', 'True').lower() == 'true'
     TTS_VOICE = "nova"
     WHISPER_MODEL = "whisper-1"
+    # Trim silence from WAV recordings and downmix them to mono before Whisper (needs NumPy)
+    TRANSCRIBE_TRIM_SILENCE = os.getenv('TRANSCRIBE_TRIM_SILENCE', 'False').lower() == 'true'
+    TRANSCRIBE_SAMPLE_RATE = int(os.getenv('TRANSCRIBE_SAMPLE_RATE', '16000'))
+    # Seconds longer pauses are shortened to, and how far above the noise floor (dB) speech is
+    TRANSCRIBE_MAX_PAUSE = float(os.getenv('TRANSCRIBE_MAX_PAUSE', '1.0'))
+    TRANSCRIBE_VAD_MARGIN_DB = float(os.getenv('TRANSCRIBE_VAD_MARGIN_DB', '12'))
+    # Transcripts of recent uploads by audio SHA-256 (shared SQLite), so a retried upload skips
+    # Whisper; an empty path disables the cache
+    TRANSCRIPT_CACHE_PATH = os.getenv('TRANSCRIPT_CACHE_PATH', '/tmp/transcript_cache.db')
+    TRANSCRIPT_CACHE_TTL = float(os.getenv('TRANSCRIPT_CACHE_TTL', '3600'))
+    TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv('TRANSCRIPT_CACHE_MAX_ENTRIES', '1000'))
+    # Transcription sessions (/api/transcribe/session): segments are transcribed while the user
+    # is still recording. Segment length and overlap are what clients are told to record
+    TRANSCRIBE_SESSION_DIR = os.getenv('TRANSCRIBE_SESSION_DIR', '/tmp/transcribe_sessions')
+    TRANSCRIBE_SESSION_TTL = float(os.getenv('TRANSCRIBE_SESSION_TTL', '900'))
+    TRANSCRIBE_SESSION_WORKERS = int(os.getenv('TRANSCRIBE_SESSION_WORKERS', '4'))
+    TRANSCRIBE_SESSION_MAX_SEGMENTS = int(os.getenv('TRANSCRIBE_SESSION_MAX_SEGMENTS', '240'))
+    TRANSCRIBE_SESSION_FINALIZE_TIMEOUT = float(os.getenv('TRANSCRIBE_SESSION_FINALIZE_TIMEOUT', '30'))
+    TRANSCRIBE_SEGMENT_SECONDS = float(os.getenv('TRANSCRIBE_SEGMENT_SECONDS', '8'))
+    TRANSCRIBE_SEGMENT_OVERLAP = float(os.getenv('TRANSCRIBE_SEGMENT_OVERLAP', '1.0'))
     CHAT_MODEL = "gpt-3.5-turbo"  # Faster response time
 
+    # Stream TTS cache misses to the client while OpenAI is still generating
+    TTS_STREAMING = os.getenv('TTS_STREAMING', 'True').lower() == 'true'
+    TTS_STREAM_CHUNK_SIZE = int(os.getenv('TTS_STREAM_CHUNK_SIZE', '4096'))
+    # AI replies are synthesized sentence by sentence, this many at once per worker
+    TTS_PIPELINE_WORKERS = int(os.getenv('TTS_PIPELINE_WORKERS', '4'))
+    # Clips a /api/pre-cache-narratives job synthesizes at once (429s pause the whole job)
+    TTS_PRE_CACHE_CONCURRENCY = int(os.getenv('TTS_PRE_CACHE_CONCURRENCY', '16'))
+
+    # Upstream HTTP connection pool (shared by OpenAI, Supabase, AssemblyAI)
+    HTTP_POOL_MAX_CONNECTIONS = int(os.getenv('HTTP_POOL_MAX_CONNECTIONS', '20'))
+    HTTP_POOL_MAX_KEEPALIVE = int(os.getenv('HTTP_POOL_MAX_KEEPALIVE', '10'))
+    HTTP_POOL_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_POOL_KEEPALIVE_EXPIRY', '60'))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '60'))
+    HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'True').lower() == 'true'
+    HTTP_POOL_WARM_ON_START = os.getenv('HTTP_POOL_WARM_ON_START', 'True').lower() == 'true'
+    HTTP_POOL_WARM_CONNECTIONS = int(os.getenv('HTTP_POOL_WARM_CONNECTIONS', '1'))
+    # ASGI mode holds many in-flight upstream calls per process
+    ASYNC_HTTP_POOL_MAX_CONNECTIONS = int(os.getenv('ASYNC_HTTP_POOL_MAX_CONNECTIONS', '200'))
+
+    # Boot-time TTS cache hydration (see /api/ready)
+    TTS_HYDRATE_ON_START = os.getenv('TTS_HYDRATE_ON_START', 'True').lower() == 'true'
+    TTS_HYDRATE_VOICES = os.getenv('TTS_HYDRATE_VOICES', 'nova').split(',')
+    TTS_HYDRATE_TOP_K = int(os.getenv('TTS_HYDRATE_TOP_K', '20'))
+    TTS_HYDRATE_CONCURRENCY = int(os.getenv('TTS_HYDRATE_CONCURRENCY', '4'))
+    TTS_HYDRATE_READY_TIMEOUT = float(os.getenv('TTS_HYDRATE_READY_TIMEOUT', '60'))
+    # Point at a mounted volume to keep request counts across machine restarts
+    TTS_ACCESS_LOG_PATH = os.getenv('TTS_ACCESS_LOG_PATH')
+
+    # Local TTS disk budget (LRU eviction; the index lives outside the cache dir so clearing it keeps the index)
+    TTS_LOCAL_CACHE_INDEX_PATH = os.getenv('TTS_LOCAL_CACHE_INDEX_PATH', '/tmp/tts_cache_index.sqlite3')
+    TTS_LOCAL_CACHE_MAX_BYTES = int(os.getenv('TTS_LOCAL_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+    TTS_LOCAL_CACHE_MAX_FILES = int(os.getenv('TTS_LOCAL_CACHE_MAX_FILES', '2000'))
+    # Content types never evicted. Interview questions are a fixed, replayed set; 'narrative' (intro/outro)
+    # is also the API default for arbitrary text, so pinning it is opt-in
+    TTS_CACHE_PINNED_CONTENT_TYPES = [t.strip() for t in os.getenv('TTS_CACHE_PINNED_CONTENT_TYPES', 'question').split(',') if t.strip()]
+
+    # Local TTS storage layout: 'files' (one MP3 per clip) or 'packed' (one segment file + mmap index)
+    TTS_LOCAL_STORE = os.getenv('TTS_LOCAL_STORE', 'files')
+    TTS_PACKED_STORE_DIR = os.getenv('TTS_PACKED_STORE_DIR', '/tmp/tts_pack')
+    TTS_PACKED_STORE_MAX_BYTES = int(os.getenv('TTS_PACKED_STORE_MAX_BYTES', str(500 * 1024 * 1024)))
+
+    # Write-behind Supabase persistence: cache misses return once the clip is local; uploads are
+    # journaled here (shared by all workers) and sent in batches with retry
+    TTS_WRITE_BEHIND = os.getenv('TTS_WRITE_BEHIND', 'True').lower() == 'true'
+    TTS_WRITE_QUEUE_DIR = os.getenv('TTS_WRITE_QUEUE_DIR', '/tmp/tts_write_queue')
+    TTS_WRITE_QUEUE_BATCH_SIZE = int(os.getenv('TTS_WRITE_QUEUE_BATCH_SIZE', '20'))
+    TTS_WRITE_QUEUE_MAX_PENDING = int(os.getenv('TTS_WRITE_QUEUE_MAX_PENDING', '500'))
+    TTS_WRITE_QUEUE_MAX_ATTEMPTS = int(os.getenv('TTS_WRITE_QUEUE_MAX_ATTEMPTS', '8'))
+
+    # Where permanent TTS audio lives: 'bytea' (tts_cache_files), 's3' (any S3-compatible bucket,
+    # e.g. Supabase Storage's S3 endpoint) or 'local' (a directory, e.g. a mounted volume)
+    TTS_BLOB_STORE = os.getenv('TTS_BLOB_STORE', 'bytea')
+    TTS_BLOB_DIR = os.getenv('TTS_BLOB_DIR', '/data/tts_blobs')
+    TTS_S3_ENDPOINT = os.getenv('TTS_S3_ENDPOINT')
+    TTS_S3_PUBLIC_ENDPOINT = os.getenv('TTS_S3_PUBLIC_ENDPOINT')
+    TTS_S3_BUCKET = os.getenv('TTS_S3_BUCKET', 'tts-audio')
+    TTS_S3_ACCESS_KEY = os.getenv('TTS_S3_ACCESS_KEY')
+    TTS_S3_SECRET_KEY = os.getenv('TTS_S3_SECRET_KEY')
+    TTS_S3_REGION = os.getenv('TTS_S3_REGION', 'us-east-1')
+    TTS_S3_PREFIX = os.getenv('TTS_S3_PREFIX', 'tts/')
+    # Redirect /api/audio local misses to a presigned URL instead of proxying the bytes
+    TTS_BLOB_REDIRECT = os.getenv('TTS_BLOB_REDIRECT', 'True').lower() == 'true'
+    TTS_BLOB_SIGNED_URL_TTL = int(os.getenv('TTS_BLOB_SIGNED_URL_TTL', '3600'))
+
+    # Supabase/blob store calls of the TTS cache: timeouts (seconds) and the circuit breaker that
+    # drops to local-only caching when too many of them fail
+    TTS_REMOTE_CONNECT_TIMEOUT = float(os.getenv('TTS_REMOTE_CONNECT_TIMEOUT', '2'))
+    TTS_REMOTE_TIMEOUT = float(os.getenv('TTS_REMOTE_TIMEOUT', '10'))
+    TTS_BREAKER_FAILURE_RATE = float(os.getenv('TTS_BREAKER_FAILURE_RATE', '0.5'))
+    TTS_BREAKER_MIN_CALLS = int(os.getenv('TTS_BREAKER_MIN_CALLS', '5'))
+    TTS_BREAKER_WINDOW = float(os.getenv('TTS_BREAKER_WINDOW', '30'))
+    TTS_BREAKER_OPEN_SECONDS = float(os.getenv('TTS_BREAKER_OPEN_SECONDS', '30'))
+    TTS_BREAKER_HALF_OPEN_PROBES = int(os.getenv('TTS_BREAKER_HALF_OPEN_PROBES', '1'))
+    # Seconds a remote cache miss is remembered (0 disables)
+    TTS_NEGATIVE_CACHE_TTL = float(os.getenv('TTS_NEGATIVE_CACHE_TTL', '30'))
+    TTS_NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv('TTS_NEGATIVE_CACHE_MAX_ENTRIES', '10000'))
+
+    # Prometheus /metrics endpoint. Each worker snapshots its metrics into METRICS_DIR (shared by all
+    # workers) every METRICS_FLUSH_INTERVAL seconds; set METRICS_TOKEN to require "Authorization: Bearer <token>"
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    METRICS_DIR = os.getenv('METRICS_DIR', '/tmp/metrics')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    # Server-Timing header (chat, tts, cache_lookup, ... durations) on every response; a sample of
+    # the traces can also be appended to TRACE_LOG_PATH as JSON lines
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'True').lower() == 'true'
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+    TRACE_LOG_PATH = os.getenv('TRACE_LOG_PATH', '/tmp/traces.jsonl')
+
     # Recording settings
     DEFAULT_RECORDING_DURATION = 30
 
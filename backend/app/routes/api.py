@@ -1,37 +1,74 @@
 """
 API routes for life review pipeline.
 """
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, Response, request, jsonify, send_file, current_app
 from werkzeug.exceptions import BadRequest
-from app.services import PDFService, OpenAIService
-from app.utils import allowed_file, save_upload, cleanup_file
+from werkzeug.wsgi import wrap_file
+from app.utils import allowed_file, named_upload, segment_index, audio_url
+from app.utils.metrics_utils import count_audio_bytes, route_label
+from app.utils.audio_utils import AUDIO_HASH, audio_headers, redirect_headers, requested_range, variant_headers, variant_hints
+from app.services.packed_audio_store import FileSlice
+from app.services.pre_cache import job_summary
+from app.services.tts_variants import AUDIO_FORMATS, DEFAULT_VARIANT
 from app.config import Config
-from app.config.narratives import INTRO_NARRATIVE, OUTRO_NARRATIVE
 import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.services import OpenAIService
+    from app.services.packed_audio_store import PackedAudio
+    from app.services.tts_variants import TTSVariant
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
-# Initialize services
-pdf_service = PDFService()
+def get_services():
+    """Get the application's shared service container"""
+    return current_app.extensions['services']
 
-# Pre-caching state to prevent duplicate requests
-_pre_caching_in_progress = False
 
+def get_openai_service() -> 'OpenAIService':
+    """Get the shared OpenAI service instance for this worker"""
+    return get_services().openai_service
 
-def get_openai_service():
-    """Get OpenAI service instance with API key and Supabase config"""
-    api_key = current_app.config.get('OPENAI_API_KEY')
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not configured")
-    
-    # Get Supabase config for permanent caching
-    supabase_url = current_app.config.get('SUPABASE_URL')
-    supabase_key = current_app.config.get('SUPABASE_SERVICE_KEY')
-    
-    # Get chat model from config
-    chat_model = current_app.config.get('CHAT_MODEL', 'gpt-3.5-turbo')
-    
-    return OpenAIService(api_key, supabase_url, supabase_key, chat_model)
+
+def stream_audio(chunks, variant: 'TTSVariant' = DEFAULT_VARIANT):
+    """
+    Stream audio chunks to the client.
+
+    The first chunk is pulled before the response starts so an upstream
+    failure still produces a JSON error instead of a truncated 200.
+    """
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        return jsonify({'error': 'Failed to generate speech'}), 500
+
+    def body():
+        yield first_chunk
+        # yield from forwards close() on client disconnect, discarding the partial file
+        yield from chunks
+
+    return Response(
+        count_audio_bytes(body(), route_label(request)),
+        mimetype=variant.mime_type,
+        headers={
+            'Content-Disposition': f'attachment; filename=speech.{variant.audio_format}',
+            **variant_headers(variant)
+        }
+    )
+
+
+def send_packed_audio(audio: 'PackedAudio', variant: 'TTSVariant' = DEFAULT_VARIANT):
+    """Send a clip from the packed TTS store (with os.sendfile under gunicorn)"""
+    return Response(
+        wrap_file(request.environ, audio.open()),
+        mimetype=variant.mime_type,
+        headers={
+            'Content-Length': str(audio.length),
+            'Content-Disposition': f'attachment; filename=speech.{variant.audio_format}',
+            **variant_headers(variant)
+        },
+        direct_passthrough=True
+    )
 
 
 @api_bp.route('/health', methods=['GET'])
@@ -43,13 +80,22 @@ def health_check():
     }), 200
 
 
+@api_bp.route('/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness probe: 503 until the hot TTS set has been hydrated into the local cache.
+
+    Returns: JSON with hydration progress
+    """
+    status = get_services().readiness()
+    return jsonify(status), 200 if status['ready'] else 503
+
+
 @api_bp.route('/assemblyai-token', methods=['GET'])
 def get_assemblyai_token():
     """
     Generate a temporary AssemblyAI v3 streaming token for WebSocket authentication.
     """
-    import requests
-
     # Get AssemblyAI API key from environment
     assemblyai_key = current_app.config.get('ASSEMBLYAI_API_KEY')
     if not assemblyai_key:
@@ -59,12 +105,12 @@ def get_assemblyai_token():
     expires_in_seconds = request.args.get('expires_in_seconds', default=300, type=int)
     try:
         # Request temporary token from AssemblyAI v3
-        resp = requests.get(
+        resp = get_services().http_pool.http_client.get(
             'https://streaming.assemblyai.com/v3/token',
             headers={'Authorization': assemblyai_key},
             params={'expires_in_seconds': expires_in_seconds}
         )
-        if resp.ok:
+        if resp.is_success:
             return jsonify(resp.json()), 200
         return jsonify({'error': 'Failed to get token from AssemblyAI', 'details': resp.text}), resp.status_code
     except Exception as e:
@@ -91,16 +137,8 @@ def extract_questions():
         return jsonify({'error': 'Invalid file type. Only PDF allowed'}), 400
 
     try:
-        # Save uploaded file
-        filepath = save_upload(file, current_app.config['UPLOAD_FOLDER'])
-        if not filepath:
-            return jsonify({'error': 'Failed to save file'}), 500
-
-        # Extract questions
-        questions = pdf_service.extract_questions(filepath)
-
-        # Cleanup
-        cleanup_file(filepath)
+        # Parsed straight from the spooled upload
+        questions = get_services().pdf_service.extract_questions(file.stream)
 
         return jsonify({
             'success': True,
@@ -117,8 +155,11 @@ def text_to_speech():
     """
     Convert text to speech with permanent caching.
 
-    Expected JSON: { "text": "...", "voice": "nova", "content_type": "narrative" }
-    Returns: Audio file (MP3)
+    Expected JSON: { "text": "...", "voice": "nova", "content_type": "narrative", "stream": true,
+                     "format": "mp3" | "opus" | "aac" }
+    Returns: Audio file, streamed as it is generated on a cache miss. The model
+             comes from the content type; the format from "format", else the
+             Accept and Save-Data headers. X-TTS-Variant names both.
     """
     data = request.get_json()
 
@@ -131,22 +172,149 @@ def text_to_speech():
 
     try:
         openai_service = get_openai_service()
-        audio_path = openai_service.text_to_speech(text, voice, content_type=content_type)
+        variant = openai_service.choose_variant(content_type, **variant_hints(request, data))
+
+        packed_audio = openai_service.open_cached_speech(text, voice, content_type, variant)
+        if packed_audio is not None:
+            return send_packed_audio(packed_audio, variant)
+
+        if data.get('stream', current_app.config.get('TTS_STREAMING', True)):
+            # Cache hits are sent whole; misses are streamed while they generate
+            audio_path = openai_service.get_cached_speech(text, voice, content_type, variant)
+            if not audio_path:
+                return stream_audio(openai_service.stream_speech(
+                    text, voice, content_type=content_type,
+                    chunk_size=current_app.config.get('TTS_STREAM_CHUNK_SIZE', 4096),
+                    variant=variant
+                ), variant)
+        else:
+            audio_path = openai_service.text_to_speech(text, voice, content_type=content_type, variant=variant)
 
         if not audio_path:
             return jsonify({'error': 'Failed to generate speech'}), 500
 
-        return send_file(
+        response = send_file(
             audio_path,
-            mimetype='audio/mpeg',
+            mimetype=variant.mime_type,
             as_attachment=True,
-            download_name='speech.mp3'
+            download_name=f'speech.{variant.audio_format}'
         )
+        response.headers.update(variant_headers(variant))
+        return response
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@api_bp.route('/text-to-speech/sentences', methods=['POST'])
+def text_to_speech_sentences():
+    """
+    Speak a multi-sentence reply, synthesizing its sentences in parallel.
+
+    Expected JSON: { "text": "...", "voice": "nova", "delivery": "stream" | "playlist", "format": "mp3" }
+    Returns: Audio stream with each sentence sent as soon as it is ready, or
+             JSON with the per-sentence audio paths in order. Streams are
+             MP3 or AAC, whose sentence clips join by concatenation.
+    """
+    data = request.get_json()
+
+    if not data or 'text' not in data:
+        return jsonify({'error': 'Text is required'}), 400
+
+    text = data['text']
+    voice = data.get('voice', 'nova')
+    content_type = data.get('content_type', 'response')
+    delivery = data.get('delivery', 'stream')
+
+    try:
+        openai_service = get_openai_service()
+        pipeline = openai_service.tts_pipeline
+        variant = openai_service.choose_variant(
+            content_type, joinable=delivery != 'playlist', **variant_hints(request, data)
+        )
+
+        if delivery == 'playlist':
+            playlist = pipeline.playlist(text, voice, content_type=content_type, variant=variant)
+            if not playlist:
+                return jsonify({'error': 'Failed to generate speech'}), 500
+
+            response = jsonify({
+                'success': True,
+                'segments': [
+                    {'text': sentence, 'audio_path': audio_path, 'audio_url': audio_url(audio_path)}
+                    for sentence, audio_path in playlist
+                ]
+            })
+            response.headers.update(variant_headers(variant))
+            return response, 200
+
+        return stream_audio(pipeline.stream(
+            text, voice, content_type=content_type,
+            chunk_size=current_app.config.get('TTS_STREAM_CHUNK_SIZE', 4096),
+            variant=variant
+        ), variant)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/audio/<content_hash>.<audio_format>', methods=['GET'])
+def serve_audio(content_hash, audio_format):
+    """
+    Serve cached TTS audio by content hash.
+
+    The URL names the audio for good, so responses carry the hash as a strong
+    ETag with an immutable Cache-Control; byte ranges are supported so
+    playback can seek. The body goes through wsgi.file_wrapper (os.sendfile
+    under gunicorn). Clips that aren't local are redirected to a presigned
+    blob store URL when the store can sign one.
+    """
+    if not AUDIO_HASH.fullmatch(content_hash) or audio_format not in AUDIO_FORMATS:
+        return jsonify({'error': 'Audio not found'}), 404
+
+    headers = audio_headers(content_hash)
+    if request.if_none_match.contains_weak(content_hash):
+        return Response(status=304, headers=headers)
+
+    try:
+        service = get_openai_service()
+        audio = service.find_audio(content_hash, audio_format, remote=False)
+        if audio is None:
+            # Not local: point the client at the blob store rather than proxying it
+            expires_in = current_app.config.get('TTS_BLOB_SIGNED_URL_TTL', 3600)
+            location = service.signed_audio_url(content_hash, expires_in) if current_app.config.get('TTS_BLOB_REDIRECT', True) else None
+            if location:
+                return Response(status=302, headers=redirect_headers(location, expires_in))
+            audio = service.find_audio(content_hash, audio_format)
+        if audio is None:
+            return jsonify({'error': 'Audio not found'}), 404
+        if isinstance(audio, str):
+            path, offset, length = audio, 0, os.path.getsize(audio)
+        else:
+            path, offset, length = audio.segment_path, audio.offset, audio.length
+
+        status, start, stop = requested_range(request, content_hash, length)
+        if status == 416:
+            return Response(status=416, headers={**headers, 'Content-Range': f"bytes */{length}"})
+        if status == 206:
+            headers['Content-Range'] = f"bytes {start}-{stop - 1}/{length}"
+        headers['Content-Length'] = str(stop - start)
+
+        body = FileSlice(path, offset + start, stop - start)
+    except FileNotFoundError:
+        # Evicted between the lookup and the open
+        return jsonify({'error': 'Audio not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    return Response(
+        wrap_file(request.environ, body),
+        status=status,
+        mimetype=AUDIO_FORMATS[audio_format],
+        headers=headers,
+        direct_passthrough=True
+    )
+
+
 @api_bp.route('/transcribe', methods=['POST'])
 def transcribe_audio():
     """
@@ -164,17 +332,9 @@ def transcribe_audio():
         return jsonify({'error': 'No file selected'}), 400
 
     try:
-        # Save uploaded audio
-        filepath = save_upload(file, current_app.config['UPLOAD_FOLDER'])
-        if not filepath:
-            return jsonify({'error': 'Failed to save audio'}), 500
-
-        # Transcribe
+        # Streamed to Whisper from the spooled upload
         openai_service = get_openai_service()
-        transcript = openai_service.transcribe_audio(filepath)
-
-        # Cleanup
-        cleanup_file(filepath)
+        transcript = openai_service.transcribe_audio(named_upload(file))
 
         if not transcript:
             return jsonify({'error': 'Failed to transcribe audio'}), 500
@@ -188,6 +348,92 @@ def transcribe_audio():
         return jsonify({'error': str(e)}), 500
 
 
+@api_bp.route('/transcribe/session', methods=['POST'])
+def create_transcription_session():
+    """
+    Start transcribing an answer while it is still being recorded.
+
+    Record self-contained segments of about segment_seconds, each starting
+    overlap_seconds before the previous one ended, and upload each one as it
+    completes; finalize with the last segment when the user stops.
+
+    Returns: JSON with session_id and the segment length and overlap to record
+    """
+    try:
+        config = current_app.config
+        session_id = get_services().transcription_sessions.create()
+        return jsonify({
+            'success': True,
+            'session_id': session_id,
+            'segment_seconds': config.get('TRANSCRIBE_SEGMENT_SECONDS', 8.0),
+            'overlap_seconds': config.get('TRANSCRIBE_SEGMENT_OVERLAP', 1.0),
+            'expires_in': config.get('TRANSCRIBE_SESSION_TTL', 900)
+        }), 201
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@api_bp.route('/transcribe/session/<session_id>/chunk', methods=['POST'])
+def append_transcription_chunk(session_id):
+    """
+    Add a recorded segment; it is transcribed in the background.
+
+    Expected: multipart/form-data with 'audio' file and 'index' (0-based
+        position in the recording; defaults to after the last segment)
+    Returns: JSON with the segment's index
+    """
+    if 'audio' not in request.files:
+        return jsonify({'error': 'No audio file provided'}), 400
+
+    file = request.files['audio']
+
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+
+    try:
+        index = get_services().transcription_sessions.append(session_id, named_upload(file), segment_index(request.form))
+        return jsonify({'success': True, 'index': index}), 202
+
+    except LookupError:
+        return jsonify({'error': 'Transcription session not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@api_bp.route('/transcribe/session/<session_id>/finalize', methods=['POST'])
+def finalize_transcription_session(session_id):
+    """
+    Transcribe the last segment and return the whole answer's transcript.
+
+    Expected: multipart/form-data with the last segment as 'audio' and its
+        'index' (both optional)
+    Returns: JSON with transcribed text, as /transcribe
+    """
+    file = request.files.get('audio')
+
+    try:
+        upload = named_upload(file) if file and file.filename else None
+        transcript = get_services().transcription_sessions.finalize(session_id, upload, segment_index(request.form))
+
+        if transcript is None:
+            return jsonify({'error': 'Failed to transcribe audio'}), 500
+
+        return jsonify({
+            'success': True,
+            'transcript': transcript
+        }), 200
+
+    except LookupError:
+        return jsonify({'error': 'Transcription session not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @api_bp.route('/analyze', methods=['POST'])
 def analyze_response():
     """
@@ -243,11 +489,12 @@ def analyze_and_tts():
         if not tts_path:
             return jsonify({'error': 'Failed to generate TTS'}), 500
 
-        # Return both the analysis and TTS file path
+        # Return both the analysis and the TTS file (path and cacheable URL)
         return jsonify({
             'success': True,
             'analysis': ai_response,
-            'tts_path': tts_path
+            'tts_path': tts_path,
+            'tts_url': audio_url(tts_path)
         }), 200
 
     except Exception as e:
@@ -280,11 +527,12 @@ def analyze_followup():
         if not tts_path:
             return jsonify({'error': 'Failed to generate TTS'}), 500
 
-        # Return both the analysis and TTS file path
+        # Return both the analysis and the TTS file (path and cacheable URL)
         return jsonify({
             'success': True,
             'analysis': ai_response,
-            'tts_path': tts_path
+            'tts_path': tts_path,
+            'tts_url': audio_url(tts_path)
         }), 200
 
     except Exception as e:
@@ -354,6 +602,7 @@ def process_question():
         audio_path = openai_service.text_to_speech(question, voice)
         if audio_path:
             result['question_audio'] = audio_path
+            result['question_audio_url'] = audio_url(audio_path)
 
         # If audio provided, transcribe and analyze
         if 'audio_data' in data:
@@ -405,61 +654,42 @@ def cache_stats():
 @api_bp.route('/pre-cache-narratives', methods=['POST'])
 def pre_cache_narratives():
     """
-    Pre-cache common narratives for faster loading.
+    Pre-cache the intro, outro and every question, generating all missing clips concurrently.
     
-    Expected JSON: { "voice": "nova" (optional) }
-    Returns: JSON with caching results
-    """
-    global _pre_caching_in_progress
+    Only one job runs at a time across workers; a request made while one is
+    running gets that job's progress.
     
-    # Prevent duplicate requests
-    if _pre_caching_in_progress:
-        return jsonify({
-            'success': True,
-            'message': 'Pre-caching already in progress',
-            'cached_count': 0,
-            'total_count': 0
-        }), 200
-    
-    data = request.get_json() or {}
-    voice = data.get('voice', 'nova')
+    Expected JSON: { "voice": "nova" (optional), "voices": ["nova", "onyx"] (optional, overrides voice) }
+    Returns: JSON with caching results and per-item progress
+    """
+    data = request.get_json(silent=True) or {}
+    voices = data.get('voices') or [data.get('voice', 'nova')]
     
     try:
-        _pre_caching_in_progress = True
-        print(f"[API] Starting pre-cache for voice: {voice}")
-        
-        openai_service = get_openai_service()
-        
-        # Collect all narratives to cache
-        all_narratives = [INTRO_NARRATIVE, OUTRO_NARRATIVE]
+        print(f"[API] Starting pre-cache for voices: {', '.join(voices)}")
+        report = get_openai_service().pre_cache.run(voices)
+        summary = job_summary(report)
         
-        # ✅ Also pre-cache all questions for instant playback
-        from app.config.narratives import QUESTION_SEQUENCE
-        questions = [q['prompt'] for q in QUESTION_SEQUENCE]
-        all_narratives.extend(questions)
+        print(f"[API] Pre-cache complete: {summary['cached_count']}/{summary['total_count']} items cached")
         
-        print(f"[API] Pre-caching {len(all_narratives)} items (intro + outro + {len(questions)} questions)")
-        
-        # Pre-cache narratives
-        results = openai_service.pre_cache_narratives(all_narratives, voice)
-        
-        cached_count = sum(1 for success in results.values() if success)
-        total_count = len(results)
-        
-        print(f"[API] Pre-cache complete: {cached_count}/{total_count} narratives cached")
-        
-        return jsonify({
-            'success': True,
-            'cached_count': cached_count,
-            'total_count': total_count,
-            'results': results
-        }), 200
+        return jsonify(summary), 200
         
     except Exception as e:
         print(f"[API] Pre-cache error: {e}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        _pre_caching_in_progress = False
+
+
+@api_bp.route('/pre-cache-narratives/status', methods=['GET'])
+def pre_cache_status():
+    """
+    Progress of the running (or last) pre-cache job, whichever worker runs it.
+    
+    Returns: JSON with running state, counts per status and per-item progress
+    """
+    try:
+        return jsonify(get_openai_service().pre_cache.status()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 
 @api_bp.errorhandler(BadRequest)
@@ -0,0 +1,683 @@
+"""
+Async API routes for the ASGI serving mode.
+
+Same /api/* endpoints as api.py, served by Quart so slow upstream calls
+suspend a coroutine instead of holding a worker thread.
+"""
+import asyncio
+import os
+
+from quart import Blueprint, Response, request, jsonify, send_file, current_app
+from werkzeug.exceptions import BadRequest
+from app.utils import allowed_file, named_upload, segment_index, audio_url
+from app.utils.metrics_utils import count_audio_bytes_async, route_label
+from app.utils.audio_utils import AUDIO_HASH, audio_headers, redirect_headers, requested_range, variant_headers, variant_hints
+from app.services.packed_audio_store import FileSlice
+from app.services.pre_cache import job_summary
+from app.services.tts_variants import AUDIO_FORMATS, DEFAULT_VARIANT
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.services import AsyncOpenAIService
+    from app.services.packed_audio_store import PackedAudio
+    from app.services.tts_variants import TTSVariant
+
+async_api_bp = Blueprint('async_api', __name__, url_prefix='/api')
+
+def get_services():
+    """Get the application's shared service container"""
+    return current_app.extensions['services']
+
+
+def get_openai_service() -> 'AsyncOpenAIService':
+    """Get the shared async OpenAI service instance for this worker"""
+    return get_services().openai_service
+
+
+def send_packed_audio(audio: 'PackedAudio', variant: 'TTSVariant' = DEFAULT_VARIANT, chunk_size: int = 64 * 1024):
+    """Send a clip from the packed TTS store, sliced straight from the mapped segment"""
+    async def body():
+        for start in range(0, audio.length, chunk_size):
+            yield audio.view[start:start + chunk_size].tobytes()
+
+    return Response(
+        body(),
+        mimetype=variant.mime_type,
+        headers={
+            'Content-Length': str(audio.length),
+            'Content-Disposition': f'attachment; filename=speech.{variant.audio_format}',
+            **variant_headers(variant)
+        }
+    )
+
+
+async def stream_audio(chunks, variant: 'TTSVariant' = DEFAULT_VARIANT):
+    """
+    Stream audio chunks to the client.
+
+    The first chunk is pulled before the response starts so an upstream
+    failure still produces a JSON error instead of a truncated 200.
+    """
+    first_chunk = await anext(chunks, None)
+    if first_chunk is None:
+        return jsonify({'error': 'Failed to generate speech'}), 500
+
+    async def body():
+        yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+
+    return Response(
+        count_audio_bytes_async(body(), route_label(request)),
+        mimetype=variant.mime_type,
+        headers={
+            'Content-Disposition': f'attachment; filename=speech.{variant.audio_format}',
+            **variant_headers(variant)
+        }
+    )
+
+
+@async_api_bp.route('/health', methods=['GET'])
+async def health_check():
+    """Health check endpoint"""
+    return jsonify({
+        'status': 'healthy',
+        'service': 'life-review-api'
+    }), 200
+
+
+@async_api_bp.route('/ready', methods=['GET'])
+async def readiness_check():
+    """
+    Readiness probe: 503 until the hot TTS set has been hydrated into the local cache.
+
+    Returns: JSON with hydration progress
+    """
+    status = get_services().readiness()
+    return jsonify(status), 200 if status['ready'] else 503
+
+
+@async_api_bp.route('/assemblyai-token', methods=['GET'])
+async def get_assemblyai_token():
+    """
+    Generate a temporary AssemblyAI v3 streaming token for WebSocket authentication.
+    """
+    assemblyai_key = current_app.config.get('ASSEMBLYAI_API_KEY')
+    if not assemblyai_key:
+        return jsonify({'error': 'AssemblyAI API key not configured'}), 500
+
+    # Expiration (seconds) - 60-600 required by API
+    expires_in_seconds = request.args.get('expires_in_seconds', default=300, type=int)
+    try:
+        resp = await get_services().http_pool.http_client.get(
+            'https://streaming.assemblyai.com/v3/token',
+            headers={'Authorization': assemblyai_key},
+            params={'expires_in_seconds': expires_in_seconds}
+        )
+        if resp.is_success:
+            return jsonify(resp.json()), 200
+        return jsonify({'error': 'Failed to get token from AssemblyAI', 'details': resp.text}), resp.status_code
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.route('/extract-questions', methods=['POST'])
+async def extract_questions():
+    """
+    Extract questions from uploaded PDF.
+
+    Expected: multipart/form-data with 'pdf' file
+    Returns: JSON with list of questions
+    """
+    files = await request.files
+    if 'pdf' not in files:
+        return jsonify({'error': 'No PDF file provided'}), 400
+
+    file = files['pdf']
+
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+
+    if not allowed_file(file.filename, current_app.config['ALLOWED_EXTENSIONS']):
+        return jsonify({'error': 'Invalid file type. Only PDF allowed'}), 400
+
+    try:
+        # PDF parsing is CPU-bound; keep it off the event loop
+        questions = await asyncio.to_thread(get_services().pdf_service.extract_questions, file.stream)
+
+        return jsonify({
+            'success': True,
+            'questions': questions,
+            'count': len(questions)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.route('/text-to-speech', methods=['POST'])
+async def text_to_speech():
+    """
+    Convert text to speech with permanent caching.
+
+    Expected JSON: { "text": "...", "voice": "nova", "content_type": "narrative", "stream": true,
+                     "format": "mp3" | "opus" | "aac" }
+    Returns: Audio file, streamed as it is generated on a cache miss. The model
+             comes from the content type; the format from "format", else the
+             Accept and Save-Data headers. X-TTS-Variant names both.
+    """
+    data = await request.get_json()
+
+    if not data or 'text' not in data:
+        return jsonify({'error': 'Text is required'}), 400
+
+    text = data['text']
+    voice = data.get('voice', 'nova')
+    content_type = data.get('content_type', 'narrative')
+
+    try:
+        openai_service = get_openai_service()
+        variant = openai_service.choose_variant(content_type, **variant_hints(request, data))
+
+        packed_audio = openai_service.open_cached_speech(text, voice, content_type, variant)
+        if packed_audio is not None:
+            return send_packed_audio(packed_audio, variant)
+
+        if data.get('stream', current_app.config.get('TTS_STREAMING', True)):
+            # Cache hits are sent whole; misses are streamed while they generate
+            audio_path = await openai_service.get_cached_speech(text, voice, content_type, variant)
+            if not audio_path:
+                return await stream_audio(openai_service.stream_speech(
+                    text, voice, content_type=content_type,
+                    chunk_size=current_app.config.get('TTS_STREAM_CHUNK_SIZE', 4096),
+                    variant=variant
+                ), variant)
+        else:
+            audio_path = await openai_service.text_to_speech(text, voice, content_type=content_type, variant=variant)
+
+        if not audio_path:
+            return jsonify({'error': 'Failed to generate speech'}), 500
+
+        response = await send_file(
+            audio_path,
+            mimetype=variant.mime_type,
+            as_attachment=True,
+            attachment_filename=f'speech.{variant.audio_format}'  # Quart 0.19's name for download_name
+        )
+        response.headers.update(variant_headers(variant))
+        return response
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.route('/text-to-speech/sentences', methods=['POST'])
+async def text_to_speech_sentences():
+    """
+    Speak a multi-sentence reply, synthesizing its sentences in parallel.
+
+    Expected JSON: { "text": "...", "voice": "nova", "delivery": "stream" | "playlist", "format": "mp3" }
+    Returns: Audio stream with each sentence sent as soon as it is ready, or
+             JSON with the per-sentence audio paths in order. Streams are
+             MP3 or AAC, whose sentence clips join by concatenation.
+    """
+    data = await request.get_json()
+
+    if not data or 'text' not in data:
+        return jsonify({'error': 'Text is required'}), 400
+
+    text = data['text']
+    voice = data.get('voice', 'nova')
+    content_type = data.get('content_type', 'response')
+    delivery = data.get('delivery', 'stream')
+
+    try:
+        openai_service = get_openai_service()
+        pipeline = openai_service.tts_pipeline
+        variant = openai_service.choose_variant(
+            content_type, joinable=delivery != 'playlist', **variant_hints(request, data)
+        )
+
+        if delivery == 'playlist':
+            playlist = await pipeline.playlist(text, voice, content_type=content_type, variant=variant)
+            if not playlist:
+                return jsonify({'error': 'Failed to generate speech'}), 500
+
+            response = jsonify({
+                'success': True,
+                'segments': [
+                    {'text': sentence, 'audio_path': audio_path, 'audio_url': audio_url(audio_path)}
+                    for sentence, audio_path in playlist
+                ]
+            })
+            response.headers.update(variant_headers(variant))
+            return response, 200
+
+        return await stream_audio(pipeline.stream(
+            text, voice, content_type=content_type,
+            chunk_size=current_app.config.get('TTS_STREAM_CHUNK_SIZE', 4096),
+            variant=variant
+        ), variant)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@async_api_bp.route('/audio/<content_hash>.<audio_format>', methods=['GET'])
+async def serve_audio(content_hash, audio_format):
+    """
+    Serve cached TTS audio by content hash.
+
+    The URL names the audio for good, so responses carry the hash as a strong
+    ETag with an immutable Cache-Control; byte ranges are supported so
+    playback can seek. Clips that aren't local are redirected to a presigned
+    blob store URL when the store can sign one.
+    """
+    if not AUDIO_HASH.fullmatch(content_hash) or audio_format not in AUDIO_FORMATS:
+        return jsonify({'error': 'Audio not found'}), 404
+
+    headers = audio_headers(content_hash)
+    if request.if_none_match.contains_weak(content_hash):
+        return Response('', status=304, headers=headers)
+
+    try:
+        service = get_openai_service()
+        audio = await service.find_audio(content_hash, audio_format, remote=False)
+        if audio is None:
+            # Not local: point the client at the blob store rather than proxying it
+            expires_in = current_app.config.get('TTS_BLOB_SIGNED_URL_TTL', 3600)
+            location = service.signed_audio_url(content_hash, expires_in) if current_app.config.get('TTS_BLOB_REDIRECT', True) else None
+            if location:
+                return Response('', status=302, headers=redirect_headers(location, expires_in))
+            audio = await service.find_audio(content_hash, audio_format)
+        if audio is None:
+            return jsonify({'error': 'Audio not found'}), 404
+        length = await asyncio.to_thread(os.path.getsize, audio) if isinstance(audio, str) else audio.length
+
+        status, start, stop = requested_range(request, content_hash, length)
+        if status == 416:
+            return Response('', status=416, headers={**headers, 'Content-Range': f"bytes */{length}"})
+        if status == 206:
+            headers['Content-Range'] = f"bytes {start}-{stop - 1}/{length}"
+        headers['Content-Length'] = str(stop - start)
+
+        file = None if not isinstance(audio, str) else await asyncio.to_thread(FileSlice, audio, start, stop - start)
+    except FileNotFoundError:
+        # Evicted between the lookup and the open
+        return jsonify({'error': 'Audio not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    chunk_size = 64 * 1024
+
+    async def body():
+        if file is None:
+            # Packed clip: slices of the mapped segment
+            for chunk_start in range(start, stop, chunk_size):
+                yield audio.view[chunk_start:min(chunk_start + chunk_size, stop)].tobytes()
+            return
+        try:
+            while chunk := await asyncio.to_thread(file.read, chunk_size):
+                yield chunk
+        finally:
+            file.close()
+
+    return Response(body(), status=status, mimetype=AUDIO_FORMATS[audio_format], headers=headers)
+
+
+@async_api_bp.route('/transcribe', methods=['POST'])
+async def transcribe_audio():
+    """
+    Transcribe audio to text.
+
+    Expected: multipart/form-data with 'audio' file
+    Returns: JSON with transcribed text
+    """
+    files = await request.files
+    if 'audio' not in files:
+        return jsonify({'error': 'No audio file provided'}), 400
+
+    file = files['audio']
+
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+
+    try:
+        transcript = await get_openai_service().transcribe_audio(named_upload(file))
+
+        if not transcript:
+            return jsonify({'error': 'Failed to transcribe audio'}), 500
+
+        return jsonify({
+            'success': True,
+            'transcript': transcript
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.route('/transcribe/session', methods=['POST'])
+async def create_transcription_session():
+    """
+    Start transcribing an answer while it is still being recorded.
+
+    Record self-contained segments of about segment_seconds, each starting
+    overlap_seconds before the previous one ended, and upload each one as it
+    completes; finalize with the last segment when the user stops.
+
+    Returns: JSON with session_id and the segment length and overlap to record
+    """
+    try:
+        config = current_app.config
+        session_id = await get_services().transcription_sessions.create()
+        return jsonify({
+            'success': True,
+            'session_id': session_id,
+            'segment_seconds': config.get('TRANSCRIBE_SEGMENT_SECONDS', 8.0),
+            'overlap_seconds': config.get('TRANSCRIBE_SEGMENT_OVERLAP', 1.0),
+            'expires_in': config.get('TRANSCRIBE_SESSION_TTL', 900)
+        }), 201
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.route('/transcribe/session/<session_id>/chunk', methods=['POST'])
+async def append_transcription_chunk(session_id):
+    """
+    Add a recorded segment; it is transcribed in the background.
+
+    Expected: multipart/form-data with 'audio' file and 'index' (0-based
+        position in the recording; defaults to after the last segment)
+    Returns: JSON with the segment's index
+    """
+    files = await request.files
+    if 'audio' not in files:
+        return jsonify({'error': 'No audio file provided'}), 400
+
+    file = files['audio']
+
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+
+    try:
+        index = await get_services().transcription_sessions.append(
+            session_id, named_upload(file), segment_index(await request.form)
+        )
+        return jsonify({'success': True, 'index': index}), 202
+
+    except LookupError:
+        return jsonify({'error': 'Transcription session not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.route('/transcribe/session/<session_id>/finalize', methods=['POST'])
+async def finalize_transcription_session(session_id):
+    """
+    Transcribe the last segment and return the whole answer's transcript.
+
+    Expected: multipart/form-data with the last segment as 'audio' and its
+        'index' (both optional)
+    Returns: JSON with transcribed text, as /transcribe
+    """
+    file = (await request.files).get('audio')
+
+    try:
+        upload = named_upload(file) if file and file.filename else None
+        transcript = await get_services().transcription_sessions.finalize(
+            session_id, upload, segment_index(await request.form)
+        )
+
+        if transcript is None:
+            return jsonify({'error': 'Failed to transcribe audio'}), 500
+
+        return jsonify({
+            'success': True,
+            'transcript': transcript
+        }), 200
+
+    except LookupError:
+        return jsonify({'error': 'Transcription session not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.route('/analyze', methods=['POST'])
+async def analyze_response():
+    """
+    Analyze a response for emotions, themes, and values.
+
+    Expected JSON: { "question": "...", "answer": "..." }
+    Returns: JSON with AI analysis
+    """
+    data = await request.get_json()
+
+    if not data or 'question' not in data or 'answer' not in data:
+        return jsonify({'error': 'Question and answer are required'}), 400
+
+    try:
+        analysis = await get_openai_service().analyze_response(data['question'], data['answer'])
+
+        if not analysis:
+            return jsonify({'error': 'Failed to generate analysis'}), 500
+
+        return jsonify({
+            'success': True,
+            'analysis': analysis
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.route('/analyze-and-tts', methods=['POST'])
+async def analyze_and_tts():
+    """
+    Analyze response and generate TTS.
+    """
+    try:
+        data = await request.get_json()
+        if not data or 'question' not in data or 'answer' not in data:
+            return jsonify({'error': 'Missing question or answer'}), 400
+
+        voice = data.get('voice', 'nova')
+
+        ai_response, tts_path = await get_openai_service().analyze_and_prepare_tts(
+            data['question'], data['answer'], voice
+        )
+
+        if not ai_response:
+            return jsonify({'error': 'Failed to generate analysis'}), 500
+
+        if not tts_path:
+            return jsonify({'error': 'Failed to generate TTS'}), 500
+
+        return jsonify({
+            'success': True,
+            'analysis': ai_response,
+            'tts_path': tts_path,
+            'tts_url': audio_url(tts_path)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.route('/analyze-followup', methods=['POST'])
+async def analyze_followup():
+    """
+    Analyze a follow-up response with context from the original question and answer.
+    """
+    try:
+        data = await request.get_json()
+        if not data or 'original_question' not in data or 'original_answer' not in data or 'followup_answer' not in data:
+            return jsonify({'error': 'Missing original question, original answer, or followup answer'}), 400
+
+        voice = data.get('voice', 'nova')
+
+        ai_response, tts_path = await get_openai_service().analyze_followup_response(
+            data['original_question'], data['original_answer'], data['followup_answer'], voice
+        )
+
+        if not ai_response:
+            return jsonify({'error': 'Failed to generate follow-up analysis'}), 500
+
+        if not tts_path:
+            return jsonify({'error': 'Failed to generate TTS'}), 500
+
+        return jsonify({
+            'success': True,
+            'analysis': ai_response,
+            'tts_path': tts_path,
+            'tts_url': audio_url(tts_path)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.route('/analyze-session', methods=['POST'])
+async def analyze_session():
+    """
+    Analyze a complete life review session with all Q&A pairs.
+
+    Expected JSON: { "session_data": [{"question": "...", "answer": "..."}, ...] }
+    Returns: JSON with comprehensive analysis and metrics
+    """
+    try:
+        data = await request.get_json()
+        if not data or 'session_data' not in data:
+            return jsonify({'error': 'Missing session_data'}), 400
+
+        session_data = data['session_data']
+
+        if not isinstance(session_data, list) or len(session_data) == 0:
+            return jsonify({'error': 'session_data must be a non-empty list'}), 400
+
+        analysis = await get_openai_service().analyze_full_session(session_data)
+
+        if not analysis:
+            return jsonify({'error': 'Failed to generate session analysis'}), 500
+
+        return jsonify({
+            'success': True,
+            'analysis': analysis
+        }), 200
+
+    except Exception as e:
+        print(f"[API] Session analysis error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.route('/process-question', methods=['POST'])
+async def process_question():
+    """
+    Speak a question.
+
+    Expected JSON: { "question": "...", "voice": "nova" (optional) }
+    Returns: JSON with the question audio path
+    """
+    data = await request.get_json()
+
+    if not data or 'question' not in data:
+        return jsonify({'error': 'Question is required'}), 400
+
+    try:
+        result = {'success': True}
+
+        audio_path = await get_openai_service().text_to_speech(data['question'], data.get('voice', 'nova'))
+        if audio_path:
+            result['question_audio'] = audio_path
+            result['question_audio_url'] = audio_url(audio_path)
+
+        return jsonify(result), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.route('/cache-stats', methods=['GET'])
+async def cache_stats():
+    """
+    Get TTS cache statistics.
+
+    Returns: JSON with cache statistics
+    """
+    try:
+        openai_service = get_openai_service()
+
+        if openai_service.tts_cache_service:
+            stats = await openai_service.tts_cache_service.get_cache_stats()
+        else:
+            stats = {
+                'supabase_entries': 0,
+                'local_files': len(openai_service.tts_cache),
+                'memory_cache': len(openai_service.tts_cache),
+                'permanent_cache_enabled': False
+            }
+
+        return jsonify({
+            'success': True,
+            'stats': stats
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.route('/pre-cache-narratives', methods=['POST'])
+async def pre_cache_narratives():
+    """
+    Pre-cache the intro, outro and every question, generating all missing clips concurrently.
+
+    Only one job runs at a time across workers; a request made while one is
+    running gets that job's progress.
+
+    Expected JSON: { "voice": "nova" (optional), "voices": ["nova", "onyx"] (optional, overrides voice) }
+    Returns: JSON with caching results and per-item progress
+    """
+    data = await request.get_json(silent=True) or {}
+    voices = data.get('voices') or [data.get('voice', 'nova')]
+
+    try:
+        print(f"[API] Starting pre-cache for voices: {', '.join(voices)}")
+        report = await get_openai_service().pre_cache.run(voices)
+        summary = job_summary(report)
+
+        print(f"[API] Pre-cache complete: {summary['cached_count']}/{summary['total_count']} items cached")
+
+        return jsonify(summary), 200
+
+    except Exception as e:
+        print(f"[API] Pre-cache error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.route('/pre-cache-narratives/status', methods=['GET'])
+async def pre_cache_status():
+    """
+    Progress of the running (or last) pre-cache job, whichever worker runs it.
+
+    Returns: JSON with running state, counts per status and per-item progress
+    """
+    try:
+        return jsonify(get_openai_service().pre_cache.status()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@async_api_bp.errorhandler(BadRequest)
+async def handle_bad_request(e):
+    """Handle bad request errors"""
+    return jsonify({'error': 'Bad request', 'message': str(e)}), 400
+
+
+@async_api_bp.errorhandler(500)
+async def handle_internal_error(e):
+    """Handle internal server errors"""
+    return jsonify({'error': 'Internal server error'}), 500
@@ -1,5 +1,24 @@
-"""Services module"""
-from .pdf_service import PDFService
-from .openai_service import OpenAIService
+"""Services module
 
-__all__ = ['PDFService', 'OpenAIService']
+Exports are resolved lazily so importing the app (e.g. for /api/health on a
+cold start) does not pull in openai, supabase or PyPDF2.
+"""
+import importlib
+
+_EXPORTS = {
+    'PDFService': '.pdf_service',
+    'OpenAIService': '.openai_service',
+    'AsyncOpenAIService': '.async_openai_service',
+    'ServiceContainer': '.container',
+    'AsyncServiceContainer': '.container',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
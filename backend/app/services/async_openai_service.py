@@ -0,0 +1,614 @@
+"""
+Async OpenAI API service for the ASGI serving mode.
+
+Mirrors OpenAIService on top of AsyncOpenAI so a single process can keep
+many slow chat/TTS calls in flight without tying up a worker thread each.
+"""
+from typing import Optional, Dict, List, Tuple, Union, AsyncIterator, BinaryIO, Set, TYPE_CHECKING
+import asyncio
+import hashlib
+import os
+import json
+from pathlib import Path
+from . import metrics
+from .async_tts_cache_service import AsyncTTSCacheService
+from .tts_cache_service import CHUNK_SIZE
+from .tts_pipeline import AsyncTTSPipeline
+from .cache_keys import cache_key as clip_key
+from .tts_variants import TTSVariant, VariantPolicy
+from .pre_cache import AsyncPreCacheEngine
+from .single_flight import AsyncSingleFlight
+from .prompts import response_messages, followup_messages, session_messages
+
+if TYPE_CHECKING:
+    import httpx
+    from .blob_store import BlobStore
+    from .circuit_breaker import CircuitBreaker
+    from .negative_cache import NegativeCache
+    from .cache_write_queue import CacheWriteQueue
+    from .http_pool import AsyncHTTPPool
+    from .local_cache_index import LocalCacheIndex
+    from .packed_audio_store import PackedAudio, PackedAudioStore
+    from .speech_trimmer import SpeechTrimmer
+    from .transcript_cache import TranscriptCache
+
+
+class AsyncOpenAIService:
+    """Service for handling OpenAI API operations from async handlers"""
+
+    def __init__(self, api_key: str, supabase_url: str = None, supabase_key: str = None, chat_model: str = "gpt-3.5-turbo", http_pool: Optional['AsyncHTTPPool'] = None, access_log_path: Optional[str] = None, tts_pipeline_workers: int = 4, local_cache_index: Optional['LocalCacheIndex'] = None, packed_store: Optional['PackedAudioStore'] = None, write_queue: Optional['CacheWriteQueue'] = None, pre_cache_concurrency: int = 16, blob_store: Optional['BlobStore'] = None, variant_policy: Optional[VariantPolicy] = None, legacy_key_fallback: bool = True, remote_timeout: Optional['httpx.Timeout'] = None, remote_breaker: Optional['CircuitBreaker'] = None, negative_cache: Optional['NegativeCache'] = None, speech_trimmer: Optional['SpeechTrimmer'] = None, transcript_cache: Optional['TranscriptCache'] = None):
+        """
+        Initialize async OpenAI service.
+
+        Args:
+            api_key (str): OpenAI API key
+            supabase_url (str): Supabase project URL for caching
+            supabase_key (str): Supabase service key for caching
+            chat_model (str): Chat model to use for analysis
+            http_pool (AsyncHTTPPool): Shared async connection pool for upstream calls
+            access_log_path (str): Where to persist TTS request counts for cache hydration
+            tts_pipeline_workers (int): Reply sentences synthesized concurrently
+            local_cache_index (LocalCacheIndex): Size/LRU index that keeps local audio files within budget
+            packed_store (PackedAudioStore): Packed local tier for the permanent cache
+            write_queue (CacheWriteQueue): Write-behind queue for Supabase cache persistence
+            pre_cache_concurrency (int): Clips a pre-cache job synthesizes at once
+            blob_store (BlobStore): Where the permanent TTS tier keeps audio (defaults to Supabase bytea)
+            variant_policy (VariantPolicy): Picks the TTS model and format per content type
+                (defaults to tts-1-hd MP3 for everything)
+            legacy_key_fallback (bool): Also look up TTS clips under their pre-v2 cache keys
+            remote_timeout (httpx.Timeout): Timeouts for the TTS cache's Supabase calls
+            remote_breaker (CircuitBreaker): Drops the TTS cache to local-only while Supabase is failing
+            negative_cache (NegativeCache): Remembers remote TTS cache misses for a short TTL
+            speech_trimmer (SpeechTrimmer): Trims silence from WAV recordings before Whisper
+            transcript_cache (TranscriptCache): Transcripts of recently uploaded audio, so retries skip Whisper
+        """
+        from openai import AsyncOpenAI  # Deferred: heavy import
+
+        if http_pool:
+            self.client = AsyncOpenAI(api_key=api_key, http_client=http_pool.client(), timeout=http_pool.timeout)
+        else:
+            self.client = AsyncOpenAI(api_key=api_key)
+        self.chat_model = chat_model
+        self.speech_trimmer = speech_trimmer
+        self.transcript_cache = transcript_cache
+        self.local_cache_index = local_cache_index
+        self.variant_policy = variant_policy or VariantPolicy()
+        self.tts_pipeline = AsyncTTSPipeline(
+            self.text_to_speech, max_concurrency=tts_pipeline_workers, on_rendered=self._index_file,
+            variant_for=lambda content_type: self.variant_policy.choose(content_type, joinable=True)
+        )
+        # Coalesces concurrent generation of the same audio (tasks and workers)
+        self.single_flight = AsyncSingleFlight()
+        # Legacy cache; only touched from the event loop thread
+        self.tts_cache: Dict[str, str] = {}
+        # Fire-and-forget cache uploads, referenced until done so they aren't collected
+        self._background_tasks: Set[asyncio.Task] = set()
+
+        if supabase_url and supabase_key:
+            self.tts_cache_service = AsyncTTSCacheService(supabase_url, supabase_key, http_pool=http_pool, access_log_path=access_log_path, local_index=local_cache_index, packed_store=packed_store, write_queue=write_queue, blob_store=blob_store, legacy_key_fallback=legacy_key_fallback, remote_timeout=remote_timeout, remote_breaker=remote_breaker, negative_cache=negative_cache)
+        else:
+            self.tts_cache_service = None
+
+        # Warms the static interview audio, all missing clips at once
+        self.pre_cache = AsyncPreCacheEngine(
+            self.find_cached_many,
+            lambda text, voice, content_type: self._generate_speech(text, voice, "/tmp", content_type, raise_errors=True),
+            max_concurrency=pre_cache_concurrency
+        )
+
+    def _get_legacy_cached(self, cache_key: str) -> Optional[str]:
+        """Look up a legacy cache entry, dropping it if the file is gone"""
+        cached_path = self.tts_cache.get(cache_key)
+        if cached_path is None:
+            return None
+        if Path(cached_path).exists():
+            self._touch_file(cached_path)
+            return cached_path
+        # Remove stale (evicted) cache entry
+        self.tts_cache.pop(cache_key, None)
+        return None
+
+    def _index_file(self, path: str, content_type: Optional[str] = None) -> None:
+        """Add a generated audio file to the local eviction index"""
+        if self.local_cache_index:
+            self.local_cache_index.add(path, content_type)
+
+    def _touch_file(self, path: str) -> None:
+        """Record a hit on a generated audio file for LRU eviction"""
+        if self.local_cache_index:
+            self.local_cache_index.touch(path)
+
+    def choose_variant(self, content_type: str = "narrative", **hints) -> TTSVariant:
+        """
+        TTS variant (model and format) for a request.
+
+        Args:
+            content_type (str): Type of content (narrative, question, response, etc.)
+            **hints: Client hints, as for VariantPolicy.choose
+
+        Returns:
+            TTSVariant: The variant to generate or look up
+        """
+        return self.variant_policy.choose(content_type, **hints)
+
+    def open_cached_speech(self, text: str, voice: str = "nova", content_type: str = "narrative", variant: Optional[TTSVariant] = None) -> Optional['PackedAudio']:
+        """
+        Look up cached speech in the packed local store, without copying it.
+
+        Args:
+            text (str): Text to speak
+            voice (str): Voice to use
+            content_type (str): Type of content for caching (narrative, question, etc.)
+            variant (TTSVariant): Model and format (defaults to the policy's choice for content_type)
+
+        Returns:
+            PackedAudio: The cached clip, or None (a miss, or no packed store configured)
+        """
+        if not self.tts_cache_service:
+            return None
+        variant = variant or self.variant_policy.choose(content_type)
+        audio = self.tts_cache_service.open_local_audio(text, voice, variant, content_type)
+        if audio is not None:
+            self.tts_cache_service.record_access(text, voice, content_type, variant)
+        return audio
+
+    async def find_audio(self, content_hash: str, audio_format: str = 'mp3', remote: bool = True) -> Optional[Union['PackedAudio', str]]:
+        """
+        Find stored speech by content hash (see tts_variants.content_hash), for /api/audio.
+
+        Args:
+            content_hash (str): Hash from the audio URL
+            audio_format (str): Format from the audio URL's extension
+            remote (bool): Download the clip from the permanent tier on a local miss
+
+        Returns:
+            PackedAudio or str: A packed clip or an audio file path, or None if unknown
+        """
+        if self.tts_cache_service:
+            audio = self.tts_cache_service.open_packed(content_hash)
+            if audio is not None:
+                return audio
+
+        cached_file = self._get_legacy_cached(content_hash)
+        if cached_file:
+            return cached_file
+
+        # Generated by another worker, or a reply joined by the sentence pipeline
+        speech_file = Path("/tmp") / f"tts_cache_{content_hash}.{audio_format}"
+        if speech_file.exists():
+            return str(speech_file)
+
+        if not self.tts_cache_service:
+            return None
+        if not remote:
+            return self.tts_cache_service.get_local_audio_by_hash(content_hash, audio_format)
+        return await self.tts_cache_service.get_cached_audio_by_hash(content_hash, audio_format)
+
+    def signed_audio_url(self, content_hash: str, expires_in: int = 3600) -> Optional[str]:
+        """Presigned blob store URL for stored speech (None without a blob store that signs URLs)"""
+        if not self.tts_cache_service:
+            return None
+        return self.tts_cache_service.signed_url(content_hash, expires_in)
+
+    async def get_cached_speech(self, text: str, voice: str = "nova", content_type: str = "narrative", variant: Optional[TTSVariant] = None) -> Optional[str]:
+        """
+        Look up already-generated speech in the permanent and legacy caches.
+
+        Args:
+            text (str): Text to speak
+            voice (str): Voice to use
+            content_type (str): Type of content for caching (narrative, question, etc.)
+            variant (TTSVariant): Model and format (defaults to the policy's choice for content_type)
+
+        Returns:
+            str: Path to the cached audio file or None on a miss
+        """
+        variant = variant or self.variant_policy.choose(content_type)
+
+        # Check permanent cache first
+        if self.tts_cache_service:
+            self.tts_cache_service.record_access(text, voice, content_type, variant)
+            cached_path = await self.tts_cache_service.get_cached_audio(text, voice, variant, content_type)
+            if cached_path:
+                print(f"Using permanently cached TTS for: {text[:50]}...")
+                return cached_path
+
+        cached_file = self._get_legacy_cached(clip_key(text, voice, variant))
+        if cached_file:
+            print(f"Using legacy cached TTS for: {text[:50]}...")
+            return cached_file
+        return None
+
+    async def _find_generated(self, text: str, voice: str, cache_key: str, speech_file: Path, variant: TTSVariant, stream: bool = False) -> Optional[Union[str, 'PackedAudio']]:
+        """Pick up audio another task or worker generated while we waited for the flight
+
+        With stream, a packed-store hit comes back as its PackedAudio slice (for
+        callers that only stream the bytes) instead of being copied to a file.
+        """
+        if self.tts_cache_service:
+            if stream:
+                local_path = self.tts_cache_service.find_local_audio(text, voice, variant)
+            else:
+                local_path = self.tts_cache_service.get_local_audio(text, voice, variant)
+            if local_path:
+                return local_path
+
+        cached_file = self._get_legacy_cached(cache_key)
+        if cached_file:
+            return cached_file
+
+        # Written by rename, so if it exists it is complete
+        if speech_file.exists():
+            self.tts_cache[cache_key] = str(speech_file)
+            self._touch_file(speech_file)
+            return str(speech_file)
+        return None
+
+    async def _generate_speech(self, text: str, voice: str, output_dir: str, content_type: str, raise_errors: bool = False, variant: Optional[TTSVariant] = None) -> Optional[str]:
+        """Call OpenAI for uncached speech, once per text/voice/variant however many requests want it.
+
+        Returns None on failure, or raises when raise_errors is set (for callers that retry).
+        """
+        variant = variant or self.variant_policy.choose(content_type)
+        cache_key = clip_key(text, voice, variant)
+        speech_file = Path(output_dir) / f"tts_cache_{cache_key}.{variant.audio_format}"
+
+        async def generate():
+            try:
+                # Write under a temporary name so readers never see a partial file.
+                # Streamed straight to disk: the clip is never held in memory.
+                partial_file = speech_file.with_suffix(f".{id(asyncio.current_task())}.part")
+                try:
+                    with metrics.timer('upstream_request_duration_seconds', span='tts', upstream='openai', operation='tts'):
+                        async with self.client.audio.speech.with_streaming_response.create(
+                            model=variant.model,
+                            voice=voice,
+                            input=text,
+                            response_format=variant.audio_format,
+                            speed=variant.speed
+                        ) as response:
+                            with open(partial_file, 'wb') as f:
+                                async for chunk in response.iter_bytes(CHUNK_SIZE):
+                                    f.write(chunk)
+                    os.replace(partial_file, speech_file)
+                finally:
+                    partial_file.unlink(missing_ok=True)
+
+                self.tts_cache[cache_key] = str(speech_file)
+                self._index_file(speech_file, content_type)
+
+                # Cache permanently if service available
+                if self.tts_cache_service:
+                    await self.tts_cache_service.cache_audio(text, voice, str(speech_file), content_type, variant)
+
+                print(f"Generated and cached TTS for: {text[:50]}...")
+                return str(speech_file)
+
+            except Exception as e:
+                print(f"Error generating speech: {e}")
+                if raise_errors:
+                    raise
+                return None
+
+        return await self.single_flight.do(
+            cache_key, generate,
+            recheck=lambda: self._find_generated(text, voice, cache_key, speech_file, variant)
+        )
+
+    async def text_to_speech(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "narrative", variant: Optional[TTSVariant] = None) -> Optional[str]:
+        """
+        Converts text to speech using OpenAI TTS with permanent caching.
+
+        Concurrent requests for the same uncached text and voice share a
+        single OpenAI call, across tasks and workers.
+
+        Args:
+            text (str): Text to speak
+            voice (str): Voice to use (alloy, echo, fable, onyx, nova, shimmer)
+            output_dir (str): Directory to save audio file
+            content_type (str): Type of content for caching (narrative, question, etc.)
+            variant (TTSVariant): Model and format (defaults to the policy's choice for content_type)
+
+        Returns:
+            str: Path to the saved audio file or None if error
+        """
+        try:
+            variant = variant or self.variant_policy.choose(content_type)
+            cached_path = await self.get_cached_speech(text, voice, content_type, variant)
+            if cached_path:
+                return cached_path
+
+            return await self._generate_speech(text, voice, output_dir, content_type, variant=variant)
+
+        except Exception as e:
+            print(f"Error generating speech: {e}")
+            return None
+
+    async def stream_speech(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "narrative", chunk_size: int = 4096, variant: Optional[TTSVariant] = None) -> AsyncIterator[bytes]:
+        """
+        Generate speech and yield audio chunks as they arrive from OpenAI.
+
+        Chunks are also written to a partial file that is renamed into the
+        cache only once the stream completes; an aborted stream leaves
+        nothing behind. If the same audio is already being generated
+        elsewhere, waits for it and yields the finished file. Check
+        get_cached_speech first.
+
+        Args:
+            text (str): Text to speak
+            voice (str): Voice to use (alloy, echo, fable, onyx, nova, shimmer)
+            output_dir (str): Directory to save audio file
+            content_type (str): Type of content for caching (narrative, question, etc.)
+            chunk_size (int): Bytes per yielded chunk
+            variant (TTSVariant): Model and format (defaults to the policy's choice for content_type)
+
+        Yields:
+            bytes: Audio data
+        """
+        variant = variant or self.variant_policy.choose(content_type)
+        cache_key = clip_key(text, voice, variant)
+        speech_file = Path(output_dir) / f"tts_cache_{cache_key}.{variant.audio_format}"
+
+        flight = self.single_flight.try_lead(cache_key)
+        audio_path = None
+        if flight is not None:
+            audio_path = await self._find_generated(text, voice, cache_key, speech_file, variant, stream=True)
+            if audio_path:
+                # Waiters want a path; on a packed hit they look it up themselves
+                flight.done(audio_path if isinstance(audio_path, str) else None)
+        else:
+            audio_path = await self._generate_speech(text, voice, output_dir, content_type, variant=variant)
+            if not audio_path:
+                raise RuntimeError("Failed to generate speech")
+
+        if audio_path and not isinstance(audio_path, str):
+            # A packed clip, sliced straight from the mapped segment
+            for start in range(0, audio_path.length, chunk_size):
+                yield audio_path.view[start:start + chunk_size].tobytes()
+            return
+        if audio_path:
+            f = await asyncio.to_thread(open, audio_path, 'rb')
+            try:
+                while chunk := await asyncio.to_thread(f.read, chunk_size):
+                    yield chunk
+            finally:
+                f.close()
+            return
+
+        partial_file = speech_file.with_suffix(f".{id(asyncio.current_task())}.part")
+        result = None
+        try:
+            with metrics.timer('upstream_request_duration_seconds', span='tts', upstream='openai', operation='tts') as stopwatch:
+                async with self.client.audio.speech.with_streaming_response.create(
+                    model=variant.model,
+                    voice=voice,
+                    input=text,
+                    response_format=variant.audio_format,
+                    speed=variant.speed
+                ) as response:
+                    # Small appends land in the page cache; not worth a thread hop per chunk
+                    with open(partial_file, 'wb') as f:
+                        async for chunk in response.iter_bytes(chunk_size):
+                            f.write(chunk)
+                            # Not the time the client takes to read it
+                            with stopwatch.paused():
+                                yield chunk
+            os.replace(partial_file, speech_file)
+            self.tts_cache[cache_key] = str(speech_file)
+            self._index_file(speech_file, content_type)
+            result = str(speech_file)
+        finally:
+            partial_file.unlink(missing_ok=True)
+            flight.done(result)
+
+        # The client already has every byte; don't make it wait on the Supabase upload
+        if self.tts_cache_service:
+            task = asyncio.create_task(
+                self.tts_cache_service.cache_audio(text, voice, str(speech_file), content_type, variant)
+            )
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        print(f"Streamed and cached TTS for: {text[:50]}...")
+
+    async def transcribe_audio(self, audio: Union[str, Tuple[str, BinaryIO]]) -> Optional[str]:
+        """
+        Transcribes speech to text using OpenAI Whisper.
+
+        With a transcript cache, audio transcribed recently (a retried upload) is
+        answered from it, and concurrent uploads of the same audio share one
+        Whisper call, across coroutines and workers.
+
+        Args:
+            audio (str | tuple): Path to the audio file, or (filename, stream) of an upload
+
+        Returns:
+            str: Transcribed text or None if error
+        """
+        try:
+            if isinstance(audio, tuple):
+                # A spilled upload is read from disk; keep that off the event loop
+                filename, stream = audio
+                audio_data = await asyncio.to_thread(stream.read)
+                # Hashed by the upload buffer as the request arrived (see spooled_file)
+                content_hash = getattr(stream, 'sha256', None)
+            else:
+                audio_file = Path(audio)
+                filename = audio_file.name
+                audio_data = await asyncio.to_thread(audio_file.read_bytes)
+                content_hash = None
+            if self.transcript_cache is None:
+                return await self._whisper(filename, audio_data)
+
+            content_hash = content_hash or await asyncio.to_thread(lambda: hashlib.sha256(audio_data).hexdigest())
+            transcript = await asyncio.to_thread(self.transcript_cache.get, content_hash)
+            metrics.inc('transcript_cache_lookups_total', result='miss' if transcript is None else 'hit')
+            if transcript is not None:
+                print(f"[TranscriptCache] Hit for {filename} ({len(audio_data)} bytes)")
+                return transcript
+            return await self.single_flight.do(
+                f"transcript-{content_hash}",
+                lambda: self._whisper(filename, audio_data, content_hash),
+                recheck=lambda: asyncio.to_thread(self.transcript_cache.get, content_hash)
+            )
+
+        except FileNotFoundError:
+            print(f"Error: Audio file not found at {audio}")
+            return None
+        except Exception as e:
+            print(f"Error transcribing audio: {e}")
+            return None
+
+    async def _whisper(self, filename: str, audio_data: bytes, content_hash: Optional[str] = None) -> str:
+        """Trim and transcribe audio, caching the transcript under content_hash"""
+        if self.speech_trimmer:
+            filename, audio_data = await asyncio.to_thread(self.speech_trimmer.prepare, filename, audio_data)
+        with metrics.timer('upstream_request_duration_seconds', span='whisper', upstream='openai', operation='whisper'):
+            transcript = await self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=(filename, audio_data)
+            )
+        if content_hash and self.transcript_cache:
+            await asyncio.to_thread(self.transcript_cache.put, content_hash, transcript.text)
+        return transcript.text
+
+    async def analyze_response(self, question: str, transcript_text: str) -> Optional[str]:
+        """
+        Analyzes a transcribed answer for emotions, themes, and personal values.
+
+        Args:
+            question (str): The question that was asked
+            transcript_text (str): The transcribed answer
+
+        Returns:
+            str: AI-generated summary or None if error
+        """
+        try:
+            with metrics.timer('upstream_request_duration_seconds', span='chat', upstream='openai', operation='chat'):
+                response = await self.client.chat.completions.create(
+                    model=self.chat_model,
+                    messages=response_messages(question, transcript_text),
+                    temperature=0.8
+                )
+            return response.choices[0].message.content.strip()
+
+        except Exception as e:
+            print(f"Error generating AI response: {e}")
+            return None
+
+    async def analyze_followup_response(self, original_question: str, original_answer: str, followup_answer: str, voice: str = "nova") -> tuple[Optional[str], Optional[str]]:
+        """
+        Analyze a follow-up response with context from the original question and answer.
+
+        Args:
+            original_question (str): The original question that was asked
+            original_answer (str): The original answer given
+            followup_answer (str): The follow-up response
+            voice (str): Voice to use for TTS
+
+        Returns:
+            tuple: (ai_response, tts_file_path) or (None, None) if error
+        """
+        try:
+            with metrics.timer('upstream_request_duration_seconds', span='chat', upstream='openai', operation='chat'):
+                response = await self.client.chat.completions.create(
+                    model=self.chat_model,
+                    messages=followup_messages(original_question, original_answer, followup_answer),
+                    temperature=0.8
+                )
+            ai_response = response.choices[0].message.content.strip()
+
+            # Generate TTS for the response, sentences in parallel
+            tts_path = await self.tts_pipeline.render(ai_response, voice)
+
+            return ai_response, tts_path
+
+        except Exception as e:
+            print(f"Error generating follow-up analysis: {e}")
+            return None, None
+
+    async def analyze_and_prepare_tts(self, question: str, transcript_text: str, voice: str = "nova") -> tuple[Optional[str], Optional[str]]:
+        """
+        Analyze response and prepare TTS, with the same time limits as the sync service.
+
+        Args:
+            question (str): The question that was asked
+            transcript_text (str): The transcribed answer
+            voice (str): Voice to use for TTS
+
+        Returns:
+            tuple: (ai_response, tts_file_path) or (None, None) if error
+        """
+        try:
+            ai_response = await asyncio.wait_for(self.analyze_response(question, transcript_text), timeout=10)
+            if not ai_response:
+                return None, None
+
+            tts_path = await asyncio.wait_for(self.tts_pipeline.render(ai_response, voice), timeout=15)
+            return ai_response, tts_path
+
+        except Exception as e:
+            print(f"Error in parallel processing: {e}")
+            return None, None
+
+    async def analyze_full_session(self, session_data: list) -> Optional[Dict]:
+        """
+        Analyze a complete life review session with all Q&A pairs.
+
+        Args:
+            session_data (list): List of dicts with 'question' and 'answer' keys
+
+        Returns:
+            Dict: Comprehensive analysis with themes, insights, personality traits, and metrics
+        """
+        try:
+            with metrics.timer('upstream_request_duration_seconds', span='chat', upstream='openai', operation='chat'):
+                response = await self.client.chat.completions.create(
+                    model=self.chat_model,
+                    messages=session_messages(session_data),
+                    temperature=0.7,
+                    response_format={"type": "json_object"}
+                )
+            return json.loads(response.choices[0].message.content.strip())
+
+        except Exception as e:
+            print(f"Error generating session analysis: {e}")
+            return None
+
+    async def find_cached_many(self, texts: List[str], voice: str, content_type: str = "narrative") -> Dict[str, Optional[str]]:
+        """
+        Look up many texts in the legacy and permanent caches at once.
+
+        Args:
+            texts (List[str]): Texts to look up
+            voice (str): Voice to use
+            content_type (str): Type of content, which picks the variant looked up
+
+        Returns:
+            Dict[str, Optional[str]]: Mapping of text to cached audio path (None on a miss)
+        """
+        variant = self.variant_policy.choose(content_type)
+        paths = {text: self._get_legacy_cached(clip_key(text, voice, variant)) for text in texts}
+        missing = [text for text, path in paths.items() if path is None]
+        if self.tts_cache_service and missing:
+            paths.update(await self.tts_cache_service.get_cached_audio_many(missing, voice, variant, content_type))
+        return paths
+
+    async def pre_cache_narratives(self, narratives: list, voice: str = "nova", output_dir: str = "/tmp") -> Dict[str, bool]:
+        """
+        Pre-cache common narratives for faster loading using permanent storage.
+
+        Runs as a pre-cache job (see PreCacheEngine): every uncached narrative is
+        generated concurrently, and only one job runs at a time across workers.
+
+        Args:
+            narratives (list): List of narrative texts to cache
+            voice (str): Voice to use for caching
+            output_dir (str): Kept for compatibility; clips are generated into the shared cache
+
+        Returns:
+            Dict[str, bool]: Mapping of narrative to success status (of the job already
+                running, if there is one)
+        """
+        report = await self.pre_cache.run([voice], [(narrative, voice, 'narrative') for narrative in narratives])
+        statuses = {item['text']: item['status'] for item in report['items'] if item['voice'] == voice}
+        return {narrative: statuses.get(narrative) in ('cached', 'generated') for narrative in narratives}
@@ -0,0 +1,254 @@
+"""
+Async TTS Cache Service for the ASGI serving mode
+Shares the local tier with TTSCacheService and talks to Supabase through
+the async PostgREST client
+"""
+import asyncio
+from typing import Optional, Dict, List, TYPE_CHECKING
+
+from . import metrics, tracing
+from .circuit_breaker import CircuitOpenError
+from .tts_cache_service import TTSCacheService, blob_rows, cache_rows
+from .tts_variants import DEFAULT_VARIANT, TTSVariant
+
+if TYPE_CHECKING:
+    from .blob_store import BlobStore
+
+
+class AsyncTTSCacheService(TTSCacheService):
+    """TTS cache whose Supabase round trips are awaitable"""
+
+    def _init_supabase(self, supabase_url: str, supabase_key: str, http_pool) -> None:
+        """Initialize the async PostgREST client if credentials provided"""
+        # supabase-py 2.0 has no async client; PostgREST is the only part we use
+        self.supabase = None
+        self.supabase_enabled = False
+        if not (supabase_url and supabase_key):
+            return
+
+        # The loop that owns the PostgREST session; the write-behind thread submits its writes to it
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+
+        try:
+            from postgrest import AsyncPostgrestClient  # Deferred: heavy import
+            self.postgrest = AsyncPostgrestClient(
+                f"{supabase_url.rstrip('/')}/rest/v1",
+                headers={
+                    'apikey': supabase_key,
+                    'Authorization': f"Bearer {supabase_key}",
+                },
+                **({'timeout': self.remote_timeout} if self.remote_timeout is not None else {})
+            )
+            if http_pool:
+                session = self.postgrest.session
+                self.postgrest.session = http_pool.client(
+                    base_url=session.base_url,
+                    headers=session.headers,
+                    timeout=self.remote_timeout or http_pool.timeout
+                )
+            self._supabase_rest = (self.postgrest.session.base_url, self.postgrest.session.headers)
+            self.supabase_enabled = True
+        except Exception as e:
+            print(f"Failed to initialize async Supabase client: {e}")
+
+    def _default_blob_store(self) -> 'BlobStore':
+        """Bytea blob store on a sync PostgREST client of its own (blob I/O runs in worker threads)"""
+        import httpx  # Deferred: heavy import
+        from .blob_store import ByteaBlobStore
+        base_url, headers = self._supabase_rest
+        return ByteaBlobStore(
+            httpx.Client(base_url=base_url, headers=headers, timeout=self.remote_timeout or httpx.Timeout(60.0, connect=5.0)),
+            owns_client=True
+        )
+
+    async def _remote_async(self, operation, *args):
+        """_remote() for coroutine functions (blocking calls go through asyncio.to_thread)"""
+        if self.remote_breaker is None:
+            return await operation(*args)
+        return await self.remote_breaker.call_async(operation, *args)
+
+    async def get_cached_audio(self, text: str, voice: str, variant: Optional[TTSVariant] = None, content_type: Optional[str] = None) -> Optional[str]:
+        """
+        Get cached audio file path (local or Supabase).
+
+        Args:
+            text (str): Text content
+            voice (str): Voice type
+            variant (TTSVariant): Model and format (defaults to DEFAULT_VARIANT)
+            content_type (str): Type of content, for the lookup metrics
+
+        Returns:
+            str: Path to cached audio file or None if not found
+        """
+        return (await self.get_cached_audio_many([text], voice, variant, content_type))[text]
+
+    async def get_cached_audio_by_hash(self, content_hash: str, audio_format: str = 'mp3') -> Optional[str]:
+        """get_cached_audio() for a content hash (as in /api/audio URLs)"""
+        return (await self._get_cached_many([content_hash], audio_format))[content_hash]
+
+    async def get_cached_audio_many(self, texts: List[str], voice: str, variant: Optional[TTSVariant] = None, content_type: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """
+        Get cached audio file paths for many texts at once.
+
+        Local misses are fetched from the blob store in batches (one joined
+        round trip per REMOTE_BATCH_SIZE keys for bytea), not one key at a time.
+
+        Args:
+            texts (List[str]): Text contents
+            voice (str): Voice type
+            variant (TTSVariant): Model and format (defaults to DEFAULT_VARIANT)
+            content_type (str): Type of content, for the lookup metrics
+
+        Returns:
+            Dict[str, Optional[str]]: Mapping of text to cached audio path (None if not cached)
+        """
+        with tracing.span('cache_lookup'):
+            variant = variant or DEFAULT_VARIANT
+            hashes = {text: self._get_content_hash(text, voice, variant) for text in texts}
+            legacy = self._legacy_keys(hashes, voice, variant)
+            paths, sources = self._lookup_local_many(list(hashes.values()), variant.audio_format, legacy)
+            remote = self._remote_candidates([content_hash for content_hash, path in paths.items() if path is None])
+
+            # Check the permanent tier if enabled
+            rekey: Dict[str, str] = {}
+            if remote:
+                try:
+                    fetched = await self._remote_async(asyncio.to_thread, self._fetch_remote, *self._remote_request(remote, legacy), variant.audio_format)
+                    rekey = self._merge_fetched(paths, sources, remote, legacy, fetched)
+                    self._remember_misses(remote, paths)
+                except CircuitOpenError:
+                    pass  # Local-only until Supabase recovers
+                except Exception as e:
+                    print(f"Error retrieving from Supabase cache: {e}")
+
+            if rekey:
+                # Journals the re-keyed clips for upload
+                await asyncio.to_thread(self._record_lookups, hashes, voice, paths, sources, rekey, content_type, variant)
+            else:
+                self._record_lookups(hashes, voice, paths, sources, rekey, content_type, variant)
+            return {text: paths[content_hash] for text, content_hash in hashes.items()}
+
+    async def _get_cached_many(self, content_hashes: List[str], audio_format: str = 'mp3') -> Dict[str, Optional[str]]:
+        """Local tier first, then one batched blob store fetch for the misses"""
+        # Check memory and local file system first
+        paths = {content_hash: self._lookup_local(content_hash, audio_format) for content_hash in content_hashes}
+        remote = self._remote_candidates([content_hash for content_hash, path in paths.items() if path is None])
+
+        # Check the permanent tier if enabled
+        if remote:
+            try:
+                fetched = await self._remote_async(asyncio.to_thread, self._fetch_remote, remote, {}, audio_format)
+                paths.update({content_hash: path for content_hash, (path, _) in fetched.items()})
+                self._remember_misses(remote, paths)
+            except CircuitOpenError:
+                pass  # Local-only until Supabase recovers
+            except Exception as e:
+                print(f"Error retrieving from Supabase cache: {e}")
+
+        return paths
+
+    async def cache_audio(self, text: str, voice: str, audio_file_path: str, content_type: str = 'narrative', variant: Optional[TTSVariant] = None) -> bool:
+        """
+        Cache audio file both locally and in Supabase.
+
+        Args:
+            text (str): Text content
+            voice (str): Voice type
+            audio_file_path (str): Path to audio file
+            content_type (str): Type of content (narrative, question, etc.)
+            variant (TTSVariant): Model and format the audio was generated with
+
+        Returns:
+            bool: Success status
+        """
+        try:
+            variant = variant or DEFAULT_VARIANT
+            content_hash = self._get_content_hash(text, voice, variant)
+
+            # Store locally
+            local_path = await asyncio.to_thread(self._store_local, content_hash, audio_file_path, content_type, variant.audio_format)
+            if self.negative_cache is not None:
+                self.negative_cache.discard(content_hash)
+
+            if not self.supabase_enabled:
+                print(f"Cached audio locally for: {text[:50]}... (hash: {content_hash})")
+                return True
+
+            if self.write_queue:
+                # Persisted in the background; the clip is already served locally
+                return await asyncio.to_thread(self.write_queue.submit, content_hash, text, voice, content_type, str(local_path))
+
+            await self._remote_async(self._persist_batch_async, [{
+                'content_hash': content_hash,
+                'text': text,
+                'voice': voice,
+                'content_type': content_type,
+                'audio_path': str(local_path),
+                'journal_path': str(local_path)
+            }])
+            print(f"Cached audio for: {text[:50]}... (hash: {content_hash})")
+            return True
+
+        except CircuitOpenError:
+            print(f"Cached audio locally for: {text[:50]}... (Supabase unavailable)")
+            return True
+        except Exception as e:
+            print(f"Error caching audio: {e}")
+
+        return False
+
+    async def _persist_batch_async(self, entries: List[dict]) -> None:
+        """Upsert a batch of clips into Supabase (see TTSCacheService._persist_batch)"""
+        with metrics.timer('upstream_request_duration_seconds', span='cache_write', upstream='supabase', operation='tts_cache.upsert'):
+            cache_result = await self.postgrest.from_('tts_cache').upsert(cache_rows(entries), on_conflict='content_hash').execute()
+
+        # Audio, streamed from disk
+        with metrics.timer('upstream_request_duration_seconds', span='cache_write', upstream='blob_store', operation='put'):
+            await asyncio.to_thread(self.blob_store.put_many, blob_rows(entries, cache_result.data))
+
+    def _persist_batch(self, entries: List[dict]) -> None:
+        """Write-behind thread entry point: run the batch on the event loop"""
+        if self._loop is None or self._loop.is_closed():
+            raise RuntimeError("event loop not available")
+        asyncio.run_coroutine_threadsafe(self._persist_batch_async(entries), self._loop).result()
+
+    async def pre_cache_narratives(self, narratives: List[str], voice: str = "nova", content_type: str = "narrative") -> Dict[str, bool]:
+        """Report which narratives are already cached"""
+        cached = await self.get_cached_audio_many(narratives, voice)
+        return {narrative: path is not None for narrative, path in cached.items()}
+
+    async def _count_remote_async(self) -> int:
+        """Active tts_cache rows"""
+        with metrics.timer('upstream_request_duration_seconds', upstream='supabase', operation='tts_cache.count'):
+            result = await self.postgrest.from_('tts_cache').select('id', count='exact').eq('is_active', True).execute()
+        return result.count or 0
+
+    async def get_cache_stats(self) -> Dict[str, int]:
+        """Get cache statistics"""
+        local_stats = self._local_stats()
+        try:
+            supabase_count = 0
+            if self.supabase_enabled:
+                supabase_count = await self._remote_async(self._count_remote_async)
+
+            return {
+                'supabase_entries': supabase_count,
+                **local_stats,
+                'memory_cache': len(self.local_cache),
+                'supabase_enabled': self.supabase_enabled,
+                **self.lookup_stats.snapshot(),
+                **self._remote_stats()
+            }
+        except Exception as e:
+            print(f"Error getting cache stats: {e}")
+            return {
+                'supabase_entries': 0,
+                **local_stats,
+                'memory_cache': len(self.local_cache),
+                'supabase_enabled': False,
+                **self.lookup_stats.snapshot(),
+                **self._remote_stats()
+            }
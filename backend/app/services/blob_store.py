@@ -0,0 +1,494 @@
+"""
+Blob backends for permanent TTS audio.
+
+The tts_cache table indexes the permanent tier; the audio bytes themselves
+live in a BlobStore:
+
+- ByteaBlobStore: the tts_cache_files bytea column (the original layout).
+  PostgREST sends bytea as a hex (or base64) JSON string, so downloads are
+  decoded as they stream in rather than parsed as one document.
+- S3BlobStore: any S3-compatible bucket (Supabase Storage through its S3
+  endpoint, Tigris, R2, MinIO). Objects can be handed out as presigned
+  URLs, so clients fetch the bytes without going through the app.
+- LocalBlobStore: a directory, e.g. a mounted volume.
+
+Every backend moves audio between files and the network in chunks; a clip
+is never held in memory.
+"""
+import base64
+import binascii
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, IO, Iterator, List, NamedTuple, Optional
+from urllib.parse import quote
+
+import httpx
+
+from .tts_variants import AUDIO_FORMATS
+
+# Blobs move in chunks of this size
+CHUNK_SIZE = 64 * 1024
+
+# Keys per ByteaBlobStore download, which keeps each response to a few MB of audio
+REMOTE_BATCH_SIZE = 25
+
+# Columns a bytea download needs, with the audio embedded from tts_cache_files (no content_text)
+REMOTE_COLUMNS = 'content_hash,content_type,tts_cache_files(file_data)'
+
+# PostgREST upsert of tts_cache_files that merges on cache_id
+UPLOAD_HEADERS = {'Content-Type': 'application/json', 'Prefer': 'resolution=merge-duplicates,return=minimal'}
+
+
+class Blob(NamedTuple):
+    """One clip to upload"""
+    content_hash: str
+    path: str
+    size: int
+    content_type: Optional[str] = None
+    cache_id: Optional[str] = None  # tts_cache row id (only ByteaBlobStore needs it)
+
+
+class BlobStore:
+    """Where the permanent TTS tier keeps audio bytes"""
+
+    def put_many(self, blobs: List[Blob]) -> None:
+        """
+        Upload clips, replacing any already stored under the same hash.
+
+        Args:
+            blobs (List[Blob]): Clips to upload
+
+        Raises:
+            Exception: If the upload fails
+        """
+        raise NotImplementedError
+
+    def fetch_many(self, content_hashes: List[str], destination: Callable[[str], Path]) -> Dict[str, Optional[str]]:
+        """
+        Download the stored clips among content_hashes.
+
+        Args:
+            content_hashes (List[str]): Clips to look for
+            destination (Callable): content_hash -> file to write that clip to
+
+        Returns:
+            Dict[str, Optional[str]]: content_hash -> content type of each clip downloaded
+                (clips that aren't stored are left out)
+
+        Raises:
+            Exception: If the backend can't be reached
+        """
+        raise NotImplementedError
+
+    def signed_url(self, content_hash: str, expires_in: int = 3600) -> Optional[str]:
+        """Time-limited URL clients can fetch the clip from directly (None if unsupported)"""
+        return None
+
+    def close(self) -> None:
+        """Release connections (no-op unless the store owns them)"""
+
+
+def _copy_into(destination: Path, source: IO) -> None:
+    """Copy a stream into a file in chunks"""
+    with open(destination, 'wb') as f:
+        shutil.copyfileobj(source, f, CHUNK_SIZE)
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files in a directory (<hash>, with the content type in <hash>.type)"""
+
+    def __init__(self, directory: str):
+        """
+        Initialize the store.
+
+        Args:
+            directory (str): Where to keep the clips (a mounted volume survives restarts)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, content_hash: str) -> Path:
+        # The hash names the variant, format included, so the file needs no extension
+        return self.directory / content_hash
+
+    def put_many(self, blobs: List[Blob]) -> None:
+        for blob in blobs:
+            target = self._path(blob.content_hash)
+            tmp_path = target.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.unlink(missing_ok=True)
+            try:
+                os.link(blob.path, tmp_path)
+            except OSError:
+                shutil.copyfile(blob.path, tmp_path)
+            target.with_suffix('.type').write_text(blob.content_type or '')
+            os.replace(tmp_path, target)
+
+    def fetch_many(self, content_hashes: List[str], destination: Callable[[str], Path]) -> Dict[str, Optional[str]]:
+        fetched = {}
+        for content_hash in content_hashes:
+            try:
+                with open(self._path(content_hash), 'rb') as source:
+                    _copy_into(destination(content_hash), source)
+            except FileNotFoundError:
+                continue
+            try:
+                fetched[content_hash] = self._path(content_hash).with_suffix('.type').read_text() or None
+            except FileNotFoundError:
+                fetched[content_hash] = None
+        return fetched
+
+
+class _BlobDecoder:
+    """Decodes a bytea JSON string (\\x hex or base64) into a file as it arrives"""
+
+    def __init__(self, target: IO):
+        self.target = target
+        self.encoding: Optional[str] = None
+        self.pending = b''
+
+    def write(self, data: bytes) -> None:
+        data = self.pending + data
+        if self.encoding is None:
+            if len(data) < 3:
+                self.pending = data
+                return
+            # JSON escapes the backslash of the \x prefix
+            if data.startswith(b'\\\\x'):
+                self.encoding, data = 'hex', data[3:]
+            else:
+                self.encoding = 'base64'
+
+        # Decode whole units only (2 hex digits, 4 base64 characters), keep the rest for the next chunk
+        unit = 2 if self.encoding == 'hex' else 4
+        whole = len(data) - len(data) % unit
+        self.pending = data[whole:]
+        if whole:
+            decode = binascii.unhexlify if self.encoding == 'hex' else base64.b64decode
+            self.target.write(decode(data[:whole]))
+
+    def close(self) -> None:
+        if self.pending:
+            raise ValueError("Truncated bytea value")
+
+
+# A field of interest and the start of its value (a string or null)
+_FIELD = re.compile(rb'"(content_hash|content_type|file_data)"\s*:\s*("|null)')
+
+
+class _RowScanner:
+    """
+    Pulls (content_hash, content_type, file_data) out of a streamed PostgREST
+    response, writing each file_data to its destination as it arrives.
+
+    Relies on the shape REMOTE_COLUMNS asks for: the short string fields come
+    before file_data in each row, and no value contains a double quote
+    (hashes, content types, hex and base64 never do).
+    """
+
+    def __init__(self, destination: Callable[[str], Path]):
+        self.destination = destination
+        self.buffer = b''
+        self.row: Dict[str, Optional[str]] = {}
+        self.decoder: Optional[_BlobDecoder] = None
+        self.target: Optional[IO] = None
+        self.fetched: Dict[str, Optional[str]] = {}
+
+    def feed(self, chunk: bytes) -> None:
+        self.buffer += chunk
+        while self.buffer:
+            if self.decoder is not None:
+                end = self.buffer.find(b'"')
+                self.decoder.write(self.buffer if end < 0 else self.buffer[:end])
+                if end < 0:
+                    self.buffer = b''
+                    return
+                self.buffer = self.buffer[end + 1:]
+                self._finish_blob()
+                continue
+
+            match = _FIELD.search(self.buffer)
+            if match is None:
+                # Keep enough of the tail to match a field name split across chunks
+                self.buffer = self.buffer[-32:]
+                return
+            field, opening = match.group(1).decode(), match.group(2)
+            if opening == b'null':
+                self.row[field] = None
+                self.buffer = self.buffer[match.end():]
+            elif field == 'file_data':
+                self._start_blob()
+                self.buffer = self.buffer[match.end():]
+            else:
+                end = self.buffer.find(b'"', match.end())
+                if end < 0:
+                    self.buffer = self.buffer[match.start():]
+                    return
+                self.row[field] = self.buffer[match.end():end].decode()
+                self.buffer = self.buffer[end + 1:]
+
+    def _start_blob(self) -> None:
+        content_hash = self.row.get('content_hash')
+        if content_hash is None:
+            raise ValueError("file_data before content_hash in bytea response")
+        self.target = open(self.destination(content_hash), 'wb')
+        self.decoder = _BlobDecoder(self.target)
+
+    def _finish_blob(self) -> None:
+        try:
+            self.decoder.close()
+        finally:
+            self.target.close()
+            self.decoder = self.target = None
+        self.fetched[self.row['content_hash']] = self.row.get('content_type')
+
+    def close(self) -> None:
+        if self.target is not None:
+            self.target.close()  # Cut off mid-blob; the partial file is not reported
+            self.decoder = self.target = None
+
+
+def bytea_upload_body(blobs: List[Blob]) -> Iterator[bytes]:
+    """
+    tts_cache_files rows as a streamed JSON array body.
+
+    The audio goes in as hex bytea literals, read and encoded one chunk at a
+    time, so an upload never holds a clip in memory.
+    """
+    for index, blob in enumerate(blobs):
+        row = json.dumps({'cache_id': blob.cache_id, 'file_size': blob.size})[:-1].encode() + b', "file_data": "\\\\x'
+        yield (b'[' if index == 0 else b'"}, ') + row
+        with open(blob.path, 'rb') as f:
+            while chunk := f.read(CHUNK_SIZE):
+                yield chunk.hex().encode()
+    yield b'"}]'
+
+
+class ByteaBlobStore(BlobStore):
+    """Blobs in the tts_cache_files bytea column, through PostgREST"""
+
+    def __init__(self, client: httpx.Client, owns_client: bool = False):
+        """
+        Initialize the store.
+
+        Args:
+            client (httpx.Client): Client whose base URL is the PostgREST root (.../rest/v1)
+                and that sends the service key
+            owns_client (bool): Close the client in close()
+        """
+        self.client = client
+        self.owns_client = owns_client
+
+    def put_many(self, blobs: List[Blob]) -> None:
+        if not blobs:
+            return
+        self.client.post(
+            '/tts_cache_files',
+            params={'on_conflict': 'cache_id'},
+            headers=UPLOAD_HEADERS,
+            content=bytea_upload_body(blobs)
+        ).raise_for_status()
+
+    def fetch_many(self, content_hashes: List[str], destination: Callable[[str], Path]) -> Dict[str, Optional[str]]:
+        fetched = {}
+        for start in range(0, len(content_hashes), REMOTE_BATCH_SIZE):
+            batch = content_hashes[start:start + REMOTE_BATCH_SIZE]
+            scanner = _RowScanner(destination)
+            try:
+                with self.client.stream('GET', '/tts_cache', params={
+                    'select': REMOTE_COLUMNS,
+                    'content_hash': f"in.({','.join(batch)})",
+                    'is_active': 'eq.true'
+                }) as response:
+                    response.raise_for_status()
+                    for chunk in response.iter_bytes(CHUNK_SIZE):
+                        scanner.feed(chunk)
+            finally:
+                scanner.close()
+            fetched.update(scanner.fetched)
+        return fetched
+
+    def close(self) -> None:
+        if self.owns_client:
+            self.client.close()
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+class SigV4:
+    """AWS Signature Version 4 for S3-compatible object storage"""
+
+    UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+
+    def __init__(self, access_key: str, secret_key: str, region: str = 'us-east-1', service: str = 's3'):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.service = service
+
+    def _scope(self, datestamp: str) -> str:
+        return f"{datestamp}/{self.region}/{self.service}/aws4_request"
+
+    def _signature(self, method: str, path: str, query: Dict[str, str], headers: Dict[str, str],
+                   payload_hash: str, amz_date: str) -> str:
+        canonical_headers = ''.join(f"{name}:{headers[name].strip()}\n" for name in sorted(headers))
+        canonical_request = '\n'.join([
+            method,
+            quote(path, safe='/-_.~'),
+            '&'.join(f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}" for k, v in sorted(query.items())),
+            canonical_headers,
+            ';'.join(sorted(headers)),
+            payload_hash
+        ])
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256', amz_date, self._scope(amz_date[:8]),
+            hashlib.sha256(canonical_request.encode()).hexdigest()
+        ])
+        key = _hmac(_hmac(_hmac(_hmac(f"AWS4{self.secret_key}".encode(), amz_date[:8]), self.region), self.service), 'aws4_request')
+        return hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    def headers(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                payload_hash: str = UNSIGNED_PAYLOAD, now: Optional[datetime.datetime] = None) -> Dict[str, str]:
+        """
+        Sign a request with an Authorization header.
+
+        Args:
+            method (str): HTTP method
+            url (str): Full request URL (its query string is signed too)
+            headers (Dict[str, str]): Extra headers to sign (e.g. Content-Type, x-amz-meta-*)
+            payload_hash (str): SHA-256 of the body, or UNSIGNED-PAYLOAD for streamed bodies
+            now (datetime): Signing time (defaults to the current UTC time)
+
+        Returns:
+            Dict[str, str]: Headers to send, Authorization included
+        """
+        parsed = httpx.URL(url)
+        amz_date = (now or datetime.datetime.now(datetime.timezone.utc)).strftime('%Y%m%dT%H%M%SZ')
+        signed = {name.lower(): value for name, value in (headers or {}).items()}
+        signed.update({'host': parsed.netloc.decode(), 'x-amz-content-sha256': payload_hash, 'x-amz-date': amz_date})
+        signature = self._signature(method, parsed.path, dict(parsed.params), signed, payload_hash, amz_date)
+        signed['authorization'] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{self._scope(amz_date[:8])}, "
+            f"SignedHeaders={';'.join(sorted(signed))}, Signature={signature}"
+        )
+        del signed['host']  # Sent by the client from the URL
+        return signed
+
+    def presign(self, method: str, url: str, expires_in: int, now: Optional[datetime.datetime] = None) -> str:
+        """
+        Presigned URL for a request (query-string authentication).
+
+        Args:
+            method (str): HTTP method the URL is good for
+            url (str): Object URL
+            expires_in (int): Seconds the URL stays valid (at most 604800)
+            now (datetime): Signing time (defaults to the current UTC time)
+
+        Returns:
+            str: The URL with its signature
+        """
+        parsed = httpx.URL(url)
+        amz_date = (now or datetime.datetime.now(datetime.timezone.utc)).strftime('%Y%m%dT%H%M%SZ')
+        query = {
+            **dict(parsed.params),
+            'X-Amz-Algorithm': 'AWS4-HMAC-SHA256',
+            'X-Amz-Credential': f"{self.access_key}/{self._scope(amz_date[:8])}",
+            'X-Amz-Date': amz_date,
+            'X-Amz-Expires': str(expires_in),
+            'X-Amz-SignedHeaders': 'host',
+        }
+        signature = self._signature(method, parsed.path, query, {'host': parsed.netloc.decode()}, self.UNSIGNED_PAYLOAD, amz_date)
+        return str(parsed.copy_with(params={**query, 'X-Amz-Signature': signature}))
+
+
+class S3BlobStore(BlobStore):
+    """Blobs as objects in an S3-compatible bucket (path-style URLs)"""
+
+    def __init__(self, endpoint: str, bucket: str, access_key: str, secret_key: str,
+                 region: str = 'us-east-1', prefix: str = 'tts/', client: Optional[httpx.Client] = None,
+                 public_endpoint: Optional[str] = None, max_concurrency: int = 8,
+                 timeout: Optional[httpx.Timeout] = None):
+        """
+        Initialize the store.
+
+        Args:
+            endpoint (str): S3 endpoint, e.g. https://<project>.supabase.co/storage/v1/s3
+                or http://localhost:9000 for MinIO
+            bucket (str): Bucket name
+            access_key (str): Access key id
+            secret_key (str): Secret access key
+            region (str): Signing region (Supabase uses the project's region)
+            prefix (str): Key prefix for the clips
+            client (httpx.Client): Client to send requests with (e.g. from the shared pool);
+                the store creates and owns one if not given
+            public_endpoint (str): Endpoint clients reach for signed URLs, if it differs
+                from the one the app uses (defaults to endpoint)
+            max_concurrency (int): Objects downloaded at once by fetch_many
+            timeout (httpx.Timeout): Timeouts of the client the store creates
+        """
+        self.endpoint = endpoint.rstrip('/')
+        self.public_endpoint = (public_endpoint or endpoint).rstrip('/')
+        self.bucket = bucket
+        self.prefix = prefix
+        self.signer = SigV4(access_key, secret_key, region)
+        self.owns_client = client is None
+        self.client = client or httpx.Client(timeout=timeout or httpx.Timeout(60.0, connect=5.0))
+        self.max_concurrency = max(1, max_concurrency)
+
+    def _url(self, content_hash: str, endpoint: Optional[str] = None) -> str:
+        # Keyed by hash alone: the hash names the variant, format included
+        return f"{endpoint or self.endpoint}/{self.bucket}/{self.prefix}{content_hash}"
+
+    def put_many(self, blobs: List[Blob]) -> None:
+        for blob in blobs:
+            url = self._url(blob.content_hash)
+            headers = {'Content-Type': AUDIO_FORMATS.get(Path(blob.path).suffix[1:], 'audio/mpeg'), 'Content-Length': str(blob.size)}
+            if blob.content_type:
+                headers['x-amz-meta-content-type'] = blob.content_type
+            with open(blob.path, 'rb') as f:
+                self.client.put(
+                    url,
+                    headers=self.signer.headers('PUT', url, headers),
+                    content=iter(lambda: f.read(CHUNK_SIZE), b'')
+                ).raise_for_status()
+
+    def _fetch(self, content_hash: str, destination: Callable[[str], Path]) -> Optional[str]:
+        """Download one object; returns its content type, or False if it doesn't exist"""
+        url = self._url(content_hash)
+        with self.client.stream('GET', url, headers=self.signer.headers('GET', url)) as response:
+            if response.status_code == 404:
+                return False
+            response.raise_for_status()
+            with open(destination(content_hash), 'wb') as f:
+                for chunk in response.iter_bytes(CHUNK_SIZE):
+                    f.write(chunk)
+            return response.headers.get('x-amz-meta-content-type')
+
+    def fetch_many(self, content_hashes: List[str], destination: Callable[[str], Path]) -> Dict[str, Optional[str]]:
+        if not content_hashes:
+            return {}
+        workers = min(len(content_hashes), self.max_concurrency)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tts-blob-fetch') as executor:
+            results = executor.map(lambda content_hash: self._fetch(content_hash, destination), content_hashes)
+            return {
+                content_hash: content_type
+                for content_hash, content_type in zip(content_hashes, results)
+                if content_type is not False
+            }
+
+    def signed_url(self, content_hash: str, expires_in: int = 3600) -> Optional[str]:
+        return self.signer.presign('GET', self._url(content_hash, self.public_endpoint), expires_in)
+
+    def close(self) -> None:
+        if self.owns_client:
+            self.client.close()
+
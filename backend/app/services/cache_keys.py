@@ -0,0 +1,102 @@
+"""
+TTS cache key derivation.
+
+Every clip is stored under cache_key(text, voice, variant). Text is
+canonicalized first, so copies of the same narrative that differ only in
+whitespace, quote style or a missing final period (the frontend and backend
+each keep one) share a clip. The model, format and speed are part of the
+key, so changing any of them never reuses stale audio, and KEY_VERSION
+leads the key material so a future change to any of this is a clean break.
+
+Keys are MD5 hex digests, the shape every tier (local files, packed store,
+tts_cache.content_hash, /api/audio URLs) already expects.
+"""
+import hashlib
+import re
+import unicodedata
+from typing import Optional
+
+from .tts_variants import AUDIO_FORMATS, DEFAULT_VARIANT, TTS_MODELS, TTSVariant
+
+KEY_VERSION = 2
+
+# Typographic quotes and primes NFKC leaves alone
+_QUOTES = str.maketrans({
+    '‘': "'", '’': "'", '‚': "'", '‛': "'", '′': "'",
+    '“': '"', '”': '"', '„': '"', '‟': '"', '″': '"',
+    '«': '"', '»': '"',
+})
+_WHITESPACE = re.compile(r'\s+')
+# No final period, or a doubled one ("..." is an ellipsis and is kept); "?" and "!" change the reading
+_FINAL_PERIOD = re.compile(r'(?<![.!?\'")\]])\.{0,2}$')
+
+
+def canonical_text(text: str) -> str:
+    """
+    Text as it is keyed: NFKC-normalized, straight quotes, single spaces,
+    and exactly one final period unless it ends in other punctuation.
+
+    Args:
+        text (str): Text as requested
+
+    Returns:
+        str: Canonical form (only used for the key; OpenAI still gets the original)
+    """
+    text = unicodedata.normalize('NFKC', text).translate(_QUOTES)
+    text = _WHITESPACE.sub(' ', text).strip()
+    return _FINAL_PERIOD.sub('.', text, count=1) if text else text
+
+
+def cache_key(text: str, voice: str, variant: Optional[TTSVariant] = None) -> str:
+    """
+    Cache key of a clip.
+
+    Args:
+        text (str): Text content
+        voice (str): Voice type
+        variant (TTSVariant): Model, format and speed (defaults to DEFAULT_VARIANT)
+
+    Returns:
+        str: Hex digest naming the clip in every tier
+    """
+    variant = variant or DEFAULT_VARIANT
+    material = '\x1f'.join((
+        f'v{KEY_VERSION}', canonical_text(text), voice.strip().lower(),
+        variant.model, variant.audio_format, f'{variant.speed:g}'
+    ))
+    return hashlib.md5(material.encode()).hexdigest()
+
+
+def legacy_key(text: str, voice: str, variant: Optional[TTSVariant] = None) -> str:
+    """
+    Key the clip had before KEY_VERSION 2: MD5 of the raw "text_voice", with
+    "_model_format" appended for non-default variants.
+
+    Used to find clips cached under the old scheme (see
+    TTSCacheService.legacy_key_fallback and migrate_tts_cache_keys.py).
+    """
+    variant = variant or DEFAULT_VARIANT
+    key = f"{text}_{voice}"
+    if variant != DEFAULT_VARIANT:
+        key = f"{key}_{variant.model}_{variant.audio_format}"
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def legacy_variant(content_hash: str, text: str, voice: str) -> Optional[TTSVariant]:
+    """
+    Variant a legacy-keyed clip was generated with, recovered from its key.
+
+    Args:
+        content_hash (str): Legacy key of a tts_cache row
+        text (str): The row's content_text
+        voice (str): The row's voice
+
+    Returns:
+        TTSVariant: The variant whose legacy key matches, or None (not a legacy key)
+    """
+    for model in TTS_MODELS:
+        for audio_format in AUDIO_FORMATS:
+            variant = TTSVariant(model, audio_format)
+            if legacy_key(text, voice, variant) == content_hash:
+                return variant
+    return None
@@ -0,0 +1,255 @@
+"""
+Boot-time TTS cache hydration.
+
+After a scale-to-zero wake the local tier is empty. CacheWarmer pulls the hot
+set (intro, outro, every question, plus the most-requested texts from a
+persisted access log) into the local tier in the background, and reports
+progress so /api/ready can hold traffic until it is done.
+"""
+import asyncio
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config.narratives import INTRO_NARRATIVE, OUTRO_NARRATIVE, QUESTION_SEQUENCE
+from .tts_variants import DEFAULT_VARIANT, TTSVariant
+
+HotItem = Tuple[str, str, str, TTSVariant]
+
+
+class AccessLog:
+    """Persisted per-(text, voice, variant) request counts, shared by all workers"""
+
+    def __init__(self, path: str, flush_every: int = 20, max_entries: int = 500):
+        """
+        Initialize the access log.
+
+        Args:
+            path (str): JSON file holding the merged counts
+            flush_every (int): Flush to disk after this many recorded accesses
+            max_entries (int): Keep only the most-requested entries on disk
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._pending: Dict[str, dict] = {}
+        self._pending_count = 0
+        atexit.register(self.flush)
+
+    def record(self, content_hash: str, text: str, voice: str, content_type: str = 'narrative',
+               variant: Optional[TTSVariant] = None) -> None:
+        """Count one request for a (text, voice, variant) clip"""
+        with self._lock:
+            entry = self._pending.setdefault(content_hash, {
+                'text': text, 'voice': voice, 'content_type': content_type, 'count': 0
+            })
+            if variant is not None and variant != DEFAULT_VARIANT:
+                # Entries logged before variants existed have neither key and mean the default
+                entry['model'], entry['audio_format'], entry['speed'] = variant
+            entry['count'] += 1
+            entry['last_access'] = time.time()
+            self._pending_count += 1
+            should_flush = self._pending_count >= self.flush_every
+
+        if should_flush:
+            self.flush()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def flush(self) -> None:
+        """Merge pending counts into the file (read-merge-write under a file lock)"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._pending_count = 0
+        if not pending:
+            return
+
+        try:
+            with open(self.path.with_suffix('.lock'), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                counts = self._load()
+                for content_hash, entry in pending.items():
+                    merged = counts.setdefault(content_hash, dict(entry, count=0))
+                    merged['count'] += entry['count']
+                    merged['last_access'] = entry['last_access']
+
+                kept = sorted(counts.items(), key=lambda item: item[1]['count'], reverse=True)[:self.max_entries]
+                tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp_path, 'w') as f:
+                    json.dump(dict(kept), f)
+                os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[AccessLog] Failed to flush access counts: {e}")
+
+    def top(self, k: int) -> List[dict]:
+        """Most-requested entries, including counts not yet flushed"""
+        counts = self._load()
+        with self._lock:
+            for content_hash, entry in self._pending.items():
+                merged = counts.setdefault(content_hash, dict(entry, count=0))
+                merged['count'] += entry['count']
+        return sorted(counts.values(), key=lambda entry: entry['count'], reverse=True)[:k]
+
+
+class CacheWarmer:
+    """Hydrates the local TTS tier with the hot set and tracks readiness"""
+
+    def __init__(self, tts_cache_service, voices: List[str], top_k: int = 20,
+                 concurrency: int = 4, ready_timeout: float = 60.0,
+                 variant_for: Optional[Callable[[str], TTSVariant]] = None):
+        """
+        Initialize the warmer.
+
+        Args:
+            tts_cache_service: TTSCacheService (or AsyncTTSCacheService) to hydrate
+            voices (List[str]): Voices whose narratives and questions are hot
+            top_k (int): Extra most-requested texts to prefetch from the access log
+            concurrency (int): Parallel downloads from Supabase
+            ready_timeout (float): Report ready after this many seconds regardless,
+                so a slow or failing Supabase never keeps the machine out of rotation
+            variant_for (Callable): content_type -> the variant narratives and questions are
+                served in (see VariantPolicy); defaults to DEFAULT_VARIANT
+        """
+        self.cache = tts_cache_service
+        self.voices = voices
+        self.top_k = top_k
+        self.concurrency = max(1, concurrency)
+        self.ready_timeout = ready_timeout
+        self.variant_for = variant_for or (lambda content_type: DEFAULT_VARIANT)
+
+        self._lock = threading.Lock()
+        self._hot_set: Optional[List[HotItem]] = None
+        self.failed = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def hot_set(self) -> List[HotItem]:
+        """(text, voice, content_type, variant) items that should be local before serving"""
+        if self._hot_set is None:
+            items = []
+            narrative, question = self.variant_for('narrative'), self.variant_for('question')
+            for voice in self.voices:
+                items.append((INTRO_NARRATIVE, voice, 'narrative', narrative))
+                items.append((OUTRO_NARRATIVE, voice, 'narrative', narrative))
+                items.extend((q['prompt'], voice, 'question', question) for q in QUESTION_SEQUENCE)
+
+            # Most-requested clips that are not already part of the fixed set
+            seen = {(text, voice, variant) for text, voice, _, variant in items}
+            access_log = getattr(self.cache, 'access_log', None)
+            popular = access_log.top(self.top_k + len(items)) if access_log and self.top_k > 0 else []
+            extra = 0
+            for entry in popular:
+                if extra >= self.top_k:
+                    break
+                variant = TTSVariant(entry.get('model', DEFAULT_VARIANT.model),
+                                     entry.get('audio_format', DEFAULT_VARIANT.audio_format),
+                                     entry.get('speed', DEFAULT_VARIANT.speed))
+                if (entry['text'], entry['voice'], variant) in seen:
+                    continue
+                seen.add((entry['text'], entry['voice'], variant))
+                items.append((entry['text'], entry['voice'], entry.get('content_type', 'narrative'), variant))
+                extra += 1
+            self._hot_set = items
+        return self._hot_set
+
+    def _is_local(self, text: str, voice: str, variant: TTSVariant) -> bool:
+        content_hash = self.cache._get_content_hash(text, voice, variant)
+        if self.cache.packed_store and content_hash in self.cache.packed_store:
+            return True  # Served from the store; no need to write a per-clip file
+        return self.cache._lookup_local(content_hash, variant.audio_format) is not None
+
+    def _lock_path(self) -> Path:
+        return self.cache.local_cache_dir / '.hydrate.lock'
+
+    def _fetch(self, item: HotItem) -> None:
+        text, voice, content_type, variant = item
+        if self._is_local(text, voice, variant):
+            return
+        if not self.cache.get_cached_audio(text, voice, variant, content_type):
+            with self._lock:
+                self.failed += 1
+
+    def hydrate(self) -> None:
+        """
+        Download every missing hot-set item into the local tier.
+
+        Workers share the local directory, so one worker hydrates at a time
+        and the others find the files already local.
+        """
+        self.started_at = time.time()
+        try:
+            with open(self._lock_path(), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                items = self.hot_set()
+                with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='tts-hydrate') as executor:
+                    list(executor.map(self._fetch, items))
+        except Exception as e:
+            print(f"[CacheWarmer] Hydration error: {e}")
+        finally:
+            self.finished_at = time.time()
+            print(f"[CacheWarmer] Hydrated {self.status()['warmed']}/{len(self.hot_set())} hot items "
+                  f"in {self.finished_at - self.started_at:.1f}s ({self.failed} missing upstream)")
+
+    def start(self) -> threading.Thread:
+        """Run hydrate() on a daemon thread"""
+        thread = threading.Thread(target=self.hydrate, name='tts-hydrate', daemon=True)
+        thread.start()
+        return thread
+
+    async def hydrate_async(self) -> None:
+        """hydrate() for the ASGI app, where get_cached_audio is a coroutine"""
+        self.started_at = time.time()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(item):
+            text, voice, content_type, variant = item
+            if self._is_local(text, voice, variant):
+                return
+            async with semaphore:
+                if not await self.cache.get_cached_audio(text, voice, variant, content_type):
+                    self.failed += 1
+
+        try:
+            lock_file = open(self._lock_path(), 'a')
+            try:
+                await asyncio.to_thread(fcntl.flock, lock_file, fcntl.LOCK_EX)
+                await asyncio.gather(*(fetch(item) for item in self.hot_set()))
+            finally:
+                lock_file.close()
+        except Exception as e:
+            print(f"[CacheWarmer] Hydration error: {e}")
+        finally:
+            self.finished_at = time.time()
+
+    def status(self) -> Dict:
+        """Hydration progress, measured from what is actually in the local tier"""
+        items = self.hot_set()
+        warmed = sum(1 for text, voice, _, variant in items if self._is_local(text, voice, variant))
+        total = len(items)
+        done = self.finished_at is not None
+        timed_out = (
+            not done and self.started_at is not None
+            and time.time() - self.started_at > self.ready_timeout
+        )
+        return {
+            'ready': warmed == total or done or timed_out,
+            'warmed': warmed,
+            'total': total,
+            'progress': round(warmed / total, 3) if total else 1.0,
+            'failed': self.failed,
+            'hydrating': self.started_at is not None and not done,
+            'timed_out': timed_out,
+        }
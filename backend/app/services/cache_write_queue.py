@@ -0,0 +1,326 @@
+"""
+Write-behind queue for Supabase TTS cache persistence.
+
+Without it cache_audio() upserts tts_cache and tts_cache_files before the
+cache miss that generated the clip can return. With a CacheWriteQueue the
+clip is journaled on local disk and the caller returns at once; a
+background thread sends the writes to Supabase in batches, retrying
+failures with exponential backoff.
+
+Journal layout (the directory is shared by all workers):
+    journal.<pid>           JSON lines, one 'add' or 'done' record per line
+    <hash>.<pid>.<format>   Hard link to each pending clip, so evicting it
+                            from the local tier can't lose the upload
+
+Each worker holds an flock on its own journal for as long as it runs. A
+journal whose lock can be taken belongs to a worker that died, and the
+next worker to start adopts its pending writes.
+"""
+import atexit
+import fcntl
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+class CacheWriteQueue:
+    """Bounded, journaled queue of Supabase cache writes drained by a background thread"""
+
+    def __init__(self, journal_dir: str, batch_size: int = 20, max_pending: int = 500,
+                 max_attempts: int = 8, retry_base: float = 1.0, retry_max: float = 300.0,
+                 linger: float = 0.05):
+        """
+        Initialize the queue (call start() to begin draining it).
+
+        Args:
+            journal_dir (str): Directory for journals and pending clips, shared by all workers
+            batch_size (int): Writes sent to Supabase per round trip
+            max_pending (int): Backlog limit; writes submitted beyond it are dropped
+                (the clip stays in the local tier)
+            max_attempts (int): Attempts before a write is given up
+            retry_base (float): Delay in seconds before the first retry, doubled for each one after
+            retry_max (float): Longest delay between retries
+            linger (float): Seconds to wait for more writes before sending a partial batch
+        """
+        self.journal_dir = Path(journal_dir)
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_size = max(1, batch_size)
+        self.max_pending = max_pending
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.linger = linger
+
+        self._cond = threading.Condition()
+        self._pending: Dict[str, dict] = {}
+        self._journal = None
+        self._write: Optional[Callable[[List[dict]], None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._deadline: Optional[float] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self, write: Callable[[List[dict]], None]) -> None:
+        """
+        Adopt journaled writes and start the drain thread.
+
+        Args:
+            write (Callable): Sends a batch of entries to Supabase, raising on failure.
+                Each entry has content_hash, text, voice, content_type, audio_path
+                (the local-tier path) and journal_path (the clip to upload)
+        """
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._write = write
+            self._claim_journal()
+            adopted = self._adopt_journals()
+            if adopted:
+                print(f"[CacheWriteQueue] Resuming {adopted} journaled Supabase writes")
+            self._thread = threading.Thread(target=self._run, name='tts-write-behind', daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def _journal_path(self) -> Path:
+        return self.journal_dir / f"journal.{os.getpid()}"
+
+    def _claim_journal(self) -> None:
+        """Open and lock this worker's journal, picking up records left by an earlier process with our pid"""
+        while True:
+            journal = open(self._journal_path(), 'a+')
+            fcntl.flock(journal, fcntl.LOCK_EX)
+            # Adopted and unlinked by another worker between open and flock: start over
+            if os.fstat(journal.fileno()).st_nlink:
+                break
+            journal.close()
+
+        journal.seek(0)
+        for entry in self._read_journal(journal):
+            self._pending[entry['content_hash']] = entry
+        self._journal = journal
+        self._rewrite_journal()
+
+    def _adopt_journals(self) -> int:
+        """Take over the pending writes of workers that are gone"""
+        adopted = 0
+        for path in self.journal_dir.glob('journal.*'):
+            if path == self._journal_path():
+                continue
+            try:
+                with open(path, 'r') as journal:
+                    try:
+                        fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue  # Its worker is alive
+                    for entry in self._read_journal(journal):
+                        if entry['content_hash'] not in self._pending:
+                            self._pending[entry['content_hash']] = entry
+                            self._append({'op': 'add', **entry})
+                            adopted += 1
+                    path.unlink()
+            except FileNotFoundError:
+                continue  # Adopted by another worker first
+        return adopted
+
+    @staticmethod
+    def _read_journal(journal) -> List[dict]:
+        """Writes added to a journal and not yet marked done"""
+        pending: Dict[str, dict] = {}
+        for line in journal:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn last line from a crash mid-append
+            content_hash = record.pop('content_hash')
+            if record.pop('op') == 'done':
+                pending.pop(content_hash, None)
+            elif Path(record['journal_path']).exists():
+                pending[content_hash] = {'content_hash': content_hash, **record}
+        return list(pending.values())
+
+    def _append(self, record: dict) -> None:
+        """Durably append one record to this worker's journal"""
+        self._journal.write(json.dumps(record) + '\n')
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _rewrite_journal(self) -> None:
+        """Replace the journal's records with the current backlog"""
+        self._journal.truncate(0)
+        for entry in self._pending.values():
+            self._journal.write(json.dumps({'op': 'add', **entry}) + '\n')
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def submit(self, content_hash: str, text: str, voice: str, content_type: str, audio_path: str) -> bool:
+        """
+        Journal a write and queue it for Supabase.
+
+        Args:
+            content_hash (str): Cache key of the clip
+            text (str): Text content
+            voice (str): Voice type
+            content_type (str): Type of content (narrative, question, etc.)
+            audio_path (str): The clip in the local tier
+
+        Returns:
+            bool: True once the write is journaled (or already pending), False if it was dropped
+        """
+        with self._cond:
+            if content_hash in self._pending:
+                return True
+            if self._deadline is not None or self._journal is None:
+                return False
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                print(f"[CacheWriteQueue] Backlog full ({self.max_pending}), not persisting {content_hash}")
+                return False
+
+            journal_path = self.journal_dir / f"{content_hash}.{os.getpid()}{Path(audio_path).suffix}"
+            journal_path.unlink(missing_ok=True)
+            try:
+                os.link(audio_path, journal_path)
+            except OSError:
+                # Different filesystem (or no hard links): fall back to a copy
+                import shutil
+                shutil.copyfile(audio_path, journal_path)
+
+            entry = {
+                'content_hash': content_hash,
+                'text': text,
+                'voice': voice,
+                'content_type': content_type,
+                'audio_path': audio_path,
+                'journal_path': str(journal_path)
+            }
+            self._append({'op': 'add', **entry})
+            self._pending[content_hash] = entry
+            self._cond.notify()
+        return True
+
+    def _next_batch(self) -> Optional[List[dict]]:
+        """Wait for writes that are due; None once the queue has been closed and drained"""
+        with self._cond:
+            lingered = False
+            while True:
+                now = time.time()
+                due = [entry for entry in self._pending.values() if entry.get('retry_at', 0) <= now]
+                closing = self._deadline is not None
+                if due and (lingered or closing or len(due) >= self.batch_size):
+                    return due[:self.batch_size]
+
+                next_retry = min((entry['retry_at'] for entry in self._pending.values()
+                                  if entry.get('retry_at', 0) > now), default=None)
+                if closing:
+                    if now >= self._deadline or not self._pending:
+                        return None
+                    if not due and (next_retry is None or next_retry > self._deadline):
+                        return None  # Only retries the deadline won't wait for are left
+
+                if due:
+                    timeout = self.linger
+                    lingered = True
+                elif next_retry is not None:
+                    timeout = next_retry - now
+                else:
+                    timeout = None
+                if closing:
+                    timeout = min(timeout if timeout is not None else self._deadline - now, self._deadline - now)
+                self._cond.wait(timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._write([{key: entry[key] for key in entry if key not in ('attempts', 'retry_at')} for entry in batch])
+            except Exception as e:
+                self._retry_later(batch, e)
+            else:
+                self._finish(batch, written=True)
+
+    def _retry_later(self, batch: List[dict], error: Exception) -> None:
+        """Back off failed writes, giving up on those out of attempts"""
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            # Refused without being tried (circuit open): wait it out without spending an attempt
+            with self._cond:
+                for entry in batch:
+                    entry['retry_at'] = time.time() + retry_after + random.uniform(0.0, self.retry_base)
+            return
+
+        exhausted = []
+        with self._cond:
+            for entry in batch:
+                entry['attempts'] = entry.get('attempts', 0) + 1
+                if entry['attempts'] >= self.max_attempts:
+                    exhausted.append(entry)
+                    continue
+                delay = min(self.retry_max, self.retry_base * 2 ** (entry['attempts'] - 1))
+                entry['retry_at'] = time.time() + delay * random.uniform(0.5, 1.0)
+        print(f"[CacheWriteQueue] Supabase write of {len(batch)} clips failed ({error}); "
+              f"{len(batch) - len(exhausted)} will be retried")
+        if exhausted:
+            self._finish(exhausted, written=False)
+
+    def _finish(self, batch: List[dict], written: bool) -> None:
+        """Take writes off the backlog and the journal"""
+        with self._cond:
+            for entry in batch:
+                self._pending.pop(entry['content_hash'], None)
+                Path(entry['journal_path']).unlink(missing_ok=True)
+            if self._journal is None:
+                pass  # Closed mid-write; the journal still lists the batch and a replay is harmless
+            elif self._pending:
+                for entry in batch:
+                    self._append({'op': 'done', 'content_hash': entry['content_hash']})
+            else:
+                self._rewrite_journal()
+            if written:
+                self.written += len(batch)
+            else:
+                self.failed += len(batch)
+            self._cond.notify_all()
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Wait until every pending write has been sent; returns whether the backlog emptied"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while self._pending and time.time() < deadline:
+                self._cond.wait(deadline - time.time())
+            return not self._pending
+
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Drain the backlog on shutdown.
+
+        Writes still pending after the timeout (or waiting out a retry past
+        it) stay in the journal for the next worker to adopt.
+        """
+        with self._cond:
+            if self._thread is None or self._deadline is not None:
+                return
+            self._deadline = time.time() + timeout
+            self._cond.notify_all()
+        self._thread.join(timeout + 1)
+        with self._cond:
+            if self._pending:
+                print(f"[CacheWriteQueue] {len(self._pending)} Supabase writes left in the journal")
+            self._journal.close()
+            self._journal = None
+
+    def stats(self) -> Dict[str, int]:
+        """Backlog size and lifetime counts"""
+        with self._cond:
+            return {
+                'write_queue_pending': len(self._pending),
+                'write_queue_written': self.written,
+                'write_queue_dropped': self.dropped,
+                'write_queue_failed': self.failed
+            }
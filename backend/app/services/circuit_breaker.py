@@ -0,0 +1,189 @@
+"""
+Circuit breaker for the Supabase side of the TTS cache.
+
+Without it a slow or unreachable Supabase makes every cache lookup and
+write wait out its timeout before falling back to the local tier. The
+breaker watches the failure rate of recent calls; once it is too high the
+circuit opens and calls are refused at once (CircuitOpenError), so the
+cache runs local-only. After open_seconds a limited number of probe calls
+go through (half-open): a success closes the circuit, a failure opens it
+again.
+
+State is per process: each worker finds out about an outage on its own,
+after minimum_calls failures at most.
+"""
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Tuple, TypeVar
+
+T = TypeVar('T')
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a call while the circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit open (retry in {retry_after:.0f}s)")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker shared by the threads (or tasks) of one worker"""
+
+    def __init__(self, name: str = 'supabase', failure_rate: float = 0.5, minimum_calls: int = 5,
+                 window: float = 30.0, open_seconds: float = 30.0, half_open_probes: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the breaker.
+
+        Args:
+            name (str): Name used in errors and logs
+            failure_rate (float): Share of failed calls in the window that opens the circuit
+            minimum_calls (int): Calls the window needs before the rate is trusted
+            window (float): Seconds of call outcomes the failure rate is computed over
+            open_seconds (float): Seconds the circuit stays open before probing
+            half_open_probes (int): Calls let through at once while probing
+            clock (Callable): Monotonic time source
+        """
+        self.name = name
+        self.failure_rate = failure_rate
+        self.minimum_calls = max(1, minimum_calls)
+        self.window = window
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()  # (time, failed)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        """CLOSED, OPEN or HALF_OPEN"""
+        with self._lock:
+            self._advance()
+            return self._state
+
+    def _advance(self) -> None:
+        """Move an open circuit to half-open once open_seconds have passed (lock held)"""
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+
+    def _trim(self, now: float) -> None:
+        """Drop outcomes older than the window (lock held)"""
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            _, failed = self._outcomes.popleft()
+            self._failures -= failed
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self._failures = 0
+        self.trips += 1
+        print(f"[CircuitBreaker] {self.name} circuit opened; local-only for {self.open_seconds:.0f}s")
+
+    def acquire(self) -> bool:
+        """
+        Ask to make a call; pair every successful acquire() with one record().
+
+        Returns:
+            bool: Whether the call is a half-open probe (pass it to record())
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with all probes taken
+        """
+        with self._lock:
+            self._advance()
+            if self._state == CLOSED:
+                return False
+            if self._state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            retry_after = max(0.0, self._opened_at + self.open_seconds - self._clock())
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record(self, success: bool, probe: bool = False) -> None:
+        """
+        Report the outcome of an acquired call.
+
+        Args:
+            success (bool): Whether the call succeeded
+            probe (bool): What acquire() returned for it
+        """
+        with self._lock:
+            now = self._clock()
+            if probe:
+                self._probes = max(0, self._probes - 1)
+                if self._state != HALF_OPEN:
+                    return
+                if success:
+                    self._state = CLOSED
+                    print(f"[CircuitBreaker] {self.name} circuit closed")
+                else:
+                    self._open(now)
+                return
+            if self._state != CLOSED:
+                return  # Started before the circuit opened; the probes decide now
+
+            self._outcomes.append((now, not success))
+            self._failures += not success
+            self._trim(now)
+            if len(self._outcomes) >= self.minimum_calls and self._failures / len(self._outcomes) >= self.failure_rate:
+                self._open(now)
+
+    def release(self, probe: bool) -> None:
+        """Give back an acquired call that ended without an outcome (cancelled)"""
+        if probe:
+            with self._lock:
+                self._probes = max(0, self._probes - 1)
+
+    def call(self, operation: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Run operation through the breaker; any Exception it raises counts as a failure.
+
+        Raises:
+            CircuitOpenError: If the circuit refuses the call
+        """
+        probe = self.acquire()
+        try:
+            result = operation(*args, **kwargs)
+        except Exception:
+            self.record(False, probe)
+            raise
+        except BaseException:
+            self.release(probe)
+            raise
+        self.record(True, probe)
+        return result
+
+    async def call_async(self, operation: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        """call() for coroutine functions"""
+        probe = self.acquire()
+        try:
+            result = await operation(*args, **kwargs)
+        except Exception:
+            self.record(False, probe)
+            raise
+        except BaseException:
+            self.release(probe)
+            raise
+        self.record(True, probe)
+        return result
+
+    def stats(self) -> Dict[str, object]:
+        """State and counters since the worker started"""
+        return {
+            'remote_circuit': self.state,
+            'remote_circuit_trips': self.trips,
+            'remote_rejected': self.rejected
+        }
@@ -0,0 +1,479 @@
+"""
+Per-application service container.
+
+Holds the long-lived service instances (OpenAI client, Supabase client,
+TTS caches) so they are built once per worker and shared by every request.
+ServiceContainer backs the WSGI app, AsyncServiceContainer the ASGI app.
+"""
+import asyncio
+import threading
+from pathlib import Path
+from typing import Dict, Optional, TYPE_CHECKING
+
+# Service modules are imported on first use to keep worker boot cheap
+if TYPE_CHECKING:
+    import httpx
+    from .blob_store import BlobStore
+    from .circuit_breaker import CircuitBreaker
+    from .negative_cache import NegativeCache
+    from .pdf_service import PDFService
+    from .openai_service import OpenAIService
+    from .async_openai_service import AsyncOpenAIService
+    from .http_pool import HTTPPool, AsyncHTTPPool
+    from .cache_warmer import CacheWarmer
+    from .tts_variants import VariantPolicy
+    from .local_cache_index import LocalCacheIndex
+    from .packed_audio_store import PackedAudioStore
+    from .cache_write_queue import CacheWriteQueue
+    from .speech_trimmer import SpeechTrimmer
+    from .transcription_sessions import TranscriptionSessions, AsyncTranscriptionSessions
+    from .transcript_cache import TranscriptCache
+
+
+def _hydration_configured(config) -> bool:
+    """Hydration needs the services to be buildable and a Supabase tier to pull from"""
+    return bool(config.get('OPENAI_API_KEY') and config.get('SUPABASE_URL') and config.get('SUPABASE_SERVICE_KEY'))
+
+
+def _build_cache_warmer(config, tts_cache_service, variant_policy: Optional['VariantPolicy'] = None) -> Optional['CacheWarmer']:
+    """CacheWarmer for the given TTS cache, or None when there is no remote tier to pull from"""
+    if tts_cache_service is None or not tts_cache_service.supabase_enabled:
+        return None
+
+    from .cache_warmer import CacheWarmer
+    return CacheWarmer(
+        tts_cache_service,
+        voices=[voice.strip() for voice in config.get('TTS_HYDRATE_VOICES', ['nova']) if voice.strip()],
+        top_k=config.get('TTS_HYDRATE_TOP_K', 20),
+        concurrency=config.get('TTS_HYDRATE_CONCURRENCY', 4),
+        ready_timeout=config.get('TTS_HYDRATE_READY_TIMEOUT', 60),
+        variant_for=variant_policy.choose if variant_policy else None
+    )
+
+
+def _build_variant_policy(config) -> 'VariantPolicy':
+    """VariantPolicy from TTS_MODEL_POLICY, TTS_MODEL and TTS_DEFAULT_FORMAT"""
+    from .tts_variants import VariantPolicy
+    return VariantPolicy(
+        config.get('TTS_MODEL_POLICY', {}),
+        default_model=config.get('TTS_MODEL', 'tts-1-hd'),
+        default_format=config.get('TTS_DEFAULT_FORMAT', 'mp3')
+    )
+
+
+def _build_local_cache_index(config) -> Optional['LocalCacheIndex']:
+    """LocalCacheIndex for the local TTS tier, adopting files written before it existed"""
+    db_path = config.get('TTS_LOCAL_CACHE_INDEX_PATH')
+    if not db_path:
+        return None
+
+    from .local_cache_index import LocalCacheIndex
+    from .tts_variants import AUDIO_FORMATS
+    index = LocalCacheIndex(
+        db_path,
+        max_bytes=config.get('TTS_LOCAL_CACHE_MAX_BYTES', 0),
+        max_files=config.get('TTS_LOCAL_CACHE_MAX_FILES', 0),
+        pinned_content_types=config.get('TTS_CACHE_PINNED_CONTENT_TYPES', ())
+    )
+    adopted = index.adopt([
+        path
+        for audio_format in AUDIO_FORMATS
+        for path in (*Path('/tmp/tts_cache').glob(f'*.{audio_format}'), *Path('/tmp').glob(f'tts_cache_*.{audio_format}'))
+    ])
+    if adopted:
+        print(f"[ServiceContainer] Indexed {adopted} existing local TTS files")
+    return index
+
+
+def _build_packed_store(config) -> Optional['PackedAudioStore']:
+    """PackedAudioStore for the local TTS tier when TTS_LOCAL_STORE is 'packed'"""
+    if config.get('TTS_LOCAL_STORE', 'files') != 'packed':
+        return None
+
+    from .packed_audio_store import PackedAudioStore
+    return PackedAudioStore(
+        config.get('TTS_PACKED_STORE_DIR', '/tmp/tts_pack'),
+        max_bytes=config.get('TTS_PACKED_STORE_MAX_BYTES', 0),
+        pinned_content_types=config.get('TTS_CACHE_PINNED_CONTENT_TYPES', ())
+    )
+
+
+def _build_write_queue(config) -> Optional['CacheWriteQueue']:
+    """CacheWriteQueue for Supabase cache persistence unless TTS_WRITE_BEHIND is off"""
+    if not config.get('TTS_WRITE_BEHIND', True):
+        return None
+
+    from .cache_write_queue import CacheWriteQueue
+    return CacheWriteQueue(
+        config.get('TTS_WRITE_QUEUE_DIR', '/tmp/tts_write_queue'),
+        batch_size=config.get('TTS_WRITE_QUEUE_BATCH_SIZE', 20),
+        max_pending=config.get('TTS_WRITE_QUEUE_MAX_PENDING', 500),
+        max_attempts=config.get('TTS_WRITE_QUEUE_MAX_ATTEMPTS', 8)
+    )
+
+
+def _remote_timeout(config) -> 'httpx.Timeout':
+    """Timeouts for the TTS cache's Supabase and blob store calls"""
+    import httpx  # Deferred: heavy import
+    return httpx.Timeout(config.get('TTS_REMOTE_TIMEOUT', 10.0), connect=config.get('TTS_REMOTE_CONNECT_TIMEOUT', 2.0))
+
+
+def _build_remote_breaker(config) -> 'CircuitBreaker':
+    """Circuit breaker around the TTS cache's Supabase and blob store calls"""
+    from .circuit_breaker import CircuitBreaker
+    return CircuitBreaker(
+        'supabase',
+        failure_rate=config.get('TTS_BREAKER_FAILURE_RATE', 0.5),
+        minimum_calls=config.get('TTS_BREAKER_MIN_CALLS', 5),
+        window=config.get('TTS_BREAKER_WINDOW', 30.0),
+        open_seconds=config.get('TTS_BREAKER_OPEN_SECONDS', 30.0),
+        half_open_probes=config.get('TTS_BREAKER_HALF_OPEN_PROBES', 1)
+    )
+
+
+def _build_negative_cache(config) -> Optional['NegativeCache']:
+    """NegativeCache for remote TTS cache misses unless TTS_NEGATIVE_CACHE_TTL is 0"""
+    ttl = config.get('TTS_NEGATIVE_CACHE_TTL', 30.0)
+    if ttl <= 0:
+        return None
+
+    from .negative_cache import NegativeCache
+    return NegativeCache(ttl, max_entries=config.get('TTS_NEGATIVE_CACHE_MAX_ENTRIES', 10000))
+
+
+def _build_speech_trimmer(config) -> Optional['SpeechTrimmer']:
+    """SpeechTrimmer for WAV uploads to Whisper when TRANSCRIBE_TRIM_SILENCE is on"""
+    if not config.get('TRANSCRIBE_TRIM_SILENCE'):
+        return None
+
+    from .speech_trimmer import SpeechTrimmer
+    try:
+        return SpeechTrimmer(
+            sample_rate=config.get('TRANSCRIBE_SAMPLE_RATE', 16000),
+            max_pause=config.get('TRANSCRIBE_MAX_PAUSE', 1.0),
+            margin_db=config.get('TRANSCRIBE_VAD_MARGIN_DB', 12.0)
+        )
+    except ImportError:
+        print("[ServiceContainer] TRANSCRIBE_TRIM_SILENCE needs NumPy (pip install -r requirements-audio.txt); "
+              "sending recordings untrimmed")
+        return None
+
+
+def _build_transcript_cache(config) -> Optional['TranscriptCache']:
+    """TranscriptCache for Whisper results unless TRANSCRIPT_CACHE_PATH is empty"""
+    db_path = config.get('TRANSCRIPT_CACHE_PATH')
+    if not db_path:
+        return None
+
+    from .transcript_cache import TranscriptCache
+    return TranscriptCache(
+        db_path,
+        ttl=config.get('TRANSCRIPT_CACHE_TTL', 3600),
+        max_entries=config.get('TRANSCRIPT_CACHE_MAX_ENTRIES', 1000)
+    )
+
+
+def _transcription_session_options(config) -> Dict:
+    """TranscriptionSessions keyword arguments from the TRANSCRIBE_SESSION_* settings"""
+    return {
+        'directory': config.get('TRANSCRIBE_SESSION_DIR', '/tmp/transcribe_sessions'),
+        'max_workers': config.get('TRANSCRIBE_SESSION_WORKERS', 4),
+        'ttl': config.get('TRANSCRIBE_SESSION_TTL', 900),
+        'max_segments': config.get('TRANSCRIBE_SESSION_MAX_SEGMENTS', 240),
+        'finalize_timeout': config.get('TRANSCRIBE_SESSION_FINALIZE_TIMEOUT', 30)
+    }
+
+
+def _build_blob_store(config, client=None, timeout=None) -> Optional['BlobStore']:
+    """
+    Blob store for permanent TTS audio selected by TTS_BLOB_STORE.
+
+    Args:
+        config: App config mapping
+        client (httpx.Client): Pooled client for object storage requests (WSGI app only)
+        timeout (httpx.Timeout): Timeouts for a client the store creates itself
+
+    Returns:
+        BlobStore: The store, or None for 'bytea' (the cache service builds that on its PostgREST session)
+    """
+    backend = config.get('TTS_BLOB_STORE', 'bytea')
+    if backend == 'bytea':
+        return None
+    if backend == 'local':
+        from .blob_store import LocalBlobStore
+        return LocalBlobStore(config.get('TTS_BLOB_DIR', '/data/tts_blobs'))
+    if backend == 's3':
+        from .blob_store import S3BlobStore
+        return S3BlobStore(
+            config.get('TTS_S3_ENDPOINT'),
+            config.get('TTS_S3_BUCKET'),
+            config.get('TTS_S3_ACCESS_KEY'),
+            config.get('TTS_S3_SECRET_KEY'),
+            region=config.get('TTS_S3_REGION', 'us-east-1'),
+            prefix=config.get('TTS_S3_PREFIX', 'tts/'),
+            client=client,
+            public_endpoint=config.get('TTS_S3_PUBLIC_ENDPOINT'),
+            timeout=timeout
+        )
+    raise ValueError(f"Unknown TTS_BLOB_STORE: {backend}")
+
+
+def _readiness(hydration_started: bool, hydration_done: bool, warmer: Optional['CacheWarmer']) -> Dict:
+    """Readiness report shared by both containers"""
+    if warmer is not None:
+        return warmer.status()
+    if hydration_started and not hydration_done:
+        # Still building the services the warmer needs
+        return {'ready': False, 'warmed': 0, 'total': 0, 'progress': 0.0, 'hydrating': True}
+    return {'ready': True, 'hydrating': False}
+
+
+class ServiceContainer:
+    """Thread-safe, lazily populated registry of shared services"""
+
+    def __init__(self, config):
+        """
+        Initialize the container.
+
+        Args:
+            config: Flask config mapping used to build the services
+        """
+        self.config = config
+        self._lock = threading.RLock()
+        self._http_pool: Optional['HTTPPool'] = None
+        self._openai_service: Optional['OpenAIService'] = None
+        self._pdf_service: Optional['PDFService'] = None
+        self._transcription_sessions: Optional['TranscriptionSessions'] = None
+        self._cache_warmer: Optional['CacheWarmer'] = None
+        self._hydration_started = False
+        self._hydration_done = False
+
+    @property
+    def http_pool(self) -> 'HTTPPool':
+        """Keep-alive connection pool shared by all upstream clients"""
+        if self._http_pool is None:
+            with self._lock:
+                if self._http_pool is None:
+                    from .http_pool import create_http_pool
+                    self._http_pool = create_http_pool(self.config)
+        return self._http_pool
+
+    @property
+    def openai_service(self) -> 'OpenAIService':
+        """Shared OpenAI service, built on first use"""
+        if self._openai_service is None:
+            with self._lock:
+                if self._openai_service is None:
+                    from .openai_service import OpenAIService
+
+                    api_key = self.config.get('OPENAI_API_KEY')
+                    if not api_key:
+                        raise ValueError("OPENAI_API_KEY not configured")
+
+                    http_pool = self.http_pool
+
+                    self._openai_service = OpenAIService(
+                        api_key,
+                        self.config.get('SUPABASE_URL'),
+                        self.config.get('SUPABASE_SERVICE_KEY'),
+                        self.config.get('CHAT_MODEL', 'gpt-3.5-turbo'),
+                        http_pool=http_pool,
+                        access_log_path=self.config.get('TTS_ACCESS_LOG_PATH'),
+                        tts_pipeline_workers=self.config.get('TTS_PIPELINE_WORKERS', 4),
+                        local_cache_index=_build_local_cache_index(self.config),
+                        packed_store=_build_packed_store(self.config),
+                        write_queue=_build_write_queue(self.config),
+                        pre_cache_concurrency=self.config.get('TTS_PRE_CACHE_CONCURRENCY', 16),
+                        blob_store=_build_blob_store(self.config, http_pool.client(timeout=_remote_timeout(self.config))),
+                        variant_policy=_build_variant_policy(self.config),
+                        legacy_key_fallback=self.config.get('TTS_LEGACY_KEY_FALLBACK', True),
+                        remote_timeout=_remote_timeout(self.config),
+                        remote_breaker=_build_remote_breaker(self.config),
+                        negative_cache=_build_negative_cache(self.config),
+                        speech_trimmer=_build_speech_trimmer(self.config),
+                        transcript_cache=_build_transcript_cache(self.config)
+                    )
+        return self._openai_service
+
+    @property
+    def pdf_service(self) -> 'PDFService':
+        """Shared PDF service"""
+        if self._pdf_service is None:
+            with self._lock:
+                if self._pdf_service is None:
+                    from .pdf_service import PDFService
+                    self._pdf_service = PDFService()
+        return self._pdf_service
+
+    @property
+    def transcription_sessions(self) -> 'TranscriptionSessions':
+        """Segmented transcription sessions, transcribed with the shared OpenAI service"""
+        if self._transcription_sessions is None:
+            with self._lock:
+                if self._transcription_sessions is None:
+                    from .transcription_sessions import TranscriptionSessions
+                    self._transcription_sessions = TranscriptionSessions(
+                        self.openai_service.transcribe_audio, **_transcription_session_options(self.config)
+                    )
+        return self._transcription_sessions
+
+    def warm_connections(self) -> threading.Thread:
+        """Build the pool and open upstream connections on a background thread"""
+        from .http_pool import upstream_warm_urls
+
+        def warm():
+            self.http_pool.warm(
+                upstream_warm_urls(self.config),
+                self.config.get('HTTP_POOL_WARM_CONNECTIONS', 1)
+            )
+
+        thread = threading.Thread(target=warm, name='http-pool-warm', daemon=True)
+        thread.start()
+        return thread
+
+    def hydrate_tts_cache(self) -> Optional[threading.Thread]:
+        """Pull the TTS hot set into the local tier on a background thread"""
+        if not _hydration_configured(self.config):
+            return None
+        self._hydration_started = True
+
+        def hydrate():
+            try:
+                self._cache_warmer = _build_cache_warmer(
+                    self.config, self.openai_service.tts_cache_service, self.openai_service.variant_policy
+                )
+                if self._cache_warmer is not None:
+                    self._cache_warmer.hydrate()
+            except Exception as e:
+                print(f"[CacheWarmer] Skipping hydration: {e}")
+            finally:
+                self._hydration_done = True
+
+        thread = threading.Thread(target=hydrate, name='tts-hydrate', daemon=True)
+        thread.start()
+        return thread
+
+    def readiness(self) -> Dict:
+        """Whether the hot TTS set is local yet, with hydration progress"""
+        return _readiness(self._hydration_started, self._hydration_done, self._cache_warmer)
+
+
+class AsyncServiceContainer:
+    """Lazily populated registry of shared services for the ASGI app"""
+
+    def __init__(self, config):
+        """
+        Initialize the container.
+
+        Services are only touched from the event loop, so no lock is needed.
+
+        Args:
+            config: Quart config mapping used to build the services
+        """
+        self.config = config
+        self._http_pool: Optional['AsyncHTTPPool'] = None
+        self._openai_service: Optional['AsyncOpenAIService'] = None
+        self._pdf_service: Optional['PDFService'] = None
+        self._transcription_sessions: Optional['AsyncTranscriptionSessions'] = None
+        self._cache_warmer: Optional['CacheWarmer'] = None
+        self._hydration_started = False
+        self._hydration_done = False
+
+    @property
+    def http_pool(self) -> 'AsyncHTTPPool':
+        """Keep-alive connection pool shared by all upstream clients"""
+        if self._http_pool is None:
+            from .http_pool import create_async_http_pool
+            self._http_pool = create_async_http_pool(self.config)
+        return self._http_pool
+
+    @property
+    def openai_service(self) -> 'AsyncOpenAIService':
+        """Shared async OpenAI service, built on first use"""
+        if self._openai_service is None:
+            from .async_openai_service import AsyncOpenAIService
+
+            api_key = self.config.get('OPENAI_API_KEY')
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY not configured")
+
+            self._openai_service = AsyncOpenAIService(
+                api_key,
+                self.config.get('SUPABASE_URL'),
+                self.config.get('SUPABASE_SERVICE_KEY'),
+                self.config.get('CHAT_MODEL', 'gpt-3.5-turbo'),
+                http_pool=self.http_pool,
+                access_log_path=self.config.get('TTS_ACCESS_LOG_PATH'),
+                tts_pipeline_workers=self.config.get('TTS_PIPELINE_WORKERS', 4),
+                local_cache_index=_build_local_cache_index(self.config),
+                packed_store=_build_packed_store(self.config),
+                write_queue=_build_write_queue(self.config),
+                pre_cache_concurrency=self.config.get('TTS_PRE_CACHE_CONCURRENCY', 16),
+                blob_store=_build_blob_store(self.config, timeout=_remote_timeout(self.config)),
+                variant_policy=_build_variant_policy(self.config),
+                legacy_key_fallback=self.config.get('TTS_LEGACY_KEY_FALLBACK', True),
+                remote_timeout=_remote_timeout(self.config),
+                remote_breaker=_build_remote_breaker(self.config),
+                negative_cache=_build_negative_cache(self.config),
+                speech_trimmer=_build_speech_trimmer(self.config),
+                transcript_cache=_build_transcript_cache(self.config)
+            )
+        return self._openai_service
+
+    @property
+    def pdf_service(self) -> 'PDFService':
+        """Shared PDF service"""
+        if self._pdf_service is None:
+            from .pdf_service import PDFService
+            self._pdf_service = PDFService()
+        return self._pdf_service
+
+    @property
+    def transcription_sessions(self) -> 'AsyncTranscriptionSessions':
+        """Segmented transcription sessions, transcribed with the shared async OpenAI service"""
+        if self._transcription_sessions is None:
+            from .transcription_sessions import AsyncTranscriptionSessions
+            self._transcription_sessions = AsyncTranscriptionSessions(
+                self.openai_service.transcribe_audio, **_transcription_session_options(self.config)
+            )
+        return self._transcription_sessions
+
+    async def warm_connections(self) -> None:
+        """Open upstream connections when the worker starts serving"""
+        from .http_pool import upstream_warm_urls
+
+        await self.http_pool.warm(
+            upstream_warm_urls(self.config),
+            self.config.get('HTTP_POOL_WARM_CONNECTIONS', 1)
+        )
+
+    async def hydrate_tts_cache(self) -> None:
+        """Pull the TTS hot set into the local tier when the worker starts serving"""
+        if not _hydration_configured(self.config):
+            return
+        self._hydration_started = True
+        try:
+            self._cache_warmer = _build_cache_warmer(
+                self.config, self.openai_service.tts_cache_service, self.openai_service.variant_policy
+            )
+            if self._cache_warmer is not None:
+                await self._cache_warmer.hydrate_async()
+        except Exception as e:
+            print(f"[CacheWarmer] Skipping hydration: {e}")
+        finally:
+            self._hydration_done = True
+
+    def readiness(self) -> Dict:
+        """Whether the hot TTS set is local yet, with hydration progress"""
+        return _readiness(self._hydration_started, self._hydration_done, self._cache_warmer)
+
+    async def aclose(self) -> None:
+        """Drain pending cache writes, then close blob store and pooled connections on shutdown"""
+        tts_cache_service = self._openai_service.tts_cache_service if self._openai_service else None
+        if tts_cache_service and tts_cache_service.write_queue:
+            # The drain thread runs its writes on this loop, so wait for it off the loop
+            await asyncio.to_thread(tts_cache_service.write_queue.close)
+        if tts_cache_service and tts_cache_service.blob_store:
+            tts_cache_service.blob_store.close()
+        if self._http_pool is not None:
+            await self._http_pool.aclose()
@@ -0,0 +1,244 @@
+"""
+Shared HTTP connection pool for upstream APIs.
+
+One keep-alive pool per worker is shared by the OpenAI, Supabase and
+AssemblyAI clients so repeated calls reuse warm TLS connections. The WSGI
+app uses HTTPPool; the ASGI app uses AsyncHTTPPool.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+import httpx
+
+
+class HTTPPool:
+    """Keep-alive connection pool shared by every upstream HTTP client"""
+
+    def __init__(self, max_connections: int = 20, max_keepalive: int = 10,
+                 keepalive_expiry: float = 60.0, connect_timeout: float = 5.0,
+                 read_timeout: float = 60.0, http2: bool = True, verify=True):
+        """
+        Initialize the connection pool.
+
+        Args:
+            max_connections (int): Maximum concurrent connections across all hosts
+            max_keepalive (int): Maximum idle connections kept open
+            keepalive_expiry (float): Seconds an idle connection stays open
+            connect_timeout (float): Connect/TLS handshake timeout in seconds
+            read_timeout (float): Read/write timeout in seconds
+            http2 (bool): Negotiate HTTP/2 where the upstream supports it
+            verify: TLS verification setting (bool, CA bundle path or SSLContext)
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("[HTTPPool] h2 not installed, falling back to HTTP/1.1")
+                http2 = False
+        self.http2 = http2
+
+        # The connection pool lives in the transport; clients only add
+        # base URLs and headers on top of it.
+        self.transport = httpx.HTTPTransport(http2=http2, limits=self.limits, verify=verify)
+        self._client = self.client()
+
+    def client(self, **kwargs) -> httpx.Client:
+        """
+        Create a client that sends its requests through the shared pool.
+
+        Clients are cheap wrappers; closing one closes the shared pool, so
+        only the pool owner should do that (via close()).
+
+        Returns:
+            httpx.Client: Client bound to the shared transport
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return httpx.Client(transport=self.transport, **kwargs)
+
+    @property
+    def http_client(self) -> httpx.Client:
+        """General-purpose client for one-off upstream calls"""
+        return self._client
+
+    def attach_supabase(self, supabase_client, timeout: Optional[httpx.Timeout] = None) -> None:
+        """
+        Route a Supabase client's PostgREST traffic through the shared pool.
+
+        Supabase rebuilds its PostgREST client on auth events, so the
+        factory is wrapped rather than patching the current session once.
+
+        Args:
+            supabase_client: Client returned by supabase.create_client
+            timeout (httpx.Timeout): Timeouts for its requests (defaults to the pool's)
+        """
+        init_postgrest = supabase_client._init_postgrest_client
+        timeout = timeout or self.timeout
+
+        def init_pooled_postgrest(*args, **kwargs):
+            postgrest = init_postgrest(*args, **kwargs)
+            session = postgrest.session
+            postgrest.session = self.client(
+                base_url=session.base_url,
+                headers=session.headers,
+                timeout=timeout
+            )
+            session.close()
+            return postgrest
+
+        supabase_client._init_postgrest_client = init_pooled_postgrest
+        supabase_client._postgrest = None
+
+    def warm(self, urls: Iterable[str], connections_per_host: int = 1) -> None:
+        """
+        Open connections to upstream hosts ahead of the first real request.
+
+        Any response (even 401/404) leaves a live connection in the pool;
+        failures are ignored since warming is best-effort.
+
+        Args:
+            urls (Iterable[str]): One URL per upstream host
+            connections_per_host (int): Concurrent connections to open per host
+        """
+        targets = [url for url in urls if url] * max(1, connections_per_host)
+        if not targets:
+            return
+
+        def touch(url: str) -> None:
+            try:
+                self._client.head(url)
+            except Exception as e:
+                print(f"[HTTPPool] Failed to warm {url}: {e}")
+
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            list(executor.map(touch, targets))
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        self._client.close()
+        self.transport.close()
+
+
+class AsyncHTTPPool:
+    """Async counterpart of HTTPPool for the ASGI serving mode"""
+
+    def __init__(self, max_connections: int = 200, max_keepalive: int = 20,
+                 keepalive_expiry: float = 60.0, connect_timeout: float = 5.0,
+                 read_timeout: float = 60.0, http2: bool = True, verify=True):
+        """
+        Initialize the connection pool.
+
+        Must be created inside the event loop that will use it.
+
+        Args:
+            max_connections (int): Maximum concurrent connections across all hosts
+            max_keepalive (int): Maximum idle connections kept open
+            keepalive_expiry (float): Seconds an idle connection stays open
+            connect_timeout (float): Connect/TLS handshake timeout in seconds
+            read_timeout (float): Read/write timeout in seconds
+            http2 (bool): Negotiate HTTP/2 where the upstream supports it
+            verify: TLS verification setting (bool, CA bundle path or SSLContext)
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("[AsyncHTTPPool] h2 not installed, falling back to HTTP/1.1")
+                http2 = False
+        self.http2 = http2
+
+        self.transport = httpx.AsyncHTTPTransport(http2=http2, limits=self.limits, verify=verify)
+        self._client = self.client()
+
+    def client(self, **kwargs) -> httpx.AsyncClient:
+        """Create an async client that sends its requests through the shared pool"""
+        kwargs.setdefault('timeout', self.timeout)
+        return httpx.AsyncClient(transport=self.transport, **kwargs)
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """General-purpose async client for one-off upstream calls"""
+        return self._client
+
+    async def warm(self, urls: Iterable[str], connections_per_host: int = 1) -> None:
+        """Open connections to upstream hosts ahead of the first real request"""
+        targets = [url for url in urls if url] * max(1, connections_per_host)
+
+        async def touch(url: str) -> None:
+            try:
+                await self._client.head(url)
+            except Exception as e:
+                print(f"[AsyncHTTPPool] Failed to warm {url}: {e}")
+
+        await asyncio.gather(*(touch(url) for url in targets))
+
+    async def aclose(self) -> None:
+        """Close every pooled connection"""
+        await self._client.aclose()
+        await self.transport.aclose()
+
+
+def create_http_pool(config) -> HTTPPool:
+    """
+    Build an HTTPPool from application config.
+
+    Args:
+        config: Flask config mapping
+
+    Returns:
+        HTTPPool: Configured pool
+    """
+    return HTTPPool(
+        max_connections=config.get('HTTP_POOL_MAX_CONNECTIONS', 20),
+        max_keepalive=config.get('HTTP_POOL_MAX_KEEPALIVE', 10),
+        keepalive_expiry=config.get('HTTP_POOL_KEEPALIVE_EXPIRY', 60.0),
+        connect_timeout=config.get('HTTP_CONNECT_TIMEOUT', 5.0),
+        read_timeout=config.get('HTTP_READ_TIMEOUT', 60.0),
+        http2=config.get('HTTP2_ENABLED', True)
+    )
+
+
+def create_async_http_pool(config) -> AsyncHTTPPool:
+    """
+    Build an AsyncHTTPPool from application config.
+
+    Args:
+        config: Quart/Flask config mapping
+
+    Returns:
+        AsyncHTTPPool: Configured pool
+    """
+    return AsyncHTTPPool(
+        max_connections=config.get('ASYNC_HTTP_POOL_MAX_CONNECTIONS', 200),
+        max_keepalive=config.get('HTTP_POOL_MAX_KEEPALIVE', 10),
+        keepalive_expiry=config.get('HTTP_POOL_KEEPALIVE_EXPIRY', 60.0),
+        connect_timeout=config.get('HTTP_CONNECT_TIMEOUT', 5.0),
+        read_timeout=config.get('HTTP_READ_TIMEOUT', 60.0),
+        http2=config.get('HTTP2_ENABLED', True)
+    )
+
+
+def upstream_warm_urls(config) -> list:
+    """Base URLs of the upstreams this worker talks to"""
+    urls = []
+    if config.get('OPENAI_API_KEY'):
+        urls.append('https://api.openai.com/v1')
+    if config.get('SUPABASE_URL'):
+        urls.append(config['SUPABASE_URL'].rstrip('/') + '/rest/v1/')
+    if config.get('ASSEMBLYAI_API_KEY'):
+        urls.append('https://streaming.assemblyai.com')
+    return urls
@@ -0,0 +1,347 @@
+"""
+On-disk index and eviction for the local TTS cache.
+
+Every MP3 the app keeps on local disk (the /tmp/tts_cache tier and the
+legacy /tmp/tts_cache_*.mp3 files) is recorded in a small SQLite table with
+its size and last access time. When the byte budget or file count is
+exceeded, the least recently used unpinned files are deleted in small
+batches on a background thread, so no request ever waits on eviction.
+Additions and accesses are queued and written in batches by that thread
+too, so requests (and the ASGI event loop) never wait on SQLite either.
+A clip hard-linked under two names is one entry (path plus alias), so its
+bytes are counted once and eviction removes both names. All gunicorn
+workers share the same index.
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    content_type TEXT,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    last_access REAL NOT NULL,
+    alias TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_entries_lru ON entries (pinned, last_access);
+"""
+
+# The same file under its other name (indexes created before aliases were tracked get the column added)
+_ALIAS_INDEX = "CREATE INDEX IF NOT EXISTS idx_entries_alias ON entries (alias)"
+
+
+class LocalCacheIndex:
+    """SQLite index of local audio files with byte- and count-budgeted LRU eviction"""
+
+    def __init__(self, db_path: str, max_bytes: int, max_files: int, pinned_content_types: Iterable[str] = (),
+                 evict_batch: int = 25, low_water: float = 0.9, touch_interval: float = 60.0,
+                 flush_interval: float = 1.0):
+        """
+        Initialize the index.
+
+        Args:
+            db_path (str): SQLite database file (shared by all workers)
+            max_bytes (int): Byte budget for indexed files (0 disables the limit)
+            max_files (int): File count budget (0 disables the limit)
+            pinned_content_types (Iterable[str]): Content types that are never evicted
+            evict_batch (int): Files deleted per eviction step
+            low_water (float): Evict down to this fraction of the budget, so eviction
+                doesn't restart on every new file
+            touch_interval (float): Minimum seconds between access-time writes per file
+            flush_interval (float): Seconds queued additions and accesses wait to be written
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.pinned_content_types = set(pinned_content_types)
+        self.evict_batch = evict_batch
+        self.low_water = low_water
+        self.touch_interval = touch_interval
+        self.flush_interval = flush_interval
+
+        self._local = threading.local()
+        self._touched: Dict[str, float] = {}
+        self._evicting = threading.Lock()
+
+        # path -> (content_type, alias, time) of queued additions, path -> time of queued accesses
+        self._pending_adds: Dict[str, Tuple[Optional[str], Optional[str], float]] = {}
+        self._pending_touches: Dict[str, float] = {}
+        self._pending_lock = threading.Lock()
+        self._flusher_pid: Optional[int] = None
+
+        db = self._db()
+        db.executescript(_SCHEMA)
+        if 'alias' not in {row[1] for row in db.execute('PRAGMA table_info(entries)')}:
+            try:
+                db.execute('ALTER TABLE entries ADD COLUMN alias TEXT')
+            except sqlite3.OperationalError:
+                pass  # Another worker added it first
+        db.execute(_ALIAS_INDEX)
+
+    def _db(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections can't be shared across threads)"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def add(self, path, content_type: Optional[str] = None, alias=None) -> None:
+        """
+        Record a newly written file (queued), then evict in the background if over budget.
+
+        Args:
+            path: The file
+            content_type (str): Its content type (pinned types are never evicted)
+            alias: Another name of the same file (a hard link), evicted with it
+        """
+        path = str(path)
+        now = time.time()
+        self._touched[path] = now
+        with self._pending_lock:
+            self._pending_adds[path] = (content_type, None if alias is None else str(alias), now)
+            self._pending_touches.pop(path, None)
+        self._schedule_flush()
+
+    def touch(self, path) -> None:
+        """Mark a file as used (throttled and queued; indexes it if it predates the index)"""
+        path = str(path)
+        now = time.time()
+        if now - self._touched.get(path, 0) < self.touch_interval:
+            return
+        self._touched[path] = now
+        with self._pending_lock:
+            if path not in self._pending_adds:
+                self._pending_touches[path] = now
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """Start this process's flush thread if it isn't running"""
+        if self._flusher_pid == os.getpid():
+            return
+        with self._pending_lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_loop, name='tts-cache-index', daemon=True).start()
+        atexit.register(self.flush)
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                if self.flush():
+                    self.maybe_evict()
+            except Exception as e:
+                print(f"[LocalCacheIndex] Flush error: {e}")
+
+    def flush(self) -> int:
+        """
+        Write queued additions and accesses in one transaction.
+
+        Returns:
+            int: Number of files written
+        """
+        with self._pending_lock:
+            adds, self._pending_adds = self._pending_adds, {}
+            touches, self._pending_touches = self._pending_touches, {}
+        if not adds and not touches:
+            return 0
+
+        rows = []
+        for path, (content_type, alias, now) in adds.items():
+            try:
+                size = os.stat(path).st_size
+            except FileNotFoundError:
+                continue
+            rows.append((path, size, content_type, int(content_type in self.pinned_content_types), now, alias))
+
+        db = self._db()
+        try:
+            db.execute('BEGIN IMMEDIATE')
+        except sqlite3.OperationalError:
+            self._requeue(adds, touches)  # Database busy; next round
+            raise
+        try:
+            unindexed = []
+            for path, now in touches.items():
+                cursor = db.execute('UPDATE entries SET last_access = ? WHERE path = ? OR alias = ?', (now, path, path))
+                if cursor.rowcount == 0:
+                    unindexed.append(path)
+            for path in unindexed:
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                rows.append((path, stat.st_size, None, 0, touches[path], None))
+
+            # A file indexed as another's alias keeps no entry of its own
+            aliases = {row[5] for row in rows if row[5] is not None}
+            db.executemany('DELETE FROM entries WHERE path = ?', [(alias,) for alias in aliases])
+            kept = []
+            for row in rows:
+                if row[0] in aliases:
+                    continue
+                if row[5] is None and db.execute('UPDATE entries SET last_access = ? WHERE alias = ?', (row[4], row[0])).rowcount:
+                    continue  # Already indexed as another file's alias
+                kept.append(row)
+            rows = kept
+            db.executemany(
+                """INSERT INTO entries (path, size, content_type, pinned, last_access, alias) VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(path) DO UPDATE SET size = excluded.size, content_type = excluded.content_type,
+                                                   pinned = excluded.pinned, last_access = excluded.last_access,
+                                                   alias = COALESCE(excluded.alias, entries.alias)""",
+                rows
+            )
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            self._requeue(adds, touches)
+            raise
+        return len(rows)
+
+    def _requeue(self, adds: dict, touches: dict) -> None:
+        """Put back what a failed flush took, unless queued again since"""
+        with self._pending_lock:
+            for path, pending in adds.items():
+                self._pending_adds.setdefault(path, pending)
+            for path, now in touches.items():
+                if path not in self._pending_adds:
+                    self._pending_touches.setdefault(path, now)
+
+    def remove(self, path) -> None:
+        """Forget a file that was deleted outside the index"""
+        path = str(path)
+        with self._pending_lock:
+            self._pending_adds.pop(path, None)
+            self._pending_touches.pop(path, None)
+        db = self._db()
+        db.execute('DELETE FROM entries WHERE path = ?', (path,))
+        db.execute('UPDATE entries SET alias = NULL WHERE alias = ?', (path,))
+        self._touched.pop(path, None)
+
+    def forget_dir(self, directory) -> None:
+        """Forget every file under a directory that was wiped (a linked file elsewhere keeps its entry)"""
+        prefix = f"{str(directory).rstrip('/')}/"
+        with self._pending_lock:
+            for pending in (self._pending_adds, self._pending_touches):
+                for path in [path for path in pending if path.startswith(prefix)]:
+                    pending.pop(path, None)
+        db = self._db()
+        db.execute(
+            "UPDATE OR REPLACE entries SET path = alias, alias = NULL WHERE substr(path, 1, ?) = ? AND alias IS NOT NULL",
+            (len(prefix), prefix)
+        )
+        db.execute("DELETE FROM entries WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))
+        for path in [path for path in self._touched if path.startswith(prefix)]:
+            self._touched.pop(path, None)
+
+    def usage(self) -> Tuple[int, int]:
+        """(bytes, files) currently indexed, queued additions included"""
+        self.flush()
+        size, count = self._db().execute('SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries').fetchone()
+        return size, count
+
+    def adopt(self, paths: Iterable[Path]) -> int:
+        """
+        Index files left over from before the index existed (one-off, empty index only).
+
+        A file seen again under another name (a hard link) becomes the alias of
+        the first name it was seen under.
+
+        Returns:
+            int: Number of files adopted
+        """
+        db = self._db()
+        if db.execute('SELECT 1 FROM entries LIMIT 1').fetchone():
+            return 0
+
+        rows: Dict[Tuple[int, int], list] = {}
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            inode = (stat.st_dev, stat.st_ino)
+            if inode in rows:
+                rows[inode][5] = rows[inode][5] or str(path)
+                continue
+            rows[inode] = [str(path), stat.st_size, None, 0, stat.st_mtime, None]
+        db.executemany(
+            'INSERT OR IGNORE INTO entries (path, size, content_type, pinned, last_access, alias) VALUES (?, ?, ?, ?, ?, ?)',
+            rows.values()
+        )
+        self.maybe_evict()
+        return len(rows)
+
+    def _over(self, size: int, count: int, fraction: float = 1.0) -> bool:
+        return (
+            (self.max_bytes > 0 and size > self.max_bytes * fraction)
+            or (self.max_files > 0 and count > self.max_files * fraction)
+        )
+
+    def maybe_evict(self) -> None:
+        """Start a background eviction pass if over budget and none is running in this process"""
+        if not self._over(*self.usage()):
+            return
+        if not self._evicting.acquire(blocking=False):
+            return
+        threading.Thread(target=self._evict_loop, name='tts-cache-evict', daemon=True).start()
+
+    def _evict_loop(self) -> None:
+        try:
+            while self.evict_step():
+                time.sleep(0.01)  # Let request threads at the database between batches
+        except Exception as e:
+            print(f"[LocalCacheIndex] Eviction error: {e}")
+        finally:
+            self._evicting.release()
+
+    def evict_step(self) -> int:
+        """
+        Delete one batch of least recently used unpinned files, if over budget.
+
+        Returns:
+            int: Number of files evicted (0 when within budget or nothing is evictable)
+        """
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')  # Workers evicting at once pick disjoint batches
+        try:
+            size, count = db.execute('SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries').fetchone()
+            if not self._over(size, count, self.low_water):
+                db.execute('COMMIT')
+                return 0
+
+            victims = []
+            for path, file_size, alias in db.execute(
+                'SELECT path, size, alias FROM entries WHERE pinned = 0 ORDER BY last_access LIMIT ?', (self.evict_batch,)
+            ).fetchall():
+                if not self._over(size, count, self.low_water):
+                    break
+                victims.append((path, alias))
+                size -= file_size
+                count -= 1
+
+            db.executemany('DELETE FROM entries WHERE path = ?', [(path,) for path, _ in victims])
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+
+        if not victims:
+            print(f"[LocalCacheIndex] Over budget ({size} bytes, {count} files) but everything left is pinned")
+        for names in victims:
+            for path in names:
+                if path is not None:
+                    self._touched.pop(path, None)
+                    Path(path).unlink(missing_ok=True)
+        return len(victims)
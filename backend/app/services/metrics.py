@@ -0,0 +1,369 @@
+"""
+Prometheus metrics for the API, its upstream calls and the TTS cache.
+
+Updates are in-process: a dict increment under a lock, cheap enough for the
+TTS cache hot path. Each gunicorn worker periodically writes a snapshot of
+its counters to METRICS_DIR (metrics.<pid>.json); /metrics, served by
+whichever worker takes the scrape, adds up its own live values and every
+other worker's latest snapshot. A worker that exits leaves its last
+snapshot behind; the next worker to start folds it into metrics.archive.json
+so counters never go backwards.
+
+Only the metrics declared in METRICS can be recorded, with the labels
+declared for them; label values must come from small, fixed sets (route
+rules, not paths).
+"""
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+from . import tracing
+
+# Seconds; spans cache hits (sub-millisecond) to long TTS generations
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# name -> (type, help, label names, histogram buckets)
+METRICS = {
+    'http_request_duration_seconds': (
+        'histogram', 'Time from request to response headers, per route',
+        ('route', 'method', 'status'), LATENCY_BUCKETS
+    ),
+    'upstream_request_duration_seconds': (
+        'histogram', 'Latency of calls to OpenAI, Supabase and the blob store',
+        ('upstream', 'operation', 'outcome'), LATENCY_BUCKETS
+    ),
+    'tts_cache_lookups_total': (
+        'counter', 'TTS cache lookups by the tier that answered (miss: none did)',
+        ('tier', 'content_type'), None
+    ),
+    'tts_audio_bytes_served_total': (
+        'counter', 'Audio bytes sent to clients, per route',
+        ('route',), None
+    ),
+    'transcription_audio_removed_seconds_total': (
+        'counter', 'Silence trimmed from recordings before Whisper, in seconds of audio',
+        (), None
+    ),
+    'transcription_audio_removed_bytes_total': (
+        'counter', 'Bytes by which trimming and downsampling shrank recordings before Whisper',
+        (), None
+    ),
+    'transcript_cache_lookups_total': (
+        'counter', 'Transcript cache lookups before Whisper (hit: a retried upload of the same audio)',
+        ('result',), None
+    ),
+    'transcription_segments_total': (
+        'counter', 'Transcription session segments transcribed, while recording (background) or at finalize',
+        ('stage',), None
+    ),
+}
+
+_Key = Tuple[str, Tuple[str, ...]]
+
+
+class Stopwatch:
+    """Time since it was created, less the time spent in paused()"""
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._paused = 0.0
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """Leave the block out of elapsed()"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._paused += time.perf_counter() - started
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start - self._paused
+
+
+class MetricsRegistry:
+    """Counters and histograms of one process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[_Key, float] = {}
+        # key -> [per-bucket counts (last is +Inf), sum]
+        self._histograms: Dict[_Key, list] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, str]) -> _Key:
+        """Metric name and label values in declared order (KeyError on an unknown name or label)"""
+        return name, tuple(str(labels[label]) for label in METRICS[name][2])
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        """Add to a counter"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a histogram observation"""
+        key = self._key(name, labels)
+        buckets = METRICS[name][3]
+        index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0]
+            histogram[0][index] += 1
+            histogram[1] += value
+
+    @contextmanager
+    def timer(self, name: str, span: Optional[str] = None, **labels) -> Iterator['Stopwatch']:
+        """
+        Observe the duration of the block, with outcome='ok' or 'error' (if it raises).
+
+        Time spent inside the yielded Stopwatch's paused() is left out, e.g. a
+        generator suspended at its yield while the client reads.
+
+        Args:
+            name (str): Histogram name
+            span (str): Also add the duration to this span of the request's Server-Timing
+            **labels: The histogram's other labels
+        """
+        stopwatch = Stopwatch()
+        outcome = 'error'
+        try:
+            yield stopwatch
+            outcome = 'ok'
+        finally:
+            duration = stopwatch.elapsed()
+            self.observe(name, duration, outcome=outcome, **labels)
+            if span:
+                tracing.add(span, duration)
+
+    def snapshot(self) -> dict:
+        """JSON-serializable copy of every series"""
+        with self._lock:
+            return {
+                'counters': [[name, list(values), value] for (name, values), value in self._counters.items()],
+                'histograms': [[name, list(values), list(counts), total]
+                               for (name, values), (counts, total) in self._histograms.items()]
+            }
+
+
+def merge_snapshots(snapshots: List[dict]) -> dict:
+    """Add up snapshots series by series"""
+    counters: Dict[_Key, float] = {}
+    histograms: Dict[_Key, list] = {}
+    for snapshot in snapshots:
+        for name, values, value in snapshot.get('counters', ()):
+            if name in METRICS:
+                key = (name, tuple(values))
+                counters[key] = counters.get(key, 0.0) + value
+        for name, values, counts, total in snapshot.get('histograms', ()):
+            if name not in METRICS or len(counts) != len(METRICS[name][3]) + 1:
+                continue  # Buckets changed since the snapshot was written
+            key = (name, tuple(values))
+            merged = histograms.setdefault(key, [[0] * len(counts), 0.0])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+    return {
+        'counters': [[name, list(values), value] for (name, values), value in counters.items()],
+        'histograms': [[name, list(values), counts, total] for (name, values), (counts, total) in histograms.items()]
+    }
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus(snapshot: dict) -> str:
+    """Prometheus text exposition format (version 0.0.4) of a snapshot"""
+    series: Dict[str, list] = {name: [] for name in METRICS}
+    for name, values, value in snapshot.get('counters', ()):
+        series[name].append((values, value))
+    for name, values, counts, total in snapshot.get('histograms', ()):
+        series[name].append((values, (counts, total)))
+
+    lines = []
+    for name, (kind, help_text, label_names, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for values, value in sorted(series[name], key=lambda item: item[0]):
+            if kind == 'counter':
+                lines.append(f'{name}{_labels(label_names, values)} {_number(value)}')
+                continue
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), counts):
+                cumulative += count
+                le = 'le="{}"'.format(bound if bound == '+Inf' else _number(bound))
+                lines.append(f'{name}_bucket{_labels(label_names, values, le)} {cumulative}')
+            lines.append(f'{name}_sum{_labels(label_names, values)} {_number(total)}')
+            lines.append(f'{name}_count{_labels(label_names, values)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+class SharedMetrics:
+    """Publishes this worker's registry to METRICS_DIR and collects every worker's"""
+
+    def __init__(self, registry: MetricsRegistry, directory: str = "/tmp/metrics", flush_interval: float = 5.0):
+        """
+        Initialize the exporter.
+
+        Args:
+            registry (MetricsRegistry): This worker's metrics
+            directory (str): Snapshot directory (must be shared by all workers on the machine)
+            flush_interval (float): Seconds between snapshots; other workers' values in a
+                scrape are at most this old
+        """
+        self.registry = registry
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self._pid: Optional[int] = None
+        self._lock_file: Optional[IO] = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def _snapshot_path(self, pid) -> Path:
+        return self.directory / f"metrics.{pid}.json"
+
+    def start(self) -> None:
+        """
+        Claim this worker's snapshot, adopt dead workers' and start the flush thread.
+
+        Call it in the worker (on its first request, or when it starts serving),
+        not in a gunicorn --preload master; it does nothing if this process
+        already started it.
+
+        Raises:
+            RuntimeError: Another exporter in this process already publishes to
+                the directory (use shared_exporter())
+        """
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            pid = os.getpid()
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+            with open(self.directory / 'metrics.archive.lock', 'a') as archive_lock:
+                fcntl.flock(archive_lock, fcntl.LOCK_EX)
+                self._adopt_dead()
+                # Held for the life of the worker; a snapshot whose lock can be taken belongs to a dead one
+                lock_file = open(self.directory / f"metrics.{pid}.lock", 'a')
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    lock_file.close()
+                    raise RuntimeError(
+                        f"metrics.{pid}.lock in {self.directory} is held by another exporter in this process"
+                    ) from None
+            self._lock_file = lock_file
+            self._pid = pid
+
+            threading.Thread(target=self._run, name='metrics-flush', daemon=True).start()
+            atexit.register(self.flush)
+
+    def _adopt_dead(self) -> None:
+        """Fold the snapshots of exited workers (including a previous holder of this pid) into the archive (archive lock held)"""
+        dead = []
+        for lock_path in self.directory.glob('metrics.*.lock'):
+            pid = lock_path.name.split('.')[1]
+            if pid == 'archive':
+                continue
+            with open(lock_path, 'a') as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # Still running
+                dead.append((pid, lock_path))
+        if not dead:
+            return
+
+        archive_path = self.directory / 'metrics.archive.json'
+        merged = merge_snapshots([self._read(archive_path), *(self._read(self._snapshot_path(pid)) for pid, _ in dead)])
+        self._write(archive_path, merged)
+        for pid, lock_path in dead:
+            self._snapshot_path(pid).unlink(missing_ok=True)
+            lock_path.unlink(missing_ok=True)
+        print(f"[Metrics] Archived metrics of {len(dead)} exited workers")
+
+    @staticmethod
+    def _read(path: Path) -> dict:
+        try:
+            return json.loads(path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def _write(path: Path, snapshot: dict) -> None:
+        """Replace a snapshot atomically (readers never see a partial one)"""
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(snapshot))
+        os.replace(tmp_path, path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[Metrics] Error writing snapshot: {e}")
+
+    def flush(self) -> None:
+        """Write this worker's current values"""
+        if self._pid == os.getpid():
+            self._write(self._snapshot_path(self._pid), self.registry.snapshot())
+
+    def collect(self) -> dict:
+        """Every worker's values added up (this worker's live, the others' as of their last flush)"""
+        snapshots = [self.registry.snapshot()]
+        if self._pid is not None:
+            own = self._snapshot_path(self._pid).name
+            snapshots += [
+                self._read(path) for path in self.directory.glob('metrics.*.json') if path.name != own
+            ]
+        return merge_snapshots(snapshots)
+
+    def render(self) -> str:
+        """collect() in Prometheus text format"""
+        return render_prometheus(self.collect())
+
+
+# The process-wide registry everything records into
+registry = MetricsRegistry()
+
+_exporters: Dict[str, SharedMetrics] = {}
+_exporters_lock = threading.Lock()
+
+
+def shared_exporter(directory: str, flush_interval: float = 5.0) -> SharedMetrics:
+    """
+    The process's exporter of the registry to directory.
+
+    Every app created in a process (tests, or an app factory called twice)
+    shares it, since only one exporter per process can hold the worker's
+    snapshot lock.
+    """
+    with _exporters_lock:
+        exporter = _exporters.get(directory)
+        if exporter is None:
+            exporter = _exporters[directory] = SharedMetrics(registry, directory, flush_interval)
+        return exporter
+inc = registry.inc
+observe = registry.observe
+timer = registry.timer
@@ -0,0 +1,72 @@
+"""
+Short-lived record of clips the permanent TTS tier doesn't have.
+
+A cache miss is followed by generation, and until the new clip is written
+back every repeat of the lookup (retries, the pipeline, other requests for
+the same sentence) would ask Supabase again for a clip that isn't there.
+Keys found missing are remembered for a few seconds and skipped; the TTL
+bounds how long another worker's fresh write can go unnoticed here.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Set
+
+
+class NegativeCache:
+    """Per-worker TTL set of content hashes known to be missing remotely"""
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl (float): Seconds a miss is remembered
+            max_entries (int): Misses kept at most (the oldest go first)
+            clock (Callable): Monotonic time source
+        """
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._expires: 'OrderedDict[str, float]' = OrderedDict()
+        self.hits = 0
+
+    def known_missing(self, content_hashes: Iterable[str]) -> Set[str]:
+        """The content hashes among these that were found missing within the TTL"""
+        now = self._clock()
+        found = set()
+        with self._lock:
+            for content_hash in content_hashes:
+                expires = self._expires.get(content_hash)
+                if expires is None:
+                    continue
+                if expires <= now:
+                    del self._expires[content_hash]
+                    continue
+                found.add(content_hash)
+            self.hits += len(found)
+        return found
+
+    def add(self, content_hashes: Iterable[str]) -> None:
+        """Remember content hashes a remote lookup didn't find"""
+        expires = self._clock() + self.ttl
+        with self._lock:
+            for content_hash in content_hashes:
+                self._expires[content_hash] = expires
+                self._expires.move_to_end(content_hash)
+            while len(self._expires) > self.max_entries:
+                self._expires.popitem(last=False)
+
+    def discard(self, content_hash: str) -> None:
+        """Forget a miss (the clip has just been cached)"""
+        with self._lock:
+            self._expires.pop(content_hash, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Size and hits since the worker started"""
+        with self._lock:
+            return {
+                'negative_cache_entries': len(self._expires),
+                'negative_cache_hits': self.hits
+            }
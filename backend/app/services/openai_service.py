@@ -1,18 +1,38 @@
 """
 OpenAI API service for TTS, transcription, and AI analysis.
 """
-from openai import OpenAI
-from typing import Optional, Dict
-import time
+from typing import Optional, Dict, List, Tuple, Union, BinaryIO, Iterator, TYPE_CHECKING
 import hashlib
+import os
+import time
+import threading
 from pathlib import Path
-from .tts_cache_service import TTSCacheService
+from .tts_cache_service import TTSCacheService, CHUNK_SIZE
+from . import metrics, tracing
+from .tts_pipeline import TTSPipeline
+from .cache_keys import cache_key as clip_key
+from .tts_variants import TTSVariant, VariantPolicy
+from .pre_cache import PreCacheEngine
+from .single_flight import SingleFlight
+from .prompts import response_messages, followup_messages, session_messages
+
+if TYPE_CHECKING:
+    import httpx
+    from .blob_store import BlobStore
+    from .circuit_breaker import CircuitBreaker
+    from .negative_cache import NegativeCache
+    from .cache_write_queue import CacheWriteQueue
+    from .http_pool import HTTPPool
+    from .local_cache_index import LocalCacheIndex
+    from .packed_audio_store import PackedAudio, PackedAudioStore
+    from .speech_trimmer import SpeechTrimmer
+    from .transcript_cache import TranscriptCache
 
 
 class OpenAIService:
     """Service for handling OpenAI API operations"""
 
-    def __init__(self, api_key: str, supabase_url: str = None, supabase_key: str = None, chat_model: str = "gpt-3.5-turbo"):
+    def __init__(self, api_key: str, supabase_url: str = None, supabase_key: str = None, chat_model: str = "gpt-3.5-turbo", http_pool: Optional['HTTPPool'] = None, access_log_path: Optional[str] = None, tts_pipeline_workers: int = 4, local_cache_index: Optional['LocalCacheIndex'] = None, packed_store: Optional['PackedAudioStore'] = None, write_queue: Optional['CacheWriteQueue'] = None, pre_cache_concurrency: int = 16, blob_store: Optional['BlobStore'] = None, variant_policy: Optional[VariantPolicy] = None, legacy_key_fallback: bool = True, remote_timeout: Optional['httpx.Timeout'] = None, remote_breaker: Optional['CircuitBreaker'] = None, negative_cache: Optional['NegativeCache'] = None, speech_trimmer: Optional['SpeechTrimmer'] = None, transcript_cache: Optional['TranscriptCache'] = None):
         """
         Initialize OpenAI service.
 
@@ -21,111 +41,431 @@ class OpenAIService:
             supabase_url (str): Supabase project URL for caching
             supabase_key (str): Supabase service key for caching
             chat_model (str): Chat model to use for analysis
+            http_pool (HTTPPool): Shared connection pool for upstream calls
+            access_log_path (str): Where to persist TTS request counts for cache hydration
+            tts_pipeline_workers (int): Reply sentences synthesized concurrently
+            local_cache_index (LocalCacheIndex): Size/LRU index that keeps local audio files within budget
+            packed_store (PackedAudioStore): Packed local tier for the permanent cache
+            write_queue (CacheWriteQueue): Write-behind queue for Supabase cache persistence
+            pre_cache_concurrency (int): Clips a pre-cache job synthesizes at once
+            blob_store (BlobStore): Where the permanent TTS tier keeps audio (defaults to Supabase bytea)
+            variant_policy (VariantPolicy): Picks the TTS model and format per content type
+                (defaults to tts-1-hd MP3 for everything)
+            legacy_key_fallback (bool): Also look up TTS clips under their pre-v2 cache keys
+            remote_timeout (httpx.Timeout): Timeouts for the TTS cache's Supabase calls
+            remote_breaker (CircuitBreaker): Drops the TTS cache to local-only while Supabase is failing
+            negative_cache (NegativeCache): Remembers remote TTS cache misses for a short TTL
+            speech_trimmer (SpeechTrimmer): Trims silence from WAV recordings before Whisper
+            transcript_cache (TranscriptCache): Transcripts of recently uploaded audio, so retries skip Whisper
         """
-        self.client = OpenAI(api_key=api_key)
+        from openai import OpenAI  # Deferred: heavy import, not needed for /api/health
+
+        if http_pool:
+            self.client = OpenAI(api_key=api_key, http_client=http_pool.client(), timeout=http_pool.timeout)
+        else:
+            self.client = OpenAI(api_key=api_key)
         self.chat_model = chat_model
+        self.speech_trimmer = speech_trimmer
+        self.transcript_cache = transcript_cache
+        self.local_cache_index = local_cache_index
+        self.variant_policy = variant_policy or VariantPolicy()
+        self.tts_pipeline = TTSPipeline(
+            self.text_to_speech, max_workers=tts_pipeline_workers, on_rendered=self._index_file,
+            variant_for=lambda content_type: self.variant_policy.choose(content_type, joinable=True)
+        )
+        # Coalesces concurrent generation of the same audio (threads and workers)
+        self.single_flight = SingleFlight()
         self.tts_cache: Dict[str, str] = {}  # Legacy cache for backward compatibility
+        self._tts_cache_lock = threading.Lock()  # Service is shared across request threads
         
         # Initialize TTS cache service if Supabase credentials provided
         if supabase_url and supabase_key:
-            self.tts_cache_service = TTSCacheService(supabase_url, supabase_key)
+            self.tts_cache_service = TTSCacheService(supabase_url, supabase_key, http_pool=http_pool, access_log_path=access_log_path, local_index=local_cache_index, packed_store=packed_store, write_queue=write_queue, blob_store=blob_store, legacy_key_fallback=legacy_key_fallback, remote_timeout=remote_timeout, remote_breaker=remote_breaker, negative_cache=negative_cache)
         else:
             self.tts_cache_service = None
 
-    def text_to_speech(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "narrative") -> Optional[str]:
+        # Warms the static interview audio, all missing clips at once
+        self.pre_cache = PreCacheEngine(
+            self.find_cached_many,
+            lambda text, voice, content_type: self._generate_speech(text, voice, "/tmp", content_type, raise_errors=True),
+            max_concurrency=pre_cache_concurrency
+        )
+
+    def _get_legacy_cached(self, cache_key: str) -> Optional[str]:
+        """Look up a legacy cache entry, dropping it if the file is gone"""
+        with self._tts_cache_lock:
+            cached_path = self.tts_cache.get(cache_key)
+            if cached_path is None:
+                return None
+            if Path(cached_path).exists():
+                self._touch_file(cached_path)
+                return cached_path
+            # Remove stale (evicted) cache entry
+            self.tts_cache.pop(cache_key, None)
+            return None
+
+    def _index_file(self, path: str, content_type: Optional[str] = None) -> None:
+        """Add a generated audio file to the local eviction index"""
+        if self.local_cache_index:
+            self.local_cache_index.add(path, content_type)
+
+    def _touch_file(self, path: str) -> None:
+        """Record a hit on a generated audio file for LRU eviction"""
+        if self.local_cache_index:
+            self.local_cache_index.touch(path)
+
+    def choose_variant(self, content_type: str = "narrative", **hints) -> TTSVariant:
         """
-        Converts text to speech using OpenAI TTS with permanent caching.
+        TTS variant (model and format) for a request.
+
+        Args:
+            content_type (str): Type of content (narrative, question, response, etc.)
+            **hints: Client hints, as for VariantPolicy.choose
+
+        Returns:
+            TTSVariant: The variant to generate or look up
+        """
+        return self.variant_policy.choose(content_type, **hints)
+
+    def open_cached_speech(self, text: str, voice: str = "nova", content_type: str = "narrative", variant: Optional[TTSVariant] = None) -> Optional['PackedAudio']:
+        """
+        Look up cached speech in the packed local store, without copying it.
 
         Args:
             text (str): Text to speak
-            voice (str): Voice to use (alloy, echo, fable, onyx, nova, shimmer)
-            output_dir (str): Directory to save audio file
+            voice (str): Voice to use
             content_type (str): Type of content for caching (narrative, question, etc.)
+            variant (TTSVariant): Model and format (defaults to the policy's choice for content_type)
 
         Returns:
-            str: Path to the saved audio file or None if error
+            PackedAudio: The cached clip, or None (a miss, or no packed store configured)
         """
-        try:
-            # Check permanent cache first
-            if self.tts_cache_service:
-                cached_path = self.tts_cache_service.get_cached_audio(text, voice)
-                if cached_path:
-                    print(f"Using permanently cached TTS for: {text[:50]}...")
-                    return cached_path
-            
-            # Create cache key from text and voice
-            cache_key = hashlib.md5(f"{text}_{voice}".encode()).hexdigest()
-            
-            # Check legacy cache
-            if cache_key in self.tts_cache:
-                cached_file = Path(self.tts_cache[cache_key])
-                if cached_file.exists():
-                    print(f"Using legacy cached TTS for: {text[:50]}...")
-                    return str(cached_file)
-                else:
-                    # Remove stale cache entry
-                    del self.tts_cache[cache_key]
-            
-            try:
-                # Generate speech with streaming for faster response
-                response = self.client.audio.speech.create(
-                    model="tts-1-hd",  # Use HD model for better quality
-                    voice=voice,
-                    input=text,
-                    response_format="mp3"  # Explicit format for consistency
-                )
+        if not self.tts_cache_service:
+            return None
+        variant = variant or self.variant_policy.choose(content_type)
+        audio = self.tts_cache_service.open_local_audio(text, voice, variant, content_type)
+        if audio is not None:
+            self.tts_cache_service.record_access(text, voice, content_type, variant)
+        return audio
+
+    def find_audio(self, content_hash: str, audio_format: str = 'mp3', remote: bool = True) -> Optional[Union['PackedAudio', str]]:
+        """
+        Find stored speech by content hash (see tts_variants.content_hash), for /api/audio.
 
-                # Save to file with cache-friendly name
-                speech_file = Path(output_dir) / f"tts_cache_{cache_key}.mp3"
+        Args:
+            content_hash (str): Hash from the audio URL
+            audio_format (str): Format from the audio URL's extension
+            remote (bool): Download the clip from the permanent tier on a local miss
+
+        Returns:
+            PackedAudio or str: A packed clip or an audio file path, or None if unknown
+        """
+        if self.tts_cache_service:
+            audio = self.tts_cache_service.open_packed(content_hash)
+            if audio is not None:
+                return audio
+
+        cached_file = self._get_legacy_cached(content_hash)
+        if cached_file:
+            return cached_file
+
+        # Generated by another worker, or a reply joined by the sentence pipeline
+        speech_file = Path("/tmp") / f"tts_cache_{content_hash}.{audio_format}"
+        if speech_file.exists():
+            return str(speech_file)
+
+        if not self.tts_cache_service:
+            return None
+        if not remote:
+            return self.tts_cache_service.get_local_audio_by_hash(content_hash, audio_format)
+        return self.tts_cache_service.get_cached_audio_by_hash(content_hash, audio_format)
 
-                with open(speech_file, 'wb') as f:
-                    for chunk in response.iter_bytes():
-                        f.write(chunk)
+    def signed_audio_url(self, content_hash: str, expires_in: int = 3600) -> Optional[str]:
+        """Presigned blob store URL for stored speech (None without a blob store that signs URLs)"""
+        if not self.tts_cache_service:
+            return None
+        return self.tts_cache_service.signed_url(content_hash, expires_in)
+
+    def get_cached_speech(self, text: str, voice: str = "nova", content_type: str = "narrative", variant: Optional[TTSVariant] = None) -> Optional[str]:
+        """
+        Look up already-generated speech in the permanent and legacy caches.
+
+        Args:
+            text (str): Text to speak
+            voice (str): Voice to use
+            content_type (str): Type of content for caching (narrative, question, etc.)
+            variant (TTSVariant): Model and format (defaults to the policy's choice for content_type)
 
-                # Cache the file path locally
+        Returns:
+            str: Path to the cached audio file or None on a miss
+        """
+        variant = variant or self.variant_policy.choose(content_type)
+
+        # Check permanent cache first
+        if self.tts_cache_service:
+            self.tts_cache_service.record_access(text, voice, content_type, variant)
+            cached_path = self.tts_cache_service.get_cached_audio(text, voice, variant, content_type)
+            if cached_path:
+                print(f"Using permanently cached TTS for: {text[:50]}...")
+                return cached_path
+
+        # Check legacy cache
+        cached_file = self._get_legacy_cached(clip_key(text, voice, variant))
+        if cached_file:
+            print(f"Using legacy cached TTS for: {text[:50]}...")
+            return cached_file
+        return None
+
+    def _commit_speech(self, text: str, voice: str, cache_key: str, speech_file: Path, content_type: str, variant: TTSVariant, background: bool = False) -> None:
+        """Register a freshly generated audio file with the legacy and permanent caches"""
+        with self._tts_cache_lock:
+            self.tts_cache[cache_key] = str(speech_file)
+        self._index_file(speech_file, content_type)
+
+        if self.tts_cache_service:
+            args = (text, voice, str(speech_file), content_type, variant)
+            if background:
+                threading.Thread(target=self.tts_cache_service.cache_audio, args=args, name='tts-commit', daemon=True).start()
+            else:
+                self.tts_cache_service.cache_audio(*args)
+
+    def _find_generated(self, text: str, voice: str, cache_key: str, speech_file: Path, variant: TTSVariant, stream: bool = False) -> Optional[Union[str, 'PackedAudio']]:
+        """Pick up audio another thread or worker generated while we waited for the flight
+
+        With stream, a packed-store hit comes back as its PackedAudio slice (for
+        callers that only stream the bytes) instead of being copied to a file.
+        """
+        if self.tts_cache_service:
+            if stream:
+                local_path = self.tts_cache_service.find_local_audio(text, voice, variant)
+            else:
+                local_path = self.tts_cache_service.get_local_audio(text, voice, variant)
+            if local_path:
+                return local_path
+
+        cached_file = self._get_legacy_cached(cache_key)
+        if cached_file:
+            return cached_file
+
+        # Written by rename, so if it exists it is complete
+        if speech_file.exists():
+            with self._tts_cache_lock:
                 self.tts_cache[cache_key] = str(speech_file)
-                
-                # Cache permanently if service available
-                if self.tts_cache_service:
-                    self.tts_cache_service.cache_audio(text, voice, str(speech_file), content_type)
-                
+            self._touch_file(speech_file)
+            return str(speech_file)
+        return None
+
+    def _generate_speech(self, text: str, voice: str, output_dir: str, content_type: str, raise_errors: bool = False, variant: Optional[TTSVariant] = None) -> Optional[str]:
+        """Call OpenAI for uncached speech, once per text/voice/variant however many requests want it.
+
+        Returns None on failure, or raises when raise_errors is set (for callers that retry).
+        """
+        variant = variant or self.variant_policy.choose(content_type)
+        cache_key = clip_key(text, voice, variant)
+        speech_file = Path(output_dir) / f"tts_cache_{cache_key}.{variant.audio_format}"
+
+        def generate():
+            try:
+                # Write under a temporary name so readers never see a partial file.
+                # Streamed straight to disk: the clip is never held in memory.
+                partial_file = speech_file.with_suffix(f".{threading.get_ident()}.part")
+                try:
+                    with metrics.timer('upstream_request_duration_seconds', span='tts', upstream='openai', operation='tts'):
+                        with self.client.audio.speech.with_streaming_response.create(
+                            model=variant.model,
+                            voice=voice,
+                            input=text,
+                            response_format=variant.audio_format,
+                            speed=variant.speed
+                        ) as response:
+                            with open(partial_file, 'wb') as f:
+                                for chunk in response.iter_bytes(CHUNK_SIZE):
+                                    f.write(chunk)
+                    os.replace(partial_file, speech_file)
+                finally:
+                    partial_file.unlink(missing_ok=True)
+
+                self._commit_speech(text, voice, cache_key, speech_file, content_type, variant)
+
                 print(f"Generated and cached TTS for: {text[:50]}...")
 
                 return str(speech_file)
-                
+
             except Exception as e:
                 print(f"Error generating speech: {e}")
+                if raise_errors:
+                    raise
                 return None
 
+        return self.single_flight.do(
+            cache_key, generate,
+            recheck=lambda: self._find_generated(text, voice, cache_key, speech_file, variant)
+        )
+
+    def text_to_speech(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "narrative", variant: Optional[TTSVariant] = None) -> Optional[str]:
+        """
+        Converts text to speech using OpenAI TTS with permanent caching.
+
+        Concurrent requests for the same uncached text and voice share a
+        single OpenAI call, across threads and workers.
+
+        Args:
+            text (str): Text to speak
+            voice (str): Voice to use (alloy, echo, fable, onyx, nova, shimmer)
+            output_dir (str): Directory to save audio file
+            content_type (str): Type of content for caching (narrative, question, etc.)
+            variant (TTSVariant): Model and format (defaults to the policy's choice for content_type)
+
+        Returns:
+            str: Path to the saved audio file or None if error
+        """
+        try:
+            variant = variant or self.variant_policy.choose(content_type)
+            cached_path = self.get_cached_speech(text, voice, content_type, variant)
+            if cached_path:
+                return cached_path
+
+            return self._generate_speech(text, voice, output_dir, content_type, variant=variant)
+
         except Exception as e:
             print(f"Error generating speech: {e}")
             return None
 
-    def transcribe_audio(self, audio_path: str) -> Optional[str]:
+    def stream_speech(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "narrative", chunk_size: int = 4096, variant: Optional[TTSVariant] = None) -> Iterator[bytes]:
+        """
+        Generate speech and yield audio chunks as they arrive from OpenAI.
+
+        Chunks are also written to a partial file that is renamed into the
+        cache only once the stream completes; an aborted stream (client gone,
+        upstream error) leaves nothing behind. If the same audio is already
+        being generated elsewhere, waits for it and yields the finished file.
+        Check get_cached_speech first.
+
+        Args:
+            text (str): Text to speak
+            voice (str): Voice to use (alloy, echo, fable, onyx, nova, shimmer)
+            output_dir (str): Directory to save audio file
+            content_type (str): Type of content for caching (narrative, question, etc.)
+            chunk_size (int): Bytes per yielded chunk
+            variant (TTSVariant): Model and format (defaults to the policy's choice for content_type)
+
+        Yields:
+            bytes: Audio data
+        """
+        variant = variant or self.variant_policy.choose(content_type)
+        cache_key = clip_key(text, voice, variant)
+        speech_file = Path(output_dir) / f"tts_cache_{cache_key}.{variant.audio_format}"
+
+        flight = self.single_flight.try_lead(cache_key)
+        audio_path = None
+        if flight is not None:
+            audio_path = self._find_generated(text, voice, cache_key, speech_file, variant, stream=True)
+            if audio_path:
+                # Waiters want a path; on a packed hit they look it up themselves
+                flight.done(audio_path if isinstance(audio_path, str) else None)
+        else:
+            audio_path = self._generate_speech(text, voice, output_dir, content_type, variant=variant)
+            if not audio_path:
+                raise RuntimeError("Failed to generate speech")
+
+        if audio_path and not isinstance(audio_path, str):
+            # A packed clip, sliced straight from the mapped segment
+            for start in range(0, audio_path.length, chunk_size):
+                yield audio_path.view[start:start + chunk_size].tobytes()
+            return
+        if audio_path:
+            with open(audio_path, 'rb') as f:
+                while chunk := f.read(chunk_size):
+                    yield chunk
+            return
+
+        partial_file = speech_file.with_suffix(f".{threading.get_ident()}.part")
+        result = None
+        try:
+            with metrics.timer('upstream_request_duration_seconds', span='tts', upstream='openai', operation='tts') as stopwatch:
+                with self.client.audio.speech.with_streaming_response.create(
+                    model=variant.model,
+                    voice=voice,
+                    input=text,
+                    response_format=variant.audio_format,
+                    speed=variant.speed
+                ) as response:
+                    with open(partial_file, 'wb') as f:
+                        for chunk in response.iter_bytes(chunk_size):
+                            f.write(chunk)
+                            # Not the time the client takes to read it
+                            with stopwatch.paused():
+                                yield chunk
+            os.replace(partial_file, speech_file)
+
+            # The client already has every byte; don't make it wait on the Supabase upload
+            self._commit_speech(text, voice, cache_key, speech_file, content_type, variant, background=True)
+            result = str(speech_file)
+        finally:
+            partial_file.unlink(missing_ok=True)
+            flight.done(result)
+
+        print(f"Streamed and cached TTS for: {text[:50]}...")
+
+    def transcribe_audio(self, audio: Union[str, Tuple[str, BinaryIO]]) -> Optional[str]:
         """
         Transcribes speech to text using OpenAI Whisper.
 
+        With a transcript cache, audio transcribed recently (a retried upload) is
+        answered from it, and concurrent uploads of the same audio share one
+        Whisper call, across threads and workers.
+
         Args:
-            audio_path (str): Path to the audio file
+            audio (str | tuple): Path to the audio file, or (filename, stream) of an upload
 
         Returns:
             str: Transcribed text or None if error
         """
         try:
-            with open(audio_path, "rb") as audio_file:
-                transcript = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file
-                )
-            return transcript.text
+            # Bytes, not the stream: httpx sizes a stream through fileno(), which makes a spooled upload spill to disk
+            if isinstance(audio, tuple):
+                filename, stream = audio
+                audio_data = stream.read()
+                # Hashed by the upload buffer as the request arrived (see spooled_file)
+                content_hash = getattr(stream, 'sha256', None)
+            else:
+                filename, audio_data = Path(audio).name, Path(audio).read_bytes()
+                content_hash = None
+            if self.transcript_cache is None:
+                return self._whisper(filename, audio_data)
+
+            content_hash = content_hash or hashlib.sha256(audio_data).hexdigest()
+            transcript = self.transcript_cache.get(content_hash)
+            metrics.inc('transcript_cache_lookups_total', result='miss' if transcript is None else 'hit')
+            if transcript is not None:
+                print(f"[TranscriptCache] Hit for {filename} ({len(audio_data)} bytes)")
+                return transcript
+            return self.single_flight.do(
+                f"transcript-{content_hash}",
+                lambda: self._whisper(filename, audio_data, content_hash),
+                recheck=lambda: self.transcript_cache.get(content_hash)
+            )
 
         except FileNotFoundError:
-            print(f"Error: Audio file not found at {audio_path}")
+            print(f"Error: Audio file not found at {audio}")
             return None
         except Exception as e:
             print(f"Error transcribing audio: {e}")
             return None
 
+    def _whisper(self, filename: str, audio_data: bytes, content_hash: Optional[str] = None) -> str:
+        """Trim and transcribe audio, caching the transcript under content_hash"""
+        if self.speech_trimmer:
+            filename, audio_data = self.speech_trimmer.prepare(filename, audio_data)
+        with metrics.timer('upstream_request_duration_seconds', span='whisper', upstream='openai', operation='whisper'):
+            transcript = self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=(filename, audio_data)
+            )
+        if content_hash and self.transcript_cache:
+            self.transcript_cache.put(content_hash, transcript.text)
+        return transcript.text
+
     def analyze_response(self, question: str, transcript_text: str) -> Optional[str]:
         """
         Analyzes a transcribed answer for emotions, themes, and personal values.
@@ -138,33 +478,12 @@ class OpenAIService:
             str: AI-generated summary or None if error
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.chat_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a warm, empathetic conversational AI companion conducting a life review interview with an older adult. Your purpose is to guide them through structured life review sessions, capturing their stories to help their family and care team understand them better.
-
-When responding to their answers:
-1. Acknowledge their story with warmth and empathy
-2. Reflect back the key emotions or themes you heard
-3. Ask a natural follow-up question to go deeper (e.g., "That sounds meaningful — how did you feel in that moment?", "What made that so special for you?", "Who was with you during that time?")
-4. Keep your response conversational, warm, and brief (2-3 sentences max)
-5. Make them feel heard and valued
-
-Your goal is to help them open up and share more details naturally."""
-                    },
-                    {
-                        "role": "user",
-                        "content": f"""I just asked: "{question}"
-
-They answered: "{transcript_text}"
-
-Respond warmly and naturally, acknowledging what they shared and asking a thoughtful follow-up question to help them elaborate."""
-                    }
-                ],
-                temperature=0.8
-            )
+            with metrics.timer('upstream_request_duration_seconds', span='chat', upstream='openai', operation='chat'):
+                response = self.client.chat.completions.create(
+                    model=self.chat_model,
+                    messages=response_messages(question, transcript_text),
+                    temperature=0.8
+                )
             summary = response.choices[0].message.content.strip()
             return summary
 
@@ -186,40 +505,16 @@ Respond warmly and naturally, acknowledging what they shared and asking a though
             tuple: (ai_response, tts_file_path) or (None, None) if error
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.chat_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a warm, empathetic conversational AI companion conducting a life review interview with an older adult. Your purpose is to guide them through structured life review sessions, capturing their stories to help their family and care team understand them better.
-
-When responding to follow-up answers:
-1. Acknowledge the additional details they shared with warmth and empathy
-2. Connect their follow-up response to their original answer to show you're listening
-3. Reflect back the deeper insights or emotions you heard
-4. Either ask another thoughtful follow-up question OR acknowledge that you have enough detail and suggest moving to the next question
-5. Keep your response conversational, warm, and brief (2-3 sentences max)
-6. Make them feel heard and valued
-
-Your goal is to help them feel comfortable sharing more details while knowing when to move forward."""
-                    },
-                    {
-                        "role": "user",
-                        "content": f"""Original question: "{original_question}"
-
-Their original answer: "{original_answer}"
-
-They then provided this follow-up response: "{followup_answer}"
-
-Respond warmly and naturally, acknowledging the additional details they shared and either asking another thoughtful follow-up question or suggesting we move to the next question."""
-                    }
-                ],
-                temperature=0.8
-            )
+            with metrics.timer('upstream_request_duration_seconds', span='chat', upstream='openai', operation='chat'):
+                response = self.client.chat.completions.create(
+                    model=self.chat_model,
+                    messages=followup_messages(original_question, original_answer, followup_answer),
+                    temperature=0.8
+                )
             ai_response = response.choices[0].message.content.strip()
             
-            # Generate TTS for the response
-            tts_path = self.text_to_speech(ai_response, voice)
+            # Generate TTS for the response, sentences in parallel
+            tts_path = self.tts_pipeline.render(ai_response, voice)
             
             return ai_response, tts_path
 
@@ -247,20 +542,20 @@ Respond warmly and naturally, acknowledging the additional details they shared a
         
         def get_tts_response(ai_text):
             if ai_text:
-                return self.text_to_speech(ai_text, voice)
+                return self.tts_pipeline.render(ai_text, voice)
             return None
         
         try:
             # Start AI analysis
             with concurrent.futures.ThreadPoolExecutor() as executor:
-                ai_future = executor.submit(get_ai_response)
+                ai_future = executor.submit(tracing.propagate(get_ai_response))
                 
                 # Wait for AI response
                 ai_response = ai_future.result(timeout=10)
                 
                 if ai_response:
                     # Start TTS generation immediately
-                    tts_future = executor.submit(get_tts_response, ai_response)
+                    tts_future = executor.submit(tracing.propagate(get_tts_response), ai_response)
                     tts_path = tts_future.result(timeout=15)
                     
                     return ai_response, tts_path
@@ -282,84 +577,13 @@ Respond warmly and naturally, acknowledging the additional details they shared a
             Dict: Comprehensive analysis with themes, insights, personality traits, and metrics
         """
         try:
-            # Build conversation history for context
-            conversation_text = ""
-            num_responses = len(session_data)
-            
-            for idx, qa in enumerate(session_data, 1):
-                conversation_text += f"Q{idx}: {qa['question']}\n"
-                conversation_text += f"A{idx}: {qa['answer']}\n\n"
-            
-            # Add context about session completeness
-            session_context = f"(Session contains {num_responses} response{'s' if num_responses != 1 else ''})"
-            
-            response = self.client.chat.completions.create(
-                model=self.chat_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert clinical psychologist and life review therapist analyzing a life review session. Your role is to provide deep, accurate, and insightful analysis that helps family members and care teams understand this person better.
-
-Note: This may be a partial session (not all questions answered). Work with whatever information is available and provide meaningful insights based on what they've shared so far. Avoid saying "not enough information" - instead, provide preliminary insights based on available data.
-
-Analyze the conversation holistically and provide:
-
-1. **Core Themes** (2-5 major themes): Identify the most significant patterns, values, and life themes that emerge from their responses. Be specific and meaningful. Even from limited responses, patterns emerge.
-
-2. **Personality Insights**: Describe their personality, communication style, and how they relate to their experiences. What makes them unique? Look for clues in word choice, storytelling style, and emotional expression.
-
-3. **Emotional Landscape**: What emotions are most present? How do they process feelings? What brings them joy or difficulty? Note their emotional tone and affect.
-
-4. **Key Relationships**: Who are the important people in their life? How do they describe relationships? Look for mentions of family, friends, or significant others.
-
-5. **Values & Beliefs**: What do they care about most deeply? What principles guide their life? Infer from their stories and priorities.
-
-6. **Life Trajectory**: How do they view their life journey? What patterns emerge in how they tell their story? Consider their narrative arc and perspective.
-
-7. **Strengths**: What personal strengths, resilience factors, and positive qualities shine through? Look for evidence of coping, growth, and positive adaptation.
-
-8. **Care Recommendations**: Based on this analysis, what would help caregivers connect with and support this person better? Provide actionable, compassionate suggestions.
-
-9. **Quantitative Metrics** (provide scores 0-100):
-   - Emotional expressiveness: How openly they share feelings
-   - Life satisfaction: Overall contentment with their life (infer from tone/content)
-   - Social connectedness: Strength of relationships mentioned
-   - Resilience: Ability to overcome challenges (look for evidence)
-   - Optimism: Positive outlook (assess from language and framing)
-   - Introspection: Self-awareness and reflection (depth of responses)
-
-Be compassionate, accurate, and deeply insightful. Even with limited data, provide meaningful preliminary insights. This analysis will help their loved ones understand and support them better."""
-                    },
-                    {
-                        "role": "user",
-                        "content": f"""Please analyze this life review session {session_context}:
-
-{conversation_text}
-
-Provide a comprehensive analysis in JSON format with these exact keys:
-{{
-  "core_themes": ["theme1", "theme2", "theme3"],
-  "personality_insights": "detailed paragraph",
-  "emotional_landscape": "detailed paragraph",
-  "key_relationships": "detailed paragraph",
-  "values_and_beliefs": "detailed paragraph",
-  "life_trajectory": "detailed paragraph",
-  "strengths": "detailed paragraph",
-  "care_recommendations": "detailed paragraph",
-  "metrics": {{
-    "emotional_expressiveness": 85,
-    "life_satisfaction": 75,
-    "social_connectedness": 90,
-    "resilience": 80,
-    "optimism": 70,
-    "introspection": 95
-  }}
-}}"""
-                    }
-                ],
-                temperature=0.7,
-                response_format={"type": "json_object"}
-            )
+            with metrics.timer('upstream_request_duration_seconds', span='chat', upstream='openai', operation='chat'):
+                response = self.client.chat.completions.create(
+                    model=self.chat_model,
+                    messages=session_messages(session_data),
+                    temperature=0.7,
+                    response_format={"type": "json_object"}
+                )
             
             import json
             analysis = json.loads(response.choices[0].message.content.strip())
@@ -370,57 +594,41 @@ Provide a comprehensive analysis in JSON format with these exact keys:
             print(f"Error generating session analysis: {e}")
             return None
 
+    def find_cached_many(self, texts: List[str], voice: str, content_type: str = "narrative") -> Dict[str, Optional[str]]:
+        """
+        Look up many texts in the legacy and permanent caches at once.
+
+        Args:
+            texts (List[str]): Texts to look up
+            voice (str): Voice to use
+            content_type (str): Type of content, which picks the variant looked up
+
+        Returns:
+            Dict[str, Optional[str]]: Mapping of text to cached audio path (None on a miss)
+        """
+        variant = self.variant_policy.choose(content_type)
+        paths = {text: self._get_legacy_cached(clip_key(text, voice, variant)) for text in texts}
+        missing = [text for text, path in paths.items() if path is None]
+        if self.tts_cache_service and missing:
+            paths.update(self.tts_cache_service.get_cached_audio_many(missing, voice, variant, content_type))
+        return paths
+
     def pre_cache_narratives(self, narratives: list, voice: str = "nova", output_dir: str = "/tmp") -> Dict[str, bool]:
         """
         Pre-cache common narratives for faster loading using permanent storage.
-        
+
+        Runs as a pre-cache job (see PreCacheEngine): every uncached narrative is
+        generated concurrently, and only one job runs at a time across workers.
+
         Args:
             narratives (list): List of narrative texts to cache
             voice (str): Voice to use for caching
-            output_dir (str): Directory to save cached files
-            
+            output_dir (str): Kept for compatibility; clips are generated into the shared cache
+
         Returns:
-            Dict[str, bool]: Mapping of narrative to success status
+            Dict[str, bool]: Mapping of narrative to success status (of the job already
+                running, if there is one)
         """
-        results = {}
-        
-        print(f"[Pre-cache] Starting to check {len(narratives)} narratives...")
-        
-        for narrative in narratives:
-            try:
-                # Check if already cached first
-                cache_key = hashlib.md5(f"{narrative}_{voice}".encode()).hexdigest()
-                
-                # Check local cache
-                if cache_key in self.tts_cache:
-                    cached_file = Path(self.tts_cache[cache_key])
-                    if cached_file.exists():
-                        results[narrative] = True
-                        print(f"[Pre-cache] Already cached locally: {narrative[:50]}...")
-                        continue
-                
-                # Check permanent cache if available
-                if self.tts_cache_service:
-                    cached_path = self.tts_cache_service.get_cached_audio(narrative, voice)
-                    if cached_path:
-                        results[narrative] = True
-                        print(f"[Pre-cache] Already cached permanently: {narrative[:50]}...")
-                        continue
-                
-                # Only generate if not cached
-                print(f"[Pre-cache] Generating TTS for: {narrative[:50]}...")
-                result = self.text_to_speech(narrative, voice, output_dir, content_type="narrative")
-                results[narrative] = result is not None
-                
-                if result:
-                    print(f"[Pre-cache] ✅ Successfully cached: {narrative[:50]}...")
-                else:
-                    print(f"[Pre-cache] ❌ Failed to cache: {narrative[:50]}...")
-                    
-            except Exception as e:
-                print(f"[Pre-cache] ❌ Error caching narrative: {e}")
-                results[narrative] = False
-                    
-        cached_count = sum(1 for success in results.values() if success)
-        print(f"[Pre-cache] Complete: {cached_count}/{len(narratives)} narratives cached")
-        return results
+        report = self.pre_cache.run([voice], [(narrative, voice, 'narrative') for narrative in narratives])
+        statuses = {item['text']: item['status'] for item in report['items'] if item['voice'] == voice}
+        return {narrative: statuses.get(narrative) in ('cached', 'generated') for narrative in narratives}
@@ -0,0 +1,505 @@
+"""
+Packed, append-only storage for the local TTS tier.
+
+Instead of one MP3 per clip, audio blobs are appended to a single segment
+file and located through a fixed-width, memory-mapped hash table
+(content hash -> offset/length). A lookup is a few probes in shared memory
+with no stat or open, and a hit is served straight out of the page cache:
+as an mmap slice, or with os.sendfile under gunicorn.
+
+Readers take no lock. Writers (all workers share the store) serialize on
+a file lock. Rebuilding the index or the segment always writes a new file
+and marks the old index stale, so readers holding the old mappings stay
+consistent and remap on their next lookup. Deleted and over-budget clips
+are dropped by a background compaction that copies live clips outside
+the lock.
+"""
+import fcntl
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, IO, Iterable, NamedTuple, Optional, Tuple
+
+MAGIC = b'TTSPACK1'
+
+# magic, slots, count, tombstones, segment generation, stale flag, (pad), live bytes, dead bytes
+_HEADER = struct.Struct('<8s6I2Q')
+HEADER_SIZE = 64
+_STALE_OFFSET = 24
+
+# digest, offset, length (top bit = pinned; 0 = deleted), last access (unix seconds)
+_SLOT = struct.Struct('<16sQII')
+SLOT_SIZE = _SLOT.size
+
+_EMPTY = bytes(16)
+_PINNED = 0x80000000
+_LENGTH_MASK = 0x7FFFFFFF
+
+MAX_LOAD = 0.7
+TOUCH_INTERVAL = 60
+COPY_CHUNK_SIZE = 64 * 1024
+
+# digest -> (offset, length with flags, last access)
+Entries = Dict[bytes, Tuple[int, int, int]]
+
+
+class PackedAudio:
+    """A stored clip: a slice of the segment file"""
+
+    __slots__ = ('segment_path', 'offset', 'length', 'view')
+
+    def __init__(self, segment_path: Path, offset: int, length: int, view: memoryview):
+        self.segment_path = segment_path
+        self.offset = offset
+        self.length = length
+        self.view = view  # Zero-copy slice of the mapped segment
+
+    def open(self) -> 'FileSlice':
+        """File object positioned at the clip, for sendfile-capable servers"""
+        return FileSlice(self.segment_path, self.offset, self.length)
+
+
+class FileSlice:
+    """
+    Read-only file object limited to a byte range of a file (a clip in the segment).
+
+    Its fileno() is positioned at the start of the range, so gunicorn's
+    wsgi.file_wrapper sends it with os.sendfile (bounded by Content-Length);
+    other servers fall back to read(), which stops at the end of the range.
+    """
+
+    def __init__(self, path, offset: int, length: int):
+        # Once open, the file stays readable even if a compaction unlinks it
+        self._file = open(path, 'rb', buffering=0)
+        self._file.seek(offset)
+        self._remaining = length
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size) if size else b''
+        self._remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _Mapping(NamedTuple):
+    """One consistent view of the store: the index map and the segment it points into"""
+    index: mmap.mmap
+    slots: int
+    segment_path: Path
+
+
+def _digest(content_hash: str) -> bytes:
+    return bytes.fromhex(content_hash)
+
+
+def _first_slot(digest: bytes, slots: int) -> int:
+    return int.from_bytes(digest[:8], 'little') & (slots - 1)
+
+
+def _table_size(entries: int, minimum: int) -> int:
+    """Power of two that keeps entries at no more than half the load limit"""
+    slots = minimum
+    while entries > slots * MAX_LOAD / 2:
+        slots *= 2
+    return slots
+
+
+def _probe(mapping: _Mapping, digest: bytes) -> Tuple[int, Optional[Tuple]]:
+    """(position, slot) holding digest, or (first empty position, None)"""
+    mask = mapping.slots - 1
+    index = _first_slot(digest, mapping.slots)
+    while True:
+        position = HEADER_SIZE + index * SLOT_SIZE
+        slot = _SLOT.unpack_from(mapping.index, position)
+        if slot[0] == digest or slot[0] == _EMPTY:
+            return position, slot if slot[0] == digest else None
+        index = (index + 1) & mask
+
+
+def _live(slot: Optional[Tuple]) -> bool:
+    return slot is not None and bool(slot[2] & _LENGTH_MASK)
+
+
+class PackedAudioStore:
+    """Append-only segment file with a memory-mapped hash index, shared by all workers"""
+
+    def __init__(self, directory: str, max_bytes: int = 0, pinned_content_types: Iterable[str] = (),
+                 initial_slots: int = 4096, compact_ratio: float = 0.5, compact_min_bytes: int = 8 * 1024 * 1024,
+                 low_water: float = 0.9):
+        """
+        Open (or create) the store.
+
+        Args:
+            directory (str): Directory for the index and segment files
+            max_bytes (int): Live-byte budget; least recently used unpinned clips are
+                dropped by compaction once it is exceeded (0 disables the limit)
+            pinned_content_types (Iterable[str]): Content types that are never dropped
+            initial_slots (int): Index size for a new store (a power of two; it doubles as it fills)
+            compact_ratio (float): Compact once deleted bytes exceed this share of the segment
+            compact_min_bytes (int): ...and at least this many bytes
+            low_water (float): Over budget, compact down to this fraction of max_bytes
+        """
+        if initial_slots & (initial_slots - 1):
+            raise ValueError("initial_slots must be a power of two")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.directory / 'index.bin'
+        self.max_bytes = max_bytes
+        self.pinned_content_types = set(pinned_content_types)
+        self.initial_slots = initial_slots
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self.low_water = low_water
+
+        self._mapping: Optional[_Mapping] = None
+        self._segment: Optional[Tuple[Path, mmap.mmap]] = None
+        self._map_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._lock_file = open(self.directory / 'lock', 'a')
+        self._compacting = threading.Lock()
+
+        with self._writing():
+            if not self.index_path.exists():
+                self._segment_file(0).touch()
+                self._write_index(self.initial_slots, {}, generation=0)
+            self._remove_orphans()
+
+    def _segment_file(self, generation: int) -> Path:
+        return self.directory / f"segment.{generation:08d}"
+
+    # --- mapping -------------------------------------------------------
+
+    def _current(self) -> _Mapping:
+        """The current mapping, remapped if a writer in any worker replaced the index"""
+        mapping = self._mapping
+        if mapping is not None and not mapping.index[_STALE_OFFSET]:
+            return mapping
+
+        with self._map_lock:
+            mapping = self._mapping
+            if mapping is None or mapping.index[_STALE_OFFSET]:
+                with open(self.index_path, 'r+b') as f:
+                    index = mmap.mmap(f.fileno(), 0)
+                magic, slots, _, _, generation, _, _, _, _ = _HEADER.unpack_from(index, 0)
+                if magic != MAGIC:
+                    raise ValueError(f"{self.index_path} is not a packed audio index")
+                # Old maps are dropped, not closed: PackedAudio views may still reference them
+                mapping = self._mapping = _Mapping(index, slots, self._segment_file(generation))
+            return mapping
+
+    def _segment_view(self, path: Path, end: int) -> Optional[memoryview]:
+        """The mapped segment, remapped if another writer appended past our mapping"""
+        segment = self._segment
+        if segment is None or segment[0] != path or len(segment[1]) < end:
+            with self._map_lock:
+                segment = self._segment
+                if segment is None or segment[0] != path or len(segment[1]) < end:
+                    try:
+                        with open(path, 'rb') as f:
+                            if os.fstat(f.fileno()).st_size < end:
+                                return None
+                            segment = self._segment = (path, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                    except FileNotFoundError:
+                        return None  # Compacted away between our index read and now
+        return memoryview(segment[1])
+
+    @staticmethod
+    def _header(mapping: _Mapping) -> Tuple:
+        return _HEADER.unpack_from(mapping.index, 0)
+
+    # --- reads ---------------------------------------------------------
+
+    def open(self, content_hash: str) -> Optional[PackedAudio]:
+        """
+        Look up a clip without copying it.
+
+        Args:
+            content_hash (str): Hex MD5 of text and voice
+
+        Returns:
+            PackedAudio: The clip, or None if it isn't stored
+        """
+        mapping = self._current()
+        position, slot = _probe(mapping, _digest(content_hash))
+        if not _live(slot):
+            return None
+
+        _, offset, length, last_access = slot
+        length &= _LENGTH_MASK
+        view = self._segment_view(mapping.segment_path, offset + length)
+        if view is None:
+            return None
+
+        now = int(time.time())
+        if now - last_access > TOUCH_INTERVAL:
+            # A plain store into shared memory; losing a race only ages the entry a little
+            struct.pack_into('<I', mapping.index, position + 28, now)
+        return PackedAudio(mapping.segment_path, offset, length, view[offset:offset + length])
+
+    def __contains__(self, content_hash: str) -> bool:
+        return _live(_probe(self._current(), _digest(content_hash))[1])
+
+    def stats(self) -> Dict[str, int]:
+        """Entry and byte counts, read from the index header"""
+        _, slots, count, _, _, _, _, live_bytes, dead_bytes = self._header(self._current())
+        return {'packed_entries': count, 'packed_bytes': live_bytes, 'packed_dead_bytes': dead_bytes, 'packed_slots': slots}
+
+    # --- writes --------------------------------------------------------
+
+    @contextmanager
+    def _writing(self):
+        """Exclusive write access across threads and workers"""
+        with self._write_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _update_header(self, mapping: _Mapping, **changes) -> None:
+        names = ('magic', 'slots', 'count', 'tombstones', 'generation', 'stale', 'pad', 'live_bytes', 'dead_bytes')
+        fields = dict(zip(names, self._header(mapping)))
+        fields.update(changes)
+        _HEADER.pack_into(mapping.index, 0, *fields.values())
+
+    def _write_index(self, slots: int, entries: Entries, generation: int, dead_bytes: int = 0) -> _Mapping:
+        """Write a fresh index for entries and swap it in, marking the current one stale"""
+        table = bytearray(HEADER_SIZE + slots * SLOT_SIZE)
+        live_bytes = 0
+        for digest, (offset, length, last_access) in entries.items():
+            index = _first_slot(digest, slots)
+            while table[HEADER_SIZE + index * SLOT_SIZE:HEADER_SIZE + index * SLOT_SIZE + 16] != _EMPTY:
+                index = (index + 1) & (slots - 1)
+            _SLOT.pack_into(table, HEADER_SIZE + index * SLOT_SIZE, digest, offset, length, last_access)
+            live_bytes += length & _LENGTH_MASK
+        _HEADER.pack_into(table, 0, MAGIC, slots, len(entries), 0, generation, 0, 0, live_bytes, dead_bytes)
+
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(table)
+        os.replace(tmp_path, self.index_path)
+
+        if self._mapping is not None:
+            self._mapping.index[_STALE_OFFSET] = 1  # Every worker remaps on its next lookup
+        return self._current()
+
+    def _live_entries(self, mapping: _Mapping) -> Entries:
+        entries = {}
+        for index in range(mapping.slots):
+            digest, offset, length, last_access = _SLOT.unpack_from(mapping.index, HEADER_SIZE + index * SLOT_SIZE)
+            if digest != _EMPTY and length & _LENGTH_MASK:
+                entries[digest] = (offset, length, last_access)
+        return entries
+
+    def _remove_orphans(self) -> None:
+        """Delete segments left behind by an interrupted compaction"""
+        current = self._current().segment_path
+        for path in self.directory.glob('segment.*'):
+            if path != current:
+                path.unlink(missing_ok=True)
+
+    def put(self, content_hash: str, data, content_type: Optional[str] = None) -> None:
+        """
+        Append a clip (a no-op if the hash is already stored: same hash, same audio).
+
+        Args:
+            content_hash (str): Hex MD5 of text and voice
+            data (bytes): MP3 bytes
+            content_type (str): Content type, for pinning
+        """
+        if len(data):
+            self._append(content_hash, content_type, len(data), lambda segment: segment.write(data))
+
+    def put_file(self, content_hash: str, path, content_type: Optional[str] = None) -> None:
+        """
+        put() streaming from a finished audio file, a chunk at a time.
+
+        Args:
+            content_hash (str): Hex MD5 of text and voice
+            path (str): MP3 file (complete, i.e. already renamed into place)
+            content_type (str): Content type, for pinning
+        """
+        with open(path, 'rb') as source:
+            size = os.fstat(source.fileno()).st_size
+            if size:
+                self._append(content_hash, content_type, size,
+                             lambda segment: shutil.copyfileobj(source, segment, COPY_CHUNK_SIZE))
+
+    def _append(self, content_hash: str, content_type: Optional[str], size: int, write: Callable[[IO], object]) -> None:
+        """Append size bytes written by write(segment) and index them under content_hash"""
+        digest = _digest(content_hash)
+        flags = _PINNED if content_type in self.pinned_content_types else 0
+
+        with self._writing():
+            mapping = self._current()
+            if _live(_probe(mapping, digest)[1]):
+                return
+
+            _, slots, count, tombstones, generation, _, _, _, dead_bytes = self._header(mapping)
+            if count + tombstones + 1 > slots * MAX_LOAD:
+                # Grow (dropping tombstones) before inserting
+                entries = self._live_entries(mapping)
+                mapping = self._write_index(_table_size(len(entries) + 1, self.initial_slots), entries, generation, dead_bytes)
+
+            with open(mapping.segment_path, 'ab') as segment:
+                offset = segment.tell()
+                write(segment)
+
+            # The digest goes in last: readers match on it, so they never see a half-written slot
+            position, reused = _probe(mapping, digest)
+            struct.pack_into('<QII', mapping.index, position + 16, offset, size | flags, int(time.time()))
+            mapping.index[position:position + 16] = digest
+
+            _, _, count, tombstones, _, _, _, live_bytes, _ = self._header(mapping)
+            self._update_header(mapping, count=count + 1, live_bytes=live_bytes + size,
+                                tombstones=tombstones - (reused is not None))
+
+        self.maybe_compact()
+
+    def delete(self, content_hash: str) -> bool:
+        """Drop a clip; its bytes are reclaimed by a later compaction"""
+        with self._writing():
+            mapping = self._current()
+            position, slot = _probe(mapping, _digest(content_hash))
+            if not _live(slot):
+                return False
+            # The digest stays, marking a tombstone that probes continue past
+            struct.pack_into('<I', mapping.index, position + 24, 0)
+
+            length = slot[2] & _LENGTH_MASK
+            _, _, count, tombstones, _, _, _, live_bytes, dead_bytes = self._header(mapping)
+            self._update_header(mapping, count=count - 1, tombstones=tombstones + 1,
+                                live_bytes=live_bytes - length, dead_bytes=dead_bytes + length)
+        self.maybe_compact()
+        return True
+
+    def clear(self) -> None:
+        """Drop every clip"""
+        with self._writing():
+            mapping = self._current()
+            generation = self._header(mapping)[4] + 1
+            self._segment_file(generation).touch()
+            self._write_index(self.initial_slots, {}, generation)
+            mapping.segment_path.unlink(missing_ok=True)
+
+    # --- compaction ----------------------------------------------------
+
+    def _needs_compaction(self) -> bool:
+        _, _, _, _, _, _, _, live_bytes, dead_bytes = self._header(self._current())
+        if self.max_bytes > 0 and live_bytes > self.max_bytes:
+            return True
+        return dead_bytes > self.compact_min_bytes and dead_bytes > self.compact_ratio * (live_bytes + dead_bytes)
+
+    def maybe_compact(self) -> None:
+        """Start a background compaction if one is due and none is running in this process"""
+        if not self._needs_compaction():
+            return
+        if not self._compacting.acquire(blocking=False):
+            return
+        threading.Thread(target=self._compact_in_background, name='tts-pack-compact', daemon=True).start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            # Writes that arrived during a pass may have pushed the store over budget again
+            while self.compact() and self._needs_compaction():
+                pass
+        except Exception as e:
+            print(f"[PackedAudioStore] Compaction error: {e}")
+        finally:
+            self._compacting.release()
+
+    def _keep(self, entries: Entries) -> Entries:
+        """Entries that survive compaction: all of them, or least recently used dropped down to the low-water mark"""
+        live_bytes = sum(length & _LENGTH_MASK for _, length, _ in entries.values())
+        if self.max_bytes <= 0 or live_bytes <= self.max_bytes:
+            return entries
+
+        target = self.max_bytes * self.low_water
+        kept = dict(entries)
+        for digest, (_, length, _) in sorted(entries.items(), key=lambda item: item[1][2]):
+            if live_bytes <= target:
+                break
+            if length & _PINNED:
+                continue
+            del kept[digest]
+            live_bytes -= length & _LENGTH_MASK
+        if live_bytes > target:
+            print(f"[PackedAudioStore] Over budget ({live_bytes} bytes) but everything left is pinned")
+        return kept
+
+    @staticmethod
+    def _copy(entries: Entries, source: Path, target, moved: Entries) -> None:
+        """Append entries' clips from source to target, recording their new offsets in moved"""
+        if not entries:
+            return
+        with open(source, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as segment:
+            view = memoryview(segment)
+            try:
+                for digest, (offset, length, last_access) in entries.items():
+                    moved[digest] = (target.tell(), length, last_access)
+                    target.write(view[offset:offset + (length & _LENGTH_MASK)])
+            finally:
+                view.release()
+
+    def compact(self) -> int:
+        """
+        Rewrite the segment with only the clips worth keeping.
+
+        Clips are copied to a new segment without holding the write lock;
+        only clips appended meanwhile are copied under it, just before the
+        new index is swapped in.
+
+        Returns:
+            int: Bytes reclaimed
+        """
+        with self._writing():
+            mapping = self._current()
+            generation = self._header(mapping)[4]
+            snapshot = self._live_entries(mapping)
+            source = mapping.segment_path
+            snapshot_end = source.stat().st_size
+
+        kept = self._keep(snapshot)
+        target_path = self._segment_file(generation + 1)
+        moved: Entries = {}
+        with open(target_path, 'wb') as target:
+            self._copy(kept, source, target, moved)
+
+            with self._writing():
+                mapping = self._current()
+                if mapping.segment_path != source:
+                    # Another worker compacted or cleared the store first
+                    target_path.unlink(missing_ok=True)
+                    return 0
+
+                entries: Entries = {}
+                appended: Entries = {}
+                for digest, (offset, length, last_access) in self._live_entries(mapping).items():
+                    if offset >= snapshot_end:
+                        appended[digest] = (offset, length, last_access)
+                    elif digest in moved:
+                        entries[digest] = (moved[digest][0], length, last_access)
+                    # Anything else was deleted meanwhile or dropped for the budget
+
+                self._copy(appended, source, target, entries)
+                target.flush()
+                reclaimed = source.stat().st_size - target.tell()
+                self._write_index(_table_size(len(entries), self.initial_slots), entries, generation + 1)
+                source.unlink(missing_ok=True)
+
+        evicted = len(snapshot) - len(kept)
+        print(f"[PackedAudioStore] Compacted to {len(entries)} clips" + (f" ({evicted} evicted)" if evicted else ""))
+        return reclaimed
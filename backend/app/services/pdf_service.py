@@ -1,20 +1,22 @@
 """
 PDF processing service for extracting questions from uploaded PDFs.
 """
-import PyPDF2
-from typing import List
+from contextlib import nullcontext
+from typing import BinaryIO, List, Union
+
+from . import tracing
 
 
 class PDFService:
     """Service for handling PDF operations"""
 
     @staticmethod
-    def extract_questions(pdf_path: str) -> List[str]:
+    def extract_questions(pdf: Union[str, BinaryIO]) -> List[str]:
         """
         Reads a PDF and extracts all lines containing a question mark.
 
         Args:
-            pdf_path (str): Path to the PDF file
+            pdf (str | BinaryIO): Path to the PDF file, or a seekable stream (e.g. an upload's)
 
         Returns:
             list: List of questions found in the PDF
@@ -23,9 +25,14 @@ class PDFService:
             FileNotFoundError: If PDF file not found
             Exception: For other PDF processing errors
         """
+        import PyPDF2  # Deferred: only PDF uploads need it
+
         questions = []
 
-        with open(pdf_path, 'rb') as f:
+        # A path is opened here; a stream is read in place
+        source = open(pdf, 'rb') if isinstance(pdf, str) else nullcontext(pdf)
+        with tracing.span('pdf'), source as f:
+            f.seek(0)
             reader = PyPDF2.PdfReader(f)
             text = "".join(page.extract_text() or "" for page in reader.pages)
 
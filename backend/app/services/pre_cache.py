@@ -0,0 +1,381 @@
+"""
+Concurrent TTS pre-caching of the static interview audio.
+
+Warming the intro, outro and every question one clip at a time takes the sum
+of every synthesis. PreCacheEngine looks all of them up at once, then
+generates every missing clip concurrently (bounded), so warming several
+voices takes about as long as the slowest clip.
+
+One job runs at a time across all workers: the job holds an flock for as
+long as it runs, and publishes per-item progress to a JSON file that any
+worker can report from. A 429 from OpenAI pauses every generation in the job
+(not just the one that hit it) for the Retry-After period, or an exponential
+backoff when there isn't one.
+"""
+import asyncio
+import fcntl
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, IO, List, Optional, Tuple
+
+from app.config.narratives import INTRO_NARRATIVE, OUTRO_NARRATIVE, QUESTION_SEQUENCE
+
+# (text, voice, content_type)
+Item = Tuple[str, str, str]
+
+
+def static_items(voices: List[str]) -> List[Item]:
+    """Intro, outro and every question, for each voice"""
+    items = []
+    for voice in voices:
+        items.append((INTRO_NARRATIVE, voice, 'narrative'))
+        items.append((OUTRO_NARRATIVE, voice, 'narrative'))
+        items.extend((q['prompt'], voice, 'question') for q in QUESTION_SEQUENCE)
+    return items
+
+
+def job_summary(report: Dict) -> Dict:
+    """
+    The /api/pre-cache-narratives response for a job report.
+
+    Args:
+        report (Dict): PreCacheEngine.run() result
+
+    Returns:
+        Dict: cached_count/total_count/results (text -> cached in every voice) as
+            before, plus the job's voices, running state and per-item progress
+    """
+    results: Dict[str, bool] = {}
+    for item in report['items']:
+        ok = item['status'] in ('cached', 'generated')
+        results[item['text']] = results.get(item['text'], True) and ok
+    summary = {
+        'success': True,
+        'cached_count': report.get('cached', 0) + report.get('generated', 0),
+        'total_count': report['total'],
+        'results': results,
+        'voices': report.get('voices', []),
+        'running': report['running'],
+        'items': report['items'],
+    }
+    if report.get('already_running'):
+        summary['message'] = 'Pre-caching already in progress'
+    return summary
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait if error is an upstream 429, else None"""
+    if getattr(error, 'status_code', None) != 429:
+        return None
+    response = getattr(error, 'response', None)
+    try:
+        return max(0.0, float(response.headers.get('retry-after')))
+    except (AttributeError, TypeError, ValueError):
+        return 0.0  # Rate limited without a hint: use the backoff
+
+
+class PreCacheEngine:
+    """Generates every uncached item of a pre-cache job concurrently"""
+
+    def __init__(self, lookup: Callable[[List[str], str, str], Dict[str, Optional[str]]],
+                 generate: Callable[[str, str, str], str], max_concurrency: int = 16,
+                 max_attempts: int = 4, backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 state_dir: str = "/tmp/tts_precache"):
+        """
+        Initialize the engine.
+
+        Args:
+            lookup (Callable): (texts, voice, content_type) -> mapping of text to cached path or None
+            generate (Callable): (text, voice, content_type) -> generated path; raises on failure
+            max_concurrency (int): Clips synthesized at once
+            max_attempts (int): Attempts per clip (rate-limited attempts included)
+            backoff_base (float): First retry delay in seconds, doubled for each retry after it
+            backoff_max (float): Longest retry delay
+            state_dir (str): Directory for the job lock and progress file (shared by all workers)
+        """
+        self.lookup = lookup
+        self.generate = generate
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._progress: Optional[Dict] = None
+        self._paused_until = 0.0
+
+    # Shared state
+
+    def _take_job_lock(self) -> Optional[IO]:
+        """The cross-worker job lock, or None if a job is already running"""
+        lock_file = open(self.state_dir / 'job.lock', 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    def _job_running(self) -> bool:
+        lock_file = self._take_job_lock()
+        if lock_file is None:
+            return True
+        lock_file.close()
+        return False
+
+    def _progress_path(self) -> Path:
+        return self.state_dir / 'progress.json'
+
+    def _publish(self) -> None:
+        """Write the job's progress where every worker can read it"""
+        with self._lock:
+            snapshot = json.dumps(self._progress)
+        tmp_path = self._progress_path().with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_text(snapshot)
+            os.replace(tmp_path, self._progress_path())
+        except OSError as e:
+            print(f"[PreCache] Failed to publish progress: {e}")
+
+    def _set(self, key: str, publish: bool = True, **fields) -> None:
+        """Update one item's progress"""
+        with self._lock:
+            self._progress['items'][key].update(fields)
+        if publish:
+            self._publish()
+
+    def status(self) -> Dict:
+        """
+        Progress of the running (or last) job, from whichever worker ran it.
+
+        Returns:
+            Dict: running, voices, started_at/finished_at, counts per status and per-item progress
+        """
+        try:
+            progress = json.loads(self._progress_path().read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'running': False, 'total': 0, 'items': []}
+
+        items = list(progress['items'].values())
+        # A job whose worker died never recorded its finish; its lock is free
+        running = progress['finished_at'] is None and self._job_running()
+        counts = {status: 0 for status in ('pending', 'generating', 'cached', 'generated', 'failed')}
+        for item in items:
+            counts[item['status']] = counts.get(item['status'], 0) + 1
+        return {
+            'running': running,
+            'voices': progress['voices'],
+            'started_at': progress['started_at'],
+            'finished_at': progress['finished_at'],
+            'total': len(items),
+            **counts,
+            'items': items,
+        }
+
+    # Job steps shared by both variants
+
+    def _start(self, items: List[Item], voices: List[str]) -> Dict[str, Item]:
+        """Register a job's items (deduplicated) as pending"""
+        keyed = {f"{voice}:{text}": (text, voice, content_type) for text, voice, content_type in items}
+        with self._lock:
+            self._paused_until = 0.0
+            self._progress = {
+                'voices': voices,
+                'started_at': time.time(),
+                'finished_at': None,
+                'items': {
+                    key: {'text': text, 'voice': voice, 'content_type': content_type,
+                          'status': 'pending', 'attempts': 0, 'seconds': None}
+                    for key, (text, voice, content_type) in keyed.items()
+                }
+            }
+        self._publish()
+        return keyed
+
+    def _mark_cached(self, keyed: Dict[str, Item], voice: str, content_type: str, cached: Dict[str, Optional[str]]) -> None:
+        for key, (text, item_voice, item_type) in keyed.items():
+            if (item_voice, item_type) == (voice, content_type) and cached.get(text):
+                self._set(key, publish=False, status='cached')
+
+    def _uncached(self) -> List[str]:
+        with self._lock:
+            return [key for key, item in self._progress['items'].items() if item['status'] == 'pending']
+
+    def _finish(self, lock_file: IO) -> Dict:
+        with self._lock:
+            self._progress['finished_at'] = time.time()
+        self._publish()
+        lock_file.close()
+        report = self.status()
+        print(f"[PreCache] {report['cached']} cached, {report['generated']} generated, {report['failed']} failed "
+              f"in {report['finished_at'] - report['started_at']:.1f}s")
+        return report
+
+    def _backoff(self, key: str, attempt: int, error: Exception) -> Optional[float]:
+        """
+        Record a failed attempt and decide whether to retry.
+
+        Returns:
+            float: Seconds to wait before the next attempt, or None to give up
+        """
+        retry_after = _retry_after(error)
+        if attempt >= self.max_attempts:
+            self._set(key, status='failed', error=str(error))
+            print(f"[PreCache] Giving up on {key[:60]}: {error}")
+            return None
+
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+            # Rate limits apply to the whole account: hold every item, not just this one
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.time() + delay)
+        self._set(key, status='pending', error=str(error))
+        return delay
+
+    def _pause_remaining(self) -> float:
+        with self._lock:
+            return self._paused_until - time.time()
+
+    # Sync job
+
+    def _generate_item(self, key: str, item: Item) -> None:
+        text, voice, content_type = item
+        for attempt in range(1, self.max_attempts + 1):
+            while (pause := self._pause_remaining()) > 0:
+                time.sleep(pause)
+            self._set(key, status='generating', attempts=attempt)
+            started = time.time()
+            try:
+                self.generate(text, voice, content_type)
+            except Exception as e:
+                delay = self._backoff(key, attempt, e)
+                if delay is None:
+                    return
+                time.sleep(delay)
+                continue
+            self._set(key, status='generated', error=None, seconds=round(time.time() - started, 2))
+            return
+
+    def run(self, voices: List[str], items: Optional[List[Item]] = None) -> Dict:
+        """
+        Pre-cache items, generating every missing one concurrently.
+
+        Args:
+            voices (List[str]): Voices to warm
+            items (List[Item]): (text, voice, content_type) to warm; defaults to the
+                intro, outro and every question in each voice
+
+        Returns:
+            Dict: status() of the finished job, or of the job already running
+                elsewhere (with already_running set)
+        """
+        lock_file = self._take_job_lock()
+        if lock_file is None:
+            return {**self.status(), 'already_running': True}
+
+        try:
+            keyed = self._start(items if items is not None else static_items(voices), voices)
+            # One batched lookup per voice and content type (which decides the variant)
+            for voice, content_type in {(voice, content_type) for _, voice, content_type in keyed.values()}:
+                try:
+                    texts = [text for text, item_voice, item_type in keyed.values() if (item_voice, item_type) == (voice, content_type)]
+                    self._mark_cached(keyed, voice, content_type, self.lookup(texts, voice, content_type))
+                except Exception as e:
+                    print(f"[PreCache] Cache lookup failed for {voice}: {e}")
+            self._publish()
+
+            missing = self._uncached()
+            print(f"[PreCache] Generating {len(missing)} of {len(keyed)} clips "
+                  f"({min(len(missing), self.max_concurrency)} at a time)")
+            if missing:
+                workers = min(len(missing), self.max_concurrency)
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tts-precache') as executor:
+                    list(executor.map(lambda key: self._generate_item(key, keyed[key]), missing))
+        finally:
+            report = self._finish(lock_file)
+        return {**report, 'already_running': False}
+
+
+class AsyncPreCacheEngine(PreCacheEngine):
+    """PreCacheEngine for the ASGI app, where lookup and generate are coroutines"""
+
+    def __init__(self, lookup: Callable[[List[str], str, str], Awaitable[Dict[str, Optional[str]]]],
+                 generate: Callable[[str, str, str], Awaitable[str]], **kwargs):
+        """
+        Initialize the engine.
+
+        Args:
+            lookup (Callable): async (texts, voice, content_type) -> mapping of text to cached path or None
+            generate (Callable): async (text, voice, content_type) -> generated path; raises on failure
+            **kwargs: As for PreCacheEngine
+        """
+        super().__init__(lookup, generate, **kwargs)
+
+    async def _generate_item(self, key: str, item: Item, semaphore: asyncio.Semaphore) -> None:
+        text, voice, content_type = item
+        async with semaphore:
+            for attempt in range(1, self.max_attempts + 1):
+                while (pause := self._pause_remaining()) > 0:
+                    await asyncio.sleep(pause)
+                self._set(key, status='generating', attempts=attempt)
+                started = time.time()
+                try:
+                    await self.generate(text, voice, content_type)
+                except Exception as e:
+                    delay = self._backoff(key, attempt, e)
+                    if delay is None:
+                        return
+                    await asyncio.sleep(delay)
+                    continue
+                self._set(key, status='generated', error=None, seconds=round(time.time() - started, 2))
+                return
+
+    async def run(self, voices: List[str], items: Optional[List[Item]] = None) -> Dict:
+        """
+        Pre-cache items, generating every missing one concurrently.
+
+        Args:
+            voices (List[str]): Voices to warm
+            items (List[Item]): (text, voice, content_type) to warm; defaults to the
+                intro, outro and every question in each voice
+
+        Returns:
+            Dict: status() of the finished job, or of the job already running
+                elsewhere (with already_running set)
+        """
+        lock_file = self._take_job_lock()
+        if lock_file is None:
+            return {**self.status(), 'already_running': True}
+
+        try:
+            keyed = self._start(items if items is not None else static_items(voices), voices)
+            # One batched lookup per voice and content type (which decides the variant)
+            groups = list({(voice, content_type) for _, voice, content_type in keyed.values()})
+
+            async def lookup(voice, content_type):
+                texts = [text for text, item_voice, item_type in keyed.values() if (item_voice, item_type) == (voice, content_type)]
+                return await self.lookup(texts, voice, content_type)
+
+            for (voice, content_type), cached in zip(groups, await asyncio.gather(*(lookup(*group) for group in groups), return_exceptions=True)):
+                if isinstance(cached, Exception):
+                    print(f"[PreCache] Cache lookup failed for {voice}: {cached}")
+                else:
+                    self._mark_cached(keyed, voice, content_type, cached)
+            self._publish()
+
+            missing = self._uncached()
+            print(f"[PreCache] Generating {len(missing)} of {len(keyed)} clips "
+                  f"({min(len(missing), self.max_concurrency)} at a time)")
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            await asyncio.gather(*(self._generate_item(key, keyed[key], semaphore) for key in missing))
+        finally:
+            report = self._finish(lock_file)
+        return {**report, 'already_running': False}
@@ -0,0 +1,244 @@
+"""
+Request coalescing for expensive, idempotent work (TTS generation).
+
+Concurrent callers asking for the same key share one execution: waiters in
+the same process block on the leader's future, and gunicorn workers
+coordinate through a per-key file lock. After taking the file lock the
+leader rechecks for a result another worker may have just produced, so
+there is exactly one upstream call per key. Waiters share the leader's
+outcome, failures included; only a flight that was abandoned (see
+Flight.done) sends them to try once more on their own.
+"""
+import asyncio
+import fcntl
+import os
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, IO, Optional, TypeVar
+
+T = TypeVar('T')
+
+LOCK_POLL_INTERVAL = 0.05
+
+# Published by a flight that gave up without an outcome
+_ABANDONED = object()
+
+
+class _Failed:
+    """The leader's exception, passed to waiters as the flight's result"""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+def _outcome(result):
+    """A waiter's view of a flight's published result"""
+    if isinstance(result, _Failed):
+        raise result.error
+    return result
+
+
+class _FlightGroup:
+    """In-flight registry and per-key lock files shared by both variants"""
+
+    def __init__(self, lock_dir: str = "/tmp/tts_locks"):
+        """
+        Initialize the group.
+
+        Args:
+            lock_dir (str): Directory for per-key lock files (must be shared by all workers)
+        """
+        self.lock_dir = Path(lock_dir)
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self._inflight: Dict[str, object] = {}
+
+    def _open_lock(self, key: str, blocking: bool) -> Optional[IO]:
+        """Take the cross-worker lock for key; None if non-blocking and another worker holds it"""
+        path = self.lock_dir / f"{key}.lock"
+        while True:
+            lock_file = open(path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                lock_file.close()
+                return None
+            try:
+                if os.stat(path).st_ino == os.fstat(lock_file.fileno()).st_ino:
+                    return lock_file
+            except FileNotFoundError:
+                pass
+            # The holder we waited on removed the file; lock whichever one is there now
+            lock_file.close()
+
+    def _release(self, key: str, lock_file: Optional[IO]) -> None:
+        # Unregister before resolving the future, so waiters that retry after an
+        # abandoned flight start a fresh one instead of re-reading the old result
+        self._inflight.pop(key, None)
+        if lock_file is not None:
+            # Removed while still held (lockers check they got the file at the path),
+            # so the lock directory doesn't fill up with one file per key ever generated
+            (self.lock_dir / f"{key}.lock").unlink(missing_ok=True)
+            lock_file.close()  # Closing drops the flock
+
+
+class Flight:
+    """Leadership of one key, taken with try_lead(); call done() exactly once"""
+
+    def __init__(self, group: '_FlightGroup', key: str, future, lock_file: Optional[IO], lock: Optional[threading.Lock] = None):
+        self._group = group
+        self._lock = lock
+        self.key = key
+        self.future = future
+        self.lock_file = lock_file
+
+    def done(self, result) -> None:
+        """Publish the result and release the key. None means the flight was
+        abandoned: its waiters each get one more try of their own"""
+        self._settle(_ABANDONED if result is None else result)
+
+    def _settle(self, result) -> None:
+        """Release the key and publish result as it is"""
+        if self._lock is not None:
+            with self._lock:
+                self._group._release(self.key, self.lock_file)
+        else:
+            self._group._release(self.key, self.lock_file)
+        self.future.set_result(result)
+
+
+class SingleFlight(_FlightGroup):
+    """Thread- and worker-safe single-flight for the WSGI app"""
+
+    def __init__(self, lock_dir: str = "/tmp/tts_locks"):
+        super().__init__(lock_dir)
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Optional[T]], recheck: Optional[Callable[[], Optional[T]]] = None) -> Optional[T]:
+        """
+        Run fn() once for all concurrent callers of key.
+
+        Args:
+            key (str): Coalescing key (e.g. the TTS cache hash)
+            fn (Callable): The expensive call; None means failure
+            recheck (Callable): Cheap lookup run once the lock is held, to pick up
+                a result another worker finished while we waited
+
+        Returns:
+            The shared result, or None if it could not be produced
+
+        Raises:
+            Whatever fn() raised, in the leader and in every caller waiting on it
+        """
+        retried = False
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = self._inflight[key] = Future()
+
+            if not leader:
+                result = _outcome(future.result())
+                if result is not _ABANDONED:
+                    return result
+                if retried:
+                    return None
+                # Nobody produced an outcome; take one turn of our own
+                retried = True
+                continue
+
+            flight = Flight(self, key, future, None, self._lock)
+            try:
+                flight.lock_file = self._open_lock(key, blocking=True)
+                result = recheck() if recheck else None
+                if result is None:
+                    result = fn()
+            except Exception as e:
+                flight._settle(_Failed(e))
+                raise
+            except BaseException:
+                flight.done(None)
+                raise
+            flight._settle(result)
+            return result
+
+    def try_lead(self, key: str) -> Optional[Flight]:
+        """Become the leader for key without waiting; None if someone else already is"""
+        with self._lock:
+            if key in self._inflight:
+                return None
+            future = self._inflight[key] = Future()
+
+        lock_file = self._open_lock(key, blocking=False)
+        if lock_file is None:
+            # Another worker is generating it; let anyone who joined us retry
+            Flight(self, key, future, None, self._lock).done(None)
+            return None
+        return Flight(self, key, future, lock_file, self._lock)
+
+
+class AsyncSingleFlight(_FlightGroup):
+    """Single-flight for the ASGI app (one event loop per worker)"""
+
+    async def _acquire_lock(self, key: str) -> IO:
+        # Poll instead of blocking a thread, so a cancelled waiter never ends up holding the lock
+        while True:
+            lock_file = self._open_lock(key, blocking=False)
+            if lock_file is not None:
+                return lock_file
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Optional[T]]], recheck: Optional[Callable[[], Awaitable[Optional[T]]]] = None) -> Optional[T]:
+        """
+        Run await fn() once for all concurrent callers of key.
+
+        Args:
+            key (str): Coalescing key (e.g. the TTS cache hash)
+            fn (Callable): The expensive coroutine function; None means failure
+            recheck (Callable): Cheap lookup run once the lock is held
+
+        Returns:
+            The shared result, or None if it could not be produced
+
+        Raises:
+            Whatever fn() raised, in the leader and in every caller waiting on it
+        """
+        retried = False
+        while True:
+            future = self._inflight.get(key)
+            if future is not None:
+                result = _outcome(await asyncio.shield(future))
+                if result is not _ABANDONED:
+                    return result
+                if retried:
+                    return None
+                retried = True
+                continue
+
+            future = self._inflight[key] = asyncio.get_running_loop().create_future()
+            flight = Flight(self, key, future, None)
+            try:
+                flight.lock_file = await self._acquire_lock(key)
+                result = await recheck() if recheck else None
+                if result is None:
+                    result = await fn()
+            except Exception as e:
+                flight._settle(_Failed(e))
+                raise
+            except BaseException:
+                # Cancelled: the waiters may still want it
+                flight.done(None)
+                raise
+            flight._settle(result)
+            return result
+
+    def try_lead(self, key: str) -> Optional[Flight]:
+        """Become the leader for key without waiting; None if someone else already is"""
+        if key in self._inflight:
+            return None
+        lock_file = self._open_lock(key, blocking=False)
+        if lock_file is None:
+            return None
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        return Flight(self, key, future, lock_file)
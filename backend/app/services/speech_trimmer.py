@@ -0,0 +1,254 @@
+"""
+Silence trimming and downsampling of WAV recordings before Whisper.
+
+Interview answers are full of long pauses, and every second of them is
+uploaded to and processed by Whisper. For PCM WAV uploads SpeechTrimmer:
+
+1. Downmixes to mono and resamples to 16 kHz (what Whisper works at),
+   low-pass filtering first so nothing aliases.
+2. Runs an energy voice-activity detector over 30 ms frames: a frame is
+   speech when its level is margin_db above the recording's noise floor
+   (a low percentile of the frame levels) or near the loudest frame, widened
+   by `padding` on each side so soft word onsets and endings are kept.
+3. Cuts the silence before the first and after the last speech, and
+   shortens every pause longer than max_pause to max_pause.
+
+All of it is vectorized NumPy over the whole recording. Anything that isn't
+PCM WAV (browser recordings are usually WebM/Opus) is passed through
+untouched. NumPy is an optional dependency (requirements-audio.txt),
+imported only once a trimmer is built.
+"""
+import io
+import wave
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple, TYPE_CHECKING
+
+from . import metrics, tracing
+
+if TYPE_CHECKING:
+    import numpy as np
+
+FRAME_SECONDS = 0.03
+# Frames within this many dB of the loudest one always count as speech, so a recording
+# without pauses (whose "noise floor" is really quiet speech) is left whole
+SPEECH_RANGE_DB = 20.0
+
+
+class TrimResult(NamedTuple):
+    """A processed recording and what was removed from it"""
+    audio: bytes
+    original_seconds: float
+    seconds: float
+    original_bytes: int
+
+    @property
+    def removed_seconds(self) -> float:
+        return self.original_seconds - self.seconds
+
+    @property
+    def removed_bytes(self) -> int:
+        return self.original_bytes - len(self.audio)
+
+
+def is_wav(data: bytes) -> bool:
+    """Whether data starts with a RIFF/WAVE header"""
+    return len(data) >= 12 and data[:4] == b'RIFF' and data[8:12] == b'WAVE'
+
+
+def read_wav(data: bytes) -> Optional[tuple]:
+    """
+    Decode a PCM WAV file.
+
+    Returns:
+        tuple: (float32 samples shaped (frames, channels) in [-1, 1], sample rate),
+            or None if it isn't integer PCM
+    """
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wav:
+            channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+            raw = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None  # Float, A-law, truncated header...
+
+    import numpy as np
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width in (2, 4):
+        dtype = np.int16 if width == 2 else np.int32
+        samples = np.frombuffer(raw, dtype=dtype).astype(np.float32) / float(np.iinfo(dtype).max + 1)
+    elif width == 3:
+        # Little-endian 24-bit: widen to int32 with the sign in the top byte
+        triples = np.frombuffer(raw[:len(raw) - len(raw) % 3], dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = ((triples[:, 0] << 8 | triples[:, 1] << 16 | triples[:, 2] << 24) >> 8).astype(np.float32) / 8388608.0
+    else:
+        return None
+    usable = len(samples) - len(samples) % channels
+    return samples[:usable].reshape(-1, channels), rate
+
+
+def write_wav(samples: 'np.ndarray', rate: int) -> bytes:
+    """Encode mono float samples as 16-bit PCM WAV"""
+    import numpy as np
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype('<i2')
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def resample(samples: 'np.ndarray', rate: int, target_rate: int) -> 'np.ndarray':
+    """Resample mono audio (windowed-sinc low-pass before downsampling, then linear interpolation)"""
+    import numpy as np
+    if rate == target_rate or len(samples) == 0:
+        return samples
+    if rate > target_rate:
+        cutoff = 0.45 * target_rate / rate  # Cycles per input sample, a little under the new Nyquist
+        taps = np.arange(-32, 33)
+        kernel = np.sinc(2 * cutoff * taps) * np.hamming(len(taps))
+        samples = np.convolve(samples, kernel / kernel.sum(), mode='same')
+    duration = len(samples) / rate
+    positions = np.arange(int(duration * target_rate)) * (rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def speech_frames(samples: 'np.ndarray', frame: int, margin_db: float = 12.0, floor_db: float = -60.0,
+                  padding_frames: int = 7) -> 'np.ndarray':
+    """
+    Energy voice-activity detection.
+
+    Args:
+        samples (np.ndarray): Mono audio
+        frame (int): Samples per frame
+        margin_db (float): Level above the noise floor that counts as speech
+        floor_db (float): Level (dBFS) that never counts as speech, for recordings
+            with no audible noise floor
+        padding_frames (int): Frames of context kept on each side of speech
+
+    Returns:
+        np.ndarray: Boolean speech mask, one entry per whole frame
+    """
+    import numpy as np
+    count = len(samples) // frame
+    frames = samples[:count * frame].reshape(count, frame)
+    level_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    if count == 0:
+        return np.zeros(0, dtype=bool)
+    noise_db = np.percentile(level_db, 10)
+    threshold = max(min(noise_db + margin_db, level_db.max() - SPEECH_RANGE_DB), floor_db)
+    speech = level_db > threshold
+    if padding_frames:
+        # Dilate: a frame is kept when any frame within padding_frames of it is speech
+        window = np.ones(2 * padding_frames + 1)
+        speech = np.convolve(speech.astype(np.float32), window, mode='same') > 0
+    return speech
+
+
+def keep_mask(speech: 'np.ndarray', max_pause_frames: int) -> 'np.ndarray':
+    """
+    Frames to keep: none before the first or after the last speech frame, and
+    at most max_pause_frames of every pause (half from each end of it).
+    """
+    import numpy as np
+    keep = speech.copy()
+    edges = np.diff(np.concatenate(([1], speech.astype(np.int8), [1])))
+    starts = np.flatnonzero(edges == -1)  # First frame of each silent run
+    ends = np.flatnonzero(edges == 1)      # One past its last frame
+    internal = (starts > 0) & (ends < len(speech))
+    head = max_pause_frames // 2
+    tail = max_pause_frames - head
+    for start, end in zip(starts[internal], ends[internal]):
+        if end - start <= max_pause_frames:
+            keep[start:end] = True
+        else:
+            keep[start:start + head] = True
+            keep[end - tail:end] = True
+    return keep
+
+
+class SpeechTrimmer:
+    """Shrinks WAV recordings to their speech before transcription"""
+
+    def __init__(self, sample_rate: int = 16000, max_pause: float = 1.0, margin_db: float = 12.0,
+                 padding: float = 0.2):
+        """
+        Initialize the trimmer.
+
+        Args:
+            sample_rate (int): Output sample rate (mono, 16-bit)
+            max_pause (float): Seconds an internal pause is shortened to
+            margin_db (float): Level above the noise floor that counts as speech
+            padding (float): Seconds kept around speech
+
+        Raises:
+            ImportError: NumPy isn't installed (pip install -r requirements-audio.txt)
+        """
+        # Fail when the trimmer is built, not on the first upload
+        import numpy  # noqa: F401
+        self.sample_rate = sample_rate
+        self.frame = max(1, int(sample_rate * FRAME_SECONDS))
+        self.max_pause_frames = max(1, round(max_pause / FRAME_SECONDS))
+        self.margin_db = margin_db
+        self.padding_frames = round(padding / FRAME_SECONDS)
+
+    def process(self, data: bytes) -> Optional[TrimResult]:
+        """
+        Downmix, resample and trim a recording.
+
+        Args:
+            data (bytes): The uploaded file
+
+        Returns:
+            TrimResult: The processed WAV, or None if data isn't PCM WAV, has no
+                speech or wouldn't get smaller (send the original)
+        """
+        if not is_wav(data):
+            return None
+        decoded = read_wav(data)
+        if decoded is None:
+            return None
+        samples, rate = decoded
+        original_seconds = len(samples) / rate if rate else 0.0
+
+        mono = resample(samples.mean(axis=1), rate, self.sample_rate)
+        speech = speech_frames(mono, self.frame, self.margin_db, padding_frames=self.padding_frames)
+        if not speech.any():
+            return None  # Nothing to transcribe; let Whisper see the original
+
+        keep = keep_mask(speech, self.max_pause_frames)
+        frames = mono[:len(keep) * self.frame].reshape(len(keep), self.frame)
+        trimmed = frames[keep].reshape(-1)
+        audio = write_wav(trimmed, self.sample_rate)
+        if len(audio) >= len(data):
+            return None
+        return TrimResult(audio, original_seconds, len(trimmed) / self.sample_rate, len(data))
+
+    def prepare(self, filename: str, data: bytes) -> Tuple[str, bytes]:
+        """
+        The file to send to Whisper: the trimmed WAV, or the upload unchanged.
+
+        What was removed is logged and added to the transcription_audio_removed_* metrics.
+
+        Args:
+            filename (str): Upload filename
+            data (bytes): Upload contents
+
+        Returns:
+            tuple: (filename, data)
+        """
+        try:
+            with tracing.span('audio_trim'):
+                result = self.process(data)
+        except Exception as e:
+            print(f"[SpeechTrimmer] Error preprocessing {filename}: {e}")
+            return filename, data
+        if result is None:
+            return filename, data
+
+        metrics.inc('transcription_audio_removed_seconds_total', result.removed_seconds)
+        metrics.inc('transcription_audio_removed_bytes_total', result.removed_bytes)
+        print(f"[SpeechTrimmer] {filename}: removed {result.removed_seconds:.1f}s of {result.original_seconds:.1f}s "
+              f"({result.original_bytes} -> {len(result.audio)} bytes)")
+        return f"{Path(filename).stem}.wav", result.audio
@@ -0,0 +1,168 @@
+"""
+Request-scoped timing breakdown, reported in the Server-Timing header.
+
+The request hooks start a RequestTrace and make it current for the
+request's context. Code anywhere below (OpenAIService, TTSCacheService,
+PDFService) adds time to named spans with span() or add(); outside a
+request both are no-ops. asyncio tasks and asyncio.to_thread inherit the
+current trace; work handed to a thread pool must go through
+propagate().
+
+Spans with the same name are summed, so work done in parallel (pipeline
+sentences) can add up to more than the request took. A sample of traces
+can also be appended to a JSONL file for offline analysis (TraceSink).
+"""
+import contextvars
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+_current: contextvars.ContextVar[Optional['RequestTrace']] = contextvars.ContextVar('request_trace', default=None)
+
+# Server-Timing metric names are HTTP tokens
+_INVALID_TOKEN = re.compile(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]")
+
+
+class RequestTrace:
+    """Time spent per span name during one request"""
+
+    def __init__(self, route: str, method: str):
+        self.route = route
+        self.method = method
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        # name -> [seconds, count], in the order spans first finished
+        self._spans: Dict[str, List[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add time to a span"""
+        with self._lock:
+            span = self._spans.setdefault(name, [0.0, 0])
+            span[0] += seconds
+            span[1] += 1
+
+    def spans(self) -> Dict[str, List[float]]:
+        """name -> [seconds, count]"""
+        with self._lock:
+            return {name: list(span) for name, span in self._spans.items()}
+
+    def elapsed(self) -> float:
+        """Seconds since the request started"""
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, e.g. 'chat;dur=812.4, tts;dur=1430.0, total;dur=2251.9'"""
+        entries = [f"{_INVALID_TOKEN.sub('_', name)};dur={seconds * 1000:.1f}" for name, (seconds, _) in self.spans().items()]
+        entries.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ', '.join(entries)
+
+    def to_record(self, status: int) -> dict:
+        """JSON-serializable summary for TraceSink"""
+        return {
+            'ts': round(self.started_at, 3),
+            'route': self.route,
+            'method': self.method,
+            'status': status,
+            'total_ms': round(self.elapsed() * 1000, 1),
+            'spans': {name: {'ms': round(seconds * 1000, 1), 'count': count}
+                      for name, (seconds, count) in self.spans().items()}
+        }
+
+
+def start(route: str, method: str) -> contextvars.Token:
+    """Begin tracing a request in the current context; pass the token to finish()"""
+    return _current.set(RequestTrace(route, method))
+
+
+def finish(token: contextvars.Token) -> None:
+    """Stop tracing (the trace object stays valid)"""
+    _current.reset(token)
+
+
+def current() -> Optional[RequestTrace]:
+    """The trace of the request being served, if any"""
+    return _current.get()
+
+
+def add(name: str, seconds: float) -> None:
+    """Add time to a span of the current request's trace"""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the block into a span of the current request's trace"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - start_time)
+
+
+def propagate(fn: Callable, queue_span: Optional[str] = None) -> Callable:
+    """
+    Wrap a callable to run in the current context when submitted to a thread pool.
+
+    Args:
+        fn (Callable): The task
+        queue_span (str): Span to record the time the task waited for a thread in
+
+    Returns:
+        Callable: Wrapper taking the same arguments (one per submitted task)
+    """
+    trace = _current.get()
+    if trace is None:
+        return fn
+    context = contextvars.copy_context()
+    submitted = time.perf_counter()
+
+    def run(*args, **kwargs):
+        if queue_span:
+            trace.add(queue_span, time.perf_counter() - submitted)
+        return context.run(fn, *args, **kwargs)
+    return run
+
+
+class TraceSink:
+    """Appends a sample of finished traces to a JSONL file"""
+
+    def __init__(self, path: str, sample_rate: float = 0.0):
+        """
+        Initialize the sink.
+
+        Args:
+            path (str): JSONL file, appended to by every worker
+            sample_rate (float): Share of requests written (0 to 1)
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+
+    def sampled(self) -> bool:
+        """Whether to write the next trace"""
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def write(self, record: dict) -> None:
+        """Append one trace (a single write per line, so workers' lines don't interleave)"""
+        line = (json.dumps(record) + '\n').encode()
+        try:
+            with self._lock:
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, line)
+                finally:
+                    os.close(fd)
+        except OSError as e:
+            print(f"[Tracing] Error writing trace: {e}")
@@ -0,0 +1,106 @@
+"""
+Whisper transcripts keyed by the SHA-256 of the audio they came from.
+
+When /api/transcribe is retried after a timeout or a dropped connection,
+the frontend uploads the same bytes again. With this cache the retry gets the
+first call's transcript instead of a second Whisper call. Entries live in a
+small SQLite table shared by all gunicorn workers. They expire `ttl` seconds
+after they were written, and past `max_entries` the least recently used are
+dropped.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    content_hash TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transcripts_lru ON transcripts (last_access);
+"""
+
+
+class TranscriptCache:
+    """SQLite cache of transcripts with a TTL and an entry budget"""
+
+    def __init__(self, db_path: str, ttl: float = 3600.0, max_entries: int = 1000):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path (str): SQLite database file (shared by all workers)
+            ttl (float): Seconds a transcript is served after it was written
+            max_entries (int): Transcripts kept (0 disables the limit)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+        self._db().executescript(_SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections can't be shared across threads)"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def get(self, content_hash: str) -> Optional[str]:
+        """
+        The transcript of audio with this hash, if cached and not expired.
+
+        Args:
+            content_hash (str): SHA-256 hex digest of the audio
+
+        Returns:
+            str: The transcript, or None
+        """
+        now = time.time()
+        try:
+            db = self._db()
+            row = db.execute(
+                'SELECT text FROM transcripts WHERE content_hash = ? AND created >= ?',
+                (content_hash, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute('UPDATE transcripts SET last_access = ? WHERE content_hash = ?', (now, content_hash))
+            return row[0]
+        except sqlite3.Error as e:
+            print(f"[TranscriptCache] Lookup failed: {e}")
+            return None
+
+    def put(self, content_hash: str, text: str) -> None:
+        """
+        Store a transcript, dropping expired and least recently used entries.
+
+        Args:
+            content_hash (str): SHA-256 hex digest of the audio
+            text (str): Its transcript
+        """
+        now = time.time()
+        try:
+            db = self._db()
+            db.execute(
+                'INSERT OR REPLACE INTO transcripts (content_hash, text, created, last_access) VALUES (?, ?, ?, ?)',
+                (content_hash, text, now, now)
+            )
+            db.execute('DELETE FROM transcripts WHERE created < ?', (now - self.ttl,))
+            if self.max_entries:
+                db.execute(
+                    'DELETE FROM transcripts WHERE content_hash IN '
+                    '(SELECT content_hash FROM transcripts ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+        except sqlite3.Error as e:
+            print(f"[TranscriptCache] Store failed: {e}")
@@ -0,0 +1,480 @@
+"""
+Progressive transcription of an answer uploaded in segments while it is recorded.
+
+/api/transcribe only starts Whisper once the user presses stop, so the whole
+transcription is waited for after the answer. A transcription session takes
+the recording as a sequence of self-contained segments instead (each a
+complete audio file, overlapping the end of the one before it by a second or
+so) while the user is still speaking:
+
+1. append() stores a segment and starts transcribing it in the background.
+2. finalize() stores the last segment and transcribes it, waits for any
+   segment still being transcribed, and stitches the texts in order, dropping
+   the words each one repeats from the overlap with the previous one.
+
+By the time the user stops, everything but the last few seconds is already
+transcribed.
+
+Any worker can serve any call: a session is a directory under
+TRANSCRIBE_SESSION_DIR holding each segment's audio and transcript, and a
+segment's transcriber holds an flock on it for as long as it works on it.
+finalize() waits for segments locked by another worker and transcribes
+itself any whose transcriber failed or died. Sessions not finalized within
+the TTL are removed.
+"""
+import asyncio
+import fcntl
+import os
+import re
+import secrets
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Awaitable, BinaryIO, Callable, Dict, IO, List, Optional, Tuple
+
+from . import metrics, tracing
+
+_SESSION_ID = re.compile(r'^[A-Za-z0-9_-]{22}$')
+_SEGMENT = re.compile(r'^(\d{5})(\.[a-z0-9]{1,5})$')
+_RESERVED_SUFFIXES = ('.txt', '.lock', '.tmp')
+_WORD_CHARS = re.compile(r"[^\w']+")
+
+
+class SessionNotFound(LookupError):
+    """The session id is unknown, expired or already finalized"""
+
+
+def _normalized(word: str) -> str:
+    return _WORD_CHARS.sub('', word.lower())
+
+
+def stitch_transcripts(texts: List[str], max_overlap_words: int = 12, min_overlap_words: int = 2) -> str:
+    """
+    Join the transcripts of consecutive overlapping segments.
+
+    Where a segment starts with the words the previous one ended with (ignoring
+    case and punctuation), they are kept once. The previous segment's last word
+    may be cut off mid-word at the boundary, so a match just before it also
+    counts when that word starts the word after the match ("the sto" + "the
+    store"), and the fragment is dropped.
+
+    Args:
+        texts (List[str]): Segment transcripts in recording order
+        max_overlap_words (int): Longest run of repeated words looked for
+        min_overlap_words (int): Shortest run treated as overlap (a single
+            matching word is too often a genuine repetition)
+
+    Returns:
+        str: The answer's transcript
+    """
+    words: List[str] = []
+    for text in texts:
+        segment = text.split()
+        if not segment:
+            continue
+        head = [_normalized(word) for word in segment[:max_overlap_words]]
+        tail = [_normalized(word) for word in words[-(max_overlap_words + 1):]]
+        for length in range(min(len(head), max_overlap_words), min_overlap_words - 1, -1):
+            for cut in (0, 1):
+                end = len(tail) - cut
+                if end < length or tail[end - length:end] != head[:length]:
+                    continue
+                if cut and not (len(segment) > length and _normalized(segment[length]).startswith(tail[-1])):
+                    continue  # A whole word, not the start of the next one
+                del words[len(words) - cut:]
+                segment = segment[length:]
+                break
+            else:
+                continue
+            break
+        words.extend(segment)
+    return ' '.join(words)
+
+
+class TranscriptionSessions:
+    """Segmented transcription sessions, shared by every worker through a directory"""
+
+    def __init__(self, transcribe: Callable[[str], Optional[str]], directory: str = '/tmp/transcribe_sessions',
+                 max_workers: int = 4, ttl: float = 900.0, max_segments: int = 240,
+                 finalize_timeout: float = 30.0, poll_interval: float = 0.1):
+        """
+        Initialize the sessions.
+
+        Args:
+            transcribe (Callable): Path of an audio file -> its transcript, or None on failure
+            directory (str): Where sessions live (shared by all workers)
+            max_workers (int): Segments this worker transcribes at once in the background
+            ttl (float): Seconds an idle session is kept before it is removed
+            max_segments (int): Segments a session may have
+            finalize_timeout (float): Seconds finalize() waits for segments another worker is transcribing
+            poll_interval (float): Seconds between checks on those segments
+        """
+        self.transcribe = transcribe
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_segments = max_segments
+        self.finalize_timeout = finalize_timeout
+        self.poll_interval = poll_interval
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    # Session directory, shared by both variants
+
+    def create(self) -> str:
+        """
+        Start a session.
+
+        Returns:
+            str: The session id
+        """
+        self.sweep()
+        session_id = secrets.token_urlsafe(16)
+        (self.directory / session_id).mkdir()
+        return session_id
+
+    def sweep(self) -> int:
+        """Remove sessions idle for longer than the TTL; returns how many"""
+        removed = 0
+        cutoff = time.time() - self.ttl
+        for session in self.directory.iterdir():
+            try:
+                if session.is_dir() and session.stat().st_mtime < cutoff:
+                    shutil.rmtree(session, ignore_errors=True)
+                    removed += 1
+            except FileNotFoundError:
+                pass  # Finalized or swept by another worker meanwhile
+        if removed:
+            print(f"[TranscriptionSessions] Removed {removed} expired sessions")
+        return removed
+
+    def _session(self, session_id: str) -> Path:
+        """A live session's directory (its mtime is the last activity)"""
+        session = self.directory / session_id
+        try:
+            if not _SESSION_ID.match(session_id) or session.stat().st_mtime < time.time() - self.ttl:
+                raise SessionNotFound(session_id)
+            os.utime(session)
+        except FileNotFoundError:
+            raise SessionNotFound(session_id) from None
+        return session
+
+    def _segments(self, session: Path) -> Dict[int, Path]:
+        """Index -> audio of every stored segment"""
+        segments = {}
+        for path in session.iterdir():
+            match = _SEGMENT.match(path.name)
+            if match and match.group(2) not in _RESERVED_SUFFIXES:
+                segments[int(match.group(1))] = path
+        return segments
+
+    def _store(self, session: Path, index: Optional[int], upload: Tuple[str, BinaryIO]) -> int:
+        """
+        Save a segment's audio, replacing any earlier upload of it.
+
+        Args:
+            session (Path): Session directory
+            index (int): Position in the recording, or None for the one after the last stored
+            upload (tuple): (filename, stream); the extension tells Whisper the format
+
+        Returns:
+            int: The segment's index
+        """
+        if index is None:
+            index = max(self._segments(session), default=-1) + 1
+        if not 0 <= index < self.max_segments:
+            raise ValueError(f"Segment index must be between 0 and {self.max_segments - 1}")
+        suffix = Path(upload[0]).suffix.lower()
+        if not re.fullmatch(r'\.[a-z0-9]{1,5}', suffix) or suffix in _RESERVED_SUFFIXES:
+            suffix = '.webm'  # What browsers record
+
+        for stale in session.glob(f'{index:05d}.*'):
+            if stale.suffix != '.lock':
+                stale.unlink(missing_ok=True)
+        path = session / f'{index:05d}{suffix}'
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            shutil.copyfileobj(upload[1], f)
+        os.replace(tmp_path, path)
+        return index
+
+    def _claim(self, session: Path, index: int) -> Optional[IO]:
+        """The segment's transcription lock, or None if someone is transcribing it"""
+        try:
+            lock_file = open(session / f'{index:05d}.lock', 'a')
+        except FileNotFoundError:
+            return None  # Session finalized meanwhile
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    def _transcript(self, session: Path, index: int) -> Optional[str]:
+        try:
+            return (session / f'{index:05d}.txt').read_text()
+        except FileNotFoundError:
+            return None
+
+    def _save_transcript(self, session: Path, index: int, text: str) -> None:
+        path = session / f'{index:05d}.txt'
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            tmp_path.write_text(text)
+            os.replace(tmp_path, path)
+        except FileNotFoundError:
+            pass  # Session finalized or expired meanwhile
+
+    def _missing(self, session: Path) -> Tuple[Dict[int, Path], List[int]]:
+        """Every segment, and the indices of those without a transcript yet"""
+        segments = self._segments(session)
+        return segments, [index for index in sorted(segments) if not (session / f'{index:05d}.txt').exists()]
+
+    def _retries(self, session: Path, missing: List[int], attempted: set) -> Optional[List[Tuple[int, IO]]]:
+        """
+        Claim the missing segments nobody is transcribing.
+
+        Returns:
+            list: (index, lock) to transcribe now, newest first, or None when one
+                of them already failed here
+        """
+        claimed = []
+        for index in missing:
+            lock_file = self._claim(session, index)
+            if lock_file is None:
+                continue  # In progress, here or in another worker
+            if index in attempted:
+                lock_file.close()
+                for _, other in claimed:
+                    other.close()
+                print(f"[TranscriptionSessions] {session.name}: segment {index} could not be transcribed")
+                return None
+            attempted.add(index)
+            claimed.append((index, lock_file))
+        # The final segment was just uploaded and is the one being waited for
+        return sorted(claimed, key=lambda claim: claim[0], reverse=True)
+
+    def _finish(self, session: Path, segments: Dict[int, Path], started: float) -> str:
+        transcript = stitch_transcripts([self._transcript(session, index) or '' for index in sorted(segments)])
+        shutil.rmtree(session, ignore_errors=True)
+        print(f"[TranscriptionSessions] {session.name}: {len(segments)} segments stitched, "
+              f"finalized in {time.perf_counter() - started:.2f}s")
+        return transcript
+
+    # Sync variant
+
+    def _transcribe_segment(self, session: Path, index: int, path: Path, lock_file: IO, stage: str) -> bool:
+        """Transcribe one segment while holding its lock; False if Whisper failed"""
+        try:
+            text = self.transcribe(str(path))
+            if text is None:
+                return False
+            self._save_transcript(session, index, text)
+            metrics.inc('transcription_segments_total', stage=stage)
+            return True
+        finally:
+            lock_file.close()
+
+    def _background(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='transcribe-segment')
+        return self._executor
+
+    def append(self, session_id: str, upload: Tuple[str, BinaryIO], index: Optional[int] = None) -> int:
+        """
+        Add a segment and start transcribing it in the background.
+
+        Uploading the same index again (a client retry) replaces the segment.
+
+        Args:
+            session_id (str): From create()
+            upload (tuple): (filename, stream) of a self-contained audio file
+            index (int): Position in the recording; defaults to after the last stored segment
+
+        Returns:
+            int: The segment's index
+
+        Raises:
+            SessionNotFound: Unknown, expired or finalized session
+            ValueError: Index out of range
+        """
+        session = self._session(session_id)
+        index = self._store(session, index, upload)
+        lock_file = self._claim(session, index)
+        if lock_file is not None:
+            self._background().submit(self._transcribe_segment, session, index,
+                                      self._segments(session)[index], lock_file, 'background')
+        return index
+
+    def finalize(self, session_id: str, upload: Optional[Tuple[str, BinaryIO]] = None,
+                 index: Optional[int] = None) -> Optional[str]:
+        """
+        Add the last segment, if given, and return the whole transcript.
+
+        The session is removed afterwards.
+
+        Args:
+            session_id (str): From create()
+            upload (tuple): (filename, stream) of the last segment
+            index (int): Its position; defaults to after the last stored segment
+
+        Returns:
+            str: The stitched transcript, or None if a segment could not be
+                transcribed (the session is kept so the call can be retried)
+
+        Raises:
+            SessionNotFound: Unknown, expired or finalized session
+            ValueError: Index out of range
+        """
+        started = time.perf_counter()
+        session = self._session(session_id)
+        if upload is not None:
+            self._store(session, index, upload)
+
+        attempted: set = set()
+        deadline = time.monotonic() + self.finalize_timeout
+        while True:
+            segments, missing = self._missing(session)
+            if not missing:
+                return self._finish(session, segments, started)
+            retries = self._retries(session, missing, attempted)
+            if retries is None:
+                return None
+            if retries:
+                # Newest inline, the rest (failed or orphaned background work) alongside it
+                futures = [
+                    self._background().submit(tracing.propagate(self._transcribe_segment), session, index,
+                                              segments[index], lock_file, 'finalize')
+                    for index, lock_file in retries[1:]
+                ]
+                self._transcribe_segment(session, retries[0][0], segments[retries[0][0]], retries[0][1], 'finalize')
+                for future in futures:
+                    future.result()
+                continue
+            if time.monotonic() > deadline:
+                print(f"[TranscriptionSessions] {session.name}: timed out waiting for segments {missing}")
+                return None
+            time.sleep(self.poll_interval)
+
+
+class AsyncTranscriptionSessions(TranscriptionSessions):
+    """TranscriptionSessions for the ASGI app, where transcribe is a coroutine"""
+
+    def __init__(self, transcribe: Callable[[str], Awaitable[Optional[str]]], **kwargs):
+        """
+        Initialize the sessions.
+
+        Args:
+            transcribe (Callable): async path of an audio file -> its transcript, or None on failure
+            **kwargs: As for TranscriptionSessions (max_workers bounds background transcriptions)
+        """
+        super().__init__(transcribe, **kwargs)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: set = set()
+
+    async def _transcribe_segment(self, session: Path, index: int, path: Path, lock_file: IO, stage: str) -> bool:
+        """Transcribe one segment while holding its lock; False if Whisper failed"""
+        try:
+            text = await self.transcribe(str(path))
+            if text is None:
+                return False
+            await asyncio.to_thread(self._save_transcript, session, index, text)
+            metrics.inc('transcription_segments_total', stage=stage)
+            return True
+        finally:
+            lock_file.close()
+
+    async def _transcribe_bounded(self, *args) -> bool:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        async with self._semaphore:
+            return await self._transcribe_segment(*args)
+
+    async def create(self) -> str:
+        """
+        Start a session.
+
+        Returns:
+            str: The session id
+        """
+        return await asyncio.to_thread(super().create)
+
+    async def append(self, session_id: str, upload: Tuple[str, BinaryIO], index: Optional[int] = None) -> int:
+        """
+        Add a segment and start transcribing it in the background.
+
+        Uploading the same index again (a client retry) replaces the segment.
+
+        Args:
+            session_id (str): From create()
+            upload (tuple): (filename, stream) of a self-contained audio file
+            index (int): Position in the recording; defaults to after the last stored segment
+
+        Returns:
+            int: The segment's index
+
+        Raises:
+            SessionNotFound: Unknown, expired or finalized session
+            ValueError: Index out of range
+        """
+        session = self._session(session_id)
+        index = await asyncio.to_thread(self._store, session, index, upload)
+        lock_file = self._claim(session, index)
+        if lock_file is not None:
+            task = asyncio.create_task(self._transcribe_bounded(session, index, self._segments(session)[index],
+                                                                lock_file, 'background'))
+            # The loop only keeps weak references to tasks
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return index
+
+    async def finalize(self, session_id: str, upload: Optional[Tuple[str, BinaryIO]] = None,
+                       index: Optional[int] = None) -> Optional[str]:
+        """
+        Add the last segment, if given, and return the whole transcript.
+
+        The session is removed afterwards.
+
+        Args:
+            session_id (str): From create()
+            upload (tuple): (filename, stream) of the last segment
+            index (int): Its position; defaults to after the last stored segment
+
+        Returns:
+            str: The stitched transcript, or None if a segment could not be
+                transcribed (the session is kept so the call can be retried)
+
+        Raises:
+            SessionNotFound: Unknown, expired or finalized session
+            ValueError: Index out of range
+        """
+        started = time.perf_counter()
+        session = self._session(session_id)
+        if upload is not None:
+            await asyncio.to_thread(self._store, session, index, upload)
+
+        attempted: set = set()
+        deadline = time.monotonic() + self.finalize_timeout
+        while True:
+            segments, missing = await asyncio.to_thread(self._missing, session)
+            if not missing:
+                return await asyncio.to_thread(self._finish, session, segments, started)
+            retries = self._retries(session, missing, attempted)
+            if retries is None:
+                return None
+            if retries:
+                await asyncio.gather(*(
+                    self._transcribe_segment(session, index, segments[index], lock_file, 'finalize')
+                    for index, lock_file in retries
+                ))
+                continue
+            if time.monotonic() > deadline:
+                print(f"[TranscriptionSessions] {session.name}: timed out waiting for segments {missing}")
+                return None
+            await asyncio.sleep(self.poll_interval)
@@ -2,19 +2,100 @@
 TTS Cache Service for permanent storage of audio files
 Handles both Supabase storage and local caching for optimal performance
 """
-import hashlib
-import base64
 import os
-from typing import Optional, Dict, List, Tuple
+import threading
+from typing import Iterable, Optional, Dict, List, Tuple, Union, TYPE_CHECKING
 from pathlib import Path
-from supabase import create_client, Client
-import json
+
+from . import metrics, tracing
+from .cache_keys import KEY_VERSION, cache_key, canonical_text, legacy_key
+from .cache_warmer import AccessLog
+from .circuit_breaker import CircuitOpenError
+from .tts_variants import AUDIO_FORMATS, CONTENT_TYPES, DEFAULT_VARIANT, TTSVariant
+
+if TYPE_CHECKING:
+    import httpx
+    from .blob_store import Blob, BlobStore
+    from .cache_write_queue import CacheWriteQueue
+    from .circuit_breaker import CircuitBreaker
+    from .local_cache_index import LocalCacheIndex
+    from .negative_cache import NegativeCache
+    from .packed_audio_store import PackedAudio, PackedAudioStore
+
+# Generation, local storage and upload all move audio in chunks of this size
+CHUNK_SIZE = 64 * 1024
+
+
+def cache_rows(entries: List[dict]) -> List[dict]:
+    """tts_cache rows for a batch of write entries (see CacheWriteQueue.start)"""
+    return [{
+        'content_hash': entry['content_hash'],
+        'content_text': entry['text'],
+        'voice': entry['voice'],
+        'audio_file_path': entry['audio_path'],
+        'audio_file_size': os.path.getsize(entry['journal_path']),
+        'content_type': entry['content_type'],
+        'key_version': KEY_VERSION,
+        'is_active': True
+    } for entry in entries]
+
+
+def blob_rows(entries: List[dict], cache_result) -> List['Blob']:
+    """Blobs to upload for a batch, matched to the tts_cache ids the upsert returned"""
+    from .blob_store import Blob
+    if not cache_result:
+        raise RuntimeError("tts_cache upsert returned no rows")
+    cache_ids = {row['content_hash']: row['id'] for row in cache_result}
+    return [
+        Blob(entry['content_hash'], entry['journal_path'], os.path.getsize(entry['journal_path']),
+             entry['content_type'], cache_ids[entry['content_hash']])
+        for entry in entries
+    ]
+
+
+class LookupStats:
+    """Per-worker counts of (text, voice, variant) lookups by the tier that answered them
+    (also exported as tts_cache_lookups_total)"""
+
+    SOURCES = ('memory', 'disk', 'packed', 'remote', 'legacy', 'miss')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.SOURCES, 0)
+        # Hits only canonicalization found: nothing was stored under the raw text's key
+        self._normalized_hits = 0
+
+    def record(self, sources: Iterable[Tuple[str, str]], content_type: Optional[str] = None, normalized_hits: int = 0) -> None:
+        """Count (text, source) outcomes (source is one of SOURCES), normalized_hits of them hits only canonicalization found"""
+        counted: Dict[str, int] = {}
+        with self._lock:
+            for text, source in sources:
+                self._counts[source] += 1
+                counted[source] = counted.get(source, 0) + 1
+            self._normalized_hits += normalized_hits
+        # content_type comes from the request body; keep the label's values bounded
+        label = content_type if content_type in CONTENT_TYPES else ('unknown' if content_type is None else 'other')
+        for source, count in counted.items():
+            metrics.inc('tts_cache_lookups_total', count, tier=source, content_type=label)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Counters and hit rate since the worker started"""
+        with self._lock:
+            counts = dict(self._counts)
+            normalized_hits = self._normalized_hits
+        total = sum(counts.values())
+        return {
+            'lookups': total,
+            **{f'lookup_{source}': count for source, count in counts.items()},
+            'lookup_normalized_hits': normalized_hits,
+            'lookup_hit_rate': round((total - counts['miss']) / total, 4) if total else 0.0
+        }
 
 
 class TTSCacheService:
     """Service for managing TTS audio file caching"""
     
-    def __init__(self, supabase_url: str, supabase_key: str, local_cache_dir: str = "/tmp/tts_cache"):
+    def __init__(self, supabase_url: str, supabase_key: str, local_cache_dir: str = "/tmp/tts_cache", http_pool=None, access_log_path: Optional[str] = None, local_index: Optional['LocalCacheIndex'] = None, packed_store: Optional['PackedAudioStore'] = None, write_queue: Optional['CacheWriteQueue'] = None, blob_store: Optional['BlobStore'] = None, legacy_key_fallback: bool = True, remote_timeout: Optional['httpx.Timeout'] = None, remote_breaker: Optional['CircuitBreaker'] = None, negative_cache: Optional['NegativeCache'] = None):
         """
         Initialize TTS cache service.
         
@@ -22,17 +103,61 @@ class TTSCacheService:
             supabase_url (str): Supabase project URL
             supabase_key (str): Supabase service key
             local_cache_dir (str): Local directory for caching
+            http_pool (HTTPPool): Shared connection pool for Supabase requests
+            access_log_path (str): Request-frequency log used to pick the boot-time hot set
+                (defaults to access_log.json in the local cache directory)
+            local_index (LocalCacheIndex): Size/LRU index that keeps the local tier within budget
+            packed_store (PackedAudioStore): Packed local store; when set it holds the local tier and
+                per-clip files are only written for callers that need a path
+            write_queue (CacheWriteQueue): Write-behind queue for Supabase persistence; when set
+                cache_audio() returns once the clip is local and journaled
+            blob_store (BlobStore): Where the permanent tier keeps audio bytes (defaults to the
+                tts_cache_files bytea column); tts_cache stays the index either way
+            legacy_key_fallback (bool): On a miss, also look for the clip under its pre-v2 key
+                (see cache_keys.legacy_key) and re-key what is found; turn off once
+                migrate_tts_cache_keys.py has run
+            remote_timeout (httpx.Timeout): Timeouts for Supabase requests (defaults to the client's own)
+            remote_breaker (CircuitBreaker): Wraps every Supabase and blob store call; while it is
+                open the cache is local-only and adds no latency
+            negative_cache (NegativeCache): Remote misses to skip asking about again for a short TTL
         """
+        self.local_index = local_index
+        self.packed_store = packed_store
+        self.legacy_key_fallback = legacy_key_fallback
+        self.remote_timeout = remote_timeout
+        self.remote_breaker = remote_breaker
+        self.negative_cache = negative_cache
+        self.lookup_stats = LookupStats()
+        self._init_local_tier(local_cache_dir)
+        self._init_supabase(supabase_url, supabase_key, http_pool)
+        self.blob_store = (blob_store or self._default_blob_store()) if self.supabase_enabled else None
+        self.access_log = AccessLog(access_log_path or self.local_cache_dir / 'access_log.json')
+
+        self.write_queue = write_queue if self.supabase_enabled else None
+        if self.write_queue:
+            self.write_queue.start(self._persist_remote)
+
+    def _init_local_tier(self, local_cache_dir: str) -> None:
+        """Set up the on-disk and in-memory local tiers"""
         self.local_cache_dir = Path(local_cache_dir)
         self.local_cache_dir.mkdir(parents=True, exist_ok=True)
         
-        # Local cache for quick access
+        # Local cache for quick access (shared across request threads)
         self.local_cache: Dict[str, str] = {}
-        
-        # Initialize Supabase client if credentials provided
+        self._local_cache_lock = threading.Lock()
+
+    def _init_supabase(self, supabase_url: str, supabase_key: str, http_pool) -> None:
+        """Initialize Supabase client if credentials provided"""
         if supabase_url and supabase_key:
             try:
-                self.supabase: Client = create_client(supabase_url, supabase_key)
+                from supabase import create_client  # Deferred: heavy import
+                if self.remote_timeout is not None:
+                    from supabase.lib.client_options import ClientOptions
+                    self.supabase = create_client(supabase_url, supabase_key, ClientOptions(postgrest_client_timeout=self.remote_timeout))
+                else:
+                    self.supabase = create_client(supabase_url, supabase_key)
+                if http_pool:
+                    http_pool.attach_supabase(self.supabase, timeout=self.remote_timeout)
                 self.supabase_enabled = True
             except Exception as e:
                 print(f"Failed to initialize Supabase client: {e}")
@@ -42,68 +167,393 @@ class TTSCacheService:
             self.supabase = None
             self.supabase_enabled = False
     
-    def _get_content_hash(self, text: str, voice: str) -> str:
-        """Generate MD5 hash for content + voice combination"""
-        return hashlib.md5(f"{text}_{voice}".encode()).hexdigest()
+    def _default_blob_store(self) -> 'BlobStore':
+        """Audio in the tts_cache_files bytea column, through the Supabase PostgREST session"""
+        from .blob_store import ByteaBlobStore
+        return ByteaBlobStore(self.supabase.postgrest.session)
+
+    def _remote(self, operation, *args):
+        """
+        Make a Supabase or blob store call through the circuit breaker.
+
+        Raises:
+            CircuitOpenError: If the breaker refuses the call (callers fall back to local-only)
+        """
+        if self.remote_breaker is None:
+            return operation(*args)
+        return self.remote_breaker.call(operation, *args)
+
+    def _remote_candidates(self, missing: List[str]) -> List[str]:
+        """Local misses worth asking the permanent tier about (none recently found missing there)"""
+        if not (missing and self.supabase_enabled):
+            return []
+        if self.negative_cache is None:
+            return missing
+        known_missing = self.negative_cache.known_missing(missing)
+        return [content_hash for content_hash in missing if content_hash not in known_missing]
+
+    def _remember_misses(self, requested: List[str], paths: Dict[str, Optional[str]]) -> None:
+        """Record the keys a remote lookup didn't find in the negative cache"""
+        if self.negative_cache is not None:
+            self.negative_cache.add(content_hash for content_hash in requested if paths[content_hash] is None)
+
+    def _remote_stats(self) -> Dict[str, object]:
+        """Circuit breaker and negative cache counters"""
+        return {
+            **(self.remote_breaker.stats() if self.remote_breaker else {}),
+            **(self.negative_cache.stats() if self.negative_cache else {})
+        }
+
+    def _get_content_hash(self, text: str, voice: str, variant: Optional[TTSVariant] = None) -> str:
+        """Cache key of a (text, voice, variant) clip (see cache_keys.cache_key)"""
+        return cache_key(text, voice, variant)
     
-    def _get_local_cache_path(self, content_hash: str) -> Path:
+    def _get_local_cache_path(self, content_hash: str, audio_format: str = 'mp3') -> Path:
         """Get local cache file path"""
-        return self.local_cache_dir / f"{content_hash}.mp3"
+        return self.local_cache_dir / f"{content_hash}.{audio_format}"
     
-    def get_cached_audio(self, text: str, voice: str) -> Optional[str]:
+    def _lookup_local(self, content_hash: str, audio_format: str = 'mp3') -> Optional[str]:
+        """Check the in-memory, on-disk and packed local tiers for a cached file"""
+        return self._lookup_local_tier(content_hash, audio_format)[0]
+
+    def _lookup_local_tier(self, content_hash: str, audio_format: str = 'mp3', copy_packed: bool = True) -> Tuple[Optional[Union[str, 'PackedAudio']], Optional[str]]:
+        """_lookup_local() and the tier that had the file ('memory', 'disk' or 'packed').
+
+        Without copy_packed, a packed hit is returned as its PackedAudio slice
+        instead of being written out to a per-clip file.
+        """
+        with self._local_cache_lock:
+            local_path = self.local_cache.get(content_hash)
+            if local_path is not None:
+                if Path(local_path).exists():
+                    self._touch_local(local_path)
+                    return local_path, 'memory'
+                # Remove stale (evicted) local cache entry
+                del self.local_cache[content_hash]
+
+        local_path = self._get_local_cache_path(content_hash, audio_format)
+        if local_path.exists():
+            self._remember_local(content_hash, local_path)
+            self._touch_local(local_path)
+            return str(local_path), 'disk'
+
+        if self.packed_store:
+            audio = self.packed_store.open(content_hash)
+            if audio is not None:
+                if not copy_packed:
+                    return audio, 'packed'
+                return str(self._write_file(content_hash, audio.view, audio_format=audio_format)), 'packed'
+        return None, None
+
+    def _touch_local(self, local_path) -> None:
+        """Record a local-tier hit for LRU eviction"""
+        if self.local_index:
+            self.local_index.touch(local_path)
+
+    def _index_local(self, local_path: Path, content_type: Optional[str], alias: Optional[str] = None) -> None:
+        """Add a newly written file (and another name it is linked under) to the eviction index"""
+        if self.local_index:
+            self.local_index.add(local_path, content_type, alias)
+
+    def _remember_local(self, content_hash: str, local_path: Path) -> None:
+        """Record a file in the in-memory tier"""
+        with self._local_cache_lock:
+            self.local_cache[content_hash] = str(local_path)
+
+    def _write_file(self, content_hash: str, audio_data: bytes, content_type: Optional[str] = None, audio_format: str = 'mp3') -> Path:
+        """Write audio bytes as a per-clip file (atomically, other threads may be reading)"""
+        local_path = self._get_local_cache_path(content_hash, audio_format)
+        tmp_path = local_path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(audio_data)
+        os.replace(tmp_path, local_path)
+        self._remember_local(content_hash, local_path)
+        self._index_local(local_path, content_type)
+        return local_path
+
+    def _link_local(self, content_hash: str, audio_file_path: str, content_type: Optional[str] = None, audio_format: str = 'mp3') -> Path:
+        """Add an audio file to the local tier as a hard link (atomically, other threads may be reading)"""
+        local_path = self._get_local_cache_path(content_hash, audio_format)
+        tmp_path = local_path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.unlink(missing_ok=True)
+        alias = audio_file_path
+        try:
+            os.link(audio_file_path, tmp_path)
+        except OSError:
+            # Different filesystem (or no hard links): fall back to a copy
+            import shutil
+            shutil.copyfile(audio_file_path, tmp_path)
+            alias = None
+        os.replace(tmp_path, local_path)
+        self._remember_local(content_hash, local_path)
+        # One entry for both names, so the bytes count once and eviction frees them
+        self._index_local(local_path, content_type, alias)
+        return local_path
+
+    def _store_local(self, content_hash: str, audio_file_path: str, content_type: Optional[str] = None, audio_format: str = 'mp3') -> Path:
+        """Add a generated file to the local tier without reading it into memory; returns the local path"""
+        if self.packed_store:
+            self.packed_store.put_file(content_hash, audio_file_path, content_type)
+            # The generated file already serves as the per-clip copy
+            return Path(audio_file_path)
+        return self._link_local(content_hash, audio_file_path, content_type, audio_format)
+
+    def _local_stats(self) -> Dict[str, int]:
+        """Local tier size, from the index when there is one"""
+        if self.local_index:
+            local_bytes, local_files = self.local_index.usage()
+            stats = {'local_files': local_files, 'local_bytes': local_bytes}
+        else:
+            stats = {'local_files': sum(1 for path in self.local_cache_dir.iterdir() if path.suffix[1:] in AUDIO_FORMATS)}
+        if self.packed_store:
+            stats.update(self.packed_store.stats())
+        if self.write_queue:
+            stats.update(self.write_queue.stats())
+        return stats
+
+    def record_access(self, text: str, voice: str, content_type: str = 'narrative', variant: Optional[TTSVariant] = None) -> None:
+        """Count a user request for (text, voice, variant) towards the boot-time hot set"""
+        self.access_log.record(self._get_content_hash(text, voice, variant), text, voice, content_type, variant)
+
+    def get_local_audio(self, text: str, voice: str, variant: Optional[TTSVariant] = None) -> Optional[str]:
+        """Get a cached audio file path from the local tier only (no Supabase round trip)"""
+        variant = variant or DEFAULT_VARIANT
+        return self._lookup_local(self._get_content_hash(text, voice, variant), variant.audio_format)
+
+    def find_local_audio(self, text: str, voice: str, variant: Optional[TTSVariant] = None) -> Optional[Union[str, 'PackedAudio']]:
+        """get_local_audio() for callers that stream the bytes: a packed hit is the
+        PackedAudio slice, not a copy written out to a file"""
+        variant = variant or DEFAULT_VARIANT
+        return self._lookup_local_tier(self._get_content_hash(text, voice, variant), variant.audio_format, copy_packed=False)[0]
+
+    def get_local_audio_by_hash(self, content_hash: str, audio_format: str = 'mp3') -> Optional[str]:
+        """get_local_audio() for a content hash (as in /api/audio URLs)"""
+        return self._lookup_local(content_hash, audio_format)
+
+    def open_packed(self, content_hash: str) -> Optional['PackedAudio']:
+        """Get a cached clip from the packed store without copying it (None without a packed store)"""
+        if not self.packed_store:
+            return None
+        return self.packed_store.open(content_hash)
+
+    def open_local_audio(self, text: str, voice: str, variant: Optional[TTSVariant] = None, content_type: Optional[str] = None) -> Optional['PackedAudio']:
+        """open_packed() for (text, voice, variant)"""
+        audio = self.open_packed(self._get_content_hash(text, voice, variant))
+        if audio is not None:
+            # Misses fall through to get_cached_audio, which counts them
+            self.lookup_stats.record([(text, 'packed')], content_type, int(self._normalized_hit(text, voice, variant)))
+        return audio
+
+    def get_cached_audio(self, text: str, voice: str, variant: Optional[TTSVariant] = None, content_type: Optional[str] = None) -> Optional[str]:
         """
         Get cached audio file path (local or Supabase).
         
         Args:
             text (str): Text content
             voice (str): Voice type
+            variant (TTSVariant): Model and format (defaults to DEFAULT_VARIANT)
+            content_type (str): Type of content, for the lookup metrics
             
         Returns:
             str: Path to cached audio file or None if not found
         """
-        content_hash = self._get_content_hash(text, voice)
-        
-        # Check local cache first
-        if content_hash in self.local_cache:
-            local_path = self.local_cache[content_hash]
-            if Path(local_path).exists():
-                return local_path
-            else:
-                # Remove stale local cache entry
-                del self.local_cache[content_hash]
-        
-        # Check local file system
-        local_path = self._get_local_cache_path(content_hash)
-        if local_path.exists():
-            self.local_cache[content_hash] = str(local_path)
-            return str(local_path)
-        
-        # Check Supabase cache if enabled
-        if self.supabase_enabled:
+        return self.get_cached_audio_many([text], voice, variant, content_type)[text]
+
+    def get_cached_audio_by_hash(self, content_hash: str, audio_format: str = 'mp3') -> Optional[str]:
+        """get_cached_audio() for a content hash (as in /api/audio URLs)"""
+        return self._get_cached_many([content_hash], audio_format)[content_hash]
+
+    def get_cached_audio_many(self, texts: List[str], voice: str, variant: Optional[TTSVariant] = None, content_type: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """
+        Get cached audio file paths for many texts at once.
+
+        Local misses are fetched from the blob store in batches (one joined
+        round trip per REMOTE_BATCH_SIZE keys for bytea), not one key at a time.
+
+        Args:
+            texts (List[str]): Text contents
+            voice (str): Voice type
+            variant (TTSVariant): Model and format (defaults to DEFAULT_VARIANT)
+            content_type (str): Type of content, for the lookup metrics
+
+        Returns:
+            Dict[str, Optional[str]]: Mapping of text to cached audio path (None if not cached)
+        """
+        with tracing.span('cache_lookup'):
+            variant = variant or DEFAULT_VARIANT
+            hashes = {text: self._get_content_hash(text, voice, variant) for text in texts}
+            legacy = self._legacy_keys(hashes, voice, variant)
+            paths, sources = self._lookup_local_many(list(hashes.values()), variant.audio_format, legacy)
+            remote = self._remote_candidates([content_hash for content_hash, path in paths.items() if path is None])
+
+            # Check the permanent tier if enabled
+            rekey: Dict[str, str] = {}
+            if remote:
+                try:
+                    fetched = self._remote(self._fetch_remote, *self._remote_request(remote, legacy), variant.audio_format)
+                    rekey = self._merge_fetched(paths, sources, remote, legacy, fetched)
+                    self._remember_misses(remote, paths)
+                except CircuitOpenError:
+                    pass  # Local-only until Supabase recovers
+                except Exception as e:
+                    print(f"Error retrieving from Supabase cache: {e}")
+
+            self._record_lookups(hashes, voice, paths, sources, rekey, content_type, variant)
+            return {text: paths[content_hash] for text, content_hash in hashes.items()}
+
+    def _legacy_keys(self, hashes: Dict[str, str], voice: str, variant: TTSVariant) -> Dict[str, str]:
+        """Cache key -> pre-v2 key to fall back to, for keys that differ"""
+        if not self.legacy_key_fallback:
+            return {}
+        legacy = {content_hash: legacy_key(text, voice, variant) for text, content_hash in hashes.items()}
+        return {content_hash: old for content_hash, old in legacy.items() if old != content_hash}
+
+    def _lookup_local_many(self, content_hashes: List[str], audio_format: str, legacy: Dict[str, str]) -> Tuple[Dict[str, Optional[str]], Dict[str, str]]:
+        """Local tier lookup, under the legacy key as well; returns (paths, hash -> source)"""
+        paths: Dict[str, Optional[str]] = {}
+        sources: Dict[str, str] = {}
+        for content_hash in content_hashes:
+            local_path, tier = self._lookup_local_tier(content_hash, audio_format)
+            if local_path is not None:
+                sources[content_hash] = tier
+            elif content_hash in legacy:
+                legacy_path = self._lookup_local(legacy[content_hash], audio_format)
+                if legacy_path is not None:
+                    local_path = str(self._store_local(content_hash, legacy_path, None, audio_format))
+                    sources[content_hash] = 'legacy'
+            paths[content_hash] = local_path
+        return paths, sources
+
+    @staticmethod
+    def _remote_request(missing: List[str], legacy: Dict[str, str]) -> Tuple[List[str], Dict[str, str]]:
+        """Keys to fetch in one batch (each miss plus its legacy key) and legacy key -> cache key"""
+        aliases = {legacy[content_hash]: content_hash for content_hash in missing if content_hash in legacy}
+        return missing + list(aliases), aliases
+
+    @staticmethod
+    def _merge_fetched(paths: Dict[str, Optional[str]], sources: Dict[str, str], missing: List[str],
+                       legacy: Dict[str, str], fetched: Dict[str, Tuple[str, Optional[str]]]) -> Dict[str, str]:
+        """Fill in the misses from a _fetch_remote result; returns cache key -> content type of legacy finds"""
+        rekey = {}
+        for content_hash in missing:
+            if content_hash in fetched:
+                paths[content_hash] = fetched[content_hash][0]
+                sources[content_hash] = 'remote'
+            elif legacy.get(content_hash) in fetched:
+                paths[content_hash], content_type = fetched[legacy[content_hash]]
+                sources[content_hash] = 'legacy'
+                rekey[content_hash] = content_type or 'narrative'
+        return rekey
+
+    def _normalized_hit(self, text: str, voice: str, variant: Optional[TTSVariant] = None) -> bool:
+        """Whether a hit for text was only found through canonicalization: the text
+        isn't canonical and no tier holds a clip under its raw-text (legacy) key"""
+        if canonical_text(text) == text:
+            return False
+        variant = variant or DEFAULT_VARIANT
+        raw_key = legacy_key(text, voice, variant)
+        with self._local_cache_lock:
+            if raw_key in self.local_cache:
+                return False
+        if self._get_local_cache_path(raw_key, variant.audio_format).exists():
+            return False
+        return not (self.packed_store and raw_key in self.packed_store)
+
+    def _record_lookups(self, hashes: Dict[str, str], voice: str, paths: Dict[str, Optional[str]],
+                        sources: Dict[str, str], rekey: Dict[str, str], content_type: Optional[str] = None,
+                        variant: Optional[TTSVariant] = None) -> None:
+        """Count the lookups, and queue clips found under a legacy remote key for upload under their cache key"""
+        outcomes = [(text, sources.get(content_hash, 'miss')) for text, content_hash in hashes.items()]
+        normalized_hits = sum(
+            1 for text, source in outcomes
+            if source not in ('miss', 'legacy') and self._normalized_hit(text, voice, variant)
+        )
+        self.lookup_stats.record(outcomes, content_type, normalized_hits)
+        if not self.write_queue:
+            return  # migrate_tts_cache_keys.py re-keys the permanent tier in bulk
+        for text, content_hash in hashes.items():
+            if content_hash in rekey:
+                self.write_queue.submit(content_hash, text, voice, rekey.pop(content_hash), paths[content_hash])
+
+    def _get_cached_many(self, content_hashes: List[str], audio_format: str = 'mp3') -> Dict[str, Optional[str]]:
+        """Local tier first, then one batched blob store fetch for the misses"""
+        # Check memory and local file system first
+        paths = {content_hash: self._lookup_local(content_hash, audio_format) for content_hash in content_hashes}
+        remote = self._remote_candidates([content_hash for content_hash, path in paths.items() if path is None])
+
+        # Check the permanent tier if enabled
+        if remote:
             try:
-                result = self.supabase.table('tts_cache').select('*').eq('content_hash', content_hash).eq('is_active', True).execute()
-                
-                if result.data:
-                    cache_entry = result.data[0]
-                    # Download from Supabase and save locally
-                    file_result = self.supabase.table('tts_cache_files').select('file_data').eq('cache_id', cache_entry['id']).execute()
-                    
-                    if file_result.data:
-                        audio_data = file_result.data[0]['file_data']
-                        
-                        # Save to local cache
-                        with open(local_path, 'wb') as f:
-                            f.write(audio_data)
-                        
-                        self.local_cache[content_hash] = str(local_path)
-                        return str(local_path)
-                        
+                paths.update({
+                    content_hash: path
+                    for content_hash, (path, _) in self._remote(self._fetch_remote, remote, {}, audio_format).items()
+                })
+                self._remember_misses(remote, paths)
+            except CircuitOpenError:
+                pass  # Local-only until Supabase recovers
             except Exception as e:
                 print(f"Error retrieving from Supabase cache: {e}")
-        
-        return None
+
+        return paths
+
+    def _fetch_remote(self, content_hashes: List[str], aliases: Dict[str, str], audio_format: str = 'mp3') -> Dict[str, Tuple[str, Optional[str]]]:
+        """
+        Download clips from the blob store into the local tier.
+
+        Args:
+            content_hashes (List[str]): Keys to fetch, in one batch
+            aliases (Dict[str, str]): Fetched key -> key to store the clip under (legacy keys);
+                skipped when the clip was also found under its own key
+            audio_format (str): Format of the clips
+
+        Returns:
+            Dict[str, Tuple[str, Optional[str]]]: Fetched key -> (local path, content type)
+        """
+        tmp_paths = {
+            content_hash: self._get_local_cache_path(content_hash, audio_format).with_suffix(f".{threading.get_ident()}.fetch")
+            for content_hash in content_hashes
+        }
+        results = {}
+        try:
+            with metrics.timer('upstream_request_duration_seconds', upstream='blob_store', operation='fetch'):
+                fetched = self.blob_store.fetch_many(content_hashes, tmp_paths.__getitem__)
+            for content_hash, content_type in fetched.items():
+                target = aliases.get(content_hash, content_hash)
+                if target != content_hash and target in fetched:
+                    continue
+                local_path = self._adopt_local(target, tmp_paths[content_hash], content_type, audio_format)
+                results[content_hash] = (str(local_path), content_type)
+        finally:
+            for tmp_path in tmp_paths.values():
+                tmp_path.unlink(missing_ok=True)
+        return results
+
+    def _adopt_local(self, content_hash: str, downloaded: Path, content_type: Optional[str] = None, audio_format: str = 'mp3') -> Path:
+        """Move a downloaded clip into the local tier"""
+        if self.packed_store:
+            self.packed_store.put_file(content_hash, downloaded, content_type)
+        local_path = self._get_local_cache_path(content_hash, audio_format)
+        os.replace(downloaded, local_path)
+        self._remember_local(content_hash, local_path)
+        self._index_local(local_path, content_type)
+        return local_path
+
+    def signed_url(self, content_hash: str, expires_in: int = 3600) -> Optional[str]:
+        """
+        Time-limited URL clients can fetch a clip from without going through the app.
+
+        Args:
+            content_hash (str): Cache key of the clip
+            expires_in (int): Seconds the URL stays valid
+
+        Returns:
+            str: The URL, or None if the blob store can't sign URLs
+        """
+        if not self.blob_store:
+            return None
+        return self.blob_store.signed_url(content_hash, expires_in)
     
-    def cache_audio(self, text: str, voice: str, audio_file_path: str, content_type: str = 'narrative') -> bool:
+    def cache_audio(self, text: str, voice: str, audio_file_path: str, content_type: str = 'narrative', variant: Optional[TTSVariant] = None) -> bool:
         """
         Cache audio file both locally and in Supabase.
         
@@ -112,63 +562,67 @@ class TTSCacheService:
             voice (str): Voice type
             audio_file_path (str): Path to audio file
             content_type (str): Type of content (narrative, question, etc.)
+            variant (TTSVariant): Model and format the audio was generated with
             
         Returns:
             bool: Success status
         """
         try:
-            content_hash = self._get_content_hash(text, voice)
-            local_path = self._get_local_cache_path(content_hash)
-            
-            # Copy to local cache
-            import shutil
-            shutil.copy2(audio_file_path, local_path)
-            self.local_cache[content_hash] = str(local_path)
+            variant = variant or DEFAULT_VARIANT
+            content_hash = self._get_content_hash(text, voice, variant)
             
-            # Get file info
-            file_size = local_path.stat().st_size
+            # Store locally
+            local_path = self._store_local(content_hash, audio_file_path, content_type, variant.audio_format)
+            if self.negative_cache is not None:
+                self.negative_cache.discard(content_hash)
             
-            # Read audio data
-            with open(local_path, 'rb') as f:
-                audio_data = f.read()
-            
-            # Store in Supabase if enabled
-            if self.supabase_enabled:
-                cache_entry = {
-                    'content_hash': content_hash,
-                    'content_text': text,
-                    'voice': voice,
-                    'audio_file_path': str(local_path),
-                    'audio_file_size': file_size,
-                    'content_type': content_type,
-                    'is_active': True
-                }
-                
-                # Insert cache entry
-                cache_result = self.supabase.table('tts_cache').upsert(cache_entry, on_conflict='content_hash').execute()
-                
-                if cache_result.data:
-                    cache_id = cache_result.data[0]['id']
-                    
-                    # Insert file data
-                    file_entry = {
-                        'cache_id': cache_id,
-                        'file_data': audio_data,
-                        'file_size': file_size
-                    }
-                    
-                    self.supabase.table('tts_cache_files').upsert(file_entry, on_conflict='cache_id').execute()
-                    
-                    print(f"Cached audio for: {text[:50]}... (hash: {content_hash})")
-                    return True
-            else:
+            if not self.supabase_enabled:
                 print(f"Cached audio locally for: {text[:50]}... (hash: {content_hash})")
                 return True
-                
+
+            if self.write_queue:
+                # Persisted in the background; the clip is already served locally
+                return self.write_queue.submit(content_hash, text, voice, content_type, str(local_path))
+
+            self._persist_remote([{
+                'content_hash': content_hash,
+                'text': text,
+                'voice': voice,
+                'content_type': content_type,
+                'audio_path': str(local_path),
+                'journal_path': str(local_path)
+            }])
+            print(f"Cached audio for: {text[:50]}... (hash: {content_hash})")
+            return True
+
+        except CircuitOpenError:
+            print(f"Cached audio locally for: {text[:50]}... (Supabase unavailable)")
+            return True
         except Exception as e:
             print(f"Error caching audio: {e}")
             
         return False
+
+    def _persist_remote(self, entries: List[dict]) -> None:
+        """_persist_batch() through the circuit breaker (also the write-behind entry point)"""
+        self._remote(self._persist_batch, entries)
+
+    def _persist_batch(self, entries: List[dict]) -> None:
+        """
+        Upsert a batch of clips into tts_cache and the blob store.
+
+        Args:
+            entries (List[dict]): Write entries (see CacheWriteQueue.start)
+
+        Raises:
+            Exception: If the upsert or the upload fails
+        """
+        with metrics.timer('upstream_request_duration_seconds', span='cache_write', upstream='supabase', operation='tts_cache.upsert'):
+            cache_result = self.supabase.table('tts_cache').upsert(cache_rows(entries), on_conflict='content_hash').execute()
+
+        # Audio, streamed from disk
+        with metrics.timer('upstream_request_duration_seconds', span='cache_write', upstream='blob_store', operation='put'):
+            self.blob_store.put_many(blob_rows(entries, cache_result.data))
     
     def pre_cache_narratives(self, narratives: List[str], voice: str = "nova", content_type: str = "narrative") -> Dict[str, bool]:
         """
@@ -182,47 +636,46 @@ class TTSCacheService:
         Returns:
             Dict[str, bool]: Mapping of narrative to success status
         """
-        results = {}
-        
-        for narrative in narratives:
-            # Check if already cached
-            cached_path = self.get_cached_audio(narrative, voice)
+        cached = self.get_cached_audio_many(narratives, voice)
+        for narrative, cached_path in cached.items():
             if cached_path:
-                results[narrative] = True
                 print(f"Already cached: {narrative[:50]}...")
-                continue
-            
-            # This would need to be called with actual TTS generation
-            # For now, just mark as needing generation
-            results[narrative] = False
-            
-        return results
+        
+        # This would need to be called with actual TTS generation
+        # For now, just mark as needing generation
+        return {narrative: cached_path is not None for narrative, cached_path in cached.items()}
     
+    def _count_remote(self) -> int:
+        """Active tts_cache rows"""
+        with metrics.timer('upstream_request_duration_seconds', upstream='supabase', operation='tts_cache.count'):
+            result = self.supabase.table('tts_cache').select('id', count='exact').eq('is_active', True).execute()
+        return result.count or 0
+
     def get_cache_stats(self) -> Dict[str, int]:
         """Get cache statistics"""
         try:
             # Count Supabase entries if enabled
             supabase_count = 0
             if self.supabase_enabled:
-                result = self.supabase.table('tts_cache').select('id', count='exact').eq('is_active', True).execute()
-                supabase_count = result.count or 0
-            
-            # Count local files
-            local_count = len(list(self.local_cache_dir.glob("*.mp3")))
+                supabase_count = self._remote(self._count_remote)
             
             return {
                 'supabase_entries': supabase_count,
-                'local_files': local_count,
+                **self._local_stats(),
                 'memory_cache': len(self.local_cache),
-                'supabase_enabled': self.supabase_enabled
+                'supabase_enabled': self.supabase_enabled,
+                **self.lookup_stats.snapshot(),
+                **self._remote_stats()
             }
         except Exception as e:
             print(f"Error getting cache stats: {e}")
             return {
                 'supabase_entries': 0, 
-                'local_files': len(list(self.local_cache_dir.glob("*.mp3"))), 
+                **self._local_stats(),
                 'memory_cache': len(self.local_cache),
-                'supabase_enabled': False
+                'supabase_enabled': False,
+                **self.lookup_stats.snapshot(),
+                **self._remote_stats()
             }
     
     def clear_local_cache(self) -> bool:
@@ -231,7 +684,12 @@ class TTSCacheService:
             import shutil
             shutil.rmtree(self.local_cache_dir)
             self.local_cache_dir.mkdir(parents=True, exist_ok=True)
-            self.local_cache.clear()
+            with self._local_cache_lock:
+                self.local_cache.clear()
+            if self.local_index:
+                self.local_index.forget_dir(self.local_cache_dir)
+            if self.packed_store:
+                self.packed_store.clear()
             return True
         except Exception as e:
             print(f"Error clearing local cache: {e}")
@@ -0,0 +1,258 @@
+"""
+Sentence-chunked TTS pipeline.
+
+A 2-4 sentence reply synthesized in one call makes the listener wait for the
+whole reply. The pipeline splits it into sentences, synthesizes them
+concurrently (bounded), and hands them back in order, so the first sentence
+is playable as soon as its own synthesis finishes.
+"""
+import asyncio
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Iterator, List, Optional, Tuple
+
+from . import tracing
+from .cache_keys import cache_key
+from .tts_variants import DEFAULT_VARIANT, TTSVariant
+
+# A sentence runs up to terminal punctuation (plus closing quotes/brackets) followed by whitespace
+_SENTENCE = re.compile(r'\S.*?(?:[.!?…]+["\'”’)\]]*(?=\s|$)|$)', re.S)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def split_sentences(text: str, min_chars: int = 20) -> List[str]:
+    """
+    Split text into sentences for synthesis.
+
+    Args:
+        text (str): Text to split
+        min_chars (int): Fragments shorter than this ("Wow.") are merged into
+            the following sentence; a separate request isn't worth it
+
+    Returns:
+        List[str]: Sentences in reading order
+    """
+    sentences: List[str] = []
+    for match in _SENTENCE.finditer(text.strip()):
+        sentence = match.group().strip()
+        if sentences and len(sentences[-1]) < min_chars:
+            sentences[-1] = f"{sentences[-1]} {sentence}"
+        else:
+            sentences.append(sentence)
+    if len(sentences) > 1 and len(sentences[-1]) < min_chars:
+        tail = sentences.pop()
+        sentences[-1] = f"{sentences[-1]} {tail}"
+    return sentences
+
+
+def _combined_path(text: str, voice: str, output_dir: str, variant: TTSVariant) -> Path:
+    """Where the concatenated reply is written (same name the single-call path uses)"""
+    return Path(output_dir) / f"tts_cache_{cache_key(text, voice, variant)}.{variant.audio_format}"
+
+
+def _concatenate(paths: List[str], target: Path) -> str:
+    """Join segments into one file (MP3 frames and ADTS AAC frames concatenate cleanly)"""
+    tmp_path = target.with_suffix(f".{threading.get_ident()}.tmp")
+    with open(tmp_path, 'wb') as out:
+        for path in paths:
+            with open(path, 'rb') as segment:
+                while chunk := segment.read(CHUNK_SIZE):
+                    out.write(chunk)
+    os.replace(tmp_path, target)
+    return str(target)
+
+
+def _read_chunks(path: str, chunk_size: int) -> Iterator[bytes]:
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+class TTSPipeline:
+    """Parallel, in-order sentence synthesis on a bounded thread pool"""
+
+    def __init__(self, speak: Callable[[str, str, str, str, TTSVariant], Optional[str]], max_workers: int = 4, min_sentence_chars: int = 20, on_rendered: Optional[Callable[[str, str], None]] = None, variant_for: Optional[Callable[[str], TTSVariant]] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            speak (Callable): text_to_speech(text, voice, output_dir, content_type, variant) -> audio path;
+                each sentence goes through it, so sentences are cached individually
+            max_workers (int): Sentences synthesized at once, across all requests in this worker
+            min_sentence_chars (int): See split_sentences
+            on_rendered (Callable): Called with (path, content_type) for each combined file render() writes
+            variant_for (Callable): content_type -> variant for calls that don't pass one
+                (must be a joinable format); defaults to DEFAULT_VARIANT
+        """
+        self.speak = speak
+        self.min_sentence_chars = min_sentence_chars
+        self.on_rendered = on_rendered
+        self.variant_for = variant_for or (lambda content_type: DEFAULT_VARIANT)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tts-pipeline')
+
+    def submit(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "response", variant: Optional[TTSVariant] = None) -> List[Tuple[str, Future]]:
+        """Start synthesizing every sentence; returns (sentence, future) pairs in order"""
+        variant = variant or self.variant_for(content_type)
+        return [
+            (sentence, self._executor.submit(tracing.propagate(self.speak, queue_span='tts_queue'), sentence, voice, output_dir, content_type, variant))
+            for sentence in split_sentences(text, self.min_sentence_chars)
+        ]
+
+    def segments(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "response", timeout: Optional[float] = None, variant: Optional[TTSVariant] = None) -> Iterator[Tuple[str, str]]:
+        """
+        Yield (sentence, audio_path) in reading order, each as soon as it and
+        every sentence before it are ready.
+
+        Raises:
+            RuntimeError: If a sentence could not be synthesized
+        """
+        pending = self.submit(text, voice, output_dir, content_type, variant)
+        try:
+            for index, (sentence, future) in enumerate(pending):
+                audio_path = future.result(timeout=timeout)
+                if not audio_path:
+                    raise RuntimeError(f"TTS failed for sentence {index + 1}/{len(pending)}")
+                yield sentence, audio_path
+        finally:
+            # Abandoned (client gone, failure, timeout): don't synthesize the rest
+            for _, future in pending:
+                future.cancel()
+
+    def playlist(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "response", timeout: Optional[float] = None, variant: Optional[TTSVariant] = None) -> Optional[List[Tuple[str, str]]]:
+        """All (sentence, audio_path) pairs in order, or None if any sentence failed"""
+        try:
+            return list(self.segments(text, voice, output_dir, content_type, timeout, variant))
+        except Exception as e:
+            print(f"[TTSPipeline] Error building playlist: {e}")
+            return None
+
+    def stream(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "response", chunk_size: int = 4096, variant: Optional[TTSVariant] = None) -> Iterator[bytes]:
+        """Audio bytes of the whole reply, sentence by sentence, in order"""
+        for _, audio_path in self.segments(text, voice, output_dir, content_type, variant=variant):
+            yield from _read_chunks(audio_path, chunk_size)
+
+    def render(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "response", timeout: Optional[float] = None, variant: Optional[TTSVariant] = None) -> Optional[str]:
+        """
+        Synthesize the reply in parallel and join it into a single file.
+
+        Returns:
+            str: Path to the combined audio file or None if error
+        """
+        variant = variant or self.variant_for(content_type)
+        playlist = self.playlist(text, voice, output_dir, content_type, timeout, variant)
+        if not playlist:
+            return None
+        if len(playlist) == 1:
+            return playlist[0][1]
+        try:
+            combined = _concatenate([audio_path for _, audio_path in playlist], _combined_path(text, voice, output_dir, variant))
+            if self.on_rendered:
+                self.on_rendered(combined, content_type)
+            return combined
+        except Exception as e:
+            print(f"[TTSPipeline] Error joining segments: {e}")
+            return None
+
+    def close(self) -> None:
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncTTSPipeline:
+    """Parallel, in-order sentence synthesis for the ASGI app"""
+
+    def __init__(self, speak: Callable[[str, str, str, str, TTSVariant], Awaitable[Optional[str]]], max_concurrency: int = 4, min_sentence_chars: int = 20, on_rendered: Optional[Callable[[str, str], None]] = None, variant_for: Optional[Callable[[str], TTSVariant]] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            speak (Callable): async text_to_speech(text, voice, output_dir, content_type, variant) -> audio path
+            max_concurrency (int): Sentences synthesized at once, across all requests in this worker
+            min_sentence_chars (int): See split_sentences
+            on_rendered (Callable): Called with (path, content_type) for each combined file render() writes
+            variant_for (Callable): See TTSPipeline
+        """
+        self.speak = speak
+        self.min_sentence_chars = min_sentence_chars
+        self.on_rendered = on_rendered
+        self.variant_for = variant_for or (lambda content_type: DEFAULT_VARIANT)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _speak_bounded(self, sentence: str, voice: str, output_dir: str, content_type: str, variant: TTSVariant) -> Optional[str]:
+        with tracing.span('tts_queue'):
+            await self._semaphore.acquire()
+        try:
+            return await self.speak(sentence, voice, output_dir, content_type, variant)
+        finally:
+            self._semaphore.release()
+
+    def submit(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "response", variant: Optional[TTSVariant] = None) -> List[Tuple[str, asyncio.Task]]:
+        """Start synthesizing every sentence; returns (sentence, task) pairs in order"""
+        variant = variant or self.variant_for(content_type)
+        return [
+            (sentence, asyncio.create_task(self._speak_bounded(sentence, voice, output_dir, content_type, variant)))
+            for sentence in split_sentences(text, self.min_sentence_chars)
+        ]
+
+    async def segments(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "response", timeout: Optional[float] = None, variant: Optional[TTSVariant] = None) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Yield (sentence, audio_path) in reading order, each as soon as it and
+        every sentence before it are ready.
+
+        Raises:
+            RuntimeError: If a sentence could not be synthesized
+        """
+        pending = self.submit(text, voice, output_dir, content_type, variant)
+        try:
+            for index, (sentence, task) in enumerate(pending):
+                audio_path = await asyncio.wait_for(asyncio.shield(task), timeout)
+                if not audio_path:
+                    raise RuntimeError(f"TTS failed for sentence {index + 1}/{len(pending)}")
+                yield sentence, audio_path
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    async def playlist(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "response", timeout: Optional[float] = None, variant: Optional[TTSVariant] = None) -> Optional[List[Tuple[str, str]]]:
+        """All (sentence, audio_path) pairs in order, or None if any sentence failed"""
+        try:
+            return [segment async for segment in self.segments(text, voice, output_dir, content_type, timeout, variant)]
+        except Exception as e:
+            print(f"[TTSPipeline] Error building playlist: {e}")
+            return None
+
+    async def stream(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "response", chunk_size: int = 4096, variant: Optional[TTSVariant] = None) -> AsyncIterator[bytes]:
+        """Audio bytes of the whole reply, sentence by sentence, in order"""
+        async for _, audio_path in self.segments(text, voice, output_dir, content_type, variant=variant):
+            # Segments are small; one read per sentence keeps thread hops down
+            data = await asyncio.to_thread(Path(audio_path).read_bytes)
+            for start in range(0, len(data), chunk_size):
+                yield data[start:start + chunk_size]
+
+    async def render(self, text: str, voice: str = "nova", output_dir: str = "/tmp", content_type: str = "response", timeout: Optional[float] = None, variant: Optional[TTSVariant] = None) -> Optional[str]:
+        """
+        Synthesize the reply in parallel and join it into a single file.
+
+        Returns:
+            str: Path to the combined audio file or None if error
+        """
+        variant = variant or self.variant_for(content_type)
+        playlist = await self.playlist(text, voice, output_dir, content_type, timeout, variant)
+        if not playlist:
+            return None
+        if len(playlist) == 1:
+            return playlist[0][1]
+        try:
+            combined = await asyncio.to_thread(
+                _concatenate, [audio_path for _, audio_path in playlist], _combined_path(text, voice, output_dir, variant)
+            )
+            if self.on_rendered:
+                self.on_rendered(combined, content_type)
+            return combined
+        except Exception as e:
+            print(f"[TTSPipeline] Error joining segments: {e}")
+            return None
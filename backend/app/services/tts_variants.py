@@ -0,0 +1,139 @@
+"""
+TTS output variants: model tier, audio format and speed.
+
+Every clip is cached per (text, voice, variant) (see cache_keys). The variant
+for a request comes from a per-content-type model policy (HD for pre-cached
+narratives and questions, the faster model for live replies) and from client
+hints: an explicit format and speed, the Accept header and Save-Data.
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Formats OpenAI can produce, with the MIME type each is served as
+AUDIO_FORMATS = {'mp3': 'audio/mpeg', 'opus': 'audio/ogg', 'aac': 'audio/aac'}
+
+# Accept values that ask for each format
+_ACCEPT_FORMATS = {
+    'audio/mpeg': 'mp3', 'audio/mp3': 'mp3',
+    'audio/ogg': 'opus', 'audio/opus': 'opus',
+    'audio/aac': 'aac',
+}
+
+# Formats whose files join by plain concatenation (MP3 frames, ADTS AAC), as the
+# sentence pipeline does; chained Ogg streams don't play reliably in browsers
+JOINABLE_FORMATS = ('mp3', 'aac')
+
+# Smallest payload first, for Save-Data clients that said which formats they play
+COMPACT_FORMATS = ('opus', 'aac', 'mp3')
+
+# Save-Data without an Accept preference: AAC is smaller than MP3 and every mobile browser decodes it
+SAVE_DATA_FORMAT = 'aac'
+
+TTS_MODELS = ('tts-1', 'tts-1-hd')
+
+# Content types the app asks for speech as (clients may send anything)
+CONTENT_TYPES = ('narrative', 'question', 'response')
+
+# Speeds OpenAI accepts
+MIN_SPEED, MAX_SPEED = 0.25, 4.0
+
+
+class TTSVariant(NamedTuple):
+    """Model tier, audio format and speed of a TTS clip"""
+    model: str = 'tts-1-hd'
+    audio_format: str = 'mp3'
+    speed: float = 1.0
+
+    @property
+    def mime_type(self) -> str:
+        return AUDIO_FORMATS[self.audio_format]
+
+    def __str__(self) -> str:
+        """Value of the X-TTS-Variant response header"""
+        value = f"{self.model}; format={self.audio_format}"
+        return value if self.speed == 1.0 else f"{value}; speed={self.speed:g}"
+
+
+# What every clip was before variants
+DEFAULT_VARIANT = TTSVariant()
+
+
+def accepted_formats(accept: Iterable[Tuple[str, float]]) -> Optional[List[str]]:
+    """
+    Audio formats an Accept header asks for, best first.
+
+    Args:
+        accept (Iterable[Tuple[str, float]]): (media type, quality) pairs, e.g. request.accept_mimetypes
+
+    Returns:
+        List[str]: Formats in order of preference, or None if no audio type is named
+            (wildcards such as */* and audio/* state no preference)
+    """
+    ranked = sorted(
+        ((quality, _ACCEPT_FORMATS[media_type.lower()]) for media_type, quality in accept
+         if quality > 0 and media_type.lower() in _ACCEPT_FORMATS),
+        key=lambda item: -item[0]
+    )
+    formats = list(dict.fromkeys(audio_format for _, audio_format in ranked))
+    return formats or None
+
+
+class VariantPolicy:
+    """Chooses the TTS variant for a request"""
+
+    def __init__(self, models: Optional[Dict[str, str]] = None, default_model: str = 'tts-1-hd',
+                 default_format: str = 'mp3'):
+        """
+        Initialize the policy.
+
+        Args:
+            models (Dict[str, str]): Content type -> model, e.g. {'response': 'tts-1'}
+            default_model (str): Model for content types not in models
+            default_format (str): Format when the client states no preference
+        """
+        self.models = dict(models or {})
+        self.default_model = default_model
+        self.default_format = default_format
+        for model in (default_model, *self.models.values()):
+            if model not in TTS_MODELS:
+                raise ValueError(f"Unknown TTS model: {model}")
+        if default_format not in AUDIO_FORMATS:
+            raise ValueError(f"Unknown audio format: {default_format}")
+
+    def model_for(self, content_type: str) -> str:
+        """Model tier for a content type"""
+        return self.models.get(content_type, self.default_model)
+
+    def choose(self, content_type: str, audio_format: Optional[str] = None,
+               accepted: Optional[List[str]] = None, save_data: bool = False,
+               joinable: bool = False, speed: Optional[float] = None) -> TTSVariant:
+        """
+        Pick the variant for a request.
+
+        Args:
+            content_type (str): Type of content (narrative, question, response, etc.)
+            audio_format (str): Format the client asked for explicitly (wins over the other hints)
+            accepted (List[str]): Formats from the Accept header, best first (see accepted_formats)
+            save_data (bool): The client sent Save-Data: on
+            joinable (bool): The audio will be joined from sentence clips (limits the format
+                to JOINABLE_FORMATS)
+            speed (float): Speaking speed the client asked for (ignored outside MIN_SPEED..MAX_SPEED)
+
+        Returns:
+            TTSVariant: The model and format to use
+        """
+        usable = JOINABLE_FORMATS if joinable else tuple(AUDIO_FORMATS)
+        if audio_format in usable:
+            candidates = [audio_format]
+        elif accepted:
+            candidates = [fmt for fmt in COMPACT_FORMATS if fmt in accepted] if save_data else accepted
+        elif save_data:
+            candidates = [SAVE_DATA_FORMAT]
+        else:
+            candidates = [self.default_format]
+
+        chosen = next((fmt for fmt in candidates if fmt in usable), None)
+        if chosen is None:
+            chosen = self.default_format if self.default_format in usable else JOINABLE_FORMATS[0]
+        if isinstance(speed, bool) or not isinstance(speed, (int, float)) or not MIN_SPEED <= speed <= MAX_SPEED:
+            speed = 1.0
+        return TTSVariant(self.model_for(content_type), chosen, float(speed))
@@ -0,0 +1,172 @@
+"""
+Cold-start profiler.
+
+Boots the app in a fresh interpreter (as a scale-to-zero machine would) and
+reports import time per module plus the time until the first request is served.
+
+Usage: python -m app.startup_report [--mode wsgi|asgi] [--top 15] [--with-services] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+FIRST_RESPONSE_MARKER = '--- first response served ---'
+HEAVY_MODULES = ('openai', 'supabase', 'postgrest', 'PyPDF2', 'httpx', 'quart')
+
+# Runs in the child interpreter; prints one JSON line of phase timings
+_WSGI_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from app import create_app
+t_import = time.perf_counter()
+application = create_app({config!r})
+t_create = time.perf_counter()
+response = application.test_client().get('/api/health')
+t_first, first_response_at = time.perf_counter(), time.time()
+sys.stderr.write({marker!r} + '\\n')
+phases = {{'import_app': t_import - t0, 'create_app': t_create - t_import, 'first_request': t_first - t_create}}
+if {with_services!r}:
+    with application.app_context():
+        application.extensions['services'].openai_service
+    phases['build_services'] = time.perf_counter() - t_first
+print(json.dumps({{'phases': phases, 'status': response.status_code, 'first_response_at': first_response_at}}))
+"""
+
+_ASGI_PROBE = """
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+from app.asgi import create_asgi_app
+t_import = time.perf_counter()
+application = create_asgi_app({config!r})
+t_create = time.perf_counter()
+
+async def first_request():
+    async with application.test_app() as test_app:
+        response = await test_app.test_client().get('/api/health')
+        return response.status_code, time.perf_counter(), time.time()
+
+status, t_first, first_response_at = asyncio.run(first_request())
+sys.stderr.write({marker!r} + '\\n')
+phases = {{'import_app': t_import - t0, 'create_app': t_create - t_import, 'first_request': t_first - t_create}}
+if {with_services!r}:
+    t_services = time.perf_counter()
+    application.extensions['services'].openai_service
+    phases['build_services'] = time.perf_counter() - t_services
+print(json.dumps({{'phases': phases, 'status': status, 'first_response_at': first_response_at}}))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Parse `python -X importtime` output.
+
+    Returns:
+        list: (module, self_us, cumulative_us, depth) tuples in import order
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        try:
+            fields = line[len('import time:'):].split('|')
+            self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2]
+        except (ValueError, IndexError):
+            continue
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def run_probe(mode: str, config_name: str, with_services: bool) -> dict:
+    """Boot the app in a child interpreter and collect timings"""
+    probe = _ASGI_PROBE if mode == 'asgi' else _WSGI_PROBE
+    env = dict(os.environ)
+    env.setdefault('OPENAI_API_KEY', 'sk-startup-report')
+    # Keep the measurement about our own boot path, not network warm-up
+    env['HTTP_POOL_WARM_ON_START'] = 'false'
+
+    started_at = time.time()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', probe.format(config=config_name, with_services=with_services, marker=FIRST_RESPONSE_MARKER)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{result.stderr[-2000:]}")
+
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['time_to_first_response'] = report.pop('first_response_at') - started_at
+    boot_log, _, first_use_log = result.stderr.partition(FIRST_RESPONSE_MARKER)
+    report['imports'] = parse_importtime(boot_log)
+    report['first_use_imports'] = parse_importtime(first_use_log)
+    return report
+
+
+def print_report(report: dict, top: int) -> None:
+    """Print a human-readable cold-start report"""
+    imports = report['imports']
+    top_level = sorted((row for row in imports if row[3] == 0), key=lambda row: row[2], reverse=True)
+    total_import_us = sum(row[2] for row in top_level)
+
+    print("=" * 70)
+    print("🚀 COLD START REPORT")
+    print("=" * 70)
+    print(f"Time to first response:  {report['time_to_first_response'] * 1000:8.1f} ms  (process spawn → /api/health {report['status']})")
+    for phase, seconds in report['phases'].items():
+        print(f"  {phase:22} {seconds * 1000:8.1f} ms")
+    print(f"Modules imported:        {len(imports):8d}   ({total_import_us / 1000:.1f} ms cumulative)")
+    print()
+    print(f"Top {top} top-level imports (cumulative):")
+    print("-" * 70)
+    for name, self_us, cumulative_us, _ in top_level[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    print()
+    print("App modules (cumulative):")
+    print("-" * 70)
+    app_modules = sorted((row for row in imports if row[0] == 'app' or row[0].startswith('app.')),
+                         key=lambda row: row[2], reverse=True)
+    for name, self_us, cumulative_us, _ in app_modules[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    print()
+    print(f"Top {top} modules by self time:")
+    print("-" * 70)
+    for name, self_us, cumulative_us, _ in sorted(imports, key=lambda row: row[1], reverse=True)[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    print()
+    print(f"Heavy dependencies loaded before first response: {', '.join(_heavy(imports)) or 'none'}")
+    if report['first_use_imports']:
+        first_use = report['first_use_imports']
+        first_use_ms = sum(row[2] for row in first_use if row[3] == 0) / 1000
+        print(f"Deferred to first use: {', '.join(_heavy(first_use)) or 'none'} ({first_use_ms:.1f} ms)")
+
+
+def _heavy(imports: list) -> list:
+    """Heavy third-party packages present in an import list"""
+    names = {row[0] for row in imports}
+    return [name for name in HEAVY_MODULES if name in names]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['wsgi', 'asgi'], default='wsgi')
+    parser.add_argument('--config', default='production')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--with-services', action='store_true',
+                        help='Also time building the OpenAI/Supabase services (first real request)')
+    parser.add_argument('--json', action='store_true', help='Emit machine-readable JSON')
+    args = parser.parse_args()
+
+    report = run_probe(args.mode, args.config, args.with_services)
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print_report(report, args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 """Utilities module"""
-from .file_utils import allowed_file, save_upload, cleanup_file
+from .file_utils import allowed_file, named_upload, segment_index, cleanup_file
+from .audio_utils import audio_url
 
-__all__ = ['allowed_file', 'save_upload', 'cleanup_file']
+__all__ = ['allowed_file', 'named_upload', 'segment_index', 'cleanup_file', 'audio_url']
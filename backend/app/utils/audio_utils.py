@@ -0,0 +1,110 @@
+"""
+Content-addressed TTS audio URLs (/api/audio/<content_hash>.<format>).
+
+The hash is the cache key that names every cached TTS file (see
+app.services.cache_keys), so the audio behind a URL never changes:
+responses use the hash as a strong ETag and may be cached forever.
+"""
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.tts_variants import AUDIO_FORMATS, accepted_formats
+
+AUDIO_HASH = re.compile(r'[0-9a-f]{32}')
+_PATH_HASH = re.compile(rf'([0-9a-f]{{32}})\.({"|".join(AUDIO_FORMATS)})$')
+
+AUDIO_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def audio_url(audio_path: Optional[str]) -> Optional[str]:
+    """
+    URL for a cached TTS file.
+
+    Args:
+        audio_path (str): Path returned by the TTS services
+
+    Returns:
+        str: /api/audio URL, or None if the path isn't a cached TTS file
+    """
+    match = _PATH_HASH.search(str(audio_path)) if audio_path else None
+    return f"/api/audio/{match.group(1)}.{match.group(2)}" if match else None
+
+
+def variant_hints(request, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Client hints for VariantPolicy.choose().
+
+    Args:
+        request: Flask or Quart request (Accept and Save-Data headers)
+        data (Dict): JSON body, whose "format" and "speed" fields are explicit choices
+
+    Returns:
+        Dict[str, Any]: audio_format, speed, accepted and save_data keyword arguments
+    """
+    data = data or {}
+    return {
+        'audio_format': data.get('format'),
+        'speed': data.get('speed'),
+        'accepted': accepted_formats(request.accept_mimetypes),
+        'save_data': request.headers.get('Save-Data', '').strip().lower() == 'on'
+    }
+
+
+def variant_headers(variant) -> Dict[str, str]:
+    """Headers reporting which TTS variant a response carries"""
+    return {
+        'X-TTS-Variant': str(variant),
+        'Vary': 'Accept, Save-Data'
+    }
+
+
+def audio_headers(content_hash: str) -> Dict[str, str]:
+    """Headers sent with every /api/audio response, 304s included"""
+    return {
+        'ETag': f'"{content_hash}"',
+        'Cache-Control': AUDIO_CACHE_CONTROL,
+        'Accept-Ranges': 'bytes'
+    }
+
+
+def redirect_headers(location: str, expires_in: int) -> Dict[str, str]:
+    """
+    Headers for redirecting an /api/audio request to a presigned blob URL.
+
+    The URL stops working after expires_in seconds, so clients may only
+    cache the redirect for part of that.
+    """
+    return {
+        'Location': location,
+        'Cache-Control': f"private, max-age={expires_in // 2}"
+    }
+
+
+def requested_range(request, content_hash: str, length: int) -> Tuple[int, int, int]:
+    """
+    Resolve the request's Range header against a clip.
+
+    Only single byte ranges are honoured; anything else gets the whole clip,
+    as does a range whose If-Range doesn't match the hash.
+
+    Args:
+        request: Flask or Quart request
+        content_hash (str): The clip's hash (its ETag)
+        length (int): Clip size in bytes
+
+    Returns:
+        Tuple[int, int, int]: (status, start, stop) with status 200, 206 or 416
+    """
+    byte_range = request.range
+    if byte_range is None or byte_range.units != 'bytes' or len(byte_range.ranges) != 1:
+        return 200, 0, length
+
+    if_range = request.if_range
+    if (if_range.etag or if_range.date) and if_range.etag != content_hash:
+        return 200, 0, length
+
+    bounds = byte_range.range_for_length(length)
+    if bounds is None:
+        return 416, 0, 0
+    start, stop = bounds
+    return 206, start, stop
@@ -1,10 +1,12 @@
 """
 File handling utilities.
 """
+import hashlib
 import os
 from pathlib import Path
+from tempfile import SpooledTemporaryFile
 from werkzeug.utils import secure_filename
-from typing import Optional
+from typing import IO, Optional, Tuple
 
 
 def allowed_file(filename: str, allowed_extensions: set) -> bool:
@@ -22,25 +24,85 @@ def allowed_file(filename: str, allowed_extensions: set) -> bool:
            filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
 
-def save_upload(file, upload_folder: Path) -> Optional[str]:
+class HashingSpooledFile(SpooledTemporaryFile):
+    """SpooledTemporaryFile that SHA-256 hashes its contents as they are written"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sha256 = hashlib.sha256()
+        self._hashed = 0  # Bytes hashed so far; None once a write didn't append
+
+    def write(self, s):
+        if self._hashed is not None:
+            if self.tell() == self._hashed:
+                self._sha256.update(s)
+                self._hashed += len(s)
+            else:
+                self._hashed = None
+        return super().write(s)
+
+    @property
+    def sha256(self) -> Optional[str]:
+        """Hex digest of the contents, or None if they weren't written front to back"""
+        if self._hashed is None:
+            return None
+        return self._sha256.hexdigest()
+
+
+def spooled_file(max_memory: int, spill_folder: Path) -> IO[bytes]:
+    """
+    Buffer for one uploaded file, used by the request classes' form parsers.
+
+    Uploads stay in memory up to max_memory bytes and are then moved to an
+    anonymous temporary file in spill_folder, which no other request can
+    see or overwrite and which is gone once the request closes it. The
+    contents are hashed while the parser writes them (the buffer's sha256),
+    so keying an upload costs no extra pass over it.
+
+    Args:
+        max_memory (int): Bytes kept in memory
+        spill_folder (Path): Directory for larger uploads
+
+    Returns:
+        IO[bytes]: Readable, writable and seekable buffer
+    """
+    return HashingSpooledFile(max_size=max_memory, mode='rb+', dir=str(spill_folder))
+
+
+def named_upload(file) -> Tuple[str, IO[bytes]]:
     """
-    Save an uploaded file securely.
+    An upload as (filename, stream), read straight from its request buffer.
 
     Args:
         file: File object from request
-        upload_folder (Path): Directory to save the file
 
     Returns:
-        str: Path to saved file or None if error
+        tuple: Sanitized filename (Whisper detects the format from its extension) and the rewound stream
     """
-    try:
-        filename = secure_filename(file.filename)
-        filepath = upload_folder / filename
-        file.save(str(filepath))
-        return str(filepath)
-    except Exception as e:
-        print(f"Error saving file: {e}")
+    file.stream.seek(0)
+    return secure_filename(file.filename) or 'upload', file.stream
+
+
+def segment_index(form) -> Optional[int]:
+    """
+    The optional 'index' field of a transcription session segment upload.
+
+    Args:
+        form: Request form data
+
+    Returns:
+        int: The index, or None to append after the last segment
+
+    Raises:
+        ValueError: The index isn't an integer
+    """
+    index = form.get('index')
+    if index in (None, ''):
         return None
+    try:
+        return int(index)
+    except ValueError:
+        raise ValueError('index must be an integer') from None
 
 
 def cleanup_file(filepath: str) -> bool:
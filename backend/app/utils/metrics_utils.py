@@ -0,0 +1,93 @@
+"""
+Request-level metrics and Server-Timing traces shared by the Flask and Quart
+apps (see app.services.metrics and app.services.tracing).
+"""
+import hmac
+import time
+from typing import AsyncIterator, Iterator, Optional
+
+from app.services import metrics, tracing
+from app.services.tracing import TraceSink
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def route_label(request) -> str:
+    """The matched route rule (e.g. /api/audio/<filename>), never the raw path"""
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def observe_request(request, response, started: Optional[float]) -> None:
+    """
+    Record a request's latency and, for audio sent in one piece, its size.
+
+    Args:
+        request: Flask or Quart request
+        response: The response about to be sent
+        started (float): perf_counter() when the request arrived
+    """
+    if started is None:
+        return
+    route = route_label(request)
+    metrics.observe('http_request_duration_seconds', time.perf_counter() - started,
+                    route=route, method=request.method, status=str(response.status_code))
+    # Streamed audio has no Content-Length here and is counted by count_audio_bytes()
+    if response.mimetype and response.mimetype.startswith('audio/') and response.content_length:
+        metrics.inc('tts_audio_bytes_served_total', response.content_length, route=route)
+
+
+def count_audio_bytes(chunks: Iterator[bytes], route: str) -> Iterator[bytes]:
+    """Pass audio chunks through, counting the bytes that reached the client"""
+    sent = 0
+    try:
+        for chunk in chunks:
+            yield chunk
+            sent += len(chunk)
+    finally:
+        # Forward close() on client disconnect, as yield from would
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+        if sent:
+            metrics.inc('tts_audio_bytes_served_total', sent, route=route)
+
+
+async def count_audio_bytes_async(chunks: AsyncIterator[bytes], route: str) -> AsyncIterator[bytes]:
+    """Async counterpart of count_audio_bytes()"""
+    sent = 0
+    try:
+        async for chunk in chunks:
+            yield chunk
+            sent += len(chunk)
+    finally:
+        aclose = getattr(chunks, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+        if sent:
+            metrics.inc('tts_audio_bytes_served_total', sent, route=route)
+
+
+def metrics_authorized(request, token: Optional[str]) -> bool:
+    """Whether a /metrics scrape may proceed (any, unless METRICS_TOKEN is set)"""
+    if not token:
+        return True
+    return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+
+def report_trace(response, sink: Optional[TraceSink] = None) -> None:
+    """
+    Add the current request's Server-Timing header and maybe log its trace.
+
+    Spans that finish after the headers (a streamed body) aren't included.
+
+    Args:
+        response: The response about to be sent
+        sink (TraceSink): Where sampled traces go, if anywhere
+    """
+    trace = tracing.current()
+    if trace is None:
+        return
+    response.headers['Server-Timing'] = trace.server_timing()
+    if sink is not None and sink.sampled():
+        sink.write(trace.to_record(response.status_code))
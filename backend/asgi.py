@@ -0,0 +1,14 @@
+"""
+ASGI entry point for the application.
+
+Run with: gunicorn -k uvicorn.workers.UvicornWorker asgi:app
+"""
+from app.asgi import create_asgi_app
+import os
+
+app = create_asgi_app(os.getenv('FLASK_ENV', 'production'))
+
+if __name__ == '__main__':
+    import uvicorn
+    port = int(os.getenv('PORT', 8080))
+    uvicorn.run(app, host='0.0.0.0', port=port)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+HTTP Pool Benchmark
+Measures per-call latency of a fresh client per request (the old behaviour)
+against the shared keep-alive HTTPPool, using a local HTTPS stub server.
+
+Usage: python benchmarks/bench_http_pool.py [--calls 200]
+"""
+import argparse
+import http.server
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+# Add parent directory to path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.http_pool import HTTPPool
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """Tiny keep-alive JSON endpoint"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    body = b'{"ok": true}'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_certificate(directory: Path) -> tuple:
+    """Generate a throwaway self-signed certificate for 127.0.0.1"""
+    cert, key = directory / 'cert.pem', directory / 'key.pem'
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-subj', '/CN=127.0.0.1', '-addext', 'subjectAltName=IP:127.0.0.1',
+         '-keyout', str(key), '-out', str(cert)],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+def start_stub(cert: Path, key: Path) -> tuple:
+    """Start the HTTPS stub on an ephemeral port"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"https://127.0.0.1:{server.server_address[1]}/v1/ping"
+
+
+def time_calls(calls: int, call) -> list:
+    """Return per-call latencies in milliseconds"""
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(label: str, samples: list) -> float:
+    """Print latency percentiles and return the mean"""
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    mean = statistics.mean(samples)
+    print(f"{label:22} mean {mean:7.2f} ms   p50 {statistics.median(samples):7.2f} ms   p95 {p95:7.2f} ms")
+    return mean
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = make_certificate(Path(tmp))
+        server, url = start_stub(cert, key)
+        ssl_context = ssl.create_default_context(cafile=str(cert))
+
+        def fresh_client_call():
+            with httpx.Client(verify=ssl_context) as client:
+                client.get(url).raise_for_status()
+
+        pool = HTTPPool(http2=False, verify=ssl_context)
+        pooled = pool.client()
+        pool.warm([url])
+
+        def pooled_call():
+            pooled.get(url).raise_for_status()
+
+        print(f"{args.calls} sequential GETs against {url}")
+        print("-" * 70)
+        fresh = summarize('fresh client per call', time_calls(args.calls, fresh_client_call))
+        shared = summarize('shared HTTPPool', time_calls(args.calls, pooled_call))
+        print("-" * 70)
+        print(f"Saved per call: {fresh - shared:.2f} ms ({fresh / shared:.1f}x faster)")
+
+        pool.close()
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
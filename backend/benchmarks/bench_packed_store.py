@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Packed Store Benchmark
+Measures lookup and serve throughput of the local TTS tier stored one MP3 per
+clip (TTSCacheService's default layout) against the PackedAudioStore segment
+file with its memory-mapped index. Both run on a warm page cache; serving
+writes every clip into a local socket, drained by a reader thread.
+
+Usage: python benchmarks/bench_packed_store.py [--clips 2000] [--clip-kb 40] [--lookups 20000]
+"""
+import argparse
+import hashlib
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.packed_audio_store import PackedAudioStore
+from app.services.tts_cache_service import TTSCacheService
+
+
+def rate(label: str, operations: int, fn) -> float:
+    """Run fn() and print operations per second"""
+    start = time.perf_counter()
+    fn()
+    per_second = operations / (time.perf_counter() - start)
+    print(f"  {label:34} {per_second:12,.0f} ops/s")
+    return per_second
+
+
+def drained_socket() -> socket.socket:
+    """Write end of a socket pair whose read end is drained on a thread"""
+    writer, reader = socket.socketpair()
+
+    def drain():
+        while reader.recv(1 << 20):
+            pass
+
+    threading.Thread(target=drain, daemon=True).start()
+    return writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clips', type=int, default=2000)
+    parser.add_argument('--clip-kb', type=int, default=40, help='Size of each clip (~2.5 s of 128 kbps MP3 per 40 KB)')
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+
+    hashes = [hashlib.md5(f"clip {i}_nova".encode()).hexdigest() for i in range(args.clips)]
+    misses = [hashlib.md5(f"missing {i}_nova".encode()).hexdigest() for i in range(args.lookups)]
+    hits = [random.choice(hashes) for _ in range(args.lookups)]
+    clip = os.urandom(args.clip_kb * 1024)
+
+    with tempfile.TemporaryDirectory() as root:
+        files = TTSCacheService(None, None, local_cache_dir=f"{root}/files", access_log_path=f"{root}/access_log.json")
+        store = PackedAudioStore(f"{root}/packed")
+        for content_hash in hashes:
+            files._write_file(content_hash, clip)
+            store.put(content_hash, clip)
+        # A worker that has never seen these hashes, as after a restart
+        files = TTSCacheService(None, None, local_cache_dir=f"{root}/files", access_log_path=f"{root}/access_log.json")
+
+        print(f"{args.clips} clips of {args.clip_kb} KB, {args.lookups} lookups")
+        print("-" * 70)
+        print("Lookup (hit)")
+        file_hit = rate('file per clip (stat)', args.lookups, lambda: [files._lookup_local(h) for h in hits])
+        packed_hit = rate('packed (mmap index)', args.lookups, lambda: [store.open(h) for h in hits])
+        print("Lookup (miss)")
+        file_miss = rate('file per clip (stat)', args.lookups, lambda: [files._lookup_local(h) for h in misses])
+        packed_miss = rate('packed (mmap index)', args.lookups, lambda: [store.open(h) for h in misses])
+
+        serves = min(args.lookups, 5000)
+        sock = drained_socket()
+
+        def serve_files():
+            for content_hash in hits[:serves]:
+                with open(files._lookup_local(content_hash), 'rb') as f:
+                    sock.sendfile(f)
+
+        def serve_packed_sendfile():
+            for content_hash in hits[:serves]:
+                audio = store.open(content_hash)
+                segment = audio.open()
+                try:
+                    os.sendfile(sock.fileno(), segment.fileno(), audio.offset, audio.length)
+                finally:
+                    segment.close()
+
+        def serve_packed_mmap():
+            for content_hash in hits[:serves]:
+                sock.sendall(store.open(content_hash).view)
+
+        print("Lookup + serve")
+        file_serve = rate('file per clip (open + sendfile)', serves, serve_files)
+        packed_serve = rate('packed (sendfile from segment)', serves, serve_packed_sendfile)
+        rate('packed (mmap slice)', serves, serve_packed_mmap)
+        sock.close()
+
+    print("-" * 70)
+    print(f"Packed vs file per clip: lookup hit {packed_hit / file_hit:.1f}x, miss {packed_miss / file_miss:.1f}x, "
+          f"serve {packed_serve / file_serve:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
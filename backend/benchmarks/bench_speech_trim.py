@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Speech Trim Benchmark
+Measures what SpeechTrimmer saves per /api/transcribe request on synthetic
+interview answers: 48 kHz stereo 16-bit WAV with leading and trailing
+silence and long thinking pauses between bursts of speech-like sound
+(syllable-modulated harmonics and noise) over a quiet noise floor.
+
+Reports bytes and seconds of audio removed, the time that saves uploading
+the recording to Whisper at the given bandwidth, the preprocessing time, and how much of the real speech
+survived (it should all be kept).
+
+Usage: python benchmarks/bench_speech_trim.py [--requests 20] [--uplink-kbps 10000] [--max-pause 1.0]
+"""
+import argparse
+import io
+import random
+import sys
+import time
+import wave
+from pathlib import Path
+from statistics import mean
+
+import numpy as np
+
+# Add parent directory to path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.speech_trimmer import SpeechTrimmer, read_wav, speech_frames
+
+
+def synthetic_answer(rng: random.Random, rate: int = 48000, channels: int = 2):
+    """
+    A spoken answer with long pauses.
+
+    Returns:
+        tuple: (int16 samples shaped (frames, channels), seconds of speech in it)
+    """
+    np_rng = np.random.default_rng(rng.randrange(1 << 30))
+    parts = [np.zeros(int(rng.uniform(1.0, 4.0) * rate))]  # Before the first word
+    speech_seconds = 0.0
+    for _ in range(rng.randint(4, 10)):
+        seconds = rng.uniform(1.0, 5.0)
+        t = np.arange(int(seconds * rate)) / rate
+        pitch = rng.uniform(100, 220)
+        voice = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+        voice += 0.3 * np_rng.standard_normal(len(t))
+        syllables = 0.55 + 0.45 * np.sin(2 * np.pi * rng.uniform(3, 5) * t)  # ~4 syllables a second
+        parts.append(0.15 * voice * syllables)
+        parts.append(np.zeros(int(rng.choice([rng.uniform(0.2, 0.8), rng.uniform(2.0, 8.0)]) * rate)))  # Pause
+        speech_seconds += seconds
+    parts.append(np.zeros(int(rng.uniform(2.0, 6.0) * rate)))  # After the last word
+
+    mono = np.concatenate(parts)
+    noise = 10 ** (-55 / 20) * np_rng.standard_normal((len(mono), channels))  # -55 dBFS room noise
+    samples = np.clip(mono[:, None] + noise, -1.0, 1.0)
+    return (samples * 32767).astype('<i2'), speech_seconds
+
+
+def stereo_wav(samples: np.ndarray, rate: int) -> bytes:
+    """Encode int16 (frames, channels) samples as a WAV file"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(samples.shape[1])
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def speech_seconds_in(wav: bytes, trimmer: SpeechTrimmer) -> float:
+    """Seconds of a processed recording louder than the synthetic room noise, i.e. real speech"""
+    samples, rate = read_wav(wav)
+    # Absolute threshold well above the -55 dBFS noise, no padding: counts speech frames only
+    speech = speech_frames(samples[:, 0], trimmer.frame, margin_db=0.0, floor_db=-40.0, padding_frames=0)
+    return speech.sum() * trimmer.frame / rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20, help='Synthetic recordings to process')
+    parser.add_argument('--uplink-kbps', type=float, default=10000, help='Bandwidth to OpenAI for the upload-time estimate')
+    parser.add_argument('--max-pause', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    trimmer = SpeechTrimmer(max_pause=args.max_pause)
+    rate = 48000
+
+    rows = []
+    for _ in range(args.requests):
+        samples, speech_seconds = synthetic_answer(rng, rate)
+        data = stereo_wav(samples, rate)
+        start = time.perf_counter()
+        result = trimmer.process(data)
+        elapsed = time.perf_counter() - start
+        if result is None:
+            print("  recording not trimmed")
+            continue
+        rows.append((result, elapsed, min(1.0, speech_seconds_in(result.audio, trimmer) / speech_seconds)))
+
+    if not rows:
+        print("Nothing was trimmed")
+        return
+
+    original_bytes = mean([r.original_bytes for r, _, _ in rows])
+    trimmed_bytes = mean([len(r.audio) for r, _, _ in rows])
+    original_seconds = mean([r.original_seconds for r, _, _ in rows])
+    trimmed_seconds = mean([r.seconds for r, _, _ in rows])
+    uplink = args.uplink_kbps * 1000 / 8
+
+    print(f"{len(rows)} recordings, 48 kHz stereo 16-bit in, {trimmer.sample_rate // 1000} kHz mono out, "
+          f"pauses capped at {args.max_pause:.1f}s")
+    print("-" * 78)
+    print(f"{'per request (mean)':36} {'original':>12} {'trimmed':>12} {'saved':>12}")
+    print(f"{'bytes':36} {original_bytes:12,.0f} {trimmed_bytes:12,.0f} {original_bytes - trimmed_bytes:12,.0f}")
+    print(f"{'audio seconds':36} {original_seconds:12.1f} {trimmed_seconds:12.1f} {original_seconds - trimmed_seconds:12.1f}")
+    print(f"{f'upload to Whisper at {args.uplink_kbps:g} kbps (s)':36} {original_bytes / uplink:12.2f} {trimmed_bytes / uplink:12.2f} "
+          f"{(original_bytes - trimmed_bytes) / uplink:12.2f}")
+    print("-" * 78)
+    print(f"Preprocessing: {mean([e for _, e, _ in rows]) * 1000:.1f} ms per request "
+          f"(max {max(e for _, e, _ in rows) * 1000:.1f} ms)")
+    print(f"Speech kept: {mean([k for _, _, k in rows]) * 100:.1f}% "
+          f"(worst {min(k for _, _, k in rows) * 100:.1f}%)")
+    print(f"Size: {trimmed_bytes / original_bytes * 100:.1f}% of the original, "
+          f"audio: {trimmed_seconds / original_seconds * 100:.1f}% of the original")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+TTS Pipeline Benchmark
+Measures time-to-first-audio for an AI reply synthesized in one call (the old
+behaviour) against the sentence-chunked TTSPipeline, using a local stub TTS
+server whose latency grows with the length of the input text.
+
+Usage: python benchmarks/bench_tts_pipeline.py [--per-char-ms 4] [--base-ms 150] [--workers 4] [--runs 5]
+"""
+import argparse
+import contextlib
+import http.server
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.openai_service import OpenAIService
+from app.services.tts_pipeline import split_sentences
+
+REPLY = (
+    "It sounds like those summers at your grandmother's farm gave you a deep sense of belonging. "
+    "The way you describe waking up before dawn to help with the animals shows how much you valued responsibility, even as a child. "
+    "I can hear how much her patience and quiet strength shaped the person you became. "
+    "Those early lessons about hard work and caring for others seem to run through so many of your stories."
+)
+
+
+class StubTTSHandler(http.server.BaseHTTPRequestHandler):
+    """Fake /v1/audio/speech: latency = base + per-char * len(input)"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    base_ms = 150.0
+    per_char_ms = 4.0
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        text = request['input']
+        time.sleep((self.base_ms + self.per_char_ms * len(text)) / 1000)
+
+        body = b'\xff\xfb\x90\x00' * (len(text) * 10)  # ~40 bytes of "MP3" per character
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/mpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(base_ms: float, per_char_ms: float) -> tuple:
+    """Start the stub TTS server on an ephemeral port"""
+    StubTTSHandler.base_ms = base_ms
+    StubTTSHandler.per_char_ms = per_char_ms
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StubTTSHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def single_call(service: OpenAIService, output_dir: str) -> tuple:
+    """Whole reply in one request: first audio == last audio"""
+    start = time.perf_counter()
+    assert service.text_to_speech(REPLY, 'nova', output_dir, 'response')
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+def pipelined(service: OpenAIService, output_dir: str) -> tuple:
+    """Sentence pipeline: time to the first playable sentence, and to the last"""
+    start = time.perf_counter()
+    first = None
+    for _ in service.tts_pipeline.segments(REPLY, 'nova', output_dir):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def measure(runs: int, workers: int, strategy) -> tuple:
+    """Median (first_audio, all_audio) in ms over fresh, uncached services"""
+    firsts, totals = [], []
+    for _ in range(runs):
+        # The services log every generated file; keep the report readable
+        with tempfile.TemporaryDirectory() as output_dir, open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            service = OpenAIService('sk-bench', tts_pipeline_workers=workers)
+            first, total = strategy(service, output_dir)
+            service.tts_pipeline.close()
+        firsts.append(first * 1000)
+        totals.append(total * 1000)
+    return statistics.median(firsts), statistics.median(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-ms', type=float, default=150.0, help='Fixed latency per TTS request')
+    parser.add_argument('--per-char-ms', type=float, default=4.0, help='Extra latency per input character')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    server, base_url = start_stub(args.base_ms, args.per_char_ms)
+    os.environ['OPENAI_BASE_URL'] = base_url
+
+    sentences = split_sentences(REPLY)
+    print(f"Reply: {len(REPLY)} chars, {len(sentences)} sentences "
+          f"(stub latency {args.base_ms:.0f} ms + {args.per_char_ms} ms/char, {args.workers} workers)")
+    print("-" * 70)
+    single_first, single_total = measure(args.runs, args.workers, single_call)
+    print(f"{'single request':22} first audio {single_first:7.0f} ms   all audio {single_total:7.0f} ms")
+    pipe_first, pipe_total = measure(args.runs, args.workers, pipelined)
+    print(f"{'sentence pipeline':22} first audio {pipe_first:7.0f} ms   all audio {pipe_total:7.0f} ms")
+    print("-" * 70)
+    print(f"Time to first audio: {single_first - pipe_first:.0f} ms sooner ({single_first / pipe_first:.1f}x)")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
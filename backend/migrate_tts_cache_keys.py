@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Migrate TTS Cache Keys Script
+Re-keys tts_cache rows written before versioned cache keys (key_version 1)
+under cache_keys.cache_key, copying their audio in the blob store.
+
+Apply supabase/migrations/004_versioned_tts_cache_keys.sql first. Until this
+has run, TTS_LEGACY_KEY_FALLBACK keeps old clips reachable (and re-keys the
+ones that get requested); afterwards it can be turned off.
+
+Usage:
+    python migrate_tts_cache_keys.py [--dry-run] [--deactivate] [--batch-size N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Settings read the environment on import, so load .env before any app module
+load_dotenv()
+
+# Add parent directory to path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.config.settings import Config
+from app.services.cache_keys import KEY_VERSION, cache_key, legacy_variant
+from app.services.container import _build_blob_store
+from app.services.tts_cache_service import TTSCacheService
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Re-key legacy tts_cache rows")
+    parser.add_argument('--dry-run', action='store_true', help="Report what would be migrated without writing")
+    parser.add_argument('--deactivate', action='store_true', help="Mark migrated legacy rows inactive")
+    parser.add_argument('--batch-size', type=int, default=100, help="Rows per round trip")
+    return parser.parse_args()
+
+
+def legacy_rows(supabase, batch_size):
+    """Active key_version 1 rows, batch by batch (keyset paging, so --deactivate can't shift pages)"""
+    last_hash = ''
+    while True:
+        result = supabase.table('tts_cache') \
+            .select('content_hash, content_text, voice, content_type') \
+            .lt('key_version', KEY_VERSION) \
+            .eq('is_active', True) \
+            .gt('content_hash', last_hash) \
+            .order('content_hash') \
+            .limit(batch_size) \
+            .execute()
+        if not result.data:
+            return
+        yield result.data
+        last_hash = result.data[-1]['content_hash']
+
+
+def migrate_keys():
+    """Copy every legacy clip to its versioned key"""
+    args = parse_args()
+
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+    if not supabase_url or not supabase_key:
+        print("❌ Error: SUPABASE_URL and SUPABASE_SERVICE_KEY are required")
+        return
+
+    print("=" * 70)
+    print("🔑 TTS CACHE KEY MIGRATION" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 70)
+    print()
+
+    config = {name: getattr(Config, name) for name in dir(Config) if name.isupper()}
+    scratch_dir = tempfile.mkdtemp(prefix='tts_rekey_')
+    cache_service = TTSCacheService(
+        supabase_url, supabase_key,
+        local_cache_dir=scratch_dir,
+        blob_store=_build_blob_store(config),
+        legacy_key_fallback=False
+    )
+    if not cache_service.supabase_enabled:
+        print("❌ Error: could not connect to Supabase")
+        return
+    supabase = cache_service.supabase
+
+    scanned = migrated = existing = unknown = missing = errors = 0
+
+    for rows in legacy_rows(supabase, args.batch_size):
+        scanned += len(rows)
+
+        # Old key -> (row, variant, new key); rows whose key matches no model/format can't be re-keyed
+        plan = {}
+        for row in rows:
+            variant = legacy_variant(row['content_hash'], row['content_text'], row['voice'])
+            if variant is None:
+                unknown += 1
+                continue
+            plan[row['content_hash']] = (row, variant, cache_key(row['content_text'], row['voice'], variant))
+
+        # Skip clips already cached under their new key (requested since the deploy)
+        new_keys = [new_key for _, _, new_key in plan.values()]
+        present = supabase.table('tts_cache').select('content_hash').in_('content_hash', new_keys).execute() if new_keys else None
+        present_keys = {row['content_hash'] for row in (present.data if present else [])}
+        done = [old_key for old_key, (_, _, new_key) in plan.items() if new_key in present_keys]
+        existing += len(done)
+        pending = {old_key: entry for old_key, entry in plan.items() if entry[2] not in present_keys}
+
+        if args.dry_run:
+            migrated += len(pending)
+            continue
+
+        try:
+            # Download under the new key's file name, then write back through the normal persist path
+            fetched = cache_service.blob_store.fetch_many(
+                list(pending),
+                lambda old_key: cache_service._get_local_cache_path(pending[old_key][2], pending[old_key][1].audio_format)
+            )
+            entries = []
+            for old_key, (row, variant, new_key) in pending.items():
+                if old_key not in fetched:
+                    missing += 1
+                    continue
+                local_path = str(cache_service._get_local_cache_path(new_key, variant.audio_format))
+                entries.append({
+                    'content_hash': new_key,
+                    'text': row['content_text'],
+                    'voice': row['voice'],
+                    'content_type': row['content_type'],
+                    'audio_path': local_path,
+                    'journal_path': local_path
+                })
+            if entries:
+                cache_service._persist_batch(entries)
+            migrated += len(entries)
+            done += [old_key for old_key, (_, _, new_key) in pending.items() if old_key in fetched]
+
+            if args.deactivate and done:
+                supabase.table('tts_cache').update({'is_active': False}).in_('content_hash', done).execute()
+
+            for entry in entries:
+                Path(entry['journal_path']).unlink(missing_ok=True)
+        except Exception as e:
+            print(f"   ❌ Batch ending at {rows[-1]['content_hash']} failed: {e}")
+            errors += len(pending)
+            continue
+
+        print(f"   ✅ Scanned {scanned} rows, migrated {migrated}")
+
+    print()
+    print("=" * 70)
+    print("📊 MIGRATION SUMMARY")
+    print("=" * 70)
+    print(f"Legacy rows:        {scanned}")
+    print(f"{'Would migrate' if args.dry_run else 'Migrated'}:{' ' * (6 if args.dry_run else 11)}{migrated}")
+    print(f"Already re-keyed:   {existing}")
+    print(f"Unknown variant:    {unknown}")
+    print(f"Audio missing:      {missing}")
+    print(f"Errors:             {errors}")
+    print()
+
+    if not args.dry_run and errors == 0 and missing == 0 and unknown == 0:
+        print("✅ SUCCESS! TTS_LEGACY_KEY_FALLBACK can now be set to false.")
+    elif not args.dry_run:
+        print("⚠️  Some rows were not migrated; keep TTS_LEGACY_KEY_FALLBACK on and re-run.")
+    print()
+
+
+if __name__ == '__main__':
+    try:
+        migrate_keys()
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Interrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n\n❌ Fatal error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
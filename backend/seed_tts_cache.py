@@ -84,13 +84,23 @@ def seed_cache():
         print(f"📢 Processing voice: {voice.upper()}")
         print("-" * 70)
         
+        # Look every item up at once (one Supabase round trip per batch, not two per item);
+        # each content type is cached in the variant the model policy gives it
+        cached_paths = {}
+        if openai_service.tts_cache_service:
+            for lookup_type in dict.fromkeys(content_type for content_type, _ in static_content):
+                cached_paths.update(openai_service.tts_cache_service.get_cached_audio_many(
+                    [text for content_type, text in static_content if content_type == lookup_type], voice,
+                    openai_service.choose_variant(lookup_type)
+                ))
+        
         for content_type, text in static_content:
             preview = text[:60] + "..." if len(text) > 60 else text
             
             try:
                 # Check if already cached
                 if openai_service.tts_cache_service:
-                    cached_path = openai_service.tts_cache_service.get_cached_audio(text, voice)
+                    cached_path = cached_paths.get(text)
                     if cached_path:
                         print(f"   ✓ [{content_type:10}] Already cached: {preview}")
                         cached += 1
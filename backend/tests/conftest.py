@@ -0,0 +1,50 @@
+"""
+Shared fixtures: Flask and Quart apps whose services keep all their state
+under the test's tmp_path and never call an upstream on their own.
+"""
+import asyncio
+
+import pytest
+
+from app import create_app
+from app.asgi import create_asgi_app
+
+
+def _test_config(tmp_path) -> dict:
+    """Config overrides pointing every on-disk store at tmp_path"""
+    return {
+        'TESTING': True,
+        'OPENAI_API_KEY': 'sk-test',
+        'SUPABASE_URL': None,
+        'SUPABASE_SERVICE_KEY': None,
+        'HTTP_POOL_WARM_ON_START': False,
+        'TTS_HYDRATE_ON_START': False,
+        'METRICS_ENABLED': False,
+        'TRACE_SAMPLE_RATE': 0,
+        'TTS_LOCAL_CACHE_INDEX_PATH': str(tmp_path / 'tts_cache_index.sqlite3'),
+        'TTS_PACKED_STORE_DIR': str(tmp_path / 'tts_pack'),
+        'TTS_WRITE_QUEUE_DIR': str(tmp_path / 'tts_write_queue'),
+        'TRANSCRIPT_CACHE_PATH': str(tmp_path / 'transcript_cache.db'),
+        'TRANSCRIBE_SESSION_DIR': str(tmp_path / 'transcribe_sessions'),
+        'UPLOAD_FOLDER': tmp_path / 'uploads',
+    }
+
+
+@pytest.fixture
+def flask_app(tmp_path):
+    """WSGI app with no background warmup, metrics exporter or upstream state"""
+    (tmp_path / 'uploads').mkdir()
+    return create_app('development', overrides=_test_config(tmp_path))
+
+
+@pytest.fixture
+def asgi_app(tmp_path):
+    """ASGI app with no background warmup, metrics exporter or upstream state"""
+    (tmp_path / 'uploads').mkdir()
+    return create_asgi_app('development', overrides=_test_config(tmp_path))
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion (the suite has no async plugin)"""
+    return lambda coroutine: asyncio.run(coroutine)
@@ -0,0 +1,23 @@
+"""Both app factories serve the same API"""
+
+
+def test_flask_health(flask_app):
+    response = flask_app.test_client().get('/api/health')
+    assert response.status_code == 200
+    assert response.json['status'] == 'healthy'
+
+
+def test_asgi_health(asgi_app, run):
+    async def call():
+        response = await asgi_app.test_client().get('/api/health')
+        return response.status_code, await response.get_json()
+
+    status, body = run(call())
+    assert status == 200
+    assert body['status'] == 'healthy'
+
+
+def test_overrides_apply_before_hooks_are_installed(flask_app):
+    # METRICS_ENABLED is off in the test config, so no exporter or /metrics route
+    assert 'metrics' not in flask_app.extensions
+    assert flask_app.test_client().get('/metrics').status_code == 404
@@ -0,0 +1,97 @@
+"""ASGI (Quart) routes, with the upstream calls of the shared services replaced"""
+import io
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+
+@pytest.fixture
+def async_openai(asgi_app, tmp_path):
+    """The app's AsyncOpenAIService, with an MP3 that every TTS call resolves to"""
+    service = asgi_app.extensions['services'].openai_service
+    clip = tmp_path / 'clip.mp3'
+    clip.write_bytes(b'ID3' + b'\x00' * 64)
+    service.open_cached_speech = lambda *args, **kwargs: None
+    service.clip = clip
+    return service
+
+
+def test_text_to_speech_cache_hit_sends_file(asgi_app, async_openai, run):
+    async def get_cached_speech(*args, **kwargs):
+        return str(async_openai.clip)
+    async_openai.get_cached_speech = get_cached_speech
+
+    async def call():
+        response = await asgi_app.test_client().post('/api/text-to-speech', json={'text': 'Hello there.'})
+        return response, await response.get_data()
+
+    response, body = run(call())
+    assert response.status_code == 200
+    assert body == async_openai.clip.read_bytes()
+    assert response.mimetype == 'audio/mpeg'
+    assert 'speech.mp3' in response.headers['Content-Disposition']
+    assert response.headers['X-TTS-Variant']
+
+
+def test_text_to_speech_without_streaming_sends_file(asgi_app, async_openai, run):
+    async def text_to_speech(*args, **kwargs):
+        return str(async_openai.clip)
+    async_openai.text_to_speech = text_to_speech
+
+    async def call():
+        response = await asgi_app.test_client().post('/api/text-to-speech', json={'text': 'Hello there.', 'stream': False})
+        return response, await response.get_data()
+
+    response, body = run(call())
+    assert response.status_code == 200
+    assert body == async_openai.clip.read_bytes()
+
+
+def test_text_to_speech_streams_cache_miss(asgi_app, async_openai, run):
+    async def get_cached_speech(*args, **kwargs):
+        return None
+
+    async def stream_speech(*args, **kwargs):
+        for chunk in (b'one', b'two'):
+            yield chunk
+    async_openai.get_cached_speech = get_cached_speech
+    async_openai.stream_speech = stream_speech
+
+    async def call():
+        response = await asgi_app.test_client().post('/api/text-to-speech', json={'text': 'Hello there.'})
+        return response, await response.get_data()
+
+    response, body = run(call())
+    assert response.status_code == 200
+    assert body == b'onetwo'
+
+
+def test_transcription_session(asgi_app, run, tmp_path):
+    service = asgi_app.extensions['services'].openai_service
+
+    async def transcribe_audio(audio):
+        return open(audio).read()
+    service.transcribe_audio = transcribe_audio
+
+    def upload(text, **form):
+        return {'files': {'audio': FileStorage(io.BytesIO(text.encode()), 'segment.webm')}, 'form': form}
+
+    async def call():
+        client = asgi_app.test_client()
+        created = await client.post('/api/transcribe/session')
+        assert created.status_code == 201
+        session_id = (await created.get_json())['session_id']
+
+        for index, text in enumerate(['we moved to the city in', 'city in nineteen sixty two']):
+            response = await client.post(f'/api/transcribe/session/{session_id}/chunk', **upload(text, index=str(index)))
+            assert response.status_code == 202
+            assert (await response.get_json())['index'] == index
+
+        response = await client.post(f'/api/transcribe/session/{session_id}/finalize', **upload('sixty two when I was nine'))
+        assert response.status_code == 200
+        assert (await response.get_json())['transcript'] == 'we moved to the city in nineteen sixty two when I was nine'
+
+        missing = await client.post(f'/api/transcribe/session/{session_id}/finalize')
+        assert missing.status_code == 404
+
+    run(call())
@@ -0,0 +1,43 @@
+"""TTS cache keys"""
+import pytest
+
+from app.services.cache_keys import cache_key, canonical_text, legacy_key, legacy_variant
+from app.services.tts_variants import DEFAULT_VARIANT, TTSVariant
+
+
+@pytest.mark.parametrize('text, canonical', [
+    ('Tell me about your childhood.', 'Tell me about your childhood.'),
+    ('Tell me about your childhood', 'Tell me about your childhood.'),
+    ('Tell me about your childhood..', 'Tell me about your childhood.'),
+    ('  Tell me\n about   your\tchildhood. ', 'Tell me about your childhood.'),
+    ('It’s “home”', 'It\'s "home"'),
+    ('It’s home', "It's home."),
+    ('Where did you grow up?', 'Where did you grow up?'),
+    ('What a day!', 'What a day!'),
+    ('And then...', 'And then...'),
+    ('Ｆｕｌｌ width', 'Full width.'),
+    ('', ''),
+])
+def test_canonical_text(text, canonical):
+    assert canonical_text(text) == canonical
+
+
+def test_equivalent_texts_share_a_key():
+    key = cache_key('Tell me about your childhood.', 'nova')
+    assert cache_key(' Tell me  about your childhood', 'Nova ') == key
+    assert cache_key('Tell me about your childhood?', 'nova') != key
+    assert cache_key('Tell me about your childhood.', 'alloy') != key
+
+
+def test_variant_is_part_of_the_key():
+    keys = {
+        cache_key('Hello.', 'nova', variant)
+        for variant in (DEFAULT_VARIANT, TTSVariant('tts-1'), TTSVariant(audio_format='opus'), TTSVariant(speed=1.25))
+    }
+    assert len(keys) == 4
+
+
+def test_legacy_variant_recovers_the_variant_from_a_legacy_key():
+    for variant in (DEFAULT_VARIANT, TTSVariant('tts-1', 'aac')):
+        assert legacy_variant(legacy_key('Hello', 'nova', variant), 'Hello', 'nova') == variant
+    assert legacy_variant(cache_key('Hello', 'nova'), 'Hello', 'nova') is None
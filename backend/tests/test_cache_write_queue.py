@@ -0,0 +1,139 @@
+"""Write-behind queue for Supabase cache writes"""
+import fcntl
+import json
+import os
+import threading
+
+import pytest
+
+from app.services.cache_write_queue import CacheWriteQueue
+
+DEAD_PID = 999999999
+
+
+class Writer:
+    """Records batches; fails while failing is set"""
+
+    def __init__(self, failing=False):
+        self.batches = []
+        self.failing = failing
+        self.called = threading.Event()
+
+    def __call__(self, batch):
+        self.called.set()
+        if self.failing:
+            raise ConnectionError('supabase unreachable')
+        self.batches.append(batch)
+
+    @property
+    def written(self):
+        return sorted(entry['content_hash'] for batch in self.batches for entry in batch)
+
+
+@pytest.fixture
+def clip(tmp_path):
+    def make(name):
+        path = tmp_path / 'tier' / f'{name}.mp3'
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(name.encode())
+        return str(path)
+    return make
+
+
+def _queue(tmp_path, **options):
+    options.setdefault('linger', 0.01)
+    return CacheWriteQueue(str(tmp_path / 'journal'), **options)
+
+
+def _entry(queue, content_hash, clip):
+    journal_path = queue.journal_dir / f'{content_hash}.{DEAD_PID}.mp3'
+    os.link(clip(content_hash), journal_path)
+    return {'content_hash': content_hash, 'text': f'Text {content_hash}', 'voice': 'nova', 'content_type': 'narrative',
+            'audio_path': clip(content_hash), 'journal_path': str(journal_path)}
+
+
+def test_writes_are_sent_in_the_background(tmp_path, clip):
+    queue, writer = _queue(tmp_path), Writer()
+    queue.start(writer)
+    for name in ('a', 'b'):
+        assert queue.submit(name, f'Text {name}', 'nova', 'narrative', clip(name))
+    assert queue.flush(5)
+    queue.close()
+
+    assert writer.written == ['a', 'b']
+    assert queue.stats()['write_queue_written'] == 2
+    # Nothing is left to replay
+    assert [path.name for path in queue.journal_dir.iterdir()] == [f'journal.{os.getpid()}']
+    assert (queue.journal_dir / f'journal.{os.getpid()}').read_text() == ''
+
+
+def test_dead_workers_journal_is_replayed(tmp_path, clip):
+    queue = _queue(tmp_path)
+    journal = queue.journal_dir / f'journal.{DEAD_PID}'
+    with open(journal, 'w') as f:
+        for content_hash in ('a', 'b', 'c'):
+            f.write(json.dumps({'op': 'add', **_entry(queue, content_hash, clip)}) + '\n')
+        f.write(json.dumps({'op': 'done', 'content_hash': 'b'}) + '\n')
+        f.write('{"op": "add", "content_ha')  # Torn by the crash
+    (queue.journal_dir / f'b.{DEAD_PID}.mp3').unlink()  # Unlinked before 'done' is journaled
+
+    writer = Writer()
+    queue.start(writer)
+    assert queue.flush(5)
+    queue.close()
+
+    assert writer.written == ['a', 'c']
+    assert not journal.exists()
+    assert not list(queue.journal_dir.glob(f'*.{DEAD_PID}.mp3'))
+
+
+def test_live_workers_journal_is_left_alone(tmp_path, clip):
+    queue = _queue(tmp_path)
+    journal = queue.journal_dir / f'journal.{DEAD_PID}'
+    journal.write_text(json.dumps({'op': 'add', **_entry(queue, 'a', clip)}) + '\n')
+
+    with open(journal) as held:
+        fcntl.flock(held, fcntl.LOCK_EX)  # Its worker is still running
+        writer = Writer()
+        queue.start(writer)
+        assert queue.flush(1)
+        queue.close()
+
+    assert writer.written == []
+    assert journal.exists()
+
+
+def test_pending_writes_survive_a_crash_of_this_process(tmp_path, clip):
+    crashed, failing = _queue(tmp_path, retry_base=60), Writer(failing=True)
+    crashed.start(failing)
+    crashed.submit('a', 'Text a', 'nova', 'narrative', clip('a'))
+    assert failing.called.wait(5)
+    crashed._journal.close()  # The process dies: its lock goes, the journal stays
+
+    writer = Writer()
+    restarted = _queue(tmp_path)
+    restarted.start(writer)
+    assert restarted.flush(5)
+    restarted.close()
+    assert writer.written == ['a']
+
+
+def test_failed_writes_are_retried_then_given_up(tmp_path, clip):
+    queue, writer = _queue(tmp_path, retry_base=0.01, max_attempts=3), Writer(failing=True)
+    queue.start(writer)
+    queue.submit('a', 'Text a', 'nova', 'narrative', clip('a'))
+    assert queue.flush(5)
+    queue.close()
+
+    assert queue.stats()['write_queue_failed'] == 1
+    assert not list(queue.journal_dir.glob('a.*'))
+
+
+def test_backlog_limit(tmp_path, clip):
+    queue, writer = _queue(tmp_path, max_pending=1, retry_base=60), Writer(failing=True)
+    queue.start(writer)
+    assert queue.submit('a', 'Text a', 'nova', 'narrative', clip('a'))
+    assert queue.submit('a', 'Text a', 'nova', 'narrative', clip('a'))  # Already pending
+    assert not queue.submit('b', 'Text b', 'nova', 'narrative', clip('b'))
+    assert queue.stats()['write_queue_dropped'] == 1
+    queue.close(timeout=0.1)
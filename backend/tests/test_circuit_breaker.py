@@ -0,0 +1,109 @@
+"""Circuit breaker for the Supabase tier"""
+import pytest
+
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(failure_rate=0.5, minimum_calls=4, window=10, open_seconds=30, clock=clock)
+
+
+def _fail():
+    raise ConnectionError('supabase unreachable')
+
+
+def _fail_times(breaker, count):
+    for _ in range(count):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+
+
+def test_opens_once_the_failure_rate_is_reached(breaker):
+    breaker.call(lambda: 'ok')
+    _fail_times(breaker, 1)
+    breaker.call(lambda: 'ok')
+    assert breaker.state == CLOSED  # Too few calls to trust the rate
+
+    _fail_times(breaker, 1)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as refused:
+        breaker.call(lambda: 'ok')
+    assert refused.value.retry_after == 30
+    assert breaker.stats() == {'remote_circuit': OPEN, 'remote_circuit_trips': 1, 'remote_rejected': 1}
+
+
+def test_old_failures_leave_the_window(breaker, clock):
+    _fail_times(breaker, 3)
+    clock.now = 11
+    for _ in range(3):
+        breaker.call(lambda: 'ok')
+    _fail_times(breaker, 1)
+    assert breaker.state == CLOSED
+
+
+def test_successful_probe_closes_the_circuit(breaker, clock):
+    _fail_times(breaker, 4)
+    clock.now = 30
+    assert breaker.state == HALF_OPEN
+
+    probe = breaker.acquire()
+    assert probe
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()  # One probe at a time
+    breaker.record(True, probe)
+    assert breaker.state == CLOSED
+    assert breaker.call(lambda: 'ok') == 'ok'
+
+
+def test_failed_probe_opens_it_again(breaker, clock):
+    _fail_times(breaker, 4)
+    clock.now = 30
+    _fail_times(breaker, 1)
+    assert breaker.state == OPEN
+    assert breaker.trips == 2
+
+    clock.now = 59
+    assert breaker.state == OPEN
+    clock.now = 60
+    assert breaker.state == HALF_OPEN
+
+
+def test_cancelled_probe_is_given_back(breaker, clock):
+    _fail_times(breaker, 4)
+    clock.now = 30
+    with pytest.raises(KeyboardInterrupt):
+        breaker.call(lambda: (_ for _ in ()).throw(KeyboardInterrupt()))
+    assert breaker.state == HALF_OPEN
+    assert breaker.acquire()
+
+
+def test_async_calls(breaker, run):
+    async def failing():
+        raise ConnectionError('supabase unreachable')
+
+    async def ok():
+        return 'ok'
+
+    async def scenario():
+        for _ in range(4):
+            with pytest.raises(ConnectionError):
+                await breaker.call_async(failing)
+        with pytest.raises(CircuitOpenError):
+            await breaker.call_async(ok)
+
+    run(scenario())
+    assert breaker.state == OPEN
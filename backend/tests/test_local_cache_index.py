@@ -0,0 +1,99 @@
+"""LRU index and eviction of the local TTS tier"""
+import os
+import time
+
+from app.services.local_cache_index import LocalCacheIndex
+
+
+def _clip(directory, name, size=100):
+    path = directory / name
+    path.write_bytes(b'x' * size)
+    return path
+
+
+def _index(tmp_path, **budget):
+    return LocalCacheIndex(str(tmp_path / 'index.sqlite3'), max_bytes=budget.get('max_bytes', 0),
+                           max_files=budget.get('max_files', 0), pinned_content_types=['question'],
+                           evict_batch=2, touch_interval=0)
+
+
+def test_additions_are_queued_until_flushed(tmp_path):
+    index = _index(tmp_path)
+    index.add(_clip(tmp_path, 'a.mp3'), 'narrative')
+    index.add(_clip(tmp_path, 'b.mp3'), 'narrative')
+    assert index._db().execute('SELECT COUNT(*) FROM entries').fetchone() == (0,)
+    assert index.flush() == 2
+    assert index.usage() == (200, 2)
+
+
+def test_evicts_least_recently_used_down_to_the_low_water_mark(tmp_path):
+    index = _index(tmp_path, max_files=4)
+    clips = [_clip(tmp_path, f'{name}.mp3') for name in 'abcdef']
+    for clip in clips:
+        index.add(clip)
+        index.flush()
+        time.sleep(0.01)
+    index.add(clips[0])  # used again: now the most recent
+    index.flush()
+
+    while index.evict_step():
+        pass
+    assert index.usage() == (300, 3)
+    assert [clip.name for clip in clips if clip.exists()] == ['a.mp3', 'e.mp3', 'f.mp3']
+
+
+def test_pinned_content_is_never_evicted(tmp_path):
+    index = _index(tmp_path, max_files=1)
+    question, narrative = _clip(tmp_path, 'q.mp3'), _clip(tmp_path, 'n.mp3')
+    index.add(question, 'question')
+    index.add(narrative, 'narrative')
+    index.flush()
+
+    while index.evict_step():
+        pass
+    assert question.exists() and not narrative.exists()
+
+
+def test_hard_linked_clip_is_counted_once_and_evicted_under_both_names(tmp_path):
+    index = _index(tmp_path, max_bytes=150)
+    (tmp_path / 'tier').mkdir()
+    generated = _clip(tmp_path, 'tts_cache_abc.mp3')
+    linked = tmp_path / 'tier' / 'abc.mp3'
+    os.link(generated, linked)
+
+    index.add(generated, 'narrative')
+    index.add(linked, 'narrative', alias=generated)
+    index.flush()
+    index.touch(generated)  # a hit on the other name
+    index.add(generated, 'narrative')  # indexed again by a later render
+    index.flush()
+    assert index.usage() == (100, 1)
+
+    index.add(_clip(tmp_path, 'other.mp3'), 'narrative')
+    index.flush()
+    assert index.evict_step() == 1
+    assert not generated.exists() and not linked.exists()
+
+
+def test_adopt_indexes_hard_links_once(tmp_path):
+    index = _index(tmp_path)
+    generated = _clip(tmp_path, 'tts_cache_abc.mp3')
+    linked = tmp_path / 'abc.mp3'
+    os.link(generated, linked)
+
+    assert index.adopt([linked, generated, _clip(tmp_path, 'other.mp3')]) == 2
+    assert index.usage() == (200, 2)
+
+
+def test_forget_dir_keeps_linked_files_elsewhere(tmp_path):
+    index = _index(tmp_path)
+    tier = tmp_path / 'tier'
+    tier.mkdir()
+    generated = _clip(tmp_path, 'tts_cache_abc.mp3')
+    os.link(generated, tier / 'abc.mp3')
+    index.add(tier / 'abc.mp3', alias=generated)
+    index.add(_clip(tier, 'def.mp3'))
+    index.flush()
+
+    index.forget_dir(tier)
+    assert index._db().execute('SELECT path, alias FROM entries').fetchall() == [(str(generated), None)]
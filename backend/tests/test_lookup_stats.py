@@ -0,0 +1,79 @@
+"""Per-tier TTS cache lookup counts"""
+import pytest
+
+from app.services import metrics
+from app.services.cache_keys import cache_key, legacy_key
+from app.services.tts_cache_service import LookupStats, TTSCacheService
+
+
+def _lookup_labels():
+    return {
+        tuple(values) for name, values, value in metrics.registry.snapshot()['counters']
+        if name == 'tts_cache_lookups_total'
+    }
+
+
+def test_counts_by_source():
+    stats = LookupStats()
+    stats.record([('Hello there.', 'memory'), ('Bye.', 'miss'), ('Again.', 'disk')], 'question')
+    snapshot = stats.snapshot()
+    assert snapshot['lookups'] == 3
+    assert snapshot['lookup_memory'] == snapshot['lookup_disk'] == snapshot['lookup_miss'] == 1
+    assert snapshot['lookup_hit_rate'] == round(2 / 3, 4)
+
+
+def test_content_type_label_is_bounded():
+    stats = LookupStats()
+    stats.record([('Hello there.', 'memory')], 'question')
+    stats.record([('Hello there.', 'memory')], 'x' * 200)
+    stats.record([('Hello there.', 'memory')])
+
+    labels = _lookup_labels()
+    assert ('memory', 'question') in labels
+    assert ('memory', 'other') in labels
+    assert ('memory', 'unknown') in labels
+    assert not any(content_type == 'x' * 200 for _, content_type in labels)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TTSCacheService(None, None, local_cache_dir=str(tmp_path / 'tier'))
+
+
+def _store(cache, content_hash, data=b'clip'):
+    path = cache._get_local_cache_path(content_hash)
+    path.write_bytes(data)
+    return path
+
+
+def test_legacy_keyed_clip_is_found_and_rekeyed(cache):
+    _store(cache, legacy_key('Tell me about your childhood', 'nova'), b'old clip')
+
+    path = cache.get_cached_audio('Tell me about your childhood', 'nova')
+    assert open(path, 'rb').read() == b'old clip'
+    assert cache.lookup_stats.snapshot()['lookup_legacy'] == 1
+
+    # Now stored under its cache key, shared by the canonical spelling
+    assert cache.get_cached_audio('Tell me about your childhood.', 'nova') is not None
+    assert cache.lookup_stats.snapshot()['lookup_memory'] == 1
+
+
+def test_legacy_fallback_can_be_turned_off(tmp_path):
+    cache = TTSCacheService(None, None, local_cache_dir=str(tmp_path / 'tier'), legacy_key_fallback=False)
+    _store(cache, legacy_key('Tell me about your childhood', 'nova'))
+    assert cache.get_cached_audio('Tell me about your childhood', 'nova') is None
+
+
+def test_normalized_hits_count_only_what_canonicalization_found(cache):
+    _store(cache, cache_key('Tell me about your childhood.', 'nova'))
+
+    cache.get_cached_audio('Tell me about your childhood.', 'nova')  # already canonical
+    cache.get_cached_audio('Tell me  about your childhood', 'nova')  # only found through canonicalization
+    assert cache.lookup_stats.snapshot()['lookup_normalized_hits'] == 1
+
+    # The raw spelling has a clip of its own (a legacy key): not a normalized hit
+    _store(cache, legacy_key('Tell me about your childhood', 'nova'))
+    cache.get_cached_audio('Tell me about your childhood', 'nova')
+    assert cache.lookup_stats.snapshot()['lookup_normalized_hits'] == 1
+    cache.get_cached_audio('Where were you born', 'nova')  # a miss
+    assert cache.lookup_stats.snapshot()['lookup_normalized_hits'] == 1
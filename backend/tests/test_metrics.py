@@ -0,0 +1,52 @@
+"""The shared /metrics exporter"""
+import os
+import time
+
+import pytest
+
+from app import create_app
+from app.services import metrics
+from tests.conftest import _test_config
+
+
+def _metrics_app(tmp_path):
+    config = _test_config(tmp_path)
+    config.update(METRICS_ENABLED=True, METRICS_DIR=str(tmp_path / 'metrics'))
+    return create_app('development', overrides=config)
+
+
+def test_apps_in_one_process_share_the_exporter(tmp_path):
+    (tmp_path / 'uploads').mkdir()
+    first, second = _metrics_app(tmp_path), _metrics_app(tmp_path)
+    assert first.extensions['metrics'] is second.extensions['metrics']
+
+    # Nothing is claimed until the worker serves its first request
+    assert not (tmp_path / 'metrics').exists()
+
+    for app in (first, second):
+        client = app.test_client()
+        assert client.get('/api/health').status_code == 200
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert b'# TYPE' in response.data
+    assert (tmp_path / 'metrics' / f'metrics.{os.getpid()}.lock').exists()
+
+
+def test_second_exporter_for_a_directory_fails_instead_of_blocking(tmp_path):
+    first = metrics.SharedMetrics(metrics.registry, str(tmp_path), flush_interval=60)
+    first.start()
+    first.start()  # already started in this process
+
+    with pytest.raises(RuntimeError):
+        metrics.SharedMetrics(metrics.registry, str(tmp_path), flush_interval=60).start()
+
+
+def test_timer_leaves_out_paused_time():
+    registry = metrics.MetricsRegistry()
+    with registry.timer('upstream_request_duration_seconds', upstream='openai', operation='tts') as stopwatch:
+        with stopwatch.paused():
+            time.sleep(0.2)  # a slow client reading a streamed chunk
+
+    (name, values, counts, total), = registry.snapshot()['histograms']
+    assert values == ['openai', 'tts', 'ok']
+    assert total < 0.1
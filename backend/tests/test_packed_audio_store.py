@@ -0,0 +1,66 @@
+"""Packed local TTS store"""
+import pytest
+
+from app.services.packed_audio_store import PackedAudioStore
+from app.services.tts_cache_service import TTSCacheService
+from app.services.tts_variants import TTSVariant
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PackedAudioStore(str(tmp_path / 'pack'), initial_slots=8)
+
+
+def test_put_and_open(store, tmp_path):
+    store.put('a' * 32, b'first clip', 'narrative')
+    source = tmp_path / 'generated.mp3'
+    source.write_bytes(b'second clip')
+    store.put_file('b' * 32, source, 'question')
+
+    assert bytes(store.open('a' * 32).view) == b'first clip'
+    assert bytes(store.open('b' * 32).view) == b'second clip'
+    assert store.open('c' * 32) is None
+    assert 'a' * 32 in store
+
+
+def test_file_slice_reads_only_the_clip(store):
+    store.put('a' * 32, b'first clip')
+    store.put('b' * 32, b'second clip')
+    audio = store.open('b' * 32)
+    f = audio.open()
+    try:
+        assert f.read(6) + f.read() == b'second clip'
+        assert f.read() == b''
+    finally:
+        f.close()
+
+
+def test_index_grows_past_its_initial_size(store):
+    clips = {f'{index:032x}': f'clip {index}'.encode() for index in range(1, 41)}
+    for content_hash, data in clips.items():
+        store.put(content_hash, data)
+    assert all(bytes(store.open(content_hash).view) == data for content_hash, data in clips.items())
+
+
+def test_deleted_clips_are_compacted_away(store):
+    store.put('a' * 32, b'x' * 1000)
+    store.put('b' * 32, b'kept')
+    assert store.delete('a' * 32)
+    assert store.open('a' * 32) is None
+
+    assert store.compact() == 1000
+    assert bytes(store.open('b' * 32).view) == b'kept'
+
+
+def test_streaming_lookup_returns_the_slice_without_copying(store, tmp_path):
+    service = TTSCacheService(None, None, local_cache_dir=str(tmp_path / 'tier'), packed_store=store)
+    variant = TTSVariant()
+    store.put(service._get_content_hash('Hello there.', 'nova', variant), b'packed clip')
+
+    audio = service.find_local_audio('Hello there.', 'nova', variant)
+    assert bytes(audio.view) == b'packed clip'
+    assert not any((tmp_path / 'tier').glob('*.mp3'))
+
+    # Callers that need a path still get a per-clip file
+    path = service.get_local_audio('Hello there.', 'nova', variant)
+    assert open(path, 'rb').read() == b'packed clip'
@@ -0,0 +1,113 @@
+"""WSGI (Flask) routes, with the upstream calls of the shared services replaced"""
+import io
+
+import pytest
+
+
+@pytest.fixture
+def client(flask_app):
+    """Test client; Whisper 'transcribes' a segment file to its own text"""
+    service = flask_app.extensions['services'].openai_service
+    service.transcribe_audio = lambda audio: open(audio).read() if isinstance(audio, str) else audio[1].read().decode()
+    return flask_app.test_client()
+
+
+def upload(text: str, **fields) -> dict:
+    return {'audio': (io.BytesIO(text.encode()), 'segment.webm'), **fields}
+
+
+def test_transcribe(client):
+    response = client.post('/api/transcribe', data=upload('hello there'), content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert response.json == {'success': True, 'transcript': 'hello there'}
+
+
+def test_transcription_session(client):
+    created = client.post('/api/transcribe/session')
+    assert created.status_code == 201
+    session_id = created.json['session_id']
+    assert created.json['segment_seconds'] > created.json['overlap_seconds'] > 0
+
+    for index, text in enumerate(['my father worked at the mill', 'at the mill for thirty years']):
+        response = client.post(f'/api/transcribe/session/{session_id}/chunk', data=upload(text, index=str(index)),
+                               content_type='multipart/form-data')
+        assert response.status_code == 202
+        assert response.json['index'] == index
+
+    response = client.post(f'/api/transcribe/session/{session_id}/finalize', data=upload('thirty years and loved it'),
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert response.json['transcript'] == 'my father worked at the mill for thirty years and loved it'
+
+    # Finalizing removes the session
+    assert client.post(f'/api/transcribe/session/{session_id}/finalize').status_code == 404
+
+
+def test_transcription_session_errors(client):
+    session_id = client.post('/api/transcribe/session').json['session_id']
+    chunk = f'/api/transcribe/session/{session_id}/chunk'
+
+    assert client.post(chunk, data=upload('x', index='abc'), content_type='multipart/form-data').status_code == 400
+    assert client.post(chunk, data=upload('x', index='100000'), content_type='multipart/form-data').status_code == 400
+    assert client.post(chunk, data={}, content_type='multipart/form-data').status_code == 400
+    assert client.post('/api/transcribe/session/unknown/chunk', data=upload('x'),
+                       content_type='multipart/form-data').status_code == 404
+
+
+CLIP_HASH = '0123456789abcdef0123456789abcdef'
+
+
+@pytest.fixture
+def audio(flask_app, tmp_path):
+    """/api/audio finds a file clip for CLIP_HASH and nothing else"""
+    clip = tmp_path / 'clip.mp3'
+    clip.write_bytes(bytes(range(100)))
+    service = flask_app.extensions['services'].openai_service
+    service.find_audio = lambda content_hash, audio_format, remote=True: str(clip) if content_hash == CLIP_HASH else None
+    service.signed_audio_url = lambda content_hash, expires_in: None
+    return service
+
+
+def test_serve_audio(client, audio):
+    response = client.get(f'/api/audio/{CLIP_HASH}.mp3')
+    assert response.status_code == 200
+    assert response.data == bytes(range(100))
+    assert response.mimetype == 'audio/mpeg'
+    assert response.headers['ETag'] == f'"{CLIP_HASH}"'
+    assert 'immutable' in response.headers['Cache-Control']
+
+    revalidated = client.get(f'/api/audio/{CLIP_HASH}.mp3', headers={'If-None-Match': f'"{CLIP_HASH}"'})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+
+
+def test_serve_audio_ranges(client, audio):
+    response = client.get(f'/api/audio/{CLIP_HASH}.mp3', headers={'Range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert response.data == bytes(range(10, 20))
+    assert response.headers['Content-Range'] == 'bytes 10-19/100'
+
+    tail = client.get(f'/api/audio/{CLIP_HASH}.mp3', headers={'Range': 'bytes=-5'})
+    assert tail.data == bytes(range(95, 100))
+
+    unsatisfiable = client.get(f'/api/audio/{CLIP_HASH}.mp3', headers={'Range': 'bytes=200-'})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers['Content-Range'] == 'bytes */100'
+
+
+def test_serve_packed_audio(client, audio, tmp_path):
+    from app.services.packed_audio_store import PackedAudioStore
+    store = PackedAudioStore(str(tmp_path / 'pack'))
+    store.put('f' * 32, b'another clip')
+    store.put(CLIP_HASH, b'the packed clip')
+    audio.find_audio = lambda content_hash, audio_format, remote=True: store.open(content_hash)
+
+    response = client.get(f'/api/audio/{CLIP_HASH}.mp3', headers={'Range': 'bytes=4-9'})
+    assert response.status_code == 206
+    assert response.data == b'packed'
+
+
+def test_serve_audio_not_found(client, audio):
+    assert client.get(f'/api/audio/{"f" * 32}.mp3').status_code == 404
+    assert client.get(f'/api/audio/{CLIP_HASH}.wav').status_code == 404
+    assert client.get('/api/audio/not-a-hash.mp3').status_code == 404
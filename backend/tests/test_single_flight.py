@@ -0,0 +1,126 @@
+"""Request coalescing"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def _concurrently(count, target):
+    results = [None] * count
+
+    def call(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_callers_share_one_call(tmp_path):
+    flight = SingleFlight(str(tmp_path))
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'clip.mp3'
+
+    assert _concurrently(4, lambda: flight.do('key', fn)) == ['clip.mp3'] * 4
+    assert len(calls) == 1
+    assert list(tmp_path.iterdir()) == []  # the lock file is removed once released
+
+
+def test_waiters_share_the_leaders_failure(tmp_path):
+    flight = SingleFlight(str(tmp_path))
+    calls = []
+
+    def failing():
+        calls.append(1)
+        time.sleep(0.2)
+        return None
+
+    assert _concurrently(4, lambda: flight.do('key', failing)) == [None] * 4
+    assert len(calls) == 1
+
+    def raising():
+        calls.append(1)
+        time.sleep(0.2)
+        raise ValueError('upstream down')
+
+    results = _concurrently(4, lambda: flight.do('other', raising))
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(calls) == 2
+
+
+def test_waiters_retry_once_after_an_abandoned_flight(tmp_path):
+    flight = SingleFlight(str(tmp_path))
+    leader = flight.try_lead('key')
+    assert leader is not None and flight.try_lead('key') is None
+
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return 'clip.mp3'
+
+    waiter = threading.Thread(target=lambda: calls.append(flight.do('key', fn)))
+    waiter.start()
+    time.sleep(0.1)
+    leader.done(None)  # e.g. the streaming client went away
+    waiter.join(5)
+
+    assert calls == [1, 'clip.mp3']
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_async_waiters_share_the_leaders_outcome(tmp_path, run):
+    flight = AsyncSingleFlight(str(tmp_path))
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return 'clip.mp3'
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        raise ValueError('upstream down')
+
+    async def call_all():
+        shared = await asyncio.gather(*(flight.do('key', fn) for _ in range(4)))
+        failed = await asyncio.gather(*(flight.do('other', failing) for _ in range(4)), return_exceptions=True)
+        return shared, failed
+
+    shared, failed = run(call_all())
+    assert shared == ['clip.mp3'] * 4
+    assert all(isinstance(result, ValueError) for result in failed)
+    assert len(calls) == 2
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_lock_is_exclusive_across_instances(tmp_path):
+    # Two workers' groups over the same lock directory
+    first, second = SingleFlight(str(tmp_path)), SingleFlight(str(tmp_path))
+    leader = first.try_lead('key')
+    assert second.try_lead('key') is None
+    leader.done('clip.mp3')
+    again = second.try_lead('key')
+    assert again is not None
+    again.done('clip.mp3')
+
+
+@pytest.mark.parametrize('result', [None, 'clip.mp3'])
+def test_recheck_skips_fn(tmp_path, result):
+    flight = SingleFlight(str(tmp_path))
+    found = flight.do('key', lambda: 'generated.mp3', recheck=lambda: result)
+    assert found == (result or 'generated.mp3')
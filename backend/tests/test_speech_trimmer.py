@@ -0,0 +1,85 @@
+"""Silence trimming before Whisper"""
+import io
+import wave
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from app.services.speech_trimmer import SpeechTrimmer, is_wav  # noqa: E402
+
+RATE = 16000
+
+
+def _wav(samples, rate=RATE, channels=1):
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype('<i2')
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def _tone(seconds, rate=RATE):
+    t = np.arange(int(seconds * rate)) / rate
+    return 0.5 * np.sin(2 * np.pi * 220 * t)
+
+
+def _silence(seconds, rate=RATE):
+    return np.random.default_rng(0).normal(0, 0.0005, int(seconds * rate))
+
+
+def _seconds(data):
+    with wave.open(io.BytesIO(data), 'rb') as wav:
+        return wav.getnframes() / wav.getframerate()
+
+
+def test_long_pauses_and_edges_are_trimmed():
+    recording = np.concatenate([_silence(2), _tone(1), _silence(5), _tone(1), _silence(2)])
+    result = SpeechTrimmer(max_pause=1.0).process(_wav(recording))
+
+    assert result is not None
+    assert result.original_seconds == pytest.approx(11, abs=0.01)
+    # Two seconds of speech, a one-second pause and some padding
+    assert 3.0 <= _seconds(result.audio) <= 4.0
+    assert result.removed_bytes > 0
+
+
+def test_stereo_44k_is_downmixed_and_resampled():
+    mono = np.concatenate([_silence(1, 44100), _tone(1, 44100), _silence(1, 44100)])
+    stereo = np.repeat(mono, 2)
+    result = SpeechTrimmer().process(_wav(stereo, rate=44100, channels=2))
+
+    with wave.open(io.BytesIO(result.audio), 'rb') as wav:
+        assert (wav.getnchannels(), wav.getframerate()) == (1, RATE)
+
+
+def test_all_silent_recording_is_sent_as_is():
+    data = _wav(_silence(5))
+    trimmer = SpeechTrimmer()
+    assert trimmer.process(data) is None
+    assert trimmer.prepare('answer.wav', data) == ('answer.wav', data)
+
+    digital_silence = _wav(np.zeros(5 * RATE))
+    assert trimmer.process(digital_silence) is None
+
+
+def test_continuous_speech_is_not_shrunk():
+    data = _wav(_tone(3))
+    assert SpeechTrimmer().process(data) is None
+
+
+def test_non_wav_uploads_pass_through():
+    webm = b'\x1aE\xdf\xa3' + b'\x00' * 100
+    assert not is_wav(webm)
+    assert SpeechTrimmer().prepare('answer.webm', webm) == ('answer.webm', webm)
+    assert SpeechTrimmer().prepare('broken.wav', b'RIFF\x00\x00\x00\x00WAVEjunk') == ('broken.wav', b'RIFF\x00\x00\x00\x00WAVEjunk')
+
+
+def test_prepare_renames_the_trimmed_upload():
+    recording = np.concatenate([_silence(3), _tone(1), _silence(3)])
+    filename, audio = SpeechTrimmer().prepare('answer.bin', _wav(recording))
+    assert filename == 'answer.wav'
+    assert is_wav(audio)
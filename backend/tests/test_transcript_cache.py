@@ -0,0 +1,98 @@
+"""TranscriptCache and the upload hashing that keys it"""
+import hashlib
+import io
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.transcript_cache import TranscriptCache
+from app.utils.file_utils import spooled_file
+
+
+def test_get_returns_stored_transcript(tmp_path):
+    cache = TranscriptCache(str(tmp_path / 'cache.db'))
+    assert cache.get('abc') is None
+    cache.put('abc', 'hello')
+    assert cache.get('abc') == 'hello'
+    # Shared through the database, like another worker's instance
+    assert TranscriptCache(str(tmp_path / 'cache.db')).get('abc') == 'hello'
+
+
+def test_entries_expire(tmp_path):
+    cache = TranscriptCache(str(tmp_path / 'cache.db'), ttl=0.05)
+    cache.put('abc', 'hello')
+    time.sleep(0.1)
+    assert cache.get('abc') is None
+
+
+def test_least_recently_used_are_dropped(tmp_path):
+    cache = TranscriptCache(str(tmp_path / 'cache.db'), max_entries=2)
+    cache.put('a', '1')
+    time.sleep(0.01)
+    cache.put('b', '2')
+    time.sleep(0.01)
+    cache.get('a')  # Now more recent than b
+    time.sleep(0.01)
+    cache.put('c', '3')
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == ('1', None, '3')
+
+
+def test_upload_buffer_hashes_while_written(tmp_path):
+    buffer = spooled_file(8, tmp_path)  # Spills to disk part way through
+    buffer.write(b'hello ')
+    buffer.write(memoryview(b'world, a longer upload'))
+    buffer.seek(0)
+    assert buffer.sha256 == hashlib.sha256(b'hello world, a longer upload').hexdigest()
+
+    buffer.seek(0)
+    buffer.write(b'H')  # Not an append: the running hash no longer describes the contents
+    assert buffer.sha256 is None
+
+
+@pytest.fixture
+def whisper(flask_app):
+    """The app's OpenAIService with a slow fake Whisper that counts its calls"""
+    service = flask_app.extensions['services'].openai_service
+    calls = []
+
+    def create(model, file):
+        calls.append(file[0])
+        time.sleep(0.2)
+        return SimpleNamespace(text=f'transcript of {len(file[1])} bytes')
+
+    service.client = SimpleNamespace(audio=SimpleNamespace(transcriptions=SimpleNamespace(create=create)))
+    return calls
+
+
+def transcribe(client, audio: bytes, filename: str = 'answer.webm'):
+    return client.post('/api/transcribe', data={'audio': (io.BytesIO(audio), filename)},
+                       content_type='multipart/form-data')
+
+
+def test_retried_upload_skips_whisper(flask_app, whisper):
+    client = flask_app.test_client()
+    first = transcribe(client, b'audio' * 100)
+    retry = transcribe(client, b'audio' * 100, 'retry.webm')
+    other = transcribe(client, b'other' * 100)
+
+    assert first.json['transcript'] == retry.json['transcript'] == 'transcript of 500 bytes'
+    assert other.status_code == 200
+    assert whisper == ['answer.webm', 'answer.webm']
+
+
+def test_concurrent_identical_uploads_share_one_call(flask_app, whisper):
+    results = []
+
+    def upload():
+        results.append(transcribe(flask_app.test_client(), b'same audio' * 50).json['transcript'])
+
+    threads = [threading.Thread(target=upload) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['transcript of 500 bytes'] * 4
+    assert len(whisper) == 1
@@ -0,0 +1,25 @@
+"""Joining the transcripts of overlapping segments"""
+import pytest
+
+from app.services.transcription_sessions import stitch_transcripts
+
+
+@pytest.mark.parametrize('texts, expected', [
+    # No overlap
+    (['My father worked at the mill.', 'He loved it.'], 'My father worked at the mill. He loved it.'),
+    # The repeated words are kept once, whatever their case and punctuation
+    (['My father worked at the mill', 'at the mill for thirty years.'],
+     'My father worked at the mill for thirty years.'),
+    (['We went to the store.', 'The store, was closed.'], 'We went to the store. was closed.'),
+    # The last word was cut off mid-word at the boundary
+    (['and then we went to the sto', 'went to the store and back'], 'and then we went to the store and back'),
+    (['and then we went to the sto', 'to the store and back'], 'and then we went to the store and back'),
+    # A whole word before a shorter match stays
+    (['we went to the store', 'to the market after'], 'we went to the store to the market after'),
+    (['we went to the store', 'the store was closed'], 'we went to the store was closed'),
+    # A single repeated word is too often genuine
+    (['I said no', 'no and no again'], 'I said no no and no again'),
+    (['', 'Only this.', ''], 'Only this.'),
+])
+def test_stitch_transcripts(texts, expected):
+    assert stitch_transcripts(texts) == expected
@@ -25,6 +25,7 @@ export interface AnalyzeAndTTSResponse {
   success: boolean;
   analysis: string;
   tts_path: string;
+  tts_url?: string;  // /api/audio/<hash>.mp3, cacheable and seekable
 }
 
 export interface ApiError {
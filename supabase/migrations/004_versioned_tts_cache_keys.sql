@@ -0,0 +1,13 @@
+-- Migration: Versioned TTS cache keys
+-- Purpose: content_hash is now derived from canonicalized text plus model, format and speed
+--          (backend/app/services/cache_keys.py). Rows record which key scheme they use so
+--          backend/migrate_tts_cache_keys.py can find and re-key the old ones.
+-- Apply before deploying a backend that writes key_version.
+
+ALTER TABLE tts_cache ADD COLUMN IF NOT EXISTS key_version SMALLINT NOT NULL DEFAULT 1;
+
+-- Existing rows keep the default: key version 1, MD5 of the raw "text_voice"
+CREATE INDEX IF NOT EXISTS idx_tts_cache_key_version ON tts_cache(key_version);
+
+COMMENT ON COLUMN tts_cache.content_hash IS 'Cache key of the clip (see key_version)';
+COMMENT ON COLUMN tts_cache.key_version IS '1: MD5 of raw text + voice; 2: MD5 of canonical text, voice, model, format and speed';